@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+混合检索回放测试
+把录制的访谈会话（sessions/*/session.json）逐轮回放到两个检索引擎：
+- 混合检索（BM25 关键词索引 + 向量检索，关键词强命中时跳过向量化）
+- 纯向量检索（对照组）
+
+统计关键词快速通道的命中率、两条路径的检索耗时、节省的时间，
+以及混合检索选出的下一题与纯向量检索 / 录制会话中实际下一题的一致率。
+没有录制会话时使用内置的示例回答。
+
+用法：
+    python benchmark_hybrid.py
+    python benchmark_hybrid.py --sessions ./sessions --questions questions_rag_example.yaml
+"""
+
+import argparse
+import glob
+import json
+import os
+import statistics
+import tempfile
+import time
+from typing import List, Dict, Any, Tuple
+
+from src.core.question_rag import QuestionRAG
+from src.core.lexical_index import FAST_PATH_MIN_SCORE, FAST_PATH_MARGIN
+
+
+# 内置示例会话（questions_rag_example.yaml 的问题 ID 与回答）
+SAMPLE_SESSIONS = [
+    [
+        (1, "身体还行，就是最近老是失眠，晚上睡不着"),
+        (2, "一般一两点才睡，早上七点就得起床，睡眠质量很差"),
+        (3, "工作压力太大了，经常加班到很晚"),
+        (10, "压力主要来自项目进度，有时候会焦虑"),
+        (11, "心情一般，偶尔会有点低落"),
+    ],
+    [
+        (1, "挺好的，没什么大问题"),
+        (4, "很少运动，每天基本都坐在电脑前面"),
+        (15, "手机和电脑加起来一天得有十个小时"),
+        (13, "这两年体重涨了十来斤"),
+        (6, "吃饭不太规律，经常点外卖"),
+    ],
+    [
+        (1, "血压有点高，在吃降压药"),
+        (8, "吃了三年的药了，另外还有点糖尿病"),
+        (9, "我父亲也有高血压和糖尿病"),
+        (12, "去年体检血脂也偏高"),
+        (14, "烟戒了，酒偶尔喝一点"),
+    ],
+]
+
+
+def load_sessions(sessions_dir: str) -> List[List[Tuple[int, str]]]:
+    """读取录制的会话：每个会话是 (问题ID, 回答文本) 列表"""
+    sessions = []
+    for path in sorted(glob.glob(os.path.join(sessions_dir, "*", "session.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        turns = [
+            (answer["question_id"], answer.get("transcript") or "")
+            for answer in data.get("answers", [])
+            if answer.get("transcript")
+        ]
+        if turns:
+            sessions.append(turns)
+    return sessions
+
+
+def replay(
+    sessions: List[List[Tuple[int, str]]],
+    hybrid: QuestionRAG,
+    vector: QuestionRAG
+) -> Dict[str, Any]:
+    """逐轮回放会话，返回统计结果"""
+    turns = agree_vector = agree_recorded = 0
+    fast_ms: List[float] = []
+    fast_vector_ms: List[float] = []  # 快速通道命中的轮次，纯向量检索的耗时
+    slow_ms: List[float] = []
+
+    questions = {q.id: q.question for q in hybrid.questions}
+    for session in sessions:
+        # 每个录制会话在两个引擎上各开一个检索会话（已提问记录和上下文互不影响）
+        hybrid_session, vector_session = hybrid.new_session(), vector.new_session()
+
+        for turn, (question_id, answer) in enumerate(session):
+            for retrieval in (hybrid_session, vector_session):
+                retrieval.mark_question_asked(question_id)
+                retrieval.context.add_qa(questions.get(question_id, ""), answer)
+
+            fast_before = len(hybrid_session.retrieval_stats.fast_path_ms)
+            start = time.perf_counter()
+            picked = hybrid_session.retrieve_next_question()
+            hybrid_ms = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            expected = vector_session.retrieve_next_question()
+            vector_ms = (time.perf_counter() - start) * 1000
+
+            turns += 1
+            if len(hybrid_session.retrieval_stats.fast_path_ms) > fast_before:
+                fast_ms.append(hybrid_ms)
+                fast_vector_ms.append(vector_ms)
+            else:
+                slow_ms.append(hybrid_ms)
+            if picked and expected and picked.id == expected.id:
+                agree_vector += 1
+            if turn + 1 < len(session) and picked and picked.id == session[turn + 1][0]:
+                agree_recorded += 1
+
+    saved = sum(fast_vector_ms) - sum(fast_ms)
+    return {
+        "sessions": len(sessions),
+        "turns": turns,
+        "fast_path": len(fast_ms),
+        "fast_path_rate": len(fast_ms) / turns if turns else 0.0,
+        "fast_path_ms": statistics.median(fast_ms) if fast_ms else 0.0,
+        "vector_path_ms": statistics.median(slow_ms) if slow_ms else 0.0,
+        "vector_only_ms": statistics.median(fast_vector_ms) if fast_vector_ms else 0.0,
+        "saved_ms_total": saved,
+        "saved_ms_per_turn": saved / turns if turns else 0.0,
+        "agree_vector": agree_vector / turns if turns else 0.0,
+        "agree_recorded": agree_recorded / max(turns - len(sessions), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="混合检索回放测试（关键词快速通道命中率和节省的耗时）")
+    parser.add_argument("--questions", default="questions_rag_example.yaml", help="YAML 问题文件")
+    parser.add_argument("--sessions", default="sessions", help="录制会话目录（sessions/<id>/session.json）")
+    parser.add_argument("--model", default="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
+                        help="嵌入模型")
+    parser.add_argument("--lexical-weight", type=float, default=0.5, help="融合排名时 BM25 的权重")
+    args = parser.parse_args()
+
+    sessions = load_sessions(args.sessions)
+    source = args.sessions
+    if not sessions:
+        sessions = SAMPLE_SESSIONS
+        source = "内置示例"
+    print(f"📼 回放 {len(sessions)} 个会话（{source}），问题库: {args.questions}")
+
+    with tempfile.TemporaryDirectory() as persist_dir:
+        engines = []
+        for hybrid_retrieval in (True, False):
+            rag = QuestionRAG(
+                args.questions,
+                collection_name="hybrid" if hybrid_retrieval else "vector",
+                embedding_model=args.model,
+                persist_directory=persist_dir,
+                vector_backend="numpy",
+                use_snapshot=False,
+                hybrid_retrieval=hybrid_retrieval,
+                lexical_weight=args.lexical_weight
+            )
+            if not rag.load_and_index_questions():
+                raise SystemExit("加载问题失败")
+            engines.append(rag)
+
+        result = replay(sessions, *engines)
+
+    print(f"\n📊 快速通道阈值: BM25 ≥ {FAST_PATH_MIN_SCORE}，领先第二名 ≥ {FAST_PATH_MARGIN} 倍")
+    print(f"   回放轮次:         {result['turns']}")
+    print(f"   快速通道命中:     {result['fast_path']}（{result['fast_path_rate']:.0%}）")
+    print(f"   快速通道耗时:     {result['fast_path_ms']:.2f} ms（中位数）")
+    print(f"   向量路径耗时:     {result['vector_path_ms']:.2f} ms（混合检索未命中快速通道的轮次）")
+    print(f"   同轮纯向量检索:   {result['vector_only_ms']:.2f} ms（快速通道命中的轮次）")
+    print(f"   节省耗时:         {result['saved_ms_total']:.1f} ms（平均每轮 {result['saved_ms_per_turn']:.2f} ms）")
+    print(f"   与纯向量检索一致: {result['agree_vector']:.0%}")
+    print(f"   与录制的下一题一致: {result['agree_recorded']:.0%}")
+    print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
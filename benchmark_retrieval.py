@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+检索后端基准测试
+对比 numpy（内存）、chroma、compressed（降维 + int8）与 hierarchical（按类别分层）后端的
+单次检索延迟、进程内存（RSS），以及相对全精度暴力检索的 recall@k
+
+测试问题库：
+- questions_rag_example.yaml（仓库自带示例）
+- 合成问题库：1k / 10k / 100k 个问题
+
+每个 (后端, 问题库) 组合在独立子进程中运行，保证 RSS 互不干扰。
+默认使用确定性的随机向量代替真实嵌入，只测量检索本身。真实句向量集中在低维子空间，
+合成向量默认为 64 维子空间 + 噪声（--rank 0 为各向同性随机向量，是降维压缩的最坏情况），
+并分属 100 个类别（--categories 0 表示不分类别）；
+指定 --model 时会用该模型对示例问题库做真实向量化。
+
+用法:
+    python benchmark_retrieval.py
+    python benchmark_retrieval.py --sizes 1000 10000 --backends numpy
+    python benchmark_retrieval.py --model BAAI/bge-small-zh-v1.5
+    python benchmark_retrieval.py --backends numpy compressed compressed:64 --sizes 100000
+    python benchmark_retrieval.py --backends numpy hierarchical hierarchical:5 --sizes 100000 200000
+"""
+
+import argparse
+import multiprocessing as mp
+import shutil
+import tempfile
+import time
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+import yaml
+
+from src.core.vector_backend import create_vector_backend
+from src.core.compressed_index import exact_top_k
+from src.utils.memory import current_rss_mb as get_rss_mb, release_memory
+
+
+EXAMPLE_BANK = "questions_rag_example.yaml"
+
+
+def load_example_documents(path: str) -> List[str]:
+    """加载示例问题库文本（与 QuestionRAG 的文档格式一致）"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f)
+
+    documents = []
+    for q in data.get("questions", []):
+        doc_text = q["question"]
+        if q.get("category"):
+            doc_text += f" [类别: {q['category']}]"
+        if q.get("keywords"):
+            doc_text += f" [关键词: {', '.join(q['keywords'])}]"
+        documents.append(doc_text)
+    return documents
+
+
+def load_example_categories(path: str) -> List[str]:
+    """示例问题库每个问题的类别"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f)
+    return [q.get("category") or "" for q in data.get("questions", [])]
+
+
+def random_embeddings(n: int, dim: int, seed: int, rank: int = 0) -> np.ndarray:
+    """生成确定性的随机单位向量（rank > 0 时集中在同一个 rank 维子空间附近）"""
+    rng = np.random.default_rng(seed)
+    if rank > 0:
+        basis = np.random.default_rng(12345).standard_normal((rank, dim), dtype=np.float32)
+        vectors = rng.standard_normal((n, rank), dtype=np.float32) @ basis / np.sqrt(rank)
+        vectors += 0.3 * rng.standard_normal((n, dim), dtype=np.float32)
+    else:
+        vectors = rng.standard_normal((n, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def categorized_embeddings(n: int, dim: int, seed: int, rank: int, categories: int):
+    """生成分属若干类别的单位向量（类别中心 + 类别内变化），返回 (向量, 类别编号)"""
+    vectors = random_embeddings(n, dim, seed, rank=rank)
+    if categories <= 0:
+        return vectors, np.zeros(n, dtype=np.int64)
+    labels = np.random.default_rng(seed + 100).integers(categories, size=n)
+    centers = random_embeddings(categories, dim, seed=54321)
+    vectors += centers[labels]
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors, labels
+
+
+def run_case(
+    backend_name: str,
+    bank_name: str,
+    size: int,
+    dim: int,
+    rank: int,
+    categories: int,
+    n_queries: int,
+    n_results: int,
+    model_name: Optional[str],
+    result_queue
+):
+    """在子进程中构建索引并测量检索延迟"""
+    persist_dir = tempfile.mkdtemp(prefix="bench_rag_")
+    try:
+        rss_start = get_rss_mb()
+
+        if bank_name == EXAMPLE_BANK and model_name:
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(model_name)
+            documents = load_example_documents(EXAMPLE_BANK)
+            embeddings = model.encode(documents, convert_to_numpy=True)
+            queries = model.encode(
+                ["用户说最近睡眠不好，经常失眠", "用户提到很少运动，总是坐着", "用户表示工作压力很大"],
+                convert_to_numpy=True
+            )
+            queries = np.resize(queries, (n_queries, queries.shape[1]))
+            labels = load_example_categories(EXAMPLE_BANK)
+        else:
+            if bank_name == EXAMPLE_BANK:
+                documents = load_example_documents(EXAMPLE_BANK)
+                labels = load_example_categories(EXAMPLE_BANK)
+                embeddings = random_embeddings(len(documents), dim, seed=0, rank=rank)
+            else:
+                documents = [f"合成问题 {i}" for i in range(size)]
+                embeddings, labels = categorized_embeddings(size, dim, 0, rank, categories)
+                labels = [f"类别{label}" for label in labels.tolist()] if categories > 0 else [""] * size
+            queries, _ = categorized_embeddings(n_queries, dim, 1, rank, categories)
+
+        ids = [f"q_{i}" for i in range(len(documents))]
+        metadatas = [
+            {"id": i, "type": "open", "category": label, "question_text": doc}
+            for i, (doc, label) in enumerate(zip(documents, labels))
+        ]
+
+        rss_data = get_rss_mb()
+
+        backend = create_vector_backend(backend_name, persist_dir, "benchmark")
+        build_start = time.perf_counter()
+        # chroma 单次 add 有批量上限，分批插入
+        batch = 5000
+        with backend.bulk_write():
+            for start in range(0, len(ids), batch):
+                end = start + batch
+                backend.add(ids[start:end], embeddings[start:end], documents[start:end], metadatas[start:end])
+        # 与引擎加载索引时一样，写完后构建延迟的检索结构（分组、量化编码）
+        backend.prepare()
+        build_time = time.perf_counter() - build_start
+
+        # 像运行时一样从磁盘重新打开索引，内存只包含检索所需的部分
+        del backend
+        release_memory()
+        backend = create_vector_backend(backend_name, persist_dir, "benchmark")
+
+        # 预热
+        backend.query(queries[0], n_results)
+
+        latencies = []
+        found = []
+        for query in queries:
+            start = time.perf_counter()
+            hits = backend.query(query, n_results)
+            latencies.append((time.perf_counter() - start) * 1000)
+            found.append({metadata["id"] for metadata, _ in hits})
+
+        rss_end = get_rss_mb()
+        latencies = np.array(latencies)
+
+        # 相对全精度暴力检索的 recall@k（在测量 RSS 之后计算，不计入索引内存）
+        expected = exact_top_k(embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True), queries, n_results)
+        recall = sum(len(set(rows.tolist()) & hits) for rows, hits in zip(expected, found)) / \
+            sum(len(rows) for rows in expected)
+
+        result_queue.put({
+            "backend": backend_name,
+            "bank": bank_name,
+            "size": len(documents),
+            "build_s": build_time,
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p95_ms": float(np.percentile(latencies, 95)),
+            "mean_ms": float(latencies.mean()),
+            "recall": recall,
+            "rss_index_mb": rss_end - rss_data,
+            "rss_total_mb": rss_end,
+            "rss_start_mb": rss_start,
+            "success": True,
+        })
+    except Exception as e:
+        result_queue.put({
+            "backend": backend_name,
+            "bank": bank_name,
+            "size": size,
+            "error": str(e),
+            "success": False,
+        })
+    finally:
+        shutil.rmtree(persist_dir, ignore_errors=True)
+
+
+def run_isolated(*args) -> Dict[str, Any]:
+    """在独立子进程中运行一个测试用例"""
+    ctx = mp.get_context("spawn")
+    result_queue = ctx.Queue()
+    process = ctx.Process(target=run_case, args=(*args, result_queue))
+    process.start()
+    result = result_queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="检索后端基准测试")
+    parser.add_argument("--backends", nargs="+", default=["numpy", "chroma", "compressed", "hierarchical"],
+                        help="检索后端（可带参数，如 compressed:64、compressed:truncate:256、hierarchical:5）")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000, 100000])
+    parser.add_argument("--dim", type=int, default=512, help="合成向量维度")
+    parser.add_argument("--rank", type=int, default=64, help="合成向量的子空间维度（0 为各向同性随机向量）")
+    parser.add_argument("--categories", type=int, default=100, help="合成问题库的类别数（0 表示不分类别）")
+    parser.add_argument("--queries", type=int, default=200, help="每个用例的检索次数")
+    parser.add_argument("--n-results", type=int, default=6, help="每次检索的候选数")
+    parser.add_argument("--model", default=None, help="对示例问题库使用真实嵌入模型")
+    args = parser.parse_args()
+
+    cases = [(EXAMPLE_BANK, 0)] + [(f"synthetic_{size}", size) for size in args.sizes]
+
+    results = []
+    for bank_name, size in cases:
+        for backend_name in args.backends:
+            print(f"🧪 {backend_name:<22} {bank_name} ...", flush=True)
+            results.append(run_isolated(
+                backend_name, bank_name, size, args.dim, args.rank, args.categories,
+                args.queries, args.n_results, args.model
+            ))
+
+    print("\n" + "=" * 118)
+    print("📊 检索基准测试结果")
+    print("=" * 118)
+    print(f"{'后端':<22} {'问题库':<28} {'问题数':>8} {'构建(s)':>9} "
+          f"{'p50(ms)':>9} {'p95(ms)':>9} {'均值(ms)':>9} {'recall@k':>9} {'索引RSS(MB)':>12} {'总RSS(MB)':>10}")
+    print("-" * 118)
+    for r in results:
+        if r["success"]:
+            print(f"{r['backend']:<22} {r['bank']:<28} {r['size']:>8} {r['build_s']:>9.2f} "
+                  f"{r['p50_ms']:>9.3f} {r['p95_ms']:>9.3f} {r['mean_ms']:>9.3f} {r['recall']:>9.3f} "
+                  f"{r['rss_index_mb']:>12.1f} {r['rss_total_mb']:>10.1f}")
+        else:
+            print(f"{r['backend']:<22} {r['bank']:<28} {'N/A':>8}  ❌ {r['error'][:40]}")
+    print("=" * 118)
+
+
+if __name__ == "__main__":
+    main()
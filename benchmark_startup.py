@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+启动耗时回归测试
+在全新的子进程中测量从进程启动到“可以提出第一个问题”的时间：
+导入 RAG 访谈客户端 → 加载问题库（快照或 YAML）→ 第一次检索。
+
+网络（WebSocket 握手）和音频设备不在测量范围内，
+只覆盖可以离线复现的部分；完整的线上耗时请用 --startup-profile 运行客户端。
+
+多次运行取中位数，超过预算时以非零状态码退出，可以直接放进 CI：
+    python benchmark_startup.py --budget-ms 1500
+    STARTUP_BUDGET_MS=1500 python benchmark_startup.py --questions questions_rag_example.yaml
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+DEFAULT_BUDGET_MS = 3000.0
+
+# 启动阶段不应该被导入的重量级依赖（由首次使用时才加载）
+HEAVY_MODULES = ["pyaudio", "websocket", "requests", "chromadb", "sentence_transformers", "torch", "openai"]
+
+
+def child(question_file: str, backend: str, model: str):
+    """子进程：测量一次启动，最后一行输出 JSON 结果"""
+    import importlib
+    import time
+    start = time.perf_counter()
+
+    from src.utils.startup_profile import startup_profiler
+    startup_profiler.enable()
+
+    with startup_profiler.phase("导入客户端"):
+        importlib.import_module("src.clients.interview_client_rag")
+        from src.core.question_rag import QuestionRAG
+        from src.core.query_cache import OPENING_CONTEXT
+
+    with startup_profiler.phase("加载问题库"):
+        rag = QuestionRAG(question_file, embedding_model=model, vector_backend=backend)
+        if not rag.load_and_index_questions():
+            raise SystemExit("加载问题失败")
+
+    with startup_profiler.phase("首次检索"):
+        question = rag.retrieve_next_question(OPENING_CONTEXT, exclude_asked=True)
+
+    total_ms = (time.perf_counter() - start) * 1000
+    startup_profiler.disable()
+
+    print(startup_profiler.report(top_imports=10), file=sys.stderr)
+    print(json.dumps({
+        "total_ms": total_ms,
+        "phases_ms": startup_profiler.summary()["phases_ms"],
+        "first_question": question.id if question else None,
+        "heavy_modules": [name for name in HEAVY_MODULES if name in sys.modules],
+    }))
+
+
+def run_once(args) -> dict:
+    """启动一个全新的解释器测量一次"""
+    command = [
+        sys.executable, os.path.abspath(__file__), "--child",
+        "--questions", args.questions, "--backend", args.backend, "--model", args.model,
+    ]
+    result = subprocess.run(
+        command, capture_output=True, text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "子进程失败")
+    return {"data": json.loads(result.stdout.strip().splitlines()[-1]), "report": result.stderr}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动耗时回归测试")
+    parser.add_argument("--questions", default="questions_rag_example.yaml", help="问题文件")
+    parser.add_argument("--backend", default="numpy", help="检索后端（numpy / chroma）")
+    parser.add_argument("--model", default="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
+                        help="嵌入模型")
+    parser.add_argument("--runs", type=int, default=5, help="测量次数（取中位数）")
+    parser.add_argument("--budget-ms", type=float,
+                        default=float(os.getenv("STARTUP_BUDGET_MS", DEFAULT_BUDGET_MS)),
+                        help="首次提问耗时预算（毫秒，也可用 STARTUP_BUDGET_MS 设置）")
+    parser.add_argument("--verbose", action="store_true", help="输出最后一次运行的 import 耗时明细")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.questions, args.backend, args.model)
+        return
+
+    print(f"⏱️  启动耗时测试: {args.questions} (后端: {args.backend}, {args.runs} 次)")
+
+    runs = []
+    for i in range(args.runs):
+        try:
+            runs.append(run_once(args))
+        except RuntimeError as e:
+            print(f"❌ 第 {i + 1} 次运行失败: {e}")
+            sys.exit(2)
+        print(f"   第 {i + 1} 次: {runs[-1]['data']['total_ms']:.1f}ms")
+
+    totals = [run["data"]["total_ms"] for run in runs]
+    median_ms = statistics.median(totals)
+    last = runs[-1]["data"]
+
+    if args.verbose:
+        print(runs[-1]["report"])
+
+    print("\n" + "=" * 60)
+    print("📊 首次提问耗时（离线部分）")
+    print("=" * 60)
+    for name in last["phases_ms"]:
+        values = [run["data"]["phases_ms"][name] for run in runs]
+        print(f"   {name:<20} {statistics.median(values):>10.1f}ms")
+    print(f"   {'合计（中位数）':<20} {median_ms:>10.1f}ms  (最小 {min(totals):.1f}ms, 最大 {max(totals):.1f}ms)")
+    if last["heavy_modules"]:
+        print(f"⚠️  启动阶段导入了重量级依赖: {', '.join(last['heavy_modules'])}")
+    print("=" * 60)
+
+    if median_ms > args.budget_ms:
+        print(f"❌ 超出预算: {median_ms:.1f}ms > {args.budget_ms:.1f}ms")
+        sys.exit(1)
+    print(f"✅ 在预算之内: {median_ms:.1f}ms <= {args.budget_ms:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
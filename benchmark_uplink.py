@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+音频上行压力测试
+模拟 N 场访谈同时录音（每场一个录音线程每 20ms 产生一块 PCM16），对比两种发送循环：
+- 逐块发送（原实现）：每 10ms 轮询一次录音队列，每块 base64 + json.dumps 后发送
+- 合并发送：阻塞等待录音，FrameCoalescer 合并成 --frame-ms 毫秒的帧，按预格式化模板拼接事件
+
+发送端写入本地 socketpair（另一端由线程读取丢弃），代替 WebSocket 连接。
+统计每场访谈发送线程的 CPU 时间、每秒发送帧数和唤醒次数，以及整个进程的 CPU 占用。
+
+用法：
+    python benchmark_uplink.py
+    python benchmark_uplink.py --sessions 50 --seconds 10 --frame-ms 100 --max-latency-ms 120
+"""
+
+import argparse
+import base64
+import json
+import queue
+import socket
+import statistics
+import threading
+import time
+from typing import Dict, Any, Callable, List, Optional
+
+from src.utils.audio_uplink import (
+    FrameCoalescer, append_event, iter_frames, DEFAULT_FRAME_MS, DEFAULT_MAX_LATENCY_MS,
+)
+
+
+SAMPLE_RATE = 24000
+CHUNK_SIZE = 480  # 与 AudioRecorder 一致：每块 20ms
+CHUNK_SECONDS = CHUNK_SIZE / SAMPLE_RATE
+CHUNK_BYTES = CHUNK_SIZE * 2
+
+
+def _record(audio_queue: "queue.Queue", seconds: float):
+    """模拟录音回调：按实时速度每 20ms 放入一块"""
+    chunk = bytes(CHUNK_BYTES)
+    next_at = time.monotonic()
+    for _ in range(int(seconds / CHUNK_SECONDS)):
+        audio_queue.put(chunk)
+        next_at += CHUNK_SECONDS
+        time.sleep(max(0.0, next_at - time.monotonic()))
+
+
+def _drain(sock: socket.socket):
+    """WebSocket 对端：读取并丢弃"""
+    while sock.recv(1 << 16):
+        pass
+
+
+def _legacy_sender(audio_queue: "queue.Queue", send: Callable[[str], None], running: Callable[[], bool], stats: Dict[str, int]):
+    """原实现：get_nowait 轮询 + 每块一个事件"""
+    while running() or not audio_queue.empty():
+        stats["wakeups"] += 1
+        try:
+            audio_data = audio_queue.get_nowait()
+        except queue.Empty:
+            audio_data = None
+        if audio_data:
+            encoded = base64.b64encode(audio_data).decode("ascii")
+            send(json.dumps({"type": "input_audio_buffer.append", "audio": encoded}))
+            stats["frames"] += 1
+        else:
+            time.sleep(0.01)
+
+
+def _coalesced_sender(
+    audio_queue: "queue.Queue",
+    send: Callable[[str], None],
+    running: Callable[[], bool],
+    stats: Dict[str, int],
+    frame_ms: float,
+    max_latency_ms: float
+):
+    """新实现：阻塞等待 + 合并成帧 + 模板拼接"""
+    def get_audio(timeout: float) -> Optional[bytes]:
+        stats["wakeups"] += 1
+        try:
+            return audio_queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    coalescer = FrameCoalescer(frame_ms, max_latency_ms, sample_rate=SAMPLE_RATE)
+    for frame in iter_frames(get_audio, coalescer, lambda: running() or not audio_queue.empty()):
+        send(append_event(frame))
+        stats["frames"] += 1
+
+
+def run(mode: str, sessions: int, seconds: float, frame_ms: float, max_latency_ms: float) -> Dict[str, Any]:
+    """同时运行 sessions 场访谈的上行（每场一个录音线程 + 一个发送线程），返回统计"""
+    recording = threading.Event()
+    recording.set()
+    results: List[Dict[str, float]] = []
+    results_lock = threading.Lock()
+    sockets: List[socket.socket] = []
+
+    def sender(audio_queue: "queue.Queue"):
+        local, remote = socket.socketpair()
+        sockets.extend((local, remote))
+        threading.Thread(target=_drain, args=(remote,), daemon=True).start()
+
+        def send(text: str):
+            local.sendall(text.encode("ascii"))
+
+        stats = {"frames": 0, "wakeups": 0}
+        start = time.thread_time()
+        if mode == "legacy":
+            _legacy_sender(audio_queue, send, recording.is_set, stats)
+        else:
+            _coalesced_sender(audio_queue, send, recording.is_set, stats, frame_ms, max_latency_ms)
+        cpu_ms = (time.thread_time() - start) * 1000
+        with results_lock:
+            results.append({"cpu_ms": cpu_ms, **stats})
+
+    queues = [queue.Queue() for _ in range(sessions)]
+    recorders = [threading.Thread(target=_record, args=(q, seconds)) for q in queues]
+    senders = [threading.Thread(target=sender, args=(q,)) for q in queues]
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    for thread in senders + recorders:
+        thread.start()
+    for thread in recorders:
+        thread.join()
+    recording.clear()
+    for thread in senders:
+        thread.join()
+    wall = time.perf_counter() - wall_start
+    cpu_total = time.process_time() - cpu_start
+    for sock in sockets:
+        sock.close()
+
+    sender_cpu_ms = statistics.mean(r["cpu_ms"] for r in results)
+    return {
+        "mode": mode,
+        "sessions": sessions,
+        "seconds": wall,
+        "sender_cpu_ms_per_session": sender_cpu_ms,
+        "sender_cpu_pct_per_session": sender_cpu_ms / 10 / wall,
+        "frames_per_second": statistics.mean(r["frames"] for r in results) / wall,
+        "wakeups_per_second": statistics.mean(r["wakeups"] for r in results) / wall,
+        "process_cpu_pct": cpu_total / wall * 100,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="音频上行压力测试（逐块发送 vs 合并发送）")
+    parser.add_argument("--sessions", type=int, default=20, help="同时录音的访谈数")
+    parser.add_argument("--seconds", type=float, default=5.0, help="每场录音时长（秒）")
+    parser.add_argument("--frame-ms", type=float, default=DEFAULT_FRAME_MS, help="合并后每帧时长（毫秒）")
+    parser.add_argument("--max-latency-ms", type=float, default=DEFAULT_MAX_LATENCY_MS, help="最长缓冲时间（毫秒）")
+    args = parser.parse_args()
+
+    # 模板拼接的事件与 json.dumps 的内容一致
+    sample = bytes(range(256)) * 4
+    assert json.loads(append_event(sample)) == {
+        "type": "input_audio_buffer.append", "audio": base64.b64encode(sample).decode("ascii")
+    }
+
+    print(f"🎙️  {args.sessions} 场访谈同时录音 {args.seconds:.0f} 秒（每块 {CHUNK_SECONDS * 1000:.0f}ms），"
+          f"合并帧 {args.frame_ms:.0f}ms / 最长缓冲 {args.max_latency_ms:.0f}ms")
+    results = [
+        run(mode, args.sessions, args.seconds, args.frame_ms, args.max_latency_ms)
+        for mode in ("legacy", "coalesced")
+    ]
+
+    print(f"\n📊 {'':10} {'发送CPU/场':>12} {'CPU%/场':>9} {'帧/秒/场':>10} {'唤醒/秒/场':>11} {'进程CPU%':>9}")
+    for result in results:
+        name = "逐块发送" if result["mode"] == "legacy" else "合并发送"
+        print(f"   {name:10} {result['sender_cpu_ms_per_session']:>10.1f}ms {result['sender_cpu_pct_per_session']:>8.2f}% "
+              f"{result['frames_per_second']:>10.1f} {result['wakeups_per_second']:>11.1f} {result['process_cpu_pct']:>8.1f}%")
+    legacy, coalesced = results
+    print(f"\n   发送线程 CPU 降低 {1 - coalesced['sender_cpu_ms_per_session'] / legacy['sender_cpu_ms_per_session']:.0%}，"
+          f"帧数降低 {1 - coalesced['frames_per_second'] / legacy['frames_per_second']:.0%}")
+    print(json.dumps(results, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
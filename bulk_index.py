@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+"""
+离线批量建索引脚本
+多进程并行向量化多个问题库的全部问题（写入嵌入向量缓存），再逐个同步向量索引，
+可选同时编译 .qbank 快照。
+
+用法:
+    python bulk_index.py examples/*.yaml --backend numpy
+    python bulk_index.py questions_rag_example.yaml --model BAAI/bge-small-zh-v1.5 --workers 4 --snapshot
+
+注意: --model / --backend / --collection 需要与运行时 QuestionRAG 的参数一致，
+运行时才会直接使用建好的索引；嵌入向量缓存则对所有集合共享。
+"""
+
+from src.core.bulk_index import main
+
+if __name__ == "__main__":
+    main()
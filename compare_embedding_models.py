@@ -1,17 +1,26 @@
 #!/usr/bin/env python3
 """
 嵌入模型对比测试
-比较不同模型在中文问题检索上的表现
+比较不同模型在中文问题检索上的表现，以及 PyTorch 与 ONNX Runtime 推理的延迟和吞吐
+
+用法:
+    python compare_embedding_models.py            # 模型对比 + 推理后端对比
+    python compare_embedding_models.py --runtime  # 只做推理后端对比
 """
 
 from src.core.question_rag_optimized import QuestionRAGOptimized, EmbeddingModel
+from src.core.model_registry import model_registry
+from src.utils.memory import current_rss_mb
+import importlib.util
+import statistics
+import sys
 import time
 
 
-def test_model(model_name: str, model_enum: EmbeddingModel):
+def test_model(model_name: str, model_enum: EmbeddingModel, precision: str = "fp32"):
     """测试单个模型的性能"""
     print("\n" + "=" * 70)
-    print(f"🧪 测试模型: {model_enum.value}")
+    print(f"🧪 测试模型: {model_enum.value} ({precision})")
     print("=" * 70)
 
     start_time = time.time()
@@ -21,7 +30,9 @@ def test_model(model_name: str, model_enum: EmbeddingModel):
         rag = QuestionRAGOptimized(
             question_file='questions.yaml',
             embedding_model=model_enum.value,
-            collection_name=f"test_{model_name}"
+            collection_name=f"test_{model_name}",
+            model_precision=precision,
+            hybrid_retrieval=False  # 只比较向量检索
         )
 
         # 加载和索引
@@ -31,6 +42,9 @@ def test_model(model_name: str, model_enum: EmbeddingModel):
 
         init_time = time.time() - start_time
         print(f"⏱️  初始化耗时: {init_time:.2f}秒")
+        if rag.embedding_cache is not None:
+            cache_stats = rag.embedding_cache.stats()
+            print(f"💾 嵌入缓存: 命中 {cache_stats['hits']}，未命中 {cache_stats['misses']}")
 
         # 测试检索
         test_contexts = [
@@ -55,11 +69,13 @@ def test_model(model_name: str, model_enum: EmbeddingModel):
                 print(f"  ❌ 未检索到问题")
 
         avg_retrieval_time = sum(retrieval_times) / len(retrieval_times)
+        model_stats = model_registry.stats()["models"].get(rag.embedding_model_name, {})
 
         return {
             "model": model_name,
             "init_time": init_time,
             "avg_retrieval_time": avg_retrieval_time,
+            "model_mb": model_stats.get("rss_delta_mb", 0.0),
             "success": True
         }
 
@@ -72,8 +88,99 @@ def test_model(model_name: str, model_enum: EmbeddingModel):
         }
 
 
+RUNTIME_TEST_MODELS = [
+    EmbeddingModel.BGE_SMALL_ZH,
+    EmbeddingModel.TEXT2VEC_BASE_CHINESE,
+    EmbeddingModel.PARAPHRASE_MULTILINGUAL,
+]
+
+RUNTIME_QUERIES = [
+    "用户说最近睡眠不好，经常失眠",
+    "用户提到很少运动，总是坐着",
+    "用户表示工作压力很大",
+    "用户说饮食不规律，经常不吃早饭",
+    "用户有高血压家族史",
+]
+
+
+def benchmark_runtime(spec: str, documents, reference=None):
+    """测量一种推理方式的单条查询延迟、批量吞吐和与 PyTorch 向量的偏差"""
+    from src.core.onnx_embedding import compare_vectors
+
+    model = model_registry.get(spec)
+    start = time.time()
+    model.load()
+    load_time = time.time() - start
+
+    model.encode(RUNTIME_QUERIES[0])  # 预热
+    latencies = []
+    for _ in range(4):
+        for query in RUNTIME_QUERIES:
+            start = time.perf_counter()
+            model.encode(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    vectors = model.encode(documents, batch_size=32)
+    throughput = len(documents) / (time.perf_counter() - start)
+
+    return {
+        "spec": spec,
+        "load_time": load_time,
+        "p50_ms": statistics.median(latencies),
+        "throughput": throughput,
+        "min_cosine": compare_vectors(reference, vectors)["min_cosine"] if reference is not None else 1.0,
+        "vectors": vectors,
+    }
+
+
+def compare_runtimes():
+    """PyTorch vs ONNX Runtime (fp32 / int8) 推理对比"""
+    if importlib.util.find_spec("onnxruntime") is None:
+        print("\n⚠️  未安装 onnxruntime，跳过推理后端对比（pip install onnxruntime onnx）")
+        return
+
+    import yaml
+    from src.core.index_sync import build_document
+    from src.core.question_bank import QuestionBank
+
+    with open("questions.yaml", "r", encoding="utf-8") as f:
+        bank = QuestionBank.from_dicts(yaml.safe_load(f).get("questions", []))
+    # 重复问题文本，让吞吐测试有足够的批量
+    documents = [build_document(q) for q in bank] * max(1, 256 // max(len(bank), 1))
+
+    print("\n" + "=" * 70)
+    print(f"⚡ 推理后端对比（{len(documents)} 条文本）")
+    print("=" * 70)
+
+    rows = []
+    for model_enum in RUNTIME_TEST_MODELS:
+        name = model_enum.value
+        try:
+            baseline = benchmark_runtime(name, documents)
+            rows.append(("PyTorch", baseline))
+            for label, spec in (("ONNX", f"onnx:{name}"), ("ONNX int8", f"onnx:{name}@int8")):
+                rows.append((label, benchmark_runtime(spec, documents, baseline["vectors"])))
+        except Exception as e:
+            print(f"❌ {name} 测试失败: {e}")
+        model_registry.clear()
+
+    print(f"\n{'模型':<45} {'推理':<10} {'加载(秒)':<10} {'单条p50(ms)':<12} {'吞吐(条/秒)':<12} {'最小余弦'}")
+    print("-" * 100)
+    for label, row in rows:
+        name = row["spec"].replace("onnx:", "").split("@")[0]
+        print(f"{name:<45} {label:<10} {row['load_time']:<10.2f} {row['p50_ms']:<12.2f} "
+              f"{row['throughput']:<12.1f} {row['min_cosine']:.5f}")
+    print("=" * 100)
+    print("💡 在 QuestionRAGOptimized 中使用 EmbeddingModel.*_ONNX（int8 再加 model_precision=\"int8\"）")
+
+
 def main():
     """主测试函数"""
+    if "--runtime" in sys.argv:
+        compare_runtimes()
+        return
+
     print("""
 ╔══════════════════════════════════════════════════════════════════════╗
 ║                                                                      ║
@@ -85,6 +192,7 @@ def main():
 本测试将对比以下嵌入模型在中文问题检索上的表现：
 
 1. BGE-Small-ZH (推荐) - BAAI 出品，轻量快速
+   （另测一次 int8 动态量化权重，对比内存占用）
 2. BGE-Base-ZH - BAAI 出品，效果更好但较大
 3. text2vec-base-chinese - 中文专用
 4. Paraphrase-Multilingual (当前使用) - 多语言
@@ -92,35 +200,38 @@ def main():
 注意：
 - 首次运行会下载模型，需要一些时间
 - 每个模型会创建独立的向量索引
+- 问题向量会缓存在 ./embedding_cache，重复运行无需重新向量化
 - 测试完成后可以删除 test_* 开头的集合
     """)
 
     input("\n按 Enter 开始测试...")
 
     models_to_test = [
-        ("bge_small", EmbeddingModel.BGE_SMALL_ZH),
-        ("bge_base", EmbeddingModel.BGE_BASE_ZH),
-        ("text2vec", EmbeddingModel.TEXT2VEC_BASE_CHINESE),
-        ("multilingual", EmbeddingModel.PARAPHRASE_MULTILINGUAL),
+        ("bge_small", EmbeddingModel.BGE_SMALL_ZH, "fp32"),
+        ("bge_small_int8", EmbeddingModel.BGE_SMALL_ZH, "int8"),
+        ("bge_base", EmbeddingModel.BGE_BASE_ZH, "fp32"),
+        ("text2vec", EmbeddingModel.TEXT2VEC_BASE_CHINESE, "fp32"),
+        ("multilingual", EmbeddingModel.PARAPHRASE_MULTILINGUAL, "fp32"),
     ]
 
     results = []
+    print(f"\n💾 初始 RSS: {current_rss_mb():.0f}MB")
 
-    for model_name, model_enum in models_to_test:
-        result = test_model(model_name, model_enum)
+    for model_name, model_enum, precision in models_to_test:
+        result = test_model(model_name, model_enum, precision)
         if result:
             results.append(result)
 
-        # 清理显存
-        import gc
-        gc.collect()
+        # 测试完立即卸载，避免多个模型同时占用内存
+        model_registry.clear()
+        print(f"💾 卸载后 RSS: {current_rss_mb():.0f}MB")
 
     # 打印对比结果
     print("\n" + "=" * 70)
     print("📊 对比结果汇总")
     print("=" * 70 + "\n")
 
-    print(f"{'模型':<30} {'初始化(秒)':<15} {'检索速度(秒)':<15} {'状态'}")
+    print(f"{'模型':<30} {'初始化(秒)':<15} {'检索速度(秒)':<15} {'模型内存(MB)':<15} {'状态'}")
     print("-" * 70)
 
     for result in results:
@@ -128,9 +239,11 @@ def main():
             print(f"{result['model']:<30} "
                   f"{result['init_time']:<15.2f} "
                   f"{result['avg_retrieval_time']:<15.3f} "
+                  f"{result['model_mb']:<15.0f} "
                   f"✅")
         else:
             print(f"{result['model']:<30} "
+                  f"{'N/A':<15} "
                   f"{'N/A':<15} "
                   f"{'N/A':<15} "
                   f"❌ {result.get('error', 'Unknown')[:20]}")
@@ -155,6 +268,8 @@ def main():
   )
     """)
 
+    compare_runtimes()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+"""
+问题库编译脚本
+把 YAML 问题库编译为 .qbank 快照（问题记录 + 归一化问题向量 + 元数据），
+运行时自动通过 mmap 加载，跳过 YAML 解析、向量数据库和向量化。
+
+用法:
+    python compile_questions.py questions.yaml
+    python compile_questions.py questions_rag_example.yaml --model BAAI/bge-small-zh-v1.5
+    python compile_questions.py examples/*.yaml --model sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2
+
+注意: --model 需要与运行时 QuestionRAG / QuestionRAGOptimized 使用的嵌入模型一致，
+否则快照中的向量不会被使用（问题记录仍可被 QuestionManager 使用）。
+"""
+
+from src.core.question_snapshot import main
+
+if __name__ == "__main__":
+    main()
@@ -6,12 +6,17 @@
 
 import os
 import sys
-import pyaudio
 from pathlib import Path
 
 # 添加src目录到路径
 sys.path.insert(0, str(Path(__file__).parent))
 
+# --startup-profile: 在导入客户端之前启用，统计各模块导入和初始化阶段耗时
+from src.utils.startup_profile import startup_profiler
+
+if "--startup-profile" in sys.argv:
+    startup_profiler.enable()
+
 from src.clients.interview_client_hybrid import HybridInterviewClient, ModelType
 
 # 配置信息
@@ -31,6 +36,8 @@ def main():
 
     # 检查音频设备
     try:
+        import pyaudio
+
         audio = pyaudio.PyAudio()
         print(f"🎵 音频设备初始化成功")
         print(f"   输入设备: {audio.get_default_input_device_info()['name']}")
@@ -59,6 +66,7 @@ def main():
         vad_silence_duration_ms=800,  # 稍微增加静音容忍时间
         tts_voice="cixingnansheng",  # 音色选项见下方注释
         tts_model="step-tts-mini",  # step-tts-mini 或 step-tts-vivid
+        voice_gate="--voice-gate" in sys.argv,  # 本地 VAD（默认关闭）
     )
 
     # step-tts-mini 支持的音色（22种）:
@@ -70,7 +78,7 @@ def main():
     # shuangkuainansheng, ganliannvsheng, qinhenvsheng, huolinvsheng
 
     try:
-        client.connect()
+        # start_interview 会与问题加载、TTS 预热、音频设备初始化并行建立连接
         client.start_interview()
     except Exception as e:
         print(f"\n❌ 错误: {e}")
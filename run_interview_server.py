@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+异步多会话访谈服务 - 启动脚本（模拟 N 路并发来电）
+
+用法：
+    python run_interview_server.py --calls 50 --audio answer.wav
+    python run_interview_server.py --questions questions.yaml examples/product_feedback.yaml --calls 200
+"""
+
+import sys
+import os
+
+# 确保可以导入 src 模块
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.clients.interview_server import main
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n👋 再见！")
@@ -9,6 +9,12 @@ import os
 # 确保可以导入 src 模块
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+# --startup-profile: 在导入客户端之前启用，统计各模块导入和初始化阶段耗时
+from src.utils.startup_profile import startup_profiler
+
+if "--startup-profile" in sys.argv:
+    startup_profiler.enable()
+
 from src.clients.interview_client_rag import main
 
 if __name__ == "__main__":
@@ -2,7 +2,17 @@
 客户端模块 - 访谈客户端实现
 """
 
-# 导入混合模式客户端（推荐使用）
-from .interview_client_hybrid import HybridInterviewClient
+__all__ = ["HybridInterviewClient", "InterviewServer"]
 
-__all__ = ["HybridInterviewClient"]
+
+def __getattr__(name):
+    # 按需导入，避免 import src.clients 时加载客户端的全部依赖
+    if name == "HybridInterviewClient":
+        from .interview_client_hybrid import HybridInterviewClient
+
+        return HybridInterviewClient
+    if name == "InterviewServer":
+        from .interview_server import InterviewServer
+
+        return InterviewServer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
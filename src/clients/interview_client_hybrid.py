@@ -5,21 +5,24 @@
 - 回答：使用 Realtime API 接收语音并转写
 """
 
-import base64
 import json
 import os
+import sys
 import threading
-import queue
 import time
-from websocket import create_connection, WebSocketConnectionClosedException
-import pyaudio
-import requests
 from pathlib import Path
 from typing import Optional, Dict, Any
 from enum import Enum
 
 from src.core.question_manager import QuestionManager, SessionRecorder, Question
-from src.analyzers.health_analyzer_client import HealthAnalyzerClient
+from src.utils.startup_profile import startup_profiler
+from src.utils.init_pipeline import InitPipeline, InitTaskError
+from src.utils.audio_uplink import FrameCoalescer, append_event, iter_frames, DEFAULT_FRAME_MS, DEFAULT_MAX_LATENCY_MS
+from src.utils.voice_gate import VoiceGate, DEFAULT_PRE_ROLL_MS
+from src.utils.outbound import OutboundChannel, socket_send_backlog
+from src.utils.pcm_ring import PCMRingBuffer, OVERFLOW_DROP_OLDEST
+
+# pyaudio / requests / websocket / 健康分析客户端都在首次使用时才导入，缩短启动时间
 
 # 配置信息
 API_KEY = os.getenv("STEPFUN_API_KEY", "your-api-key-here")
@@ -37,7 +40,10 @@ class ModelType(Enum):
 SAMPLE_RATE = 24000
 CHANNELS = 1
 CHUNK_SIZE = 480
-FORMAT = pyaudio.paInt16
+TTS_WORKERS = 4  # 后台预生成问题语音的并发请求数
+FORMAT = 8  # pyaudio.paInt16（常量值，避免导入本模块时加载 pyaudio）
+CHUNK_BYTES = CHUNK_SIZE * 2
+RECORD_BUFFER_MS = 10000  # 录音缓冲最多 10 秒
 
 
 class ConnectionState(Enum):
@@ -73,6 +79,8 @@ class TTSGenerator:
         print(f"🎙️  正在生成语音: {text[:30]}...")
 
         try:
+            import requests
+
             headers = {
                 "Authorization": f"Bearer {self.api_key}",
                 "Content-Type": "application/json",
@@ -84,9 +92,11 @@ class TTSGenerator:
             response = requests.post(TTS_URL, headers=headers, json=data, timeout=30)
 
             if response.status_code == 200:
-                # 保存音频文件
-                with open(cache_file, "wb") as f:
+                # 保存音频文件（先写临时文件，后台预生成时不会读到半个文件）
+                tmp_file = cache_file.with_name(f"{cache_file.name}.{threading.get_ident()}.tmp")
+                with open(tmp_file, "wb") as f:
                     f.write(response.content)
+                os.replace(tmp_file, cache_file)
                 print(f"✅ 语音生成成功: {cache_file.name}")
                 return cache_file
             else:
@@ -108,7 +118,14 @@ class AudioPlayer:
     """音频播放器 - 支持文件播放"""
 
     def __init__(self):
-        self.audio = pyaudio.PyAudio()
+        self.audio = None  # PyAudio 实例在 open() 中创建（初始化 PortAudio 较慢）
+
+    def open(self):
+        """初始化音频输出（可以在初始化阶段提前执行）"""
+        if self.audio is None:
+            import pyaudio
+
+            self.audio = pyaudio.PyAudio()
 
     def play_file(self, file_path: Path):
         """播放音频文件"""
@@ -133,6 +150,7 @@ class AudioPlayer:
             data = (data * 32767).astype("int16")
 
             # 播放
+            self.open()
             stream = self.audio.open(
                 format=FORMAT, channels=CHANNELS, rate=SAMPLE_RATE, output=True
             )
@@ -146,25 +164,33 @@ class AudioPlayer:
 
     def terminate(self):
         """清理资源"""
-        self.audio.terminate()
+        if self.audio is not None:
+            self.audio.terminate()
 
 
 class AudioRecorder:
     """实时音频录制器"""
 
     def __init__(self):
-        self.audio = pyaudio.PyAudio()
+        self.audio = None  # PyAudio 实例在 open() 中创建（初始化 PortAudio 较慢）
         self.stream = None
         self.recording = False
         self.record_thread = None
-        self.audio_queue = queue.Queue()
+        # 发送循环卡住时只保留最近的录音，内存有上限
+        self.buffer = PCMRingBuffer(
+            RECORD_BUFFER_MS, overflow=OVERFLOW_DROP_OLDEST, track_underruns=False, sample_rate=SAMPLE_RATE
+        )
         self._lock = threading.Lock()
 
-    def start(self):
-        """启动录制"""
+    def open(self):
+        """打开输入设备（不开始录制，可以在初始化阶段提前执行）"""
         with self._lock:
-            if self.recording:
+            if self.stream is not None:
                 return
+            import pyaudio
+
+            if self.audio is None:
+                self.audio = pyaudio.PyAudio()
             self.stream = self.audio.open(
                 format=FORMAT,
                 channels=CHANNELS,
@@ -172,6 +198,13 @@ class AudioRecorder:
                 input=True,
                 frames_per_buffer=CHUNK_SIZE,
             )
+
+    def start(self):
+        """启动录制（设备未打开时先打开）"""
+        self.open()
+        with self._lock:
+            if self.recording:
+                return
             self.recording = True
             self.record_thread = threading.Thread(target=self._record_loop, daemon=True)
             self.record_thread.start()
@@ -181,17 +214,18 @@ class AudioRecorder:
         while self.recording:
             try:
                 audio_data = self.stream.read(CHUNK_SIZE, exception_on_overflow=False)
-                self.audio_queue.put(audio_data)
+                self.buffer.write(audio_data)
             except Exception as e:
                 if self.recording:
                     print(f"❌ 录制错误: {e}")
 
-    def get_audio(self) -> Optional[bytes]:
-        """获取录制的音频数据"""
-        try:
-            return self.audio_queue.get_nowait()
-        except queue.Empty:
-            return None
+    def get_audio(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        """获取录制的音频数据；timeout 为 None 时不等待，否则最多阻塞 timeout 秒"""
+        return self.buffer.read(CHUNK_BYTES, 0 if timeout is None else timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """录音缓冲的水位和溢出统计"""
+        return self.buffer.stats()
 
     def stop(self):
         """停止录制"""
@@ -205,7 +239,8 @@ class AudioRecorder:
                 self.stream.close()
             except Exception:
                 pass
-        self.audio.terminate()
+        if self.audio is not None:
+            self.audio.terminate()
 
 
 class HybridInterviewClient:
@@ -220,6 +255,11 @@ class HybridInterviewClient:
         vad_silence_duration_ms: int = 700,
         tts_voice: str = "cixingnansheng",  # 磁性男声
         tts_model: str = "step-tts-mini",  # step-tts-mini 或 step-tts-vivid
+        uplink_frame_ms: float = DEFAULT_FRAME_MS,  # 上行音频每帧时长
+        uplink_max_latency_ms: float = DEFAULT_MAX_LATENCY_MS,  # 录音最多缓冲多久就发送
+        voice_gate: bool = False,  # 本地 VAD：静音不上传，只发保活（默认关闭，命令行 --voice-gate 开启）
+        voice_gate_pre_roll_ms: float = DEFAULT_PRE_ROLL_MS,  # 开始说话前补发的音频
+        voice_gate_hangover_ms: Optional[float] = None,  # 说话后继续上传多久（默认服务端静音时长 + 300ms）
     ):
         self.api_key = api_key
         self.model = model
@@ -237,8 +277,8 @@ class HybridInterviewClient:
         self.tts_generator.tts_model = tts_model
         self.tts_generator.tts_voice = tts_voice
 
-        # 健康分析客户端
-        self.health_analyzer = HealthAnalyzerClient(api_key)
+        # 健康分析客户端（访谈结束时才创建）
+        self._health_analyzer = None
 
         # 当前问题状态
         self.current_question: Optional[Question] = None
@@ -247,11 +287,18 @@ class HybridInterviewClient:
 
         # WebSocket 和音频
         self.ws = None
+        # 单写者出站通道：控制事件优先，音频在后（ws.send 只在写线程中调用）
+        self.outbound = OutboundChannel(self._write, backlog=self._send_backlog)
         self.running = False
         self.connection_state = ConnectionState.DISCONNECTED
 
         self.player = AudioPlayer()
         self.recorder = AudioRecorder()
+        # 上行：录音小块合并成帧后发送
+        self.uplink = FrameCoalescer(uplink_frame_ms, uplink_max_latency_ms, sample_rate=SAMPLE_RATE)
+        self.voice_gate = VoiceGate.for_server_vad(
+            vad_silence_duration_ms, voice_gate_pre_roll_ms, voice_gate_hangover_ms, sample_rate=SAMPLE_RATE
+        ) if voice_gate else None
 
         self.receive_thread = None
         self.send_thread = None
@@ -260,9 +307,24 @@ class HybridInterviewClient:
 
         # 同步事件
         self.answer_received = threading.Event()
+        self.session_ready = threading.Event()  # 收到 session.updated
+
+        # 初始化流水线（记录各阶段耗时）
+        self.init_pipeline: Optional[InitPipeline] = None
+
+    @property
+    def health_analyzer(self):
+        """健康分析客户端（首次使用时导入并创建）"""
+        if self._health_analyzer is None:
+            from src.analyzers.health_analyzer_client import HealthAnalyzerClient
+
+            self._health_analyzer = HealthAnalyzerClient(self.api_key)
+        return self._health_analyzer
 
     def connect(self):
         """建立 WebSocket 连接（仅用于接收用户语音）"""
+        from websocket import create_connection
+
         url = f"{WS_URL}?model={self.model}"
         headers = {"Authorization": f"Bearer {self.api_key}"}
 
@@ -270,12 +332,15 @@ class HybridInterviewClient:
         self.connection_state = ConnectionState.CONNECTING
 
         try:
-            self.ws = create_connection(url, header=headers, timeout=10)
+            with startup_profiler.phase("WebSocket 握手"):
+                self.ws = create_connection(url, header=headers, timeout=10)
             self.connection_state = ConnectionState.CONNECTED
+            self.outbound.start()
             print("✅ WebSocket 连接成功！")
 
             # 配置会话（仅用于语音识别）
-            self._configure_session()
+            with startup_profiler.phase("会话配置"):
+                self._configure_session()
 
         except Exception as e:
             self.connection_state = ConnectionState.ERROR
@@ -307,12 +372,18 @@ class HybridInterviewClient:
         print(f"   静音检测: {self.vad_silence_duration_ms}ms")
 
     def _send_event(self, event: Dict[str, Any]):
-        """发送事件"""
+        """发送事件（放入出站通道的控制通道，排在音频前面）"""
+        self.outbound.send_control(json.dumps(event))
+
+    def _write(self, text: str):
+        """实际发送一条消息（只在出站通道的写线程中调用；发送失败由出站通道记录）"""
         if self.connection_state == ConnectionState.CONNECTED and self.ws:
-            try:
-                self.ws.send(json.dumps(event))
-            except Exception as e:
-                print(f"❌ 发送消息失败: {e}")
+            self.ws.send(text)
+
+    def _send_backlog(self) -> Optional[int]:
+        """WebSocket 底层 socket 发送队列中的积压字节数"""
+        sock = self.ws.sock if self.ws is not None else None
+        return socket_send_backlog(sock) if sock is not None else 0
 
     def start_interview(self):
         """开始访谈"""
@@ -320,11 +391,32 @@ class HybridInterviewClient:
         print("🎤 客户访谈系统 - 混合模式（TTS + Realtime）")
         print("=" * 60)
 
-        # 加载问题
-        if not self.question_manager.load_questions():
+        # 并行初始化：问题加载、WebSocket、音频设备互不依赖；
+        # 欢迎语 TTS 依赖问题文件，其余问题的语音在访谈开始后继续在后台生成
+        self.init_pipeline = InitPipeline()
+        self.init_pipeline.add("加载问题", self.question_manager.load_questions)
+        self.init_pipeline.add("TTS 预热", self._pregenerate_welcome_tts, after=["加载问题"])
+        self.init_pipeline.add("TTS 预生成", self._pregenerate_tts, after=["加载问题"], wait=False)
+        if self.connection_state != ConnectionState.CONNECTED:
+            self.init_pipeline.add("WebSocket 连接", self.connect)
+        self.init_pipeline.add("打开音频设备", self._open_audio_devices)
+
+        print("🎙️  正在并行初始化（问题 / 语音 / 连接 / 音频设备）...")
+        try:
+            results = self.init_pipeline.run()
+        except InitTaskError as e:
+            print(f"❌ 初始化失败（{e.task}）: {e.error}")
+            self.stop()
+            return
+
+        if not results["加载问题"]:
             print("❌ 加载问题失败，无法开始访谈")
+            self.stop()
             return
 
+        timings = self.init_pipeline.timings()
+        print(f"⏱️  初始化完成: {timings['wall_ms']:.0f}ms（串行需 {timings['serial_ms']:.0f}ms）")
+
         # 创建会话记录器
         self.session_recorder = SessionRecorder()
 
@@ -336,14 +428,9 @@ class HybridInterviewClient:
         print(f"   回答识别: Realtime API")
         print("\n" + "=" * 60 + "\n")
 
-        # 预生成所有问题的语音
-        print("🎙️  正在预生成问题语音...")
-        self._pregenerate_tts()
-        print()
-
         self.running = True
 
-        # 启动录制
+        # 启动录制（设备已在初始化阶段打开）
         self.recorder.start()
 
         # 启动接收和发送线程
@@ -353,8 +440,8 @@ class HybridInterviewClient:
         self.receive_thread.start()
         self.send_thread.start()
 
-        # 等待连接稳定
-        time.sleep(1)
+        # 等待会话配置生效（最多 1 秒）
+        self.session_ready.wait(timeout=1)
 
         try:
             # 播放欢迎语
@@ -377,19 +464,25 @@ class HybridInterviewClient:
         finally:
             self.stop()
 
-    def _pregenerate_tts(self):
-        """预生成所有问题的 TTS 音频"""
-        # 欢迎语
+    def _open_audio_devices(self):
+        """初始化音频输出并打开录音设备（不开始录制）"""
+        self.player.open()
+        self.recorder.open()
+
+    def _pregenerate_welcome_tts(self):
+        """生成欢迎语音频（第一次提问前必须就绪）"""
         welcome_msg = self.question_manager.get_welcome_message()
         self.tts_generator.generate_speech(welcome_msg, 0)
 
-        # 所有问题
-        for question in self.question_manager.questions:
-            self.tts_generator.generate_speech(question.question, question.id)
+    def _pregenerate_tts(self):
+        """并发预生成所有问题和结束语的 TTS 音频"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        texts = [(question.question, question.id) for question in self.question_manager.questions]
+        texts.append((self.question_manager.get_completion_message(), 9999))
 
-        # 结束语
-        completion_msg = self.question_manager.get_completion_message()
-        self.tts_generator.generate_speech(completion_msg, 9999)
+        with ThreadPoolExecutor(max_workers=TTS_WORKERS, thread_name_prefix="tts") as executor:
+            list(executor.map(lambda item: self.tts_generator.generate_speech(*item), texts))
 
         print("✅ 所有语音文件已准备就绪")
 
@@ -399,6 +492,7 @@ class HybridInterviewClient:
         print(f"🤖 欢迎: {welcome_msg}\n")
 
         audio_file = self.tts_generator.cache_dir / "question_0.mp3"
+        startup_profiler.mark_first_prompt()
         if audio_file.exists():
             self.player.play_file(audio_file)
             time.sleep(1)
@@ -420,9 +514,9 @@ class HybridInterviewClient:
         print(f"🎯 问题: {question.question}")
         print(f"{'=' * 60}\n")
 
-        # 步骤1：播放 TTS 生成的问题音频
-        audio_file = self.tts_generator.cache_dir / f"question_{question.id}.mp3"
-        if audio_file.exists():
+        # 步骤1：播放 TTS 生成的问题音频（后台尚未生成时当场生成）
+        audio_file = self.tts_generator.generate_speech(question.question, question.id)
+        if audio_file:
             print("🔊 播放问题...")
             self.player.play_file(audio_file)
             time.sleep(0.5)
@@ -464,8 +558,8 @@ class HybridInterviewClient:
         completion_msg = self.question_manager.get_completion_message()
         print(f"🤖 结束语: {completion_msg}\n")
 
-        audio_file = self.tts_generator.cache_dir / "question_9999.mp3"
-        if audio_file.exists():
+        audio_file = self.tts_generator.generate_speech(completion_msg, 9999)
+        if audio_file:
             self.player.play_file(audio_file)
             time.sleep(2)
 
@@ -476,9 +570,19 @@ class HybridInterviewClient:
                     "version": "hybrid_tts_realtime",
                     "total_questions": len(self.question_manager.questions),
                     "answered": self.session_recorder.get_answer_count(),
+                    "uplink": self.uplink.stats(),
+                    "voice_gate": self.voice_gate.stats() if self.voice_gate else None,
+                    "outbound": self.outbound.stats(),
+                    "audio_buffers": {"recorder": self.recorder.stats()},
+                    "startup": startup_profiler.summary(),
+                    "init_phases": self.init_pipeline.timings() if self.init_pipeline else None,
                 }
             )
 
+            if self.voice_gate:
+                gate = self.voice_gate.stats()
+                print(f"📉 上行音频: {gate['bytes_out'] / 1024:.0f}KB / {gate['bytes_in'] / 1024:.0f}KB（静音过滤节省 {gate['reduction']:.0%}）")
+
             # 生成 AI 健康分析报告
             self._generate_health_analysis()
 
@@ -526,23 +630,20 @@ class HybridInterviewClient:
             traceback.print_exc()
 
     def _send_loop(self):
-        """发送音频数据循环"""
-        while self.running:
-            try:
-                audio_data = self.recorder.get_audio()
-                if audio_data:
-                    encoded = base64.b64encode(audio_data).decode("ascii")
-                    event = {"type": "input_audio_buffer.append", "audio": encoded}
-                    self._send_event(event)
-                else:
-                    time.sleep(0.01)
-            except Exception as e:
-                if self.running:
-                    print(f"❌ 发送错误: {e}")
-                break
+        """发送音频数据循环：阻塞等待录音，合并成帧后发送"""
+        try:
+            for frame in iter_frames(
+                self.recorder.get_audio, self.uplink, lambda: self.running, gate=self.voice_gate
+            ):
+                self.outbound.send_audio(append_event(frame))
+        except Exception as e:
+            if self.running:
+                print(f"❌ 发送错误: {e}")
 
     def _receive_loop(self):
         """接收响应循环（仅处理转写）"""
+        from websocket import WebSocketConnectionClosedException
+
         while self.running:
             try:
                 message = self.ws.recv()
@@ -558,7 +659,7 @@ class HybridInterviewClient:
                     print(f"✅ 会话已创建 (ID: {session_id[:8]}...)")
 
                 elif event_type == "session.updated":
-                    pass  # 静默
+                    self.session_ready.set()
 
                 elif event_type == "input_audio_buffer.speech_started":
                     self.user_speaking = True
@@ -605,6 +706,7 @@ class HybridInterviewClient:
             self.receive_thread.join(timeout=1.0)
         if self.send_thread and self.send_thread.is_alive():
             self.send_thread.join(timeout=1.0)
+        self.outbound.close()
 
         if self.ws:
             try:
@@ -629,6 +731,8 @@ def main():
 
     # 检查音频设备
     try:
+        import pyaudio
+
         audio = pyaudio.PyAudio()
         print(f"🎵 音频设备初始化成功")
         print(f"   输入设备: {audio.get_default_input_device_info()['name']}")
@@ -657,6 +761,7 @@ def main():
         vad_silence_duration_ms=800,  # 稍微增加静音容忍时间
         tts_voice="wenrounvsheng",  # 音色选项见下方注释
         tts_model="step-tts-mini",  # step-tts-mini 或 step-tts-vivid
+        voice_gate="--voice-gate" in sys.argv,  # 本地 VAD（默认关闭）
     )
 
     # step-tts-mini 支持的音色（22种）:
@@ -668,7 +773,7 @@ def main():
     # shuangkuainansheng, ganliannvsheng, qinhenvsheng, huolinvsheng
 
     try:
-        client.connect()
+        # start_interview 会与问题加载、音频设备初始化并行建立连接
         client.start_interview()
     except Exception as e:
         print(f"\n❌ 错误: {e}")
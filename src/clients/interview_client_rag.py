@@ -10,19 +10,29 @@ import base64
 import json
 import os
 import threading
-import queue
 import time
 import logging
 import sys
 from datetime import datetime
 from pathlib import Path
-from websocket import create_connection, WebSocketConnectionClosedException
-import pyaudio
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any
 from enum import Enum
 
-from src.core.question_rag import QuestionRAG, Question, analyze_answer_completeness
+from src.core.question_rag import QuestionRAG, analyze_answer_completeness
+from src.core.question_bank import Question
 from src.core.question_manager import SessionRecorder
+from src.clients.rag_prompts import (
+    WELCOME_MESSAGE, COMPLETION_MESSAGE, session_update_event, user_text_event,
+    question_prompt, welcome_prompt, followup_prompt, completion_prompt,
+)
+from src.utils.startup_profile import startup_profiler
+from src.utils.audio_uplink import FrameCoalescer, append_event, iter_frames, DEFAULT_FRAME_MS, DEFAULT_MAX_LATENCY_MS
+from src.utils.voice_gate import VoiceGate, DEFAULT_PRE_ROLL_MS
+from src.utils.outbound import OutboundChannel, socket_send_backlog
+from src.utils.pcm_ring import PCMRingBuffer, OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST
+from src.utils.init_pipeline import InitPipeline, InitTaskError
+
+# pyaudio / websocket 在首次使用时才导入，缩短启动时间
 
 # 配置信息
 API_KEY = os.getenv("STEPFUN_API_KEY", "your-api-key-here")
@@ -96,7 +106,12 @@ class ModelType(Enum):
 SAMPLE_RATE = 24000
 CHANNELS = 1
 CHUNK_SIZE = 480
-FORMAT = pyaudio.paInt16
+FORMAT = 8  # pyaudio.paInt16（常量值，避免导入本模块时加载 pyaudio）
+CHUNK_BYTES = CHUNK_SIZE * 2
+PLAY_BUFFER_MS = 60000  # 播放缓冲最多 60 秒 AI 语音
+PLAY_WRITE_TIMEOUT = 0.5  # 播放缓冲满时接收线程最多等待多久
+PLAY_CHUNK_BYTES = CHUNK_BYTES * 5  # 每次写入声卡 100ms
+RECORD_BUFFER_MS = 10000  # 录音缓冲最多 10 秒
 
 
 class ConnectionState(Enum):
@@ -112,17 +127,25 @@ class AudioPlayer:
     """实时音频播放器"""
 
     def __init__(self):
-        self.audio = pyaudio.PyAudio()
+        self.audio = None  # PyAudio 实例在 open() 中创建（初始化 PortAudio 较慢）
         self.stream = None
         self.playing = False
-        self.audio_queue = queue.Queue(maxsize=100)
+        # 满了先让接收线程等待播放（不丢音频），超过 PLAY_WRITE_TIMEOUT 才丢弃新音频
+        self.buffer = PCMRingBuffer(
+            PLAY_BUFFER_MS, overflow=OVERFLOW_BLOCK, write_timeout=PLAY_WRITE_TIMEOUT, sample_rate=SAMPLE_RATE
+        )
         self.play_thread = None
         self._lock = threading.Lock()
 
-    def start(self):
+    def open(self):
+        """打开输出设备（不开始播放，可以在初始化阶段提前执行）"""
         with self._lock:
-            if self.playing:
+            if self.stream is not None:
                 return
+            import pyaudio
+
+            if self.audio is None:
+                self.audio = pyaudio.PyAudio()
             self.stream = self.audio.open(
                 format=FORMAT,
                 channels=CHANNELS,
@@ -130,43 +153,43 @@ class AudioPlayer:
                 output=True,
                 frames_per_buffer=CHUNK_SIZE,
             )
+
+    def start(self):
+        self.open()
+        with self._lock:
+            if self.playing:
+                return
             self.playing = True
             self.play_thread = threading.Thread(target=self._play_loop, daemon=True)
             self.play_thread.start()
 
     def _play_loop(self):
         while self.playing:
-            try:
-                audio_data = self.audio_queue.get(timeout=0.1)
-                if audio_data is not None and self.playing:
-                    self.stream.write(audio_data)
-            except queue.Empty:
+            audio_data = self.buffer.acquire(PLAY_CHUNK_BYTES, timeout=0.1)
+            if audio_data is None:
                 continue
+            try:
+                if self.playing:
+                    self.stream.write(audio_data)  # 直接写缓冲区内的数据，不复制
             except Exception as e:
                 if self.playing:
                     logger.error(f"❌ 播放错误: {e}")
+            finally:
+                self.buffer.release()
 
     def add_audio(self, pcm_bytes: bytes):
-        try:
-            if self.audio_queue.full():
-                try:
-                    self.audio_queue.get_nowait()
-                except queue.Empty:
-                    pass
-            self.audio_queue.put_nowait(pcm_bytes)
-        except queue.Full:
-            pass
+        self.buffer.write(pcm_bytes)
 
     def clear(self):
-        while not self.audio_queue.empty():
-            try:
-                self.audio_queue.get_nowait()
-            except queue.Empty:
-                break
+        self.buffer.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self.buffer.stats()
 
     def stop(self):
         with self._lock:
             self.playing = False
+        self.buffer.close()
         if self.play_thread and self.play_thread.is_alive():
             self.play_thread.join(timeout=1.0)
         if self.stream:
@@ -175,24 +198,33 @@ class AudioPlayer:
                 self.stream.close()
             except Exception:
                 pass
-        self.audio.terminate()
+        if self.audio is not None:
+            self.audio.terminate()
 
 
 class AudioRecorder:
     """实时音频录制器"""
 
     def __init__(self):
-        self.audio = pyaudio.PyAudio()
+        self.audio = None  # PyAudio 实例在 open() 中创建（初始化 PortAudio 较慢）
         self.stream = None
         self.recording = False
         self.record_thread = None
-        self.audio_queue = queue.Queue()
+        # 发送循环卡住时只保留最近的录音，内存有上限
+        self.buffer = PCMRingBuffer(
+            RECORD_BUFFER_MS, overflow=OVERFLOW_DROP_OLDEST, track_underruns=False, sample_rate=SAMPLE_RATE
+        )
         self._lock = threading.Lock()
 
-    def start(self):
+    def open(self):
+        """打开输入设备（不开始录制，可以在初始化阶段提前执行）"""
         with self._lock:
-            if self.recording:
+            if self.stream is not None:
                 return
+            import pyaudio
+
+            if self.audio is None:
+                self.audio = pyaudio.PyAudio()
             self.stream = self.audio.open(
                 format=FORMAT,
                 channels=CHANNELS,
@@ -200,6 +232,12 @@ class AudioRecorder:
                 input=True,
                 frames_per_buffer=CHUNK_SIZE,
             )
+
+    def start(self):
+        self.open()
+        with self._lock:
+            if self.recording:
+                return
             self.recording = True
             self.record_thread = threading.Thread(target=self._record_loop, daemon=True)
             self.record_thread.start()
@@ -208,16 +246,17 @@ class AudioRecorder:
         while self.recording:
             try:
                 audio_data = self.stream.read(CHUNK_SIZE, exception_on_overflow=False)
-                self.audio_queue.put(audio_data)
+                self.buffer.write(audio_data)
             except Exception as e:
                 if self.recording:
                     logger.error(f"❌ 录制错误: {e}")
 
-    def get_audio(self) -> Optional[bytes]:
-        try:
-            return self.audio_queue.get_nowait()
-        except queue.Empty:
-            return None
+    def get_audio(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        """取一块录音；timeout 为 None 时不等待，否则最多阻塞 timeout 秒"""
+        return self.buffer.read(CHUNK_BYTES, 0 if timeout is None else timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.buffer.stats()
 
     def stop(self):
         with self._lock:
@@ -230,43 +269,8 @@ class AudioRecorder:
                 self.stream.close()
             except Exception:
                 pass
-        self.audio.terminate()
-
-
-class ConversationContext:
-    """对话上下文管理器"""
-
-    def __init__(self, max_history: int = 5):
-        self.max_history = max_history
-        self.qa_history: List[Dict[str, str]] = []  # 问答历史
-        self.current_topic = ""  # 当前话题
-
-    def add_qa(self, question: str, answer: str):
-        """添加问答记录"""
-        self.qa_history.append({"question": question, "answer": answer})
-        # 保持历史记录不超过上限
-        if len(self.qa_history) > self.max_history:
-            self.qa_history.pop(0)
-
-    def get_context_summary(self) -> str:
-        """获取上下文摘要（用于 RAG 检索）"""
-        if not self.qa_history:
-            return "开始健康咨询访谈"
-
-        # 返回最近的对话内容
-        recent_qa = self.qa_history[-2:]  # 最近2轮
-        context_parts = []
-        for qa in recent_qa:
-            context_parts.append(f"问：{qa['question']}")
-            context_parts.append(f"答：{qa['answer']}")
-
-        return " ".join(context_parts)
-
-    def get_last_answer(self) -> Optional[str]:
-        """获取最后一次回答"""
-        if self.qa_history:
-            return self.qa_history[-1]["answer"]
-        return None
+        if self.audio is not None:
+            self.audio.terminate()
 
 
 class RAGInterviewClient:
@@ -281,6 +285,11 @@ class RAGInterviewClient:
         vad_threshold: float = 0.5,
         vad_silence_duration_ms: int = 700,
         max_questions: int = 10,  # 最多问几个问题
+        uplink_frame_ms: float = DEFAULT_FRAME_MS,  # 上行音频每帧时长
+        uplink_max_latency_ms: float = DEFAULT_MAX_LATENCY_MS,  # 录音最多缓冲多久就发送
+        voice_gate: bool = False,  # 本地 VAD：静音不上传，只发保活（默认关闭，命令行 --voice-gate 开启）
+        voice_gate_pre_roll_ms: float = DEFAULT_PRE_ROLL_MS,  # 开始说话前补发的音频
+        voice_gate_hangover_ms: Optional[float] = None,  # 说话后继续上传多久（默认服务端静音时长 + 300ms）
     ):
         self.api_key = api_key
         self.model = model
@@ -293,8 +302,9 @@ class RAGInterviewClient:
         self.question_rag = QuestionRAG(question_file)
         self.session_recorder: Optional[SessionRecorder] = None
 
-        # 对话上下文
-        self.context = ConversationContext()
+        # 本场访谈的检索会话（已提问记录 + 对话上下文，引擎本身可被多场访谈共享）
+        self.retrieval = self.question_rag.new_session()
+        self.context = self.retrieval.context
 
         # 当前问题状态
         self.current_question: Optional[Question] = None
@@ -304,11 +314,18 @@ class RAGInterviewClient:
 
         # WebSocket 和音频
         self.ws = None
+        # 单写者出站通道：控制事件优先，音频在后（ws.send 只在写线程中调用）
+        self.outbound = OutboundChannel(self._write, backlog=self._send_backlog)
         self.running = False
         self.connection_state = ConnectionState.DISCONNECTED
 
         self.player = AudioPlayer()
         self.recorder = AudioRecorder()
+        # 上行：录音小块合并成帧后发送
+        self.uplink = FrameCoalescer(uplink_frame_ms, uplink_max_latency_ms, sample_rate=SAMPLE_RATE)
+        self.voice_gate = VoiceGate.for_server_vad(
+            vad_silence_duration_ms, voice_gate_pre_roll_ms, voice_gate_hangover_ms, sample_rate=SAMPLE_RATE
+        ) if voice_gate else None
 
         self.receive_thread = None
         self.send_thread = None
@@ -319,6 +336,10 @@ class RAGInterviewClient:
         # 同步事件
         self.answer_received = threading.Event()
         self.ai_finished_speaking = threading.Event()
+        self.session_ready = threading.Event()  # 收到 session.updated
+
+        # 初始化流水线（记录各阶段耗时）
+        self.init_pipeline: Optional[InitPipeline] = None
 
         # 连接质量监控
         self.connection_errors = 0
@@ -326,6 +347,8 @@ class RAGInterviewClient:
 
     def connect(self):
         """建立 WebSocket 连接"""
+        from websocket import create_connection
+
         url = f"{WS_URL}?model={self.model}"
         headers = {"Authorization": f"Bearer {self.api_key}"}
 
@@ -333,12 +356,15 @@ class RAGInterviewClient:
         self.connection_state = ConnectionState.CONNECTING
 
         try:
-            self.ws = create_connection(url, header=headers, timeout=10)
+            with startup_profiler.phase("WebSocket 握手"):
+                self.ws = create_connection(url, header=headers, timeout=10)
             self.connection_state = ConnectionState.CONNECTED
+            self.outbound.start()
             logger.info(f"✅ WebSocket 连接成功！")
 
             # 初始配置
-            self._configure_initial_session()
+            with startup_profiler.phase("会话配置"):
+                self._configure_initial_session()
 
         except Exception as e:
             self.connection_state = ConnectionState.ERROR
@@ -346,50 +372,27 @@ class RAGInterviewClient:
 
     def _configure_initial_session(self):
         """初始会话配置"""
-        instructions = """你是一个专业、友好的健康咨询助手。
-
-你的任务：
-1. 根据提供的参考问题，用自然、亲切的语气与用户交流
-2. 可以适当调整问题表述，使对话更自然流畅
-3. 在问题之间添加简短的过渡语（如"好的，明白了"、"接下来"等）
-4. 如果用户回答不够详细，可以追问澄清
-5. 保持专业但不失温度，让用户感到舒适
-
-重要原则：
-- 每次只问一个问题
-- 问题内容必须基于提供的参考，但表述可以灵活
-- 说话要简洁，不要啰嗦
-- 认真倾听用户的回答，不要急于提下一个问题
-"""
-
-        config = {
-            "type": "session.update",
-            "session": {
-                "modalities": ["text", "audio"],
-                "instructions": instructions,
-                "input_audio_format": "pcm16",
-                "output_audio_format": "pcm16",
-                "input_audio_transcription": {"model": "whisper-1"},
-                "turn_detection": {
-                    "type": "server_vad",
-                    "threshold": self.vad_threshold,
-                    "prefix_padding_ms": 300,
-                    "silence_duration_ms": self.vad_silence_duration_ms,
-                },
-                "temperature": self.temperature,
-                "max_response_output_tokens": 4096,
-            },
-        }
+        config = session_update_event(
+            vad_threshold=self.vad_threshold,
+            vad_silence_duration_ms=self.vad_silence_duration_ms,
+            temperature=self.temperature,
+        )
         self._send_event(config)
         logger.info(f"⚙️  初始会话配置完成（RAG 灵活模式）")
 
     def _send_event(self, event: Dict[str, Any]):
-        """发送事件"""
+        """发送事件（放入出站通道的控制通道，排在音频前面）"""
+        self.outbound.send_control(json.dumps(event))
+
+    def _write(self, text: str):
+        """实际发送一条消息（只在出站通道的写线程中调用；发送失败由出站通道记录）"""
         if self.connection_state == ConnectionState.CONNECTED and self.ws:
-            try:
-                self.ws.send(json.dumps(event))
-            except Exception as e:
-                logger.error(f"❌ 发送消息失败: {e}")
+            self.ws.send(text)
+
+    def _send_backlog(self) -> Optional[int]:
+        """WebSocket 底层 socket 发送队列中的积压字节数"""
+        sock = self.ws.sock if self.ws is not None else None
+        return socket_send_backlog(sock) if sock is not None else 0
 
     def start_interview(self):
         """开始访谈"""
@@ -397,11 +400,30 @@ class RAGInterviewClient:
         logger.info(f"🎤 客户访谈系统 - RAG 增强版（智能 + 灵活）")
         logger.info(f"=" * 60)
 
-        # 加载和索引问题
-        if not self.question_rag.load_and_index_questions():
+        # 并行初始化：问题库 / 索引、WebSocket、音频设备互不依赖；
+        # 嵌入模型放到后台（快照已包含开场查询向量，第一轮检索不需要模型）
+        self.init_pipeline = InitPipeline()
+        self.init_pipeline.add("加载问题库", self.question_rag.load_and_index_questions)
+        self.init_pipeline.add("加载嵌入模型", self.question_rag.preload_model, wait=False)
+        if self.connection_state != ConnectionState.CONNECTED:
+            self.init_pipeline.add("WebSocket 连接", self.connect)
+        self.init_pipeline.add("打开音频设备", self._open_audio_devices)
+
+        try:
+            results = self.init_pipeline.run()
+        except InitTaskError as e:
+            logger.error(f"❌ 初始化失败（{e.task}）: {e.error}")
+            self.stop()
+            return
+
+        if not results["加载问题库"]:
             logger.error("❌ 加载问题失败，无法开始访谈")
+            self.stop()
             return
 
+        timings = self.init_pipeline.timings()
+        logger.info(f"⏱️  初始化完成: {timings['wall_ms']:.0f}ms（串行需 {timings['serial_ms']:.0f}ms）")
+
         # 创建会话记录器
         self.session_recorder = SessionRecorder()
 
@@ -416,7 +438,7 @@ class RAGInterviewClient:
 
         self.running = True
 
-        # 启动音频播放和录制
+        # 启动音频播放和录制（设备已在初始化阶段打开）
         self.player.start()
         self.recorder.start()
 
@@ -427,8 +449,8 @@ class RAGInterviewClient:
         self.receive_thread.start()
         self.send_thread.start()
 
-        # 等待连接稳定
-        time.sleep(1)
+        # 等待会话配置生效（最多 1 秒）
+        self.session_ready.wait(timeout=1)
 
         try:
             # 发送欢迎语
@@ -456,13 +478,21 @@ class RAGInterviewClient:
         finally:
             self.stop()
 
+    def _open_audio_devices(self):
+        """打开音频输入输出设备（不开始播放和录制）"""
+        self.player.open()
+        self.recorder.open()
+
     def _retrieve_next_question(self) -> Optional[Question]:
         """根据上下文检索下一个问题"""
         context = self.context.get_context_summary()
         logger.info(f"\n🔍 检索上下文: {context[:80]}...")
 
-        question = self.question_rag.retrieve_next_question(
-            context=context, n_results=3, exclude_asked=True
+        question = self.retrieval.retrieve_next_question(
+            context=context,
+            n_results=3,
+            exclude_asked=True,
+            last_answer=self.context.get_last_answer()
         )
 
         if question:
@@ -472,25 +502,11 @@ class RAGInterviewClient:
 
     def _say_welcome(self):
         """播放欢迎语"""
-        welcome_msg = "您好，欢迎参加健康状况咨询。接下来我会问您几个关于健康的问题，请如实回答。"
-        logger.info(f"🤖 欢迎: {welcome_msg}\n")
+        logger.info(f"🤖 欢迎: {WELCOME_MESSAGE}\n")
+        startup_profiler.mark_first_prompt()
 
         # 触发 AI 说欢迎语
-        self._send_event(
-            {
-                "type": "conversation.item.create",
-                "item": {
-                    "type": "message",
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "input_text",
-                            "text": f"请用友好的语气说：{welcome_msg}",
-                        }
-                    ],
-                },
-            }
-        )
+        self._send_event(user_text_event(welcome_prompt()))
         self._send_event({"type": "response.create"})
 
         # 等待 AI 说完
@@ -525,42 +541,11 @@ class RAGInterviewClient:
             time.sleep(0.5)
 
         # 构建提问指令（灵活版）
-        last_answer = self.context.get_last_answer()
-
-        if last_answer and self.questions_asked > 0:
-            # 有上下文，添加过渡
-            prompt = f"""[上一个问题的回答是: {last_answer}]
-
-现在请基于以下参考问题，用自然的方式继续提问：
-参考问题: {question.question}
-
-要求：
-1. 可以先简短地回应上一个回答（如"好的，明白了"）
-2. 然后提出新问题，表述要自然流畅
-3. 整体保持简洁，不要啰嗦
-"""
-        else:
-            # 第一个问题，直接问
-            prompt = f"""请基于以下参考问题，用自然、友好的方式提问：
-参考问题: {question.question}
-
-要求：
-1. 保持问题核心内容不变
-2. 表述要自然亲切
-3. 简洁明了
-"""
+        last_answer = self.context.get_last_answer() if self.questions_asked > 0 else None
+        prompt = question_prompt(question, last_answer)
 
         # 发送提问请求
-        self._send_event(
-            {
-                "type": "conversation.item.create",
-                "item": {
-                    "type": "message",
-                    "role": "user",
-                    "content": [{"type": "input_text", "text": prompt}],
-                },
-            }
-        )
+        self._send_event(user_text_event(prompt))
         self._send_event({"type": "response.create"})
 
         # 等待 AI 提问完成
@@ -584,11 +569,8 @@ class RAGInterviewClient:
                     transcript=self.current_transcript,
                 )
 
-                # 更新上下文
-                self.context.add_qa(question.question, self.current_transcript)
-
-                # 标记问题已问过
-                self.question_rag.mark_question_asked(question.id)
+                # 更新上下文，标记问题已问过
+                self.retrieval.record_answer(question, self.current_transcript)
 
                 # 检查是否需要追问
                 self._check_and_followup(question, self.current_transcript)
@@ -643,21 +625,7 @@ class RAGInterviewClient:
             time.sleep(0.5)
 
         # 发送追问
-        self._send_event(
-            {
-                "type": "conversation.item.create",
-                "item": {
-                    "type": "message",
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "input_text",
-                            "text": f"用简短、自然的方式追问: {followup_text}",
-                        }
-                    ],
-                },
-            }
-        )
+        self._send_event(user_text_event(followup_prompt(followup_text)))
         self._send_event({"type": "response.create"})
 
         # 等待 AI 说完
@@ -685,24 +653,9 @@ class RAGInterviewClient:
         logger.info(f"✅ 访谈已完成！")
         logger.info(f"=" * 60 + "\n")
 
-        completion_msg = "感谢您的配合，健康咨询已完成。祝您身体健康！"
-        logger.info(f"🤖 结束语: {completion_msg}\n")
-
-        self._send_event(
-            {
-                "type": "conversation.item.create",
-                "item": {
-                    "type": "message",
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "input_text",
-                            "text": f"用友好的语气说：{completion_msg}",
-                        }
-                    ],
-                },
-            }
-        )
+        logger.info(f"🤖 结束语: {COMPLETION_MESSAGE}\n")
+
+        self._send_event(user_text_event(completion_prompt()))
         self._send_event({"type": "response.create"})
         time.sleep(3)
 
@@ -714,6 +667,14 @@ class RAGInterviewClient:
                     "total_questions_in_db": len(self.question_rag.questions),
                     "questions_asked": self.questions_asked,
                     "answered": self.session_recorder.get_answer_count(),
+                    "query_cache": self.question_rag.query_cache.stats(),
+                    "retrieval": self.retrieval.retrieval_stats.summary(),
+                    "uplink": self.uplink.stats(),
+                    "voice_gate": self.voice_gate.stats() if self.voice_gate else None,
+                    "outbound": self.outbound.stats(),
+                    "audio_buffers": {"player": self.player.stats(), "recorder": self.recorder.stats()},
+                    "startup": startup_profiler.summary(),
+                    "init_phases": self.init_pipeline.timings() if self.init_pipeline else None,
                 }
             )
 
@@ -721,6 +682,9 @@ class RAGInterviewClient:
         logger.info(f"   问题库大小: {len(self.question_rag.questions)}")
         logger.info(f"   主问题数: {self.questions_asked}")
         logger.info(f"   有效回答: {self.session_recorder.get_answer_count()}")
+        if self.voice_gate:
+            gate = self.voice_gate.stats()
+            logger.info(f"   上行音频: {gate['bytes_out'] / 1024:.0f}KB / {gate['bytes_in'] / 1024:.0f}KB（静音过滤节省 {gate['reduction']:.0%}）")
 
         # 统计追问次数
         followup_count = 0
@@ -737,20 +701,17 @@ class RAGInterviewClient:
         logger.info(f"   • 追问: 当回答不完整时的补充提问（不单独计数）")
 
     def _send_loop(self):
-        """发送音频数据循环（带重试机制）"""
+        """发送音频数据循环：阻塞等待录音，合并成帧后发送（带重试机制）"""
         error_count = 0
         max_errors = 5
 
         while self.running:
             try:
-                audio_data = self.recorder.get_audio()
-                if audio_data:
-                    encoded = base64.b64encode(audio_data).decode("ascii")
-                    event = {"type": "input_audio_buffer.append", "audio": encoded}
-                    self._send_event(event)
+                for frame in iter_frames(
+                    self.recorder.get_audio, self.uplink, lambda: self.running, gate=self.voice_gate
+                ):
+                    self.outbound.send_audio(append_event(frame))
                     error_count = 0  # 成功发送，重置错误计数
-                else:
-                    time.sleep(0.01)
             except Exception as e:
                 error_count += 1
                 if self.running:
@@ -764,6 +725,8 @@ class RAGInterviewClient:
 
     def _receive_loop(self):
         """接收响应循环（带重试机制）"""
+        from websocket import WebSocketConnectionClosedException
+
         error_count = 0
         max_errors = 3
         last_activity = time.time()
@@ -793,7 +756,7 @@ class RAGInterviewClient:
                     logger.info(f"✅ 会话已创建 (ID: {session_id[:8]}...)")
 
                 elif event_type == "session.updated":
-                    pass
+                    self.session_ready.set()
 
                 elif event_type == "input_audio_buffer.speech_started":
                     self.user_speaking = True
@@ -901,6 +864,7 @@ class RAGInterviewClient:
             self.receive_thread.join(timeout=1.0)
         if self.send_thread and self.send_thread.is_alive():
             self.send_thread.join(timeout=1.0)
+        self.outbound.close()
 
         if self.ws:
             try:
@@ -925,6 +889,8 @@ def main():
 
     # 检查音频设备
     try:
+        import pyaudio
+
         audio = pyaudio.PyAudio()
         logger.info(f"🎵 音频设备初始化成功")
         logger.info(f"   输入设备: {audio.get_default_input_device_info()['name']}")
@@ -943,10 +909,11 @@ def main():
         vad_threshold=0.5,
         vad_silence_duration_ms=700,
         max_questions=10,  # 最多问10个问题
+        voice_gate="--voice-gate" in sys.argv,  # 本地 VAD（默认关闭）
     )
 
     try:
-        client.connect()
+        # start_interview 会与问题库加载、音频设备初始化并行建立连接
         client.start_interview()
     except Exception as e:
         logger.error(f"\n❌ 错误: {e}")
@@ -0,0 +1,753 @@
+"""
+异步多会话访谈服务
+一个进程、一个事件循环同时运行多场 RAG 访谈（呼叫中心场景：每台机器几百通并发电话，
+而不是每通电话一个进程）：
+
+- 每场访谈一个 AsyncInterviewSession：异步 WebSocket 连接，接收 / 发送各是一个协程，
+  等待用 asyncio.Event，不占用线程
+- 所有访谈共享进程内的嵌入模型和问题索引（QuestionBankRegistry），每场访谈一个 RetrievalSession
+- 会话 ID 全局唯一（时间戳 + 随机后缀），会话目录互不冲突
+- 音频不经过本机声卡：电话网关把来电者的 PCM16（24kHz 单声道）放进 CallAudio 的上行队列，
+  从下行队列取 AI 语音
+- 检索、加载问题库和保存会话记录是阻塞调用，放到线程池执行，不阻塞事件循环
+
+依赖：pip install websockets
+
+    server = InterviewServer(API_KEY, question_files=["questions.yaml"], max_sessions=200)
+    await server.start()
+    audio = CallAudio()          # 电话网关调用 audio.feed(pcm) / await audio.downlink.get()
+    summary = await server.run_interview(audio)
+
+压测（N 路并发模拟来电，来电者音频取自 WAV 文件或静音）：
+    python run_interview_server.py --calls 50 --audio answer.wav --backend numpy
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Sequence, Set
+
+from src.core.bank_registry import QuestionBankRegistry, bank_name
+from src.core.question_bank import Question
+from src.core.question_manager import SessionRecorder, new_session_id
+from src.core.question_rag import analyze_answer_completeness
+from src.clients.rag_prompts import (
+    WELCOME_MESSAGE, COMPLETION_MESSAGE, session_update_event, user_text_event,
+    question_prompt, welcome_prompt, followup_prompt, completion_prompt,
+)
+from src.utils.audio_uplink import FrameCoalescer, append_event, aiter_frames, DEFAULT_FRAME_MS, DEFAULT_MAX_LATENCY_MS
+from src.utils.voice_gate import VoiceGate, DEFAULT_PRE_ROLL_MS
+from src.utils.outbound import AsyncOutboundChannel, transport_send_backlog
+
+# websockets 在首次连接时才导入
+
+# 配置信息
+API_KEY = os.getenv("STEPFUN_API_KEY", "your-api-key-here")
+WS_URL = "wss://api.stepfun.com/v1/realtime"
+DEFAULT_MODEL = "step-audio-2"
+
+# 音频配置（与客户端一致：PCM16，24kHz 单声道，每块 20ms）
+SAMPLE_RATE = 24000
+CHUNK_SIZE = 480
+CHUNK_SECONDS = CHUNK_SIZE / SAMPLE_RATE
+
+DEFAULT_MAX_SESSIONS = int(os.getenv("INTERVIEW_MAX_SESSIONS", 200))
+# 检索 / 加载 / 保存线程池大小（查询向量化在共享模型上互斥执行，线程多了也只是排队）
+DEFAULT_RETRIEVAL_WORKERS = 8
+# 每通电话上下行各最多缓存的音频块数（20ms 一块，500 块 = 10 秒）
+CALL_AUDIO_MAX_CHUNKS = 500
+
+logger = logging.getLogger("InterviewServer")
+
+
+class CallAudio:
+    """一通电话的双向音频（PCM16，24kHz 单声道），由电话网关填充和读取"""
+
+    def __init__(self, max_chunks: int = CALL_AUDIO_MAX_CHUNKS):
+        self.uplink: asyncio.Queue = asyncio.Queue(maxsize=max_chunks)  # 来电者 → 服务，None 表示挂断
+        self.downlink: asyncio.Queue = asyncio.Queue(maxsize=max_chunks)  # AI 语音 → 来电者
+        self.uplink_dropped = 0
+        self.downlink_dropped = 0
+        self.hung_up = False
+
+    def feed(self, pcm: bytes):
+        """来电者的一块音频（队列满时丢弃最旧的一块）"""
+        if self._put_latest(self.uplink, pcm):
+            self.uplink_dropped += 1
+
+    def hang_up(self):
+        """来电者挂断"""
+        self.hung_up = True
+        self._put_latest(self.uplink, None)
+
+    def play(self, pcm: bytes):
+        """AI 的一块语音（网关来不及取时丢弃最旧的一块）"""
+        if self._put_latest(self.downlink, pcm):
+            self.downlink_dropped += 1
+
+    def clear_playback(self):
+        """清空未播放的 AI 语音（来电者打断时）"""
+        while not self.downlink.empty():
+            self.downlink.get_nowait()
+
+    @staticmethod
+    def _put_latest(q: asyncio.Queue, item) -> bool:
+        """放入队列，满时先丢弃最旧的一项，返回是否丢弃了数据"""
+        dropped = False
+        if q.full():
+            q.get_nowait()
+            dropped = True
+        q.put_nowait(item)
+        return dropped
+
+
+class _SessionLog(logging.LoggerAdapter):
+    """日志前加会话 ID（几百场访谈的日志混在一起）"""
+
+    def process(self, msg, kwargs):
+        return f"[{self.extra['session_id']}] {msg}", kwargs
+
+
+class AsyncInterviewSession:
+    """一场 RAG 访谈（RAGInterviewClient 的 asyncio 版本，模型和索引由服务共享）"""
+
+    def __init__(
+        self,
+        server: "InterviewServer",
+        engine,
+        audio: CallAudio,
+        session_id: str,
+        bank: str
+    ):
+        """
+        Args:
+            server: 所属的访谈服务（提供 API key、会话参数和线程池）
+            engine: 共享的检索引擎（QuestionRAG）
+            audio: 本通电话的音频
+            session_id: 全局唯一的会话 ID（同时是会话目录名）
+            bank: 问题库名称
+        """
+        self.server = server
+        self.engine = engine
+        self.audio = audio
+        self.session_id = session_id
+        self.bank = bank
+        self.log = _SessionLog(logger, {"session_id": session_id})
+
+        # 本场访谈的检索会话（已提问记录 + 对话上下文）
+        self.retrieval = engine.new_session(session_id)
+        self.context = self.retrieval.context
+        self.session_recorder: Optional[SessionRecorder] = None
+        # 上行：来电音频小块合并成帧后发送
+        self.uplink = FrameCoalescer(server.uplink_frame_ms, server.uplink_max_latency_ms, sample_rate=SAMPLE_RATE)
+        self.voice_gate = server.new_voice_gate()
+
+        # 当前问题状态
+        self.current_question: Optional[Question] = None
+        self.waiting_for_answer = False
+        self.current_transcript = ""
+        self.questions_asked = 0
+
+        # WebSocket（ws.send 只在出站通道的写协程中调用，控制事件优先于音频）
+        self.ws = None
+        self.outbound = AsyncOutboundChannel(
+            self._write, backlog=lambda: transport_send_backlog(self.ws) if self.ws else 0,
+            name=f"{session_id}-writer",
+        )
+        self.running = False
+        self.is_ai_speaking = False
+        self.user_speaking = False
+
+        # 同步事件
+        self.answer_received = asyncio.Event()
+        self.ai_finished_speaking = asyncio.Event()
+        self.session_ready = asyncio.Event()  # 收到 session.updated
+
+        self.status = "created"
+        self.error: Optional[str] = None
+        self.started_at = 0.0
+        self.finished_at = 0.0
+        self.connect_ms = 0.0
+
+    async def run(self) -> Dict[str, Any]:
+        """进行整场访谈，返回会话摘要"""
+        self.started_at = time.time()
+        self.status = "running"
+        tasks: List[asyncio.Task] = []
+        try:
+            await self._connect()
+            self.running = True
+            self.session_recorder = SessionRecorder(self.session_id)
+            tasks = [
+                asyncio.create_task(self._receive_loop(), name=f"{self.session_id}-recv"),
+                asyncio.create_task(self._send_loop(), name=f"{self.session_id}-send"),
+            ]
+
+            # 等待会话配置生效（最多 1 秒）
+            await self._wait(self.session_ready, 1)
+
+            await self._say_welcome()
+
+            # 智能提问循环
+            while self.running and self.questions_asked < self.server.max_questions:
+                next_question = await self._retrieve_next_question()
+                if next_question is None:
+                    self.log.info("✅ 所有相关问题都已提问")
+                    break
+                if await self._ask_question(next_question):
+                    self.questions_asked += 1
+
+            if self.running:
+                await self._complete_interview()
+                self.status = "completed"
+            else:
+                self.status = "aborted"
+
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+            self.log.error(f"❌ 访谈失败: {e}")
+
+        finally:
+            self.running = False
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self.outbound.close()
+            if self.ws is not None:
+                try:
+                    await self.ws.close()
+                except Exception:
+                    pass
+            self.finished_at = time.time()
+            await self._save_session()
+
+        return self.summary()
+
+    def summary(self) -> Dict[str, Any]:
+        """会话摘要"""
+        end = self.finished_at or time.time()
+        return {
+            "session_id": self.session_id,
+            "bank": self.bank,
+            "status": self.status,
+            "error": self.error,
+            "questions_asked": self.questions_asked,
+            "answered": self.session_recorder.get_answer_count() if self.session_recorder else 0,
+            "duration_seconds": end - self.started_at if self.started_at else 0.0,
+            "connect_ms": self.connect_ms,
+            "uplink_dropped": self.audio.uplink_dropped,
+            "downlink_dropped": self.audio.downlink_dropped,
+            "uplink": self.uplink.stats(),
+            "voice_gate": self.voice_gate.stats() if self.voice_gate else None,
+            "outbound": self.outbound.stats(),
+            "retrieval": self.retrieval.summary(),
+        }
+
+    # ==================== 连接与收发 ====================
+
+    async def _connect(self):
+        """建立异步 WebSocket 连接并发送初始配置"""
+        from websockets.asyncio.client import connect
+
+        url = f"{self.server.ws_url}?model={self.server.model}"
+        headers = {"Authorization": f"Bearer {self.server.api_key}"}
+
+        start = time.perf_counter()
+        try:
+            self.ws = await connect(url, additional_headers=headers, open_timeout=10, max_size=None)
+        except Exception as e:
+            raise Exception(f"连接失败: {e}")
+        self.connect_ms = (time.perf_counter() - start) * 1000
+        self.log.info(f"✅ WebSocket 连接成功（{self.connect_ms:.0f}ms）")
+        self.outbound.start()
+
+        self._send_event(session_update_event(
+            vad_threshold=self.server.vad_threshold,
+            vad_silence_duration_ms=self.server.vad_silence_duration_ms,
+            temperature=self.server.temperature,
+        ))
+
+    def _send_event(self, event: Dict[str, Any]):
+        """发送事件（放入出站通道的控制通道，排在音频前面）"""
+        self.outbound.send_control(json.dumps(event))
+
+    async def _write(self, text: str):
+        """实际发送一条消息（只在出站通道的写协程中调用；发送失败由出站通道记录）"""
+        if self.ws is None:
+            return
+        from websockets.exceptions import ConnectionClosed
+
+        try:
+            await self.ws.send(text)
+        except ConnectionClosed:
+            self._abort()
+            raise
+
+    async def _send_loop(self):
+        """把来电者的音频合并成帧发送到 Realtime API（挂断时结束访谈）"""
+        async for frame in aiter_frames(self.audio.uplink, self.uplink, gate=self.voice_gate):
+            await self.outbound.send_audio(append_event(frame))
+        if self.running:
+            self.log.info("📴 来电者已挂断")
+            self._abort()
+
+    async def _receive_loop(self):
+        """接收响应"""
+        from websockets.exceptions import ConnectionClosed
+
+        try:
+            async for message in self.ws:
+                try:
+                    event = json.loads(message)
+                except json.JSONDecodeError as e:
+                    self.log.error(f"⚠️  JSON 解析错误: {e}")
+                    continue
+                self._handle_event(event)
+        except ConnectionClosed as e:
+            if self.running:
+                self.log.error(f"❌ WebSocket 连接已关闭: {e}")
+        finally:
+            self._abort()
+
+    def _handle_event(self, event: Dict[str, Any]):
+        """处理一个服务端事件"""
+        event_type = event.get("type")
+
+        if event_type == "session.updated":
+            self.session_ready.set()
+
+        elif event_type == "input_audio_buffer.speech_started":
+            self.user_speaking = True
+            # 来电者打断时不再播放尚未送出的 AI 语音
+            self.audio.clear_playback()
+
+        elif event_type == "input_audio_buffer.speech_stopped":
+            self.user_speaking = False
+
+        elif event_type == "conversation.item.input_audio_transcription.completed":
+            transcript = event.get("transcript", "").strip()
+            # 忽略空转录和过短的转录（可能是误触发）
+            if len(transcript) < 2:
+                self.log.debug(f"⚠️  忽略无效转录: '{transcript}'")
+                return
+            if self.waiting_for_answer:
+                self.log.info(f"👤 客户: {transcript}")
+                self.current_transcript = transcript
+                self.answer_received.set()
+
+        elif event_type == "response.created":
+            self.is_ai_speaking = True
+
+        elif event_type == "response.audio.delta":
+            if self.is_ai_speaking and not self.user_speaking:
+                audio_delta = event.get("delta", "")
+                if audio_delta:
+                    self.audio.play(base64.b64decode(audio_delta))
+
+        elif event_type == "response.done":
+            self.is_ai_speaking = False
+            self.ai_finished_speaking.set()
+
+        elif event_type == "error":
+            error_data = event.get("error", {})
+            self.log.error(f"❌ API 错误 [{error_data.get('type', '')}]: {error_data.get('message', 'Unknown error')}")
+
+    def _abort(self):
+        """连接断开或来电者挂断：结束访谈并唤醒所有等待"""
+        self.running = False
+        self.answer_received.set()
+        self.ai_finished_speaking.set()
+        self.session_ready.set()
+
+    @staticmethod
+    async def _wait(event: asyncio.Event, timeout: float) -> bool:
+        """等待事件，超时返回 False"""
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    # ==================== 访谈流程 ====================
+
+    async def _retrieve_next_question(self) -> Optional[Question]:
+        """根据上下文检索下一个问题（在线程池中执行）"""
+        question = await self.server.run_blocking(self.retrieval.retrieve_next_question)
+        if question:
+            self.log.info(f"✅ 检索到问题 #{question.id}: {question.question}")
+        return question
+
+    async def _say_welcome(self):
+        """播放欢迎语"""
+        self.log.info(f"🤖 欢迎: {WELCOME_MESSAGE}")
+        await self._speak(welcome_prompt(), timeout=10)
+        await asyncio.sleep(1)
+
+    async def _speak(self, prompt: str, timeout: float):
+        """让 AI 说一段话并等待说完"""
+        self.ai_finished_speaking.clear()
+        self._send_event(user_text_event(prompt))
+        self._send_event({"type": "response.create"})
+        await self._wait(self.ai_finished_speaking, timeout)
+
+    async def _wait_for_previous_response(self):
+        """等待上一个响应完成"""
+        if self.is_ai_speaking:
+            await self._wait(self.ai_finished_speaking, 5)
+            await asyncio.sleep(0.5)
+
+    async def _ask_question(self, question: Question) -> bool:
+        """
+        RAG 模式提问：AI 灵活表述问题
+        返回：是否成功获得回答
+        """
+        self.current_question = question
+        self.waiting_for_answer = True
+        self.current_transcript = ""
+        self.answer_received.clear()
+
+        self.log.info(f"📝 进度: {self.questions_asked + 1}/{self.server.max_questions}，参考问题: {question.question}")
+
+        await self._wait_for_previous_response()
+        last_answer = self.context.get_last_answer() if self.questions_asked > 0 else None
+        await self._speak(question_prompt(question, last_answer), timeout=15)
+        await asyncio.sleep(0.3)
+
+        # 等待用户回答
+        timeout = 90
+        answered = await self._wait(self.answer_received, timeout)
+        self.waiting_for_answer = False
+        if not answered:
+            self.log.warning(f"⏰ 回答超时（{timeout}秒内未收到回答）")
+            return False
+        if not self.current_transcript:
+            return False
+
+        answer = self.current_transcript
+        self.session_recorder.add_answer(
+            question_id=question.id,
+            question_text=question.question,
+            transcript=answer,
+        )
+        # 更新上下文，标记问题已问过
+        self.retrieval.record_answer(question, answer)
+
+        await self._check_and_followup(question, answer)
+        await asyncio.sleep(1.0)
+        return True
+
+    async def _check_and_followup(self, question: Question, answer: str):
+        """检查回答并决定是否追问"""
+        completeness = analyze_answer_completeness(question.question, answer)
+        if completeness['is_complete'] or completeness['confidence'] <= 0.6:
+            return
+
+        follow_ups = self.engine.get_follow_up_questions(question, answer, n_results=1)
+        if not follow_ups or not self.running:
+            return
+
+        self.log.info(f"🔄 追问（不计入问题总数）: {follow_ups[0]}")
+        self.waiting_for_answer = True
+        self.current_transcript = ""
+        self.answer_received.clear()
+
+        await self._wait_for_previous_response()
+        await self._speak(followup_prompt(follow_ups[0]), timeout=10)
+
+        if await self._wait(self.answer_received, 60) and self.current_transcript:
+            # 将追问回答追加到原问题的记录中
+            answers = self.session_recorder.answers
+            if answers:
+                answers[-1].transcript += f" [追问回答: {self.current_transcript}]"
+        self.waiting_for_answer = False
+
+    async def _complete_interview(self):
+        """完成访谈"""
+        self.log.info(f"✅ 访谈已完成，结束语: {COMPLETION_MESSAGE}")
+        self._send_event(user_text_event(completion_prompt()))
+        self._send_event({"type": "response.create"})
+        await asyncio.sleep(3)
+
+    async def _save_session(self):
+        """保存会话记录（在线程池中写文件）"""
+        if self.session_recorder is None:
+            return
+        info = {
+            "version": "rag_server",
+            "status": self.status,
+            "bank": self.bank,
+            "total_questions_in_db": len(self.retrieval.version.bank),
+            "questions_asked": self.questions_asked,
+            "answered": self.session_recorder.get_answer_count(),
+            "retrieval": self.retrieval.retrieval_stats.summary(),
+            "uplink": self.uplink.stats(),
+            "voice_gate": self.voice_gate.stats() if self.voice_gate else None,
+            "outbound": self.outbound.stats(),
+            "audio": {
+                "uplink_dropped": self.audio.uplink_dropped,
+                "downlink_dropped": self.audio.downlink_dropped,
+            },
+        }
+        try:
+            await self.server.run_blocking(self.session_recorder.save_session, info)
+        except Exception as e:
+            self.log.error(f"❌ 保存会话记录失败: {e}")
+
+
+class InterviewServer:
+    """在一个事件循环中运行多场访谈，共享嵌入模型和问题索引"""
+
+    def __init__(
+        self,
+        api_key: str,
+        question_files: Sequence[str] = ("questions.yaml",),
+        model: str = DEFAULT_MODEL,
+        temperature: float = 0.7,
+        vad_threshold: float = 0.5,
+        vad_silence_duration_ms: int = 700,
+        max_questions: int = 10,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        retrieval_workers: int = DEFAULT_RETRIEVAL_WORKERS,
+        registry: Optional[QuestionBankRegistry] = None,
+        ws_url: str = WS_URL,
+        uplink_frame_ms: float = DEFAULT_FRAME_MS,
+        uplink_max_latency_ms: float = DEFAULT_MAX_LATENCY_MS,
+        voice_gate: bool = False,
+        voice_gate_pre_roll_ms: float = DEFAULT_PRE_ROLL_MS,
+        voice_gate_hangover_ms: Optional[float] = None,
+        **engine_kwargs
+    ):
+        """
+        Args:
+            api_key: Realtime API key
+            question_files: 问题文件（按文件名注册为问题库，第一个为默认问题库）
+            model / temperature / vad_threshold / vad_silence_duration_ms / max_questions:
+                每场访谈的参数（与 RAGInterviewClient 相同）
+            max_sessions: 同时进行的访谈数上限（超过时排队等待）
+            retrieval_workers: 检索 / 加载 / 保存线程池大小
+            registry: 共享的问题库注册表（默认按 engine_kwargs 新建）
+            ws_url: Realtime API 地址
+            uplink_frame_ms / uplink_max_latency_ms: 上行音频每帧时长和最长缓冲时间（毫秒）
+            voice_gate / voice_gate_pre_roll_ms / voice_gate_hangover_ms:
+                本地 VAD（静音不上传，默认关闭）及开始说话前补发、说话后继续上传的时长（毫秒，默认服务端静音时长 + 300ms）
+            engine_kwargs: 传给检索引擎的参数（如 vector_backend、hot_reload）
+        """
+        self.api_key = api_key
+        self.model = model
+        self.temperature = temperature
+        self.vad_threshold = vad_threshold
+        self.vad_silence_duration_ms = vad_silence_duration_ms
+        self.max_questions = max_questions
+        self.max_sessions = max_sessions
+        self.ws_url = ws_url
+        self.uplink_frame_ms = uplink_frame_ms
+        self.uplink_max_latency_ms = uplink_max_latency_ms
+        self.voice_gate = voice_gate
+        self.voice_gate_pre_roll_ms = voice_gate_pre_roll_ms
+        self.voice_gate_hangover_ms = voice_gate_hangover_ms
+
+        self.registry = registry or QuestionBankRegistry(**engine_kwargs)
+        names = self.registry.register_files(list(question_files))
+        self.default_bank = names[0] if names else None
+
+        self.executor = ThreadPoolExecutor(max_workers=retrieval_workers, thread_name_prefix="interview-io")
+        self._slots = asyncio.Semaphore(max_sessions)
+        self.sessions: Dict[str, AsyncInterviewSession] = {}
+        # 已占用的会话 ID（包括还在排队等待的访谈），在等待并发名额之前登记
+        self._reserved: Set[str] = set()
+        self.started = 0
+        self.finished: Dict[str, int] = {}
+        self.peak_sessions = 0
+
+    def new_voice_gate(self) -> Optional[VoiceGate]:
+        """每场访谈一个本地 VAD（关闭时返回 None）"""
+        if not self.voice_gate:
+            return None
+        return VoiceGate.for_server_vad(
+            self.vad_silence_duration_ms, self.voice_gate_pre_roll_ms, self.voice_gate_hangover_ms,
+            sample_rate=SAMPLE_RATE,
+        )
+
+    async def run_blocking(self, fn, *args):
+        """在线程池中执行阻塞调用"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def start(self):
+        """预先加载所有问题库和嵌入模型（第一通电话不必等待）"""
+        engines = [await self.run_blocking(self.registry.get, name) for name in self.registry.names()]
+        if engines:
+            await self.run_blocking(engines[0].preload_model)
+        logger.info(f"🚀 访谈服务已就绪: {len(engines)} 个问题库，最多 {self.max_sessions} 场并发访谈")
+
+    async def run_interview(
+        self,
+        audio: CallAudio,
+        bank: Optional[str] = None,
+        session_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        进行一场访谈（同时进行的访谈达到上限时先排队）
+
+        Args:
+            audio: 本通电话的音频
+            bank: 问题库名称（默认第一个问题库）
+            session_id: 会话 ID（默认生成全局唯一 ID）
+
+        Returns:
+            会话摘要
+        """
+        bank = bank or self.default_bank
+        session_id = session_id or new_session_id()
+        if session_id in self._reserved:
+            raise ValueError(f"会话 ID 已在使用: {session_id}")
+        self._reserved.add(session_id)
+
+        try:
+            async with self._slots:
+                engine = await self.run_blocking(self.registry.get, bank)
+                session = AsyncInterviewSession(self, engine, audio, session_id, bank)
+                self.sessions[session_id] = session
+                self.started += 1
+                self.peak_sessions = max(self.peak_sessions, len(self.sessions))
+                summary = await session.run()
+        finally:
+            self.sessions.pop(session_id, None)
+            self._reserved.discard(session_id)
+        self.finished[summary["status"]] = self.finished.get(summary["status"], 0) + 1
+        return summary
+
+    def stats(self) -> Dict[str, Any]:
+        """服务状态：进行中的访谈、完成情况和问题库内存"""
+        registry = self.registry.stats()
+        return {
+            "active": len(self.sessions),
+            "peak": self.peak_sessions,
+            "max_sessions": self.max_sessions,
+            "started": self.started,
+            "finished": dict(self.finished),
+            "sessions": [session.summary() for session in self.sessions.values()],
+            "banks_loaded": registry["loaded"],
+            "index_memory_mb": registry["memory_mb"],
+            "rss_mb": registry["rss_mb"],
+        }
+
+    async def close(self):
+        """卸载问题库并关闭线程池（进行中的访谈应先结束）"""
+        await self.run_blocking(self.registry.clear)
+        self.executor.shutdown(wait=False)
+
+
+# ==================== 压测 / 演示入口 ====================
+
+def load_caller_audio(path: Optional[str]) -> bytes:
+    """读取模拟来电者的音频（PCM16，24kHz 单声道 WAV）；不指定时为 1 秒静音"""
+    if not path:
+        return bytes(SAMPLE_RATE * 2)
+    import soundfile as sf
+
+    data, rate = sf.read(path, dtype="int16", always_2d=True)
+    if rate != SAMPLE_RATE:
+        raise ValueError(f"音频采样率需要是 {SAMPLE_RATE}Hz: {path}（{rate}Hz）")
+    return data[:, 0].tobytes()
+
+
+async def simulate_caller(audio: CallAudio, pcm: bytes, done: asyncio.Event):
+    """按实时速度循环播放来电者音频（20ms 一块），并丢弃 AI 语音"""
+    chunk_bytes = CHUNK_SIZE * 2
+    loop = asyncio.get_running_loop()
+    next_at = loop.time()
+    while not done.is_set():
+        for offset in range(0, len(pcm), chunk_bytes):
+            if done.is_set():
+                return
+            audio.feed(pcm[offset:offset + chunk_bytes])
+            while not audio.downlink.empty():
+                audio.downlink.get_nowait()
+            next_at += CHUNK_SECONDS
+            await asyncio.sleep(max(0.0, next_at - loop.time()))
+
+
+async def _run_calls(args) -> List[Dict[str, Any]]:
+    server = InterviewServer(
+        API_KEY,
+        question_files=args.questions,
+        max_questions=args.max_questions,
+        max_sessions=args.max_sessions,
+        vector_backend=args.backend,
+        hot_reload=args.hot_reload,
+        uplink_frame_ms=args.frame_ms,
+        uplink_max_latency_ms=args.max_latency_ms,
+        voice_gate=args.voice_gate,
+    )
+    await server.start()
+    pcm = load_caller_audio(args.audio)
+
+    async def one_call(index: int) -> Dict[str, Any]:
+        audio = CallAudio()
+        done = asyncio.Event()
+        caller = asyncio.create_task(simulate_caller(audio, pcm, done))
+        bank = bank_name(args.questions[index % len(args.questions)])
+        try:
+            return await server.run_interview(audio, bank=bank)
+        finally:
+            done.set()
+            await caller
+
+    async def report():
+        while True:
+            await asyncio.sleep(args.report_interval)
+            stats = server.stats()
+            logger.info(f"📊 进行中 {stats['active']}（峰值 {stats['peak']}），已结束 {stats['finished']}，"
+                        f"RSS {stats['rss_mb']:.0f}MB")
+
+    reporter = asyncio.create_task(report())
+    try:
+        return await asyncio.gather(*(one_call(i) for i in range(args.calls)))
+    finally:
+        reporter.cancel()
+        await server.close()
+
+
+def main():
+    """模拟 N 路并发来电"""
+    parser = argparse.ArgumentParser(description="异步多会话访谈服务（模拟并发来电）")
+    parser.add_argument("--questions", nargs="+", default=["questions.yaml"], help="问题文件（可多个，轮流分配给来电）")
+    parser.add_argument("--calls", type=int, default=10, help="并发模拟来电数")
+    parser.add_argument("--max-sessions", type=int, default=DEFAULT_MAX_SESSIONS, help="同时进行的访谈数上限")
+    parser.add_argument("--max-questions", type=int, default=10, help="每场访谈最多提问数")
+    parser.add_argument("--audio", help="来电者音频（PCM16 24kHz 单声道 WAV，默认静音）")
+    parser.add_argument("--backend", default="numpy", help="检索后端")
+    parser.add_argument("--hot-reload", action="store_true", help="监视问题文件，修改后新来电使用新问题")
+    parser.add_argument("--frame-ms", type=float, default=DEFAULT_FRAME_MS, help="上行音频每帧时长（毫秒，60~200）")
+    parser.add_argument("--max-latency-ms", type=float, default=DEFAULT_MAX_LATENCY_MS, help="上行音频最长缓冲时间（毫秒）")
+    parser.add_argument("--voice-gate", action="store_true", help="开启本地 VAD（静音不上传，只发保活）")
+    parser.add_argument("--report-interval", type=float, default=10.0, help="状态输出间隔（秒）")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        datefmt="%H:%M:%S",
+        stream=sys.stdout,
+    )
+    if API_KEY == "your-api-key-here":
+        logger.warning("⚠️  请先设置环境变量 STEPFUN_API_KEY")
+        return
+
+    results = asyncio.run(_run_calls(args))
+    statuses: Dict[str, int] = {}
+    for result in results:
+        statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+    logger.info(f"✅ {len(results)} 场访谈结束: {statuses}")
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+RAG 访谈的提示词和 Realtime API 事件
+RAGInterviewClient（单场访谈，线程）和 interview_server（多场访谈，asyncio）共用
+"""
+
+from typing import Dict, Any, Optional
+
+from src.core.question_bank import Question
+
+
+WELCOME_MESSAGE = "您好，欢迎参加健康状况咨询。接下来我会问您几个关于健康的问题，请如实回答。"
+COMPLETION_MESSAGE = "感谢您的配合，健康咨询已完成。祝您身体健康！"
+
+INSTRUCTIONS = """你是一个专业、友好的健康咨询助手。
+
+你的任务：
+1. 根据提供的参考问题，用自然、亲切的语气与用户交流
+2. 可以适当调整问题表述，使对话更自然流畅
+3. 在问题之间添加简短的过渡语（如"好的，明白了"、"接下来"等）
+4. 如果用户回答不够详细，可以追问澄清
+5. 保持专业但不失温度，让用户感到舒适
+
+重要原则：
+- 每次只问一个问题
+- 问题内容必须基于提供的参考，但表述可以灵活
+- 说话要简洁，不要啰嗦
+- 认真倾听用户的回答，不要急于提下一个问题
+"""
+
+
+def session_update_event(
+    vad_threshold: float = 0.5,
+    vad_silence_duration_ms: int = 700,
+    temperature: float = 0.7
+) -> Dict[str, Any]:
+    """初始会话配置（RAG 灵活模式，服务端 VAD）"""
+    return {
+        "type": "session.update",
+        "session": {
+            "modalities": ["text", "audio"],
+            "instructions": INSTRUCTIONS,
+            "input_audio_format": "pcm16",
+            "output_audio_format": "pcm16",
+            "input_audio_transcription": {"model": "whisper-1"},
+            "turn_detection": {
+                "type": "server_vad",
+                "threshold": vad_threshold,
+                "prefix_padding_ms": 300,
+                "silence_duration_ms": vad_silence_duration_ms,
+            },
+            "temperature": temperature,
+            "max_response_output_tokens": 4096,
+        },
+    }
+
+
+def user_text_event(text: str) -> Dict[str, Any]:
+    """以用户身份发给模型的文字指令"""
+    return {
+        "type": "conversation.item.create",
+        "item": {
+            "type": "message",
+            "role": "user",
+            "content": [{"type": "input_text", "text": text}],
+        },
+    }
+
+
+def question_prompt(question: Question, last_answer: Optional[str] = None) -> str:
+    """提问指令（灵活版）：有上一个回答时先简短回应再过渡到新问题"""
+    if last_answer:
+        # 有上下文，添加过渡
+        return f"""[上一个问题的回答是: {last_answer}]
+
+现在请基于以下参考问题，用自然的方式继续提问：
+参考问题: {question.question}
+
+要求：
+1. 可以先简短地回应上一个回答（如"好的，明白了"）
+2. 然后提出新问题，表述要自然流畅
+3. 整体保持简洁，不要啰嗦
+"""
+
+    # 第一个问题，直接问
+    return f"""请基于以下参考问题，用自然、友好的方式提问：
+参考问题: {question.question}
+
+要求：
+1. 保持问题核心内容不变
+2. 表述要自然亲切
+3. 简洁明了
+"""
+
+
+def welcome_prompt(message: str = WELCOME_MESSAGE) -> str:
+    return f"请用友好的语气说：{message}"
+
+
+def followup_prompt(followup_text: str) -> str:
+    return f"用简短、自然的方式追问: {followup_text}"
+
+
+def completion_prompt(message: str = COMPLETION_MESSAGE) -> str:
+    return f"用友好的语气说：{message}"
@@ -3,5 +3,6 @@
 """
 
 from .question_manager import QuestionManager, SessionRecorder, Question, Answer
+from .question_bank import QuestionBank
 
-__all__ = ["QuestionManager", "SessionRecorder", "Question", "Answer"]
+__all__ = ["QuestionManager", "SessionRecorder", "Question", "Answer", "QuestionBank"]
@@ -0,0 +1,257 @@
+"""
+多问题库注册表
+一个进程同时为多个客户的问卷（questions.yaml、questions_rag_example.yaml、examples/*.yaml ……）提供检索：
+
+- 所有问题库共享进程级嵌入模型注册表中的同一个模型（相同模型名只加载一次）
+- 问题库的检索引擎在第一次使用时才加载（优先使用 .qbank 快照）
+- 已加载索引的估算内存超过 max_memory_mb 时，按最近最少使用（LRU）卸载其他问题库
+- 加载 / 卸载事件计入 stats()（计数器 + 最近的事件列表）
+
+卸载只是把引擎移出注册表：仍在进行中的访谈（RetrievalSession）持有引擎的引用，可以继续完成，
+访谈结束后内存才会真正释放；下一次 get() 会重新加载。
+
+    registry = QuestionBankRegistry(max_memory_mb=512)
+    registry.register_files(["questions.yaml", "examples/product_feedback.yaml"])
+    session = registry.new_session("product_feedback")
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import List, Dict, Any, Optional, Callable
+
+from src.utils.memory import current_rss_mb, release_memory
+
+from .question_rag import QuestionRAG
+from .retrieval_session import RetrievalSession
+
+
+DEFAULT_BANK_MEMORY_MB = float(os.getenv("QUESTION_BANK_MEMORY_MB", 1024))
+# stats() 中保留的最近事件数
+MAX_EVENTS = 100
+
+
+def bank_name(question_file: str) -> str:
+    """问题库名称：文件名去掉扩展名（examples/product_feedback.yaml → product_feedback）"""
+    return os.path.splitext(os.path.basename(question_file))[0]
+
+
+class _BankEntry:
+    __slots__ = ("engine", "memory_mb", "load_seconds", "last_used", "hits")
+
+    def __init__(self, engine, memory_mb: float, load_seconds: float):
+        self.engine = engine
+        self.memory_mb = memory_mb
+        self.load_seconds = load_seconds
+        self.last_used = time.monotonic()
+        self.hits = 0
+
+
+class QuestionBankRegistry:
+    """线程安全的多问题库注册表（懒加载 + LRU 内存上限）"""
+
+    def __init__(
+        self,
+        max_memory_mb: float = DEFAULT_BANK_MEMORY_MB,
+        engine_factory: Optional[Callable[[str, str], Any]] = None,
+        **engine_kwargs
+    ):
+        """
+        Args:
+            max_memory_mb: 已加载索引的估算内存上限（MB，不含共享的嵌入模型；0 表示不限制）
+            engine_factory: 创建检索引擎的函数 factory(name, question_file)（默认创建 QuestionRAG）
+            engine_kwargs: 传给默认 QuestionRAG 的参数（如 embedding_model、vector_backend）；
+                           collection_name 默认为问题库名称，vector_backend 默认为 numpy
+        """
+        self.max_memory_mb = max_memory_mb
+        self._factory = engine_factory or self._default_factory
+        self._engine_kwargs = engine_kwargs
+        self._files: Dict[str, str] = {}  # 名称 → 问题文件
+        self._entries: "OrderedDict[str, _BankEntry]" = OrderedDict()  # 按最近使用排序
+        self._loading: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._events: deque = deque(maxlen=MAX_EVENTS)
+        self.loads = 0
+        self.load_failures = 0
+        self.evictions = 0
+        self.hits = 0
+        self.misses = 0
+
+    def register(self, name: str, question_file: str):
+        """注册问题库（不加载）；同名重新注册时卸载旧的引擎"""
+        with self._lock:
+            previous = self._files.get(name)
+            self._files[name] = question_file
+        if previous is not None and previous != question_file:
+            self.evict(name, reason="重新注册")
+
+    def register_files(self, question_files: List[str]) -> List[str]:
+        """按文件名注册多个问题库，返回名称列表"""
+        names = []
+        for question_file in question_files:
+            name = bank_name(question_file)
+            self.register(name, question_file)
+            names.append(name)
+        return names
+
+    def names(self) -> List[str]:
+        """已注册的问题库名称"""
+        with self._lock:
+            return list(self._files)
+
+    def is_loaded(self, name: str) -> bool:
+        with self._lock:
+            return name in self._entries
+
+    def get(self, name: str):
+        """获取问题库的检索引擎（第一次使用时加载，可能触发 LRU 卸载）"""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None:
+                self._touch(name, entry)
+                return entry.engine
+            if name not in self._files:
+                raise KeyError(f"未注册的问题库: {name}")
+            loading = self._loading.setdefault(name, threading.Lock())
+
+        with loading:
+            with self._lock:
+                entry = self._entries.get(name)
+                if entry is not None:
+                    self._touch(name, entry)
+                    return entry.engine
+                question_file = self._files[name]
+                self.misses += 1
+
+            try:
+                entry = self._load(name, question_file)
+            except Exception:
+                with self._lock:
+                    self.load_failures += 1
+                    self._loading.pop(name, None)
+                    self._record("load_failed", name)
+                raise
+
+            with self._lock:
+                self._entries[name] = entry
+                self._loading.pop(name, None)
+            self._evict_over_budget(keep=name)
+            return entry.engine
+
+    def new_session(self, name: str, session_id: Optional[str] = None) -> RetrievalSession:
+        """在指定问题库上开始一场访谈"""
+        return self.get(name).new_session(session_id)
+
+    def evict(self, name: str, reason: str = "手动") -> bool:
+        """卸载问题库的检索引擎（进行中的访谈不受影响）"""
+        with self._lock:
+            entry = self._entries.pop(name, None)
+        if entry is None:
+            return False
+
+        # 监视线程持有引擎的引用，不停止的话内存无法释放
+        stop_hot_reload = getattr(entry.engine, "stop_hot_reload", None)
+        if stop_hot_reload is not None:
+            stop_hot_reload()
+
+        memory_mb = entry.memory_mb
+        before = current_rss_mb()
+        del entry
+        release_memory()
+        with self._lock:
+            self.evictions += 1
+            self._record("evict", name, reason=reason, memory_mb=memory_mb)
+        print(f"♻️  卸载问题库: {name}（{reason}，RSS {before:.0f}MB → {current_rss_mb():.0f}MB）")
+        return True
+
+    def clear(self):
+        """卸载全部问题库"""
+        with self._lock:
+            names = list(self._entries)
+        for name in names:
+            self.evict(name, reason="清空")
+
+    def memory_mb(self) -> float:
+        """已加载索引的估算内存（MB）"""
+        with self._lock:
+            return sum(entry.memory_mb for entry in self._entries.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """各问题库状态、加载 / 卸载计数和最近事件"""
+        now = time.monotonic()
+        with self._lock:
+            banks = {}
+            for name, question_file in self._files.items():
+                entry = self._entries.get(name)
+                banks[name] = {
+                    "question_file": question_file,
+                    "loaded": entry is not None,
+                    "memory_mb": entry.memory_mb if entry else 0.0,
+                    "load_seconds": entry.load_seconds if entry else None,
+                    "hits": entry.hits if entry else 0,
+                    "idle_seconds": now - entry.last_used if entry else None,
+                }
+            return {
+                "banks": banks,
+                "loaded": list(self._entries),
+                "memory_mb": sum(entry.memory_mb for entry in self._entries.values()),
+                "max_memory_mb": self.max_memory_mb,
+                "loads": self.loads,
+                "load_failures": self.load_failures,
+                "evictions": self.evictions,
+                "hits": self.hits,
+                "misses": self.misses,
+                "events": list(self._events),
+                "rss_mb": current_rss_mb(),
+            }
+
+    # ==================== 内部实现 ====================
+
+    def _default_factory(self, name: str, question_file: str) -> QuestionRAG:
+        kwargs = dict(self._engine_kwargs)
+        kwargs.setdefault("collection_name", name)
+        # 索引放在进程内，memory_mb() 才能反映各问题库的实际占用，内存上限才有意义
+        kwargs.setdefault("vector_backend", "numpy")
+        return QuestionRAG(question_file, **kwargs)
+
+    def _load(self, name: str, question_file: str) -> _BankEntry:
+        """创建并加载检索引擎"""
+        print(f"🔄 加载问题库: {name}（{question_file}）")
+        start = time.time()
+        engine = self._factory(name, question_file)
+        if not engine.load_and_index_questions():
+            raise RuntimeError(f"问题库加载失败: {name}（{question_file}）")
+
+        entry = _BankEntry(engine, engine.memory_mb(), time.time() - start)
+        with self._lock:
+            self.loads += 1
+            self._record("load", name, memory_mb=entry.memory_mb, seconds=entry.load_seconds)
+        print(f"✅ 问题库已加载: {name}（{len(engine.questions)} 个问题，"
+              f"索引约 {entry.memory_mb:.1f}MB，{entry.load_seconds:.2f}秒）")
+        return entry
+
+    def _evict_over_budget(self, keep: str):
+        """估算内存超过上限时按 LRU 卸载（刚加载的问题库除外）"""
+        if not self.max_memory_mb:
+            return
+        while True:
+            with self._lock:
+                total = sum(entry.memory_mb for entry in self._entries.values())
+                if total <= self.max_memory_mb:
+                    return
+                victim = next((name for name in self._entries if name != keep), None)
+            if victim is None:
+                return
+            self.evict(victim, reason=f"超出内存上限 {total:.1f}/{self.max_memory_mb:.1f}MB")
+
+    def _touch(self, name: str, entry: _BankEntry):
+        """记录一次命中（调用方持有 _lock）"""
+        self._entries.move_to_end(name)
+        entry.last_used = time.monotonic()
+        entry.hits += 1
+        self.hits += 1
+
+    def _record(self, event: str, name: str, **fields):
+        """追加一条事件（调用方持有 _lock）"""
+        self._events.append({"event": event, "bank": name, "time": time.time(), **fields})
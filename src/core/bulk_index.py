@@ -0,0 +1,127 @@
+"""
+离线批量建索引
+一次性为多个问题库（如 examples/*.yaml）建立向量索引：
+1. 汇总所有问题库的文档并去重，用多进程并行向量化写入嵌入向量缓存（进程池和模型只启动一次）
+2. 逐个问题库同步向量索引（此时全部命中缓存，不再向量化）
+3. 可选：同时编译 .qbank 快照
+
+用法：
+    python bulk_index.py examples/*.yaml --model BAAI/bge-small-zh-v1.5 --backend numpy
+    python bulk_index.py big_bank.yaml --workers 8 --snapshot
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import List
+
+import yaml
+
+from .question_bank import QuestionBank
+from .index_sync import build_document
+from .embedding_cache import EmbeddingCache
+from .model_registry import model_registry
+from .parallel_embedding import ParallelEmbedder, PARALLEL_MIN_TEXTS
+from .question_rag import QuestionRAG
+from .question_snapshot import compile_snapshot
+from .vector_backend import VECTOR_BACKENDS
+
+
+def collect_documents(question_files: List[str]) -> List[str]:
+    """汇总所有问题库的待向量化文档（去重，保持首次出现的顺序）"""
+    documents = {}
+    for question_file in question_files:
+        with open(question_file, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+        for question in QuestionBank.from_dicts(data.get("questions", [])):
+            documents.setdefault(build_document(question), None)
+    return list(documents)
+
+
+def prefill_cache(
+    documents: List[str],
+    model_name: str,
+    cache: EmbeddingCache,
+    embedder: ParallelEmbedder
+) -> int:
+    """分批并行向量化缓存中缺失的文档，返回新向量化的数量"""
+    misses_before = cache.misses
+    chunk = max(embedder.chunk_size, PARALLEL_MIN_TEXTS)
+    start_time = time.time()
+
+    with cache.bulk_write():
+        for start in range(0, len(documents), chunk):
+            cache.encode(model_name, documents[start:start + chunk], embedder.encode)
+            done = min(start + chunk, len(documents))
+            print(f"   ✓ {done}/{len(documents)}（{done / max(time.time() - start_time, 1e-9):.0f} 条/秒）")
+
+    return cache.misses - misses_before
+
+
+def main():
+    """命令行：离线批量建索引"""
+    parser = argparse.ArgumentParser(description="离线批量建立问题库向量索引（多进程向量化）")
+    parser.add_argument("question_files", nargs="+", help="YAML 问题文件")
+    parser.add_argument("--model", default="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
+                        help="嵌入模型（可带 onnx: 前缀和 @int8 等精度后缀）")
+    parser.add_argument("--backend", default="chroma", choices=VECTOR_BACKENDS, help="检索后端")
+    parser.add_argument("--persist-dir", default="./chroma_db", help="向量数据库目录")
+    parser.add_argument("--collection", default=None,
+                        help="集合名称，可用 {name} 表示问题文件名"
+                             "（默认：单个文件为 interview_questions，多个文件为 {name}）")
+    parser.add_argument("--workers", type=int, default=0, help="向量化进程数（0 为自动选择）")
+    parser.add_argument("--batch-size", type=int, default=0, help="每个分片的文本数（0 为自动选择）")
+    parser.add_argument("--cache-dir", default="./embedding_cache", help="嵌入向量缓存目录")
+    parser.add_argument("--cache-max-mb", type=float, default=4096, help="嵌入向量缓存大小上限（MB）")
+    parser.add_argument("--snapshot", action="store_true", help="同时编译 .qbank 快照")
+    args = parser.parse_args()
+
+    model_name = model_registry.get(args.model).spec
+    collection = args.collection or ("interview_questions" if len(args.question_files) == 1 else "{name}")
+    cache = EmbeddingCache(args.cache_dir, max_size_mb=args.cache_max_mb)
+    total_start = time.time()
+
+    documents = collect_documents(args.question_files)
+    print(f"📚 {len(args.question_files)} 个问题库，共 {len(documents)} 条不重复文档")
+
+    with ParallelEmbedder(model_name, workers=args.workers, batch_size=args.batch_size) as embedder:
+        start = time.time()
+        encoded = prefill_cache(documents, model_name, cache, embedder)
+        print(f"✅ 向量化完成: 新增 {encoded} 条，缓存命中 {len(documents) - encoded} 条"
+              f"（{time.time() - start:.1f}秒）")
+
+    def embed_batch(texts):
+        return cache.encode(model_name, texts, model_registry.get(model_name).encode)
+
+    failed = []
+    for question_file in args.question_files:
+        name = os.path.splitext(os.path.basename(question_file))[0]
+        start = time.time()
+        rag = QuestionRAG(
+            question_file,
+            collection_name=collection.format(name=name),
+            embedding_model=model_name,
+            persist_directory=args.persist_dir,
+            vector_backend=args.backend,
+            embedding_cache_dir=args.cache_dir,
+            embedding_cache_max_mb=args.cache_max_mb,
+            use_snapshot=False
+        )
+        if not rag.load_and_index_questions():
+            print(f"❌ {question_file} 建索引失败")
+            failed.append(question_file)
+            continue
+        if args.snapshot:
+            path = compile_snapshot(question_file, embedding_model=model_name, embed_batch=embed_batch)
+            print(f"   📦 快照: {path}")
+        print(f"✅ {question_file} → {collection.format(name=name)}（{time.time() - start:.2f}秒）")
+
+    if failed:
+        print(f"❌ {len(failed)} 个问题库建索引失败: {', '.join(failed)}")
+        sys.exit(1)
+    print(f"🎉 全部完成（{time.time() - total_start:.1f}秒）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,443 @@
+"""
+压缩向量索引
+为超大题库 / 多租户场景把问题向量常驻内存的部分压缩到原来的 1/10 左右：
+
+1. 降维：建索引时在题库向量上拟合 PCA（或对 Matryoshka 类模型直接截断前 N 维），投影随索引保存
+2. int8 量化：降维后的向量按行量化为 int8，每行一个 float32 缩放系数
+3. 精排：先用 int8 向量近似打分取出 n_results × rerank_factor 个候选，
+   再用全精度向量（磁盘 .npy，只读取候选行）重新打分
+
+全精度向量不常驻内存，常驻的只有 int8 编码、缩放系数和投影矩阵。
+写入（包括分批写入的每一批）只保存全精度向量和记录；写完后 prepare() 拟合投影、量化一次，
+用题库自身的向量作查询估算相对未压缩索引的 recall@k，写入索引元数据并连同压缩数据一起保存。
+
+后端名称（create_vector_backend / vector_backend 参数）：
+- compressed                  PCA 降到 128 维
+- compressed:64               PCA 降到 64 维
+- compressed:truncate:256     截断前 256 维（适用于 Matryoshka 训练的模型）
+"""
+
+import json
+import os
+import shutil
+from typing import List, Dict, Any, Optional, Collection, Sequence
+
+import numpy as np
+
+from .vector_backend import (
+    NumpyVectorBackend, SearchHit, BATCH_SCORE_ELEMENTS, _batch_excludes, _normalize_rows
+)
+
+
+DEFAULT_DIMS = 128
+PROJECTION_METHODS = ("pca", "truncate")
+DEFAULT_RERANK_FACTOR = 4
+MIN_RERANK_CANDIDATES = 32
+
+# 分块处理的行数（拟合、量化和近似打分时限制临时内存；近似打分的临时矩阵尽量留在 CPU 缓存内）
+CHUNK_ROWS = 65536
+SCORE_CHUNK_ROWS = 8192
+# 保存时估算 recall 使用的查询数和 k
+RECALL_SAMPLE_QUERIES = 100
+RECALL_K = 10
+
+
+def parse_compressed_spec(spec: str) -> Dict[str, Any]:
+    """解析后端名：'compressed:truncate:256' → {'method': 'truncate', 'dims': 256}"""
+    parts = spec.split(":")[1:]
+    options: Dict[str, Any] = {"method": "pca", "dims": DEFAULT_DIMS}
+    for part in parts:
+        if part in PROJECTION_METHODS:
+            options["method"] = part
+        elif part.isdigit() and int(part) > 0:
+            options["dims"] = int(part)
+        else:
+            raise ValueError(f"无法解析压缩索引参数: {spec}（示例: compressed:truncate:256）")
+    return options
+
+
+class Projection:
+    """降维投影：PCA（中心化 + 主成分）或截断前 dims 维"""
+
+    def __init__(self, method: str, mean: np.ndarray, components: Optional[np.ndarray], dims: int):
+        self.method = method
+        self.mean = mean
+        self.components = components  # (原维度, dims)，截断时为 None
+        self.dims = dims
+
+    @classmethod
+    def fit(cls, matrix: np.ndarray, dims: int, method: str = "pca") -> "Projection":
+        """在 (n, 原维度) 的向量矩阵上拟合投影"""
+        if method not in PROJECTION_METHODS:
+            raise ValueError(f"未知的降维方法: {method}（可选: {', '.join(PROJECTION_METHODS)}）")
+        dim = matrix.shape[1]
+        dims = min(dims, dim)
+        if method == "truncate":
+            return cls(method, np.zeros(dim, dtype=np.float32), None, dims)
+
+        # 分块累加协方差，避免复制整个中心化矩阵
+        mean = np.zeros(dim, dtype=np.float64)
+        gram = np.zeros((dim, dim), dtype=np.float64)
+        for start in range(0, len(matrix), CHUNK_ROWS):
+            chunk = np.asarray(matrix[start:start + CHUNK_ROWS], dtype=np.float64)
+            mean += chunk.sum(axis=0)
+            gram += chunk.T @ chunk
+        mean /= max(len(matrix), 1)
+        covariance = gram - len(matrix) * np.outer(mean, mean)
+
+        _, eigenvectors = np.linalg.eigh(covariance)
+        components = eigenvectors[:, ::-1][:, :dims]  # 特征值从大到小
+        return cls(method, mean.astype(np.float32), np.ascontiguousarray(components, dtype=np.float32), dims)
+
+    def transform(self, matrix: np.ndarray) -> np.ndarray:
+        """投影到低维空间（(n, 原维度) → (n, dims)）"""
+        matrix = np.asarray(matrix, dtype=np.float32)
+        if self.components is None:
+            return matrix[:, :self.dims]
+        return (matrix - self.mean) @ self.components
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {"method": np.array(self.method), "mean": self.mean, "dims": np.array(self.dims)}
+        if self.components is not None:
+            arrays["components"] = self.components
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, data) -> "Projection":
+        components = data["components"] if "components" in data else None
+        return cls(str(data["method"]), data["mean"], components, int(data["dims"]))
+
+
+def quantize_int8(vectors: np.ndarray):
+    """按行对称量化为 int8，返回 (编码, 每行缩放系数)"""
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+class CompressedVectorBackend(NumpyVectorBackend):
+    """
+    降维 + int8 量化的内存检索后端，候选用全精度向量精排
+
+    persist_path 是一个目录：
+        vectors.npy      全精度归一化向量（不常驻内存，精排时按行读取）
+        codes.npy        int8 编码（prepare() 之后才有）
+        scales.npy       每行缩放系数
+        projection.npz   降维投影
+        records.json     记录 id、文档、元数据、索引级元数据（含压缩统计）
+    """
+
+    name = "compressed"
+
+    def __init__(
+        self,
+        persist_path: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        dims: int = DEFAULT_DIMS,
+        method: str = "pca",
+        rerank_factor: int = DEFAULT_RERANK_FACTOR
+    ):
+        """
+        Args:
+            persist_path: 索引目录（None 表示不持久化）
+            metadata: 索引级元数据
+            dims: 降维后的维度
+            method: 降维方法（pca / truncate）
+            rerank_factor: 精排候选数 = n_results × rerank_factor（0 表示不精排，只用 int8 分数）
+        """
+        if method not in PROJECTION_METHODS:
+            raise ValueError(f"未知的降维方法: {method}（可选: {', '.join(PROJECTION_METHODS)}）")
+        self.dims = dims
+        self.method = method
+        self.rerank_factor = rerank_factor
+        self._projection: Optional[Projection] = None
+        self._codes: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        self._vectors_file = None  # 精排时按行 pread 全精度向量
+        self._vectors_offset = 0
+        super().__init__(persist_path=persist_path, metadata=metadata)
+
+    def reset(self, metadata: Optional[Dict[str, Any]] = None):
+        self._invalidate()
+        super().reset(metadata)
+
+    def delete(self, ids: List[str]):
+        self._invalidate()
+        super().delete(ids)
+
+    def prepare(self):
+        """写完索引后压缩一次：拟合投影、量化、估算 recall@k，并保存压缩数据"""
+        if not self._ids or self._codes is not None:
+            return
+        self._compress()
+        self._metadata["compression"] = self._compression_report()
+        self._save()
+
+    def query(
+        self,
+        query_embedding: np.ndarray,
+        n_results: int,
+        exclude_ids: Optional[Collection[int]] = None
+    ) -> List[SearchHit]:
+        total = len(self._ids)
+        if total == 0 or n_results <= 0:
+            return []
+        if self._codes is None:
+            self._compress()
+
+        query = np.asarray(query_embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        return self._rescore(query, self._approx_scores(query[None, :])[0], n_results, exclude_ids)
+
+    def query_batch(
+        self,
+        query_embeddings: np.ndarray,
+        n_results: int,
+        exclude_ids: Optional[Sequence[Optional[Collection[int]]]] = None
+    ) -> List[List[SearchHit]]:
+        queries = np.asarray(query_embeddings, dtype=np.float32).reshape(len(query_embeddings), -1)
+        excludes = _batch_excludes(exclude_ids, len(queries))
+        total = len(self._ids)
+        if total == 0 or n_results <= 0:
+            return [[] for _ in range(len(queries))]
+        if self._codes is None:
+            self._compress()
+
+        queries = _normalize_rows(queries)
+        results: List[List[SearchHit]] = []
+        # 近似打分一次处理一块查询（每个 int8 分块只转换一次），精排仍按查询进行
+        block = max(1, BATCH_SCORE_ELEMENTS // total)
+        for start in range(0, len(queries), block):
+            chunk = queries[start:start + block]
+            scores = self._approx_scores(chunk)
+            for query, row, exclude in zip(chunk, scores, excludes[start:start + block]):
+                results.append(self._rescore(query, row, n_results, exclude))
+        return results
+
+    def _rescore(
+        self,
+        query: np.ndarray,
+        scores: np.ndarray,
+        n_results: int,
+        exclude_ids: Optional[Collection[int]]
+    ) -> List[SearchHit]:
+        """屏蔽排除的问题，按近似分数取候选并用全精度向量精排（会原地修改 scores）"""
+        total = len(scores)
+        excluded_rows = self._excluded_rows(exclude_ids)
+        scores[excluded_rows] = -np.inf
+        k = min(n_results, total - len(excluded_rows))
+        if k <= 0:
+            return []
+
+        if self.rerank_factor:
+            # 近似分数取候选，再用全精度向量精排
+            candidates = _top_rows(scores, min(max(k * self.rerank_factor, MIN_RERANK_CANDIDATES), total))
+            candidates = np.sort(candidates[np.isfinite(scores[candidates])])
+            exact = self._read_rows(candidates) @ query
+            return [(self._metadatas[candidates[j]], float(exact[j])) for j in _top_rows(exact, k)]
+
+        top = _top_rows(scores, k)
+        return [(self._metadatas[i], float(scores[i])) for i in top]
+
+    def memory_mb(self) -> float:
+        # 全精度向量不常驻内存，只计算压缩数据
+        return self.memory_stats()["compressed_mb"] + self._records_bytes() / 1024 / 1024
+
+    def memory_stats(self) -> Dict[str, float]:
+        """常驻内存的压缩数据与等价全精度矩阵的大小（MB）"""
+        if self._codes is None:
+            self._compress()
+        rows, dim = len(self._ids), (self._matrix.shape[1] if self._matrix.size else 0)
+        projection_bytes = 0
+        if self._projection is not None:
+            projection_bytes = self._projection.mean.nbytes + (
+                self._projection.components.nbytes if self._projection.components is not None else 0
+            )
+        compressed = (self._codes.nbytes if self._codes is not None else 0) + \
+            (self._scales.nbytes if self._scales is not None else 0) + projection_bytes
+        return {"compressed_mb": compressed / 1024 / 1024, "full_mb": rows * dim * 4 / 1024 / 1024}
+
+    # ==================== 内部实现 ====================
+
+    def _apply_upsert(self, ids, vectors, documents, metadatas):
+        self._invalidate()
+        super()._apply_upsert(ids, vectors, documents, metadatas)
+
+    def _invalidate(self):
+        self._projection = None
+        self._codes = None
+        self._scales = None
+        self._metadata.pop("compression", None)
+
+    def _compress(self):
+        """在当前向量上拟合投影并量化"""
+        rows = len(self._ids)
+        if rows == 0:
+            self._projection = None
+            self._codes = np.zeros((0, 0), dtype=np.int8)
+            self._scales = np.zeros(0, dtype=np.float32)
+            return
+
+        projection = Projection.fit(self._matrix, self.dims, self.method)
+        codes = np.empty((rows, projection.dims), dtype=np.int8)
+        scales = np.empty(rows, dtype=np.float32)
+        for start in range(0, rows, CHUNK_ROWS):
+            end = start + CHUNK_ROWS
+            codes[start:end], scales[start:end] = quantize_int8(projection.transform(self._matrix[start:end]))
+        self._projection, self._codes, self._scales = projection, codes, scales
+
+    def _approx_scores(self, queries: np.ndarray) -> np.ndarray:
+        """int8 编码上的近似内积，返回（查询数 × 行数）矩阵（PCA 中心化带来的常数项不影响排序）"""
+        projected = self._projection.transform(queries)
+        scores = np.empty((len(queries), len(self._codes)), dtype=np.float32)
+        for start in range(0, len(self._codes), SCORE_CHUNK_ROWS):
+            end = start + SCORE_CHUNK_ROWS
+            codes = self._codes[start:end].astype(np.float32)
+            scores[:, start:end] = (projected @ codes.T) * self._scales[start:end]
+        return scores
+
+    def _save(self):
+        """
+        保存为索引目录（先写临时目录再整体替换），全精度向量改为 mmap 读取
+
+        不在这里压缩：写入后编码已失效，只有 prepare() 压缩过才一起保存编码
+        """
+        if not self.persist_path:
+            return
+
+        tmp_dir = f"{self.persist_path}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        np.save(os.path.join(tmp_dir, "vectors.npy"), np.ascontiguousarray(self._matrix, dtype=np.float32))
+        if self._codes is not None:
+            np.save(os.path.join(tmp_dir, "codes.npy"), self._codes)
+            np.save(os.path.join(tmp_dir, "scales.npy"), self._scales)
+        if self._projection is not None:
+            np.savez(os.path.join(tmp_dir, "projection.npz"), **self._projection.to_arrays())
+
+        with open(os.path.join(tmp_dir, "records.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "ids": self._ids,
+                "documents": self._documents,
+                "metadatas": self._metadatas,
+                "metadata": self._metadata,
+            }, f, ensure_ascii=False)
+
+        old_dir = f"{self.persist_path}.old"
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if os.path.exists(self.persist_path):
+            os.replace(self.persist_path, old_dir)
+        os.replace(tmp_dir, self.persist_path)
+        shutil.rmtree(old_dir, ignore_errors=True)
+        self._clear_checkpoints()
+
+        self._map_vectors()
+
+    def _load(self):
+        with open(os.path.join(self.persist_path, "records.json"), "r", encoding="utf-8") as f:
+            records = json.load(f)
+        self._ids = records["ids"]
+        self._documents = records["documents"]
+        self._metadatas = records["metadatas"]
+        self._metadata = records["metadata"]
+        self._rebuild_row_maps()
+
+        self._map_vectors()
+        codes_path = os.path.join(self.persist_path, "codes.npy")
+        if not os.path.exists(codes_path):
+            return  # 写入后还没有 prepare()：第一次检索前再压缩
+        self._codes = np.load(codes_path)
+        self._scales = np.load(os.path.join(self.persist_path, "scales.npy"))
+        projection_path = os.path.join(self.persist_path, "projection.npz")
+        if os.path.exists(projection_path):
+            with np.load(projection_path) as data:
+                self._projection = Projection.from_arrays(data)
+
+    def _map_vectors(self):
+        """
+        全精度向量改为 mmap（拟合、增量写入时使用），精排只用 pread 读取候选行：
+        通过 mmap 随机读取少量行时，内核的预读和大页映射会把大片文件计入 RSS
+        """
+        self._vectors_file = None
+        if not self._ids:
+            self._matrix = np.zeros((0, 0), dtype=np.float32)
+        else:
+            path = os.path.join(self.persist_path, "vectors.npy")
+            self._matrix = np.load(path, mmap_mode="r")
+            if hasattr(os, "pread"):
+                self._vectors_file = open(path, "rb", buffering=0)
+                self._vectors_offset = self._matrix.offset
+        self._buffer = None
+
+    def _read_rows(self, rows: np.ndarray) -> np.ndarray:
+        """读取若干行全精度向量"""
+        if self._vectors_file is None or self._buffer is not None:
+            return np.asarray(self._matrix[rows], dtype=np.float32)
+        row_bytes = self._matrix.shape[1] * 4
+        fd = self._vectors_file.fileno()
+        data = b"".join(os.pread(fd, row_bytes, self._vectors_offset + int(row) * row_bytes) for row in rows)
+        return np.frombuffer(data, dtype=np.float32).reshape(len(rows), -1)
+
+    def _compression_report(self) -> Dict[str, Any]:
+        """压缩参数、内存占用，以及用题库自身向量估算的 recall@k"""
+        rng = np.random.default_rng(0)
+        sample = rng.choice(len(self._ids), size=min(RECALL_SAMPLE_QUERIES, len(self._ids)), replace=False)
+        queries = np.asarray(self._matrix[np.sort(sample)], dtype=np.float32)
+        report = {
+            "method": self.method,
+            "dims": self._projection.dims if self._projection else 0,
+            "original_dims": int(self._matrix.shape[1]),
+            "rerank_factor": self.rerank_factor,
+            **self.memory_stats(),
+            f"recall@{RECALL_K}": recall_at_k(self, queries, RECALL_K),
+        }
+        print(f"🗜️  压缩索引: {report['original_dims']} → {report['dims']} 维 int8（{self.method}），"
+              f"常驻 {report['compressed_mb']:.1f}MB（全精度 {report['full_mb']:.1f}MB），"
+              f"recall@{RECALL_K} {report[f'recall@{RECALL_K}']:.3f}")
+        return report
+
+
+def _top_rows(scores: np.ndarray, k: int) -> np.ndarray:
+    """分数最高的 k 行（从高到低）"""
+    if k < len(scores):
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(len(scores))
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+def exact_top_k(matrix: np.ndarray, queries: np.ndarray, k: int) -> List[np.ndarray]:
+    """全精度暴力检索的 top-k 行号（作为 recall 的参照）"""
+    queries = _normalize_rows(np.asarray(queries, dtype=np.float32))
+    scores = np.empty((len(queries), len(matrix)), dtype=np.float32)
+    for start in range(0, len(matrix), CHUNK_ROWS):
+        chunk = np.asarray(matrix[start:start + CHUNK_ROWS], dtype=np.float32)
+        scores[:, start:start + len(chunk)] = queries @ chunk.T
+    return [_top_rows(row, min(k, len(matrix))) for row in scores]
+
+
+def recall_at_k(backend: NumpyVectorBackend, queries: Sequence[np.ndarray], k: int) -> float:
+    """
+    后端检索结果相对全精度暴力检索的 recall@k
+
+    Args:
+        backend: 待评估的后端（NumpyVectorBackend 或其子类，使用其中保存的全精度向量作参照）
+        queries: 查询向量
+        k: top-k
+    """
+    queries = np.asarray(queries, dtype=np.float32).reshape(len(queries), -1)
+    if len(queries) == 0 or backend.count() == 0:
+        return 1.0
+
+    expected = exact_top_k(backend._matrix, queries, k)
+    found = 0
+    for query, rows in zip(queries, expected):
+        truth = {backend._metadatas[row].get("id") for row in rows.tolist()}
+        hits = {metadata.get("id") for metadata, _ in backend.query(query, k)}
+        found += len(truth & hits)
+    return found / sum(len(rows) for rows in expected)
@@ -0,0 +1,358 @@
+"""
+持久化嵌入向量缓存
+按 (模型名, 归一化文本哈希) 缓存向量，不同集合、不同脚本之间共享，
+避免对同样的问题文本重复向量化。
+
+存储格式（cache_dir 下）：
+- shards/<shard>.npy  每次写入生成一个 float32 矩阵分片，读取时以 mmap 方式打开
+- index.json          记录 key → (分片, 行号) 以及每个分片的大小和最近使用时间
+
+分批建索引时每批都会调用 encode()：在 bulk_write() 中新向量先在内存中累积，
+结束时（或累积到 BULK_FLUSH_ROWS 行时）写成一个分片并只更新一次索引。
+同一模型的小分片过多时合并为一个；总大小超过上限时，按分片最近使用时间做 LRU 淘汰。
+索引更新通过文件锁保护，可以放在多个进程共享的卷上。
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+import unicodedata
+import uuid
+from contextlib import contextmanager
+from typing import List, Dict, Any, Callable, Iterator, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows 上不做跨进程加锁
+    fcntl = None
+
+
+INDEX_VERSION = 1
+
+# bulk_write() 期间内存中累积多少行后先写出一个分片（限制内存）
+BULK_FLUSH_ROWS = 65536
+# 行数少于 COMPACT_SHARD_ROWS 的分片算小分片，同一模型的小分片超过 COMPACT_MAX_SMALL_SHARDS 个时合并
+COMPACT_SHARD_ROWS = 4096
+COMPACT_MAX_SMALL_SHARDS = 16
+
+
+def normalize_text(text: str) -> str:
+    """文本归一化：NFKC + 折叠空白"""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def cache_key(model_name: str, text: str) -> str:
+    """缓存键：模型名 + 归一化文本的哈希"""
+    payload = f"{model_name}\0{normalize_text(text)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """磁盘嵌入向量缓存（mmap 分片 + LRU 淘汰）"""
+
+    def __init__(self, cache_dir: str = "./embedding_cache", max_size_mb: float = 1024):
+        """
+        Args:
+            cache_dir: 缓存目录（可以是共享卷）
+            max_size_mb: 缓存总大小上限（MB）
+        """
+        self.cache_dir = cache_dir
+        self.shard_dir = os.path.join(cache_dir, "shards")
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.lock_path = os.path.join(cache_dir, ".lock")
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+
+        os.makedirs(self.shard_dir, exist_ok=True)
+
+        self._index = self._read_index()
+        self._mmaps: Dict[str, np.ndarray] = {}
+        self._touched: Dict[str, float] = {}  # 本进程内被读取过的分片 → 最近使用时间
+        # bulk_write() 期间尚未写出的向量：模型名 → {缓存键: 向量}（None 表示不在批量写入中）
+        self._pending: Optional[Dict[str, Dict[str, np.ndarray]]] = None
+        self._pending_rows = 0
+
+        self.hits = 0
+        self.misses = 0
+
+    # ==================== 读写接口 ====================
+
+    def get_many(self, model_name: str, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """批量读取缓存，未命中的位置为 None"""
+        results: List[Optional[np.ndarray]] = []
+        now = time.time()
+        pending = self._pending.get(model_name, {}) if self._pending else {}
+
+        for text in texts:
+            key = cache_key(model_name, text)
+            vector = pending.get(key)
+            if vector is None:
+                location = self._index["entries"].get(key)
+                vector = self._read_vector(location) if location else None
+                if vector is not None:
+                    self._touched[location[0]] = now
+            if vector is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            results.append(vector)
+
+        return results
+
+    def put_many(self, model_name: str, texts: List[str], embeddings: np.ndarray):
+        """批量写入缓存（写成一个新分片；bulk_write() 期间先在内存中累积）"""
+        if not texts:
+            return
+
+        matrix = np.asarray(embeddings, dtype=np.float32).reshape(len(texts), -1)
+        keys = [cache_key(model_name, text) for text in texts]
+        if self._pending is None:
+            self._write_shards([(model_name, keys, np.ascontiguousarray(matrix))])
+            return
+
+        pending = self._pending.setdefault(model_name, {})
+        for key, vector in zip(keys, matrix):
+            if key not in pending:
+                self._pending_rows += 1
+            pending[key] = vector
+        if self._pending_rows >= BULK_FLUSH_ROWS:
+            self._flush_pending()
+
+    @contextmanager
+    def bulk_write(self) -> Iterator[None]:
+        """
+        批量写入：期间 put_many() 只在内存中累积，结束时写成一个分片、更新一次索引
+
+        分批建索引时每批都调用 encode()，不再每批重写 index.json 并留下一个小分片。
+        正常结束或抛出异常时都会写出已累积的向量。
+        """
+        if self._pending is not None:
+            yield
+            return
+
+        self._pending = {}
+        try:
+            yield
+        finally:
+            self._flush_pending()
+            self._pending = None
+            self.flush()
+
+    def encode(
+        self,
+        model_name: str,
+        texts: List[str],
+        encode_fn: Callable[[List[str]], np.ndarray]
+    ) -> np.ndarray:
+        """
+        优先从缓存读取向量，只对未命中的文本调用 encode_fn
+
+        Args:
+            model_name: 嵌入模型名称
+            texts: 待向量化文本
+            encode_fn: 批量向量化函数
+
+        Returns:
+            与 texts 顺序一致的向量矩阵
+        """
+        cached = self.get_many(model_name, texts)
+        missing = [i for i, vector in enumerate(cached) if vector is None]
+
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            encoded = np.asarray(encode_fn(missing_texts), dtype=np.float32).reshape(len(missing), -1)
+            self.put_many(model_name, missing_texts, encoded)
+            for position, i in enumerate(missing):
+                cached[i] = encoded[position]
+        elif self._touched and self._pending is None:
+            self.flush()
+
+        if not cached:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.vstack(cached)
+
+    def flush(self):
+        """把本进程的访问记录写回索引（用于 LRU）"""
+        if not self._touched:
+            return
+        with self._locked():
+            self._index = self._read_index()
+            self._apply_touched()
+            self._write_index()
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计"""
+        return {
+            "entries": len(self._index["entries"]),
+            "shards": len(self._index["shards"]),
+            "size_mb": self._total_bytes() / (1024 * 1024),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+    # ==================== 内部实现 ====================
+
+    def _flush_pending(self):
+        """把 bulk_write() 中累积的向量写成分片（每个模型一个）"""
+        if not self._pending:
+            return
+        shards = [
+            (model_name, list(vectors), np.ascontiguousarray(np.stack(list(vectors.values())), dtype=np.float32))
+            for model_name, vectors in self._pending.items() if vectors
+        ]
+        self._pending = {}
+        self._pending_rows = 0
+        self._write_shards(shards)
+
+    def _write_shards(self, shards: List[Tuple[str, List[str], np.ndarray]]):
+        """写入若干 (模型名, 缓存键, 向量矩阵) 分片，然后在锁内只更新一次索引"""
+        written = [(model_name, keys, self._save_shard(matrix)) for model_name, keys, matrix in shards]
+        if not written:
+            return
+
+        with self._locked():
+            self._index = self._read_index()
+            now = time.time()
+            for model_name, keys, shard in written:
+                self._register_shard(shard, model_name, keys, now)
+            self._apply_touched()
+            self._compact()
+            self._evict()
+            self._write_index()
+
+    def _save_shard(self, matrix: np.ndarray) -> str:
+        """把向量矩阵写成新分片文件，返回分片名"""
+        shard = f"{uuid.uuid4().hex}.npy"
+        shard_path = os.path.join(self.shard_dir, shard)
+        tmp_path = f"{shard_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, matrix)
+        os.replace(tmp_path, shard_path)
+        return shard
+
+    def _register_shard(self, shard: str, model_name: str, keys: List[str], last_used: float):
+        """在索引中登记分片及其中每一行的缓存键（调用方持有锁）"""
+        self._index["shards"][shard] = {
+            "model": model_name,
+            "rows": len(keys),
+            "nbytes": os.path.getsize(os.path.join(self.shard_dir, shard)),
+            "last_used": last_used
+        }
+        for row, key in enumerate(keys):
+            self._index["entries"][key] = [shard, row]
+
+    def _open_shard(self, shard: str) -> Optional[np.ndarray]:
+        matrix = self._mmaps.get(shard)
+        if matrix is None:
+            path = os.path.join(self.shard_dir, shard)
+            try:
+                matrix = np.load(path, mmap_mode="r")
+            except (OSError, ValueError):
+                # 分片可能已被其他进程淘汰
+                return None
+            self._mmaps[shard] = matrix
+        return matrix
+
+    def _read_vector(self, location) -> Optional[np.ndarray]:
+        shard, row = location
+        matrix = self._open_shard(shard)
+        if matrix is None or row >= matrix.shape[0]:
+            return None
+        return np.array(matrix[row], dtype=np.float32)
+
+    def _apply_touched(self):
+        for shard, last_used in self._touched.items():
+            info = self._index["shards"].get(shard)
+            if info:
+                info["last_used"] = max(info["last_used"], last_used)
+        self._touched.clear()
+
+    def _total_bytes(self) -> int:
+        return sum(info["nbytes"] for info in self._index["shards"].values())
+
+    def _compact(self):
+        """同一模型的小分片过多时合并成一个（调用方持有锁）"""
+        small: Dict[str, List[str]] = {}
+        for shard, info in self._index["shards"].items():
+            if info["rows"] < COMPACT_SHARD_ROWS:
+                small.setdefault(info["model"], []).append(shard)
+
+        for model_name, shards in small.items():
+            if len(shards) <= COMPACT_MAX_SMALL_SHARDS:
+                continue
+            merged = set(shards)
+            keys, vectors = [], []
+            for key, (shard, row) in self._index["entries"].items():
+                if shard in merged:
+                    matrix = self._open_shard(shard)
+                    if matrix is not None and row < matrix.shape[0]:
+                        keys.append(key)
+                        vectors.append(matrix[row])
+            last_used = max(self._index["shards"][shard]["last_used"] for shard in shards)
+
+            self._drop_shards(merged)
+            if keys:
+                shard = self._save_shard(np.ascontiguousarray(np.stack(vectors), dtype=np.float32))
+                self._register_shard(shard, model_name, keys, last_used)
+
+    def _drop_shards(self, shards: set):
+        """从索引和磁盘删除分片（调用方持有锁）"""
+        for shard in shards:
+            del self._index["shards"][shard]
+            self._mmaps.pop(shard, None)
+            try:
+                os.remove(os.path.join(self.shard_dir, shard))
+            except OSError:
+                pass
+
+        self._index["entries"] = {
+            key: location for key, location in self._index["entries"].items()
+            if location[0] not in shards
+        }
+
+    def _evict(self):
+        """超过大小上限时按 LRU 淘汰分片"""
+        total = self._total_bytes()
+        if total <= self.max_bytes:
+            return
+
+        evicted = set()
+        for shard, info in sorted(self._index["shards"].items(), key=lambda item: item[1]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            total -= info["nbytes"]
+            evicted.add(shard)
+
+        self._drop_shards(evicted)
+
+    def _read_index(self) -> Dict[str, Any]:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("version") == INDEX_VERSION:
+                return index
+        except (OSError, ValueError):
+            pass
+        return {"version": INDEX_VERSION, "shards": {}, "entries": {}}
+
+    def _write_index(self):
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self.index_path)
+
+    @contextmanager
+    def _locked(self):
+        """跨进程互斥（保护 index.json 的读-改-写）"""
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,251 @@
+"""
+按类别分层检索
+问题带有 category 字段（基础健康、生活习惯……）。分层检索先把查询与每个类别的质心比较，
+只在最相关的几个类别内部做精确检索，每轮的计算量取决于类别大小而不是题库大小。
+
+- 类别质心：类别内问题向量的均值（L2 归一化），索引变化后重新计算
+- 分组后矩阵按组重新排列，每个组是一段连续的行，组内打分直接对切片做矩阵向量乘
+- 过大的类别（超过 max_group_size 个问题）用球面 k-means 再切分成若干子簇
+- 回退到全量检索：题库小于 min_flat_rows、候选（排除已提问后）不足 n_results、
+  或最相关质心的相似度低于 fallback_score 时
+
+索引文件与 numpy 后端相同（<collection>.npz），同一份索引可以用两种方式检索。
+
+后端名称（create_vector_backend / vector_backend 参数）：
+- hierarchical        每次检索 3 个类别（子簇）
+- hierarchical:5      每次检索 5 个类别（子簇）
+"""
+
+from typing import List, Dict, Any, Optional, Collection, Tuple, Sequence
+
+import numpy as np
+
+from .vector_backend import NumpyVectorBackend, VectorBackend, SearchHit, _normalize_rows
+
+
+DEFAULT_N_PROBE = 3
+DEFAULT_MAX_GROUP_SIZE = 4096
+DEFAULT_MIN_FLAT_ROWS = 2048
+KMEANS_ITERATIONS = 8
+# 分块计算相似度的行数
+CHUNK_ROWS = 65536
+
+
+def parse_hierarchical_spec(spec: str) -> Dict[str, Any]:
+    """解析后端名：'hierarchical:5' → {'n_probe': 5}"""
+    parts = spec.split(":")[1:]
+    if not parts:
+        return {}
+    if len(parts) == 1 and parts[0].isdigit() and int(parts[0]) > 0:
+        return {"n_probe": int(parts[0])}
+    raise ValueError(f"无法解析分层检索参数: {spec}（示例: hierarchical:5）")
+
+
+def spherical_kmeans(matrix: np.ndarray, n_clusters: int, seed: int = 0) -> np.ndarray:
+    """球面 k-means（余弦相似度），返回每行的簇编号"""
+    rng = np.random.default_rng(seed)
+    centroids = np.array(matrix[rng.choice(len(matrix), size=n_clusters, replace=False)], dtype=np.float32)
+    labels = np.zeros(len(matrix), dtype=np.int64)
+
+    for _ in range(KMEANS_ITERATIONS):
+        for start in range(0, len(matrix), CHUNK_ROWS):
+            chunk = np.asarray(matrix[start:start + CHUNK_ROWS], dtype=np.float32)
+            labels[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, matrix)
+        empty = np.bincount(labels, minlength=n_clusters) == 0
+        # 空簇重新随机取一个点作为质心
+        sums[empty] = matrix[rng.choice(len(matrix), size=int(empty.sum()))]
+        centroids = _normalize_rows(sums)
+
+    return labels
+
+
+def build_groups(
+    matrix: np.ndarray,
+    categories: List[str],
+    max_group_size: int = DEFAULT_MAX_GROUP_SIZE
+) -> Tuple[List[str], List[np.ndarray], np.ndarray]:
+    """
+    按类别分组（过大的类别切分为子簇）
+
+    Returns:
+        (分组名称, 每组的行号数组, 归一化质心矩阵)
+    """
+    by_category: Dict[str, List[int]] = {}
+    for row, category in enumerate(categories):
+        by_category.setdefault(category, []).append(row)
+
+    labels: List[str] = []
+    groups: List[np.ndarray] = []
+    for category, rows in by_category.items():
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) <= max_group_size:
+            labels.append(category)
+            groups.append(rows)
+            continue
+
+        n_clusters = -(-len(rows) // max_group_size)
+        assignment = spherical_kmeans(matrix[rows], n_clusters)
+        for cluster in range(n_clusters):
+            members = rows[assignment == cluster]
+            if len(members):
+                labels.append(f"{category}#{cluster}")
+                groups.append(members)
+
+    centroids = np.stack([np.asarray(matrix[rows], dtype=np.float32).mean(axis=0) for rows in groups])
+    return labels, groups, _normalize_rows(centroids)
+
+
+class HierarchicalVectorBackend(NumpyVectorBackend):
+    """先选类别、再在类别内精确检索的内存后端"""
+
+    name = "hierarchical"
+
+    def __init__(
+        self,
+        persist_path: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        n_probe: int = DEFAULT_N_PROBE,
+        max_group_size: int = DEFAULT_MAX_GROUP_SIZE,
+        min_flat_rows: int = DEFAULT_MIN_FLAT_ROWS,
+        fallback_score: Optional[float] = None
+    ):
+        """
+        Args:
+            persist_path: .npz 索引路径（与 numpy 后端格式相同）
+            metadata: 索引级元数据
+            n_probe: 每次检索的类别（子簇）数
+            max_group_size: 超过该大小的类别切分为子簇
+            min_flat_rows: 题库小于该行数时直接全量检索
+            fallback_score: 最相关质心的相似度低于该值时回退到全量检索（None 表示不回退）
+        """
+        self.n_probe = n_probe
+        self.max_group_size = max_group_size
+        self.min_flat_rows = min_flat_rows
+        self.fallback_score = fallback_score
+        self._group_labels: Optional[List[str]] = None
+        self._groups: List[Tuple[int, int]] = []  # 每组在矩阵中的 [start, end) 行区间
+        self._centroids = np.zeros((0, 0), dtype=np.float32)
+        self.hierarchical_queries = 0
+        self.flat_queries = 0
+        self.candidates_scored = 0
+        super().__init__(persist_path=persist_path, metadata=metadata)
+
+    def reset(self, metadata: Optional[Dict[str, Any]] = None):
+        self._invalidate()
+        super().reset(metadata)
+
+    def delete(self, ids: List[str]):
+        self._invalidate()
+        super().delete(ids)
+
+    def prepare(self):
+        if len(self._ids) >= self.min_flat_rows and self._group_labels is None:
+            self._build_groups()
+
+    def query(
+        self,
+        query_embedding: np.ndarray,
+        n_results: int,
+        exclude_ids: Optional[Collection[int]] = None
+    ) -> List[SearchHit]:
+        total = len(self._ids)
+        if total == 0 or n_results <= 0:
+            return []
+        if total < self.min_flat_rows:
+            return self._flat_query(query_embedding, n_results, exclude_ids)
+        if self._group_labels is None:
+            self._build_groups()
+        if len(self._groups) <= self.n_probe:
+            return self._flat_query(query_embedding, n_results, exclude_ids)
+
+        query = np.asarray(query_embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        centroid_scores = self._centroids @ query
+        if self.fallback_score is not None and centroid_scores.max() < self.fallback_score:
+            return self._flat_query(query_embedding, n_results, exclude_ids)
+
+        probe = np.argpartition(-centroid_scores, self.n_probe - 1)[:self.n_probe]
+        slices = sorted(self._groups[group] for group in probe)
+        rows = np.concatenate([np.arange(start, end) for start, end in slices])
+        scores = np.concatenate([self._matrix[start:end] @ query for start, end in slices])
+
+        available = len(rows)
+        excluded_rows = self._excluded_rows(exclude_ids)
+        if excluded_rows:
+            excluded = np.isin(rows, excluded_rows)
+            scores[excluded] = -np.inf
+            available -= int(excluded.sum())
+        if available < n_results:
+            # 这几个类别里剩下的问题不够，回退到全量检索
+            return self._flat_query(query_embedding, n_results, exclude_ids)
+
+        k = n_results
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(rows) else np.arange(len(rows))
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        self.hierarchical_queries += 1
+        self.candidates_scored += len(rows)
+        return [(self._metadatas[rows[i]], float(scores[i])) for i in top]
+
+    def query_batch(
+        self,
+        query_embeddings: np.ndarray,
+        n_results: int,
+        exclude_ids: Optional[Sequence[Optional[Collection[int]]]] = None
+    ) -> List[List[SearchHit]]:
+        if len(self._ids) < self.min_flat_rows:
+            # 小题库：与全量检索相同，一次矩阵乘完成
+            self.flat_queries += len(query_embeddings)
+            return super().query_batch(query_embeddings, n_results, exclude_ids)
+        # 每个查询选中的类别不同，逐个检索
+        return VectorBackend.query_batch(self, query_embeddings, n_results, exclude_ids)
+
+    def stats(self) -> Dict[str, Any]:
+        """分组情况和检索路径统计"""
+        queries = self.hierarchical_queries + self.flat_queries
+        return {
+            "groups": len(self._groups) if self._group_labels is not None else None,
+            "hierarchical_queries": self.hierarchical_queries,
+            "flat_queries": self.flat_queries,
+            "avg_candidates": (
+                (self.candidates_scored + self.flat_queries * len(self._ids)) / queries if queries else 0.0
+            ),
+        }
+
+    # ==================== 内部实现 ====================
+
+    def _flat_query(self, query_embedding, n_results, exclude_ids) -> List[SearchHit]:
+        self.flat_queries += 1
+        return super().query(query_embedding, n_results, exclude_ids)
+
+    def _apply_upsert(self, ids, vectors, documents, metadatas):
+        self._invalidate()
+        super()._apply_upsert(ids, vectors, documents, metadatas)
+
+    def _invalidate(self):
+        self._group_labels = None
+        self._groups = []
+        self._centroids = np.zeros((0, 0), dtype=np.float32)
+
+    def _build_groups(self):
+        """计算类别（子簇）分组和质心，并把矩阵按组重新排列为连续的行区间"""
+        categories = [metadata.get("category") or "" for metadata in self._metadatas]
+        labels, groups, centroids = build_groups(self._matrix, categories, self.max_group_size)
+
+        order = np.concatenate(groups)
+        self._matrix = self._buffer = np.ascontiguousarray(self._matrix[order])
+        self._ids = [self._ids[row] for row in order]
+        self._documents = [self._documents[row] for row in order]
+        self._metadatas = [self._metadatas[row] for row in order]
+        self._rebuild_row_maps()
+
+        bounds = np.cumsum([0] + [len(rows) for rows in groups])
+        self._group_labels = labels
+        self._groups = [(int(bounds[i]), int(bounds[i + 1])) for i in range(len(groups))]
+        self._centroids = centroids
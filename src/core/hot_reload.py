@@ -0,0 +1,120 @@
+"""
+问题库热更新
+修改 questions.yaml 后不需要重启客户端：
+
+- FileWatcher: 后台线程轮询文件的修改时间和大小（不依赖 watchdog / inotify），
+  文件稳定 debounce 秒后回调（编辑器保存时可能分几次写入）
+- IndexVersion: 检索引擎的一个只读版本（问题库 + 检索后端 + 关键词索引）。
+  热更新在后台构建新版本（按内容哈希增量同步向量索引），完成后整体替换引擎的当前版本；
+  已经开始的访谈（RetrievalSession）继续使用开始时的版本，新访谈使用新版本
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Tuple
+
+from .question_bank import QuestionBank
+
+
+DEFAULT_POLL_INTERVAL = 1.0
+DEFAULT_DEBOUNCE = 0.5
+# 热更新时每批向量化的问题数：模型 encode 互斥执行，小批次让进行中访谈的查询向量化不必久等
+RELOAD_BATCH_SIZE = 32
+
+
+@dataclass(frozen=True)
+class IndexVersion:
+    """检索引擎的一个只读版本"""
+    version: int
+    bank: QuestionBank
+    backend: Any = None  # VectorBackend（尚未加载时为 None）
+    lexical_index: Any = None  # LexicalIndex（未开启混合检索时为 None）
+    loaded_at: float = 0.0
+
+    @classmethod
+    def empty(cls) -> "IndexVersion":
+        return cls(version=0, bank=QuestionBank())
+
+
+def file_signature(path: str) -> Optional[Tuple[int, int]]:
+    """文件的 (修改时间 ns, 大小)；文件不存在时为 None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class FileWatcher:
+    """轮询文件变化的后台线程"""
+
+    def __init__(
+        self,
+        path: str,
+        callback: Callable[[], Any],
+        interval: float = DEFAULT_POLL_INTERVAL,
+        debounce: float = DEFAULT_DEBOUNCE
+    ):
+        """
+        Args:
+            path: 监视的文件
+            callback: 文件变化（且已稳定）后在监视线程中调用
+            interval: 轮询间隔（秒）
+            debounce: 文件保持不变多久后才回调（秒）
+        """
+        self.path = path
+        self.callback = callback
+        self.interval = interval
+        self.debounce = debounce
+        self._signature = file_signature(path)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.changes = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> "FileWatcher":
+        if not self.running:
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name=f"watch-{os.path.basename(self.path)}", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.interval + self.debounce + 1)
+        self._thread = None
+
+    def check(self) -> bool:
+        """检查一次文件是否变化，变化且稳定后调用回调，返回是否调用了回调"""
+        signature = file_signature(self.path)
+        if signature is None or signature == self._signature:
+            # 文件暂时不存在（编辑器先删除再写入）时等待下一次轮询
+            return False
+
+        # 等待文件写完
+        while not self._stop.wait(self.debounce):
+            latest = file_signature(self.path)
+            if latest == signature:
+                break
+            signature = latest
+        if signature is None or self._stop.is_set():
+            return False
+
+        self._signature = signature
+        self.changes += 1
+        try:
+            self.callback()
+        except Exception as e:
+            print(f"❌ 热更新失败: {self.path}: {e}")
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
@@ -0,0 +1,178 @@
+"""
+增量索引同步
+为每个问题计算内容哈希（问题文本、类别、关键词、嵌入模型名），
+与索引中已保存的哈希对比，只对新增或变化的问题重新向量化，
+并删除问题库中已不存在的记录。
+
+变化的问题按固定大小分批 向量化 → 写入，内存占用只与批大小有关；
+每批写入即是检查点，构建中断后再次同步只会处理剩下的问题。
+"""
+
+import hashlib
+import json
+import time
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Callable, Optional, Iterator, Tuple
+
+import numpy as np
+
+from .vector_backend import VectorBackend
+
+
+# 每批向量化并写入的问题数
+DEFAULT_INDEX_BATCH_SIZE = 256
+
+
+def question_record_id(question) -> str:
+    """问题在向量索引中的记录 id"""
+    return f"q_{question.id}"
+
+
+def build_document(question) -> str:
+    """构建用于向量化的富文本（问题 + 类别 + 关键词）"""
+    doc_text = f"{question.question}"
+    if question.category:
+        doc_text += f" [类别: {question.category}]"
+    if question.keywords:
+        doc_text += f" [关键词: {', '.join(question.keywords)}]"
+    return doc_text
+
+
+def question_content_hash(question, model_name: str) -> str:
+    """计算问题内容哈希（任一字段或模型变化都会改变哈希）"""
+    payload = json.dumps(
+        [question.question, question.category, question.keywords, model_name],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def build_metadata(question, content_hash: str) -> Dict[str, Any]:
+    """构建向量记录的元数据"""
+    return {
+        "id": question.id,
+        "type": question.type,
+        "category": question.category or "",
+        "question_text": question.question,
+        "content_hash": content_hash
+    }
+
+
+@dataclass
+class IndexDiff:
+    """索引差异"""
+    added: List[Any] = field(default_factory=list)  # 新增的问题
+    updated: List[Any] = field(default_factory=list)  # 内容变化的问题
+    removed: List[str] = field(default_factory=list)  # 需删除的记录 id
+    unchanged: int = 0
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.updated or self.removed)
+
+    def summary(self) -> str:
+        return (f"新增 {len(self.added)}，更新 {len(self.updated)}，"
+                f"删除 {len(self.removed)}，未变 {self.unchanged}")
+
+
+def diff_index(existing_hashes: Dict[str, str], questions: List[Any], model_name: str) -> IndexDiff:
+    """对比索引中的哈希与当前问题库"""
+    diff = IndexDiff()
+    current_ids = set()
+
+    for q in questions:
+        record_id = question_record_id(q)
+        current_ids.add(record_id)
+        old_hash = existing_hashes.get(record_id)
+        if old_hash is None:
+            diff.added.append(q)
+        elif old_hash != question_content_hash(q, model_name):
+            diff.updated.append(q)
+        else:
+            diff.unchanged += 1
+
+    diff.removed = [record_id for record_id in existing_hashes if record_id not in current_ids]
+    return diff
+
+
+def iter_embedding_batches(
+    documents: List[str],
+    embed_batch: Callable[[List[str]], np.ndarray],
+    batch_size: int = DEFAULT_INDEX_BATCH_SIZE
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """逐批向量化，产出 (批起始位置, float32 向量矩阵)"""
+    batch_size = max(1, batch_size)
+    for start in range(0, len(documents), batch_size):
+        yield start, np.asarray(embed_batch(documents[start:start + batch_size]), dtype=np.float32)
+
+
+def sync_question_index(
+    backend: VectorBackend,
+    questions: List[Any],
+    model_name: str,
+    embed_batch: Callable[[List[str]], np.ndarray],
+    index_metadata: Optional[Dict[str, Any]] = None,
+    batch_size: int = DEFAULT_INDEX_BATCH_SIZE
+) -> IndexDiff:
+    """
+    将问题库增量同步到检索后端
+
+    Args:
+        backend: 检索后端
+        questions: 当前问题列表
+        model_name: 嵌入模型名称（参与哈希，并写入索引元数据）
+        embed_batch: 批量向量化函数
+        index_metadata: 需要重建索引时写入的索引级元数据
+        batch_size: 每批向量化并写入的问题数
+
+    Returns:
+        本次同步应用的差异
+    """
+    # 模型变化时向量维度可能不同，只能整体重建
+    if backend.count() > 0 and backend.get_metadata().get("embedding_model") != model_name:
+        print(f"🔄 嵌入模型已变化，重建索引")
+        backend.reset(metadata=index_metadata)
+
+    diff = diff_index(backend.get_content_hashes(), questions, model_name)
+    if diff.is_empty:
+        return diff
+
+    changed = diff.added + diff.updated
+    with backend.bulk_write():
+        if changed:
+            _upsert_in_batches(backend, changed, model_name, embed_batch, batch_size)
+        if diff.removed:
+            backend.delete(diff.removed)
+
+    return diff
+
+
+def _upsert_in_batches(
+    backend: VectorBackend,
+    changed: List[Any],
+    model_name: str,
+    embed_batch: Callable[[List[str]], np.ndarray],
+    batch_size: int
+):
+    """逐批 构建文档 → 向量化 → 写入，不在内存中保留整个问题库的文档和向量"""
+    batch_size = max(1, batch_size)
+    total = len(changed)
+    batches = (total + batch_size - 1) // batch_size
+    if batches > 1:
+        print(f"   正在向量化 {total} 个问题（{batches} 批，每批 {batch_size}）...")
+    else:
+        print(f"   正在向量化 {total} 个问题...")
+
+    start_time = time.time()
+    for start in range(0, total, batch_size):
+        batch = changed[start:start + batch_size]
+        documents = [build_document(q) for q in batch]
+        backend.upsert(
+            ids=[question_record_id(q) for q in batch],
+            embeddings=np.asarray(embed_batch(documents), dtype=np.float32),
+            documents=documents,
+            metadatas=[build_metadata(q, question_content_hash(q, model_name)) for q in batch]
+        )
+        if batches > 1:
+            done = start + len(batch)
+            print(f"   ✓ {done}/{total}（{done / max(time.time() - start_time, 1e-9):.0f} 条/秒）")
@@ -0,0 +1,192 @@
+"""
+关键词 + 字符 n-gram 倒排索引（BM25）
+与向量检索融合（混合检索），并提供跳过向量化的关键词快速通道：
+
+- 关键词：问题的 keywords 作为独立词项（权重 KEYWORD_WEIGHT），在查询文本中按子串匹配
+- 字符 n-gram：问题文本的汉字二元组 + 英文 / 数字单词
+- 打分：BM25（k1=1.5, b=0.75）
+- 融合：向量检索排名与 BM25 排名做加权倒数排名融合（RRF），两种分数量纲不同，只用排名
+- 快速通道：最近一次回答命中了某个未提问问题的关键词，且 BM25 分数明显领先时，
+  直接返回该问题，不做向量化（不加载模型、不做前向计算）
+"""
+
+import re
+import time
+from collections import Counter
+from typing import List, Dict, Any, Optional, Iterable, Collection, Tuple
+
+import numpy as np
+
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+KEYWORD_WEIGHT = 2.0
+RRF_K = 60
+
+# 快速通道：首位至少命中一个关键词、BM25 分数不低于 FAST_PATH_MIN_SCORE，
+# 且不低于第二名的 FAST_PATH_MARGIN 倍
+FAST_PATH_MIN_SCORE = 4.0
+FAST_PATH_MARGIN = 1.5
+
+_WORD = re.compile(r"[a-z0-9]+")
+_CJK = re.compile(r"[一-鿿]+")
+
+# 检索命中：(问题 ID, BM25 分数, 命中的关键词数)
+LexicalHit = Tuple[int, float, int]
+
+
+def char_ngrams(text: str) -> List[str]:
+    """汉字二元组（单字片段保留为一元）+ 小写英文 / 数字单词"""
+    text = text.lower()
+    terms = _WORD.findall(text)
+    for run in _CJK.findall(text):
+        if len(run) == 1:
+            terms.append(run)
+        else:
+            terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return terms
+
+
+class LexicalIndex:
+    """问题库的 BM25 倒排索引"""
+
+    def __init__(self, questions: Iterable[Any]):
+        """
+        Args:
+            questions: Question 对象（使用 id、question、keywords）
+        """
+        self.question_ids: List[int] = []
+        postings: Dict[str, Dict[int, float]] = {}
+        lengths: List[float] = []
+        self._keyword_terms: Dict[str, str] = {}  # 小写关键词 → 词项
+
+        for doc, question in enumerate(questions):
+            self.question_ids.append(question.id)
+            counts = Counter(char_ngrams(question.question))
+            for keyword in question.keywords or ():
+                term = f"kw:{keyword.lower()}"
+                self._keyword_terms[keyword.lower()] = term
+                counts[term] += KEYWORD_WEIGHT
+            for term, tf in counts.items():
+                postings.setdefault(term, {})[doc] = tf
+            lengths.append(sum(counts.values()))
+
+        self._doc_of = {question_id: doc for doc, question_id in enumerate(self.question_ids)}
+        self._lengths = np.asarray(lengths, dtype=np.float32)
+        avg_length = float(self._lengths.mean()) if len(lengths) else 1.0
+        self._norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths / max(avg_length, 1e-9))
+        self._max_keyword_len = max((len(k) for k in self._keyword_terms), default=0)
+
+        n_docs = len(self.question_ids)
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray, float]] = {}
+        for term, docs in postings.items():
+            idf = float(np.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5)))
+            self._postings[term] = (
+                np.fromiter(docs.keys(), dtype=np.int64, count=len(docs)),
+                np.fromiter(docs.values(), dtype=np.float32, count=len(docs)),
+                idf,
+            )
+
+    def __len__(self) -> int:
+        return len(self.question_ids)
+
+    def memory_bytes(self) -> int:
+        """倒排表占用的内存（近似）"""
+        return self._lengths.nbytes + self._norm.nbytes + sum(
+            docs.nbytes + tf.nbytes + 100 for docs, tf, _ in self._postings.values()
+        )
+
+    def query_terms(self, text: str) -> Counter:
+        """查询文本中的词项（关键词按子串匹配，汉字没有分词边界）"""
+        terms = Counter(char_ngrams(text))
+        lowered = text.lower()
+        for start in range(len(lowered)):
+            for end in range(start + 1, min(start + self._max_keyword_len, len(lowered)) + 1):
+                term = self._keyword_terms.get(lowered[start:end])
+                if term is not None:
+                    terms[term] += 1
+        return terms
+
+    def search(
+        self,
+        text: str,
+        n_results: int,
+        exclude_ids: Optional[Collection[int]] = None
+    ) -> List[LexicalHit]:
+        """BM25 检索，返回分数从高到低的 (问题 ID, 分数, 命中关键词数)"""
+        if not self.question_ids or n_results <= 0:
+            return []
+
+        scores = np.zeros(len(self.question_ids), dtype=np.float32)
+        keyword_hits = np.zeros(len(self.question_ids), dtype=np.int32)
+        for term, query_tf in self.query_terms(text).items():
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            docs, tf, idf = posting
+            scores[docs] += query_tf * idf * tf * (BM25_K1 + 1) / (tf + self._norm[docs])
+            if term.startswith("kw:"):
+                keyword_hits[docs] += 1
+
+        if exclude_ids:
+            excluded = [self._doc_of[qid] for qid in exclude_ids if qid in self._doc_of]
+            scores[excluded] = 0.0
+
+        matched = np.flatnonzero(scores > 0)
+        if len(matched) > n_results:
+            matched = matched[np.argpartition(-scores[matched], n_results - 1)[:n_results]]
+        matched = matched[np.argsort(-scores[matched], kind="stable")]
+        return [(self.question_ids[doc], float(scores[doc]), int(keyword_hits[doc])) for doc in matched]
+
+
+def fast_path_pick(
+    hits: List[LexicalHit],
+    min_score: float = FAST_PATH_MIN_SCORE,
+    margin: float = FAST_PATH_MARGIN
+) -> Optional[int]:
+    """关键词命中足够强时返回问题 ID（否则 None，需要走向量检索）"""
+    if not hits:
+        return None
+    question_id, score, keywords = hits[0]
+    if keywords == 0 or score < min_score:
+        return None
+    if len(hits) > 1 and score < hits[1][1] * margin:
+        return None
+    return question_id
+
+
+def fuse_rankings(
+    vector_ids: List[int],
+    lexical_ids: List[int],
+    lexical_weight: float = 0.5
+) -> List[int]:
+    """加权倒数排名融合：score = (1 - w) / (k + 向量排名) + w / (k + 词法排名)"""
+    scores: Dict[int, float] = {}
+    for rank, question_id in enumerate(vector_ids):
+        scores[question_id] = scores.get(question_id, 0.0) + (1 - lexical_weight) / (RRF_K + rank)
+    for rank, question_id in enumerate(lexical_ids):
+        scores[question_id] = scores.get(question_id, 0.0) + lexical_weight / (RRF_K + rank)
+    return sorted(scores, key=lambda question_id: -scores[question_id])
+
+
+class RetrievalStats:
+    """检索路径统计（快速通道命中率和各路径耗时）"""
+
+    def __init__(self):
+        self.fast_path_ms: List[float] = []
+        self.vector_ms: List[float] = []
+
+    def record(self, fast_path: bool, start: float):
+        """记录一次检索（start 为 time.perf_counter() 起点）"""
+        elapsed = (time.perf_counter() - start) * 1000
+        (self.fast_path_ms if fast_path else self.vector_ms).append(elapsed)
+
+    def summary(self) -> Dict[str, Any]:
+        total = len(self.fast_path_ms) + len(self.vector_ms)
+        return {
+            "queries": total,
+            "fast_path": len(self.fast_path_ms),
+            "fast_path_rate": len(self.fast_path_ms) / total if total else 0.0,
+            "fast_path_avg_ms": float(np.mean(self.fast_path_ms)) if self.fast_path_ms else 0.0,
+            "vector_avg_ms": float(np.mean(self.vector_ms)) if self.vector_ms else 0.0,
+        }
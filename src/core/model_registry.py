@@ -0,0 +1,264 @@
+"""
+进程级嵌入模型注册表
+每个模型在进程内只加载一次，QuestionRAG / QuestionRAGOptimized / 对比脚本共享同一份权重。
+
+模型名可以带精度后缀（CPU 上的低精度权重，向量与 fp32 略有差异，缓存按完整名称区分）：
+- BAAI/bge-small-zh-v1.5          fp32（默认）
+- BAAI/bge-small-zh-v1.5@bf16     bfloat16 权重
+- BAAI/bge-small-zh-v1.5@int8     Linear 层动态 int8 量化
+- onnx:BAAI/bge-small-zh-v1.5     ONNX Runtime 推理（见 onnx_embedding.py，支持 @int8）
+
+超过 idle_timeout 秒未使用的模型会被卸载，下次使用时自动重新加载。
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Any, Optional, Tuple, Callable
+
+import numpy as np
+
+from src.utils.memory import current_rss_mb, release_memory
+
+
+PRECISIONS = ("fp32", "bf16", "int8")
+DEFAULT_IDLE_TIMEOUT = float(os.getenv("EMBEDDING_MODEL_IDLE_TIMEOUT", 600))
+
+
+def parse_model_spec(spec: str) -> Tuple[str, str]:
+    """拆分模型名和精度：'name@int8' → ('name', 'int8')"""
+    name, _, precision = spec.partition("@")
+    precision = precision or "fp32"
+    if precision not in PRECISIONS:
+        raise ValueError(f"不支持的模型精度: {precision}（可选: {', '.join(PRECISIONS)}）")
+    return name, precision
+
+
+def model_spec(name: str, precision: str = "fp32") -> str:
+    """组合模型名和精度（fp32 不带后缀，与已有缓存保持一致）"""
+    name, existing = parse_model_spec(name)
+    precision = precision if precision != "fp32" else existing
+    return name if precision == "fp32" else f"{name}@{precision}"
+
+
+def base_model_name(spec: str) -> str:
+    """去掉运行时前缀和精度后缀的模型名：'onnx:name@int8' → 'name'"""
+    name = parse_model_spec(spec)[0]
+    return name.split(":", 1)[1] if name.startswith("onnx:") else name
+
+
+def _load_sentence_transformer(name: str, precision: str):
+    """加载 SentenceTransformer 并按精度转换权重"""
+    from sentence_transformers import SentenceTransformer
+
+    kwargs = {"device": "cpu"} if precision != "fp32" else {}  # 低精度权重只用于 CPU 推理
+    model = SentenceTransformer(name, **kwargs)
+    if precision == "bf16":
+        import torch
+        model = model.to(torch.bfloat16)
+    elif precision == "int8":
+        import torch
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+
+def _load_onnx(name: str, precision: str):
+    """加载 ONNX Runtime 模型（首次使用时导出并校验）"""
+    from .onnx_embedding import load_onnx_model
+    return load_onnx_model(name, precision)
+
+
+class SharedEmbeddingModel:
+    """
+    共享模型引用
+
+    不直接持有模型对象：每次 encode 时从注册表取出（已卸载则重新加载），
+    同一模型的 encode 调用互斥执行（tokenizer 不支持并发调用）。
+    """
+
+    def __init__(self, registry: "EmbeddingModelRegistry", spec: str):
+        self.registry = registry
+        self.spec = spec
+
+    def encode(self, sentences, **kwargs) -> np.ndarray:
+        """与 SentenceTransformer.encode 相同的参数，总是返回 float32 数组"""
+        return self.registry._encode(self.spec, sentences, kwargs)
+
+    def load(self) -> "SharedEmbeddingModel":
+        """确保模型已加载"""
+        self.registry._entry(self.spec)
+        return self
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.registry.is_loaded(self.spec)
+
+    def __repr__(self):
+        return f"SharedEmbeddingModel({self.spec!r})"
+
+
+class _Entry:
+    __slots__ = ("model", "lock", "last_used", "load_seconds", "rss_delta_mb")
+
+    def __init__(self, model, load_seconds: float, rss_delta_mb: float):
+        self.model = model
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+        self.load_seconds = load_seconds
+        self.rss_delta_mb = rss_delta_mb
+
+
+class EmbeddingModelRegistry:
+    """线程安全的进程级模型注册表"""
+
+    def __init__(self, idle_timeout: Optional[float] = DEFAULT_IDLE_TIMEOUT):
+        """
+        Args:
+            idle_timeout: 空闲多少秒后卸载模型（None 或 0 表示不卸载）
+        """
+        self.idle_timeout = idle_timeout
+        self._entries: Dict[str, _Entry] = {}
+        self._loading: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._loaders: Dict[str, Callable[[str, str], Any]] = {
+            "": _load_sentence_transformer,
+            "onnx": _load_onnx,
+        }  # 前缀 → 加载函数
+        self._reaper: Optional[threading.Thread] = None
+        self.loads = 0
+        self.unloads = 0
+
+    def get(self, name: str, precision: str = "fp32") -> SharedEmbeddingModel:
+        """获取共享模型引用（不会立即加载）"""
+        return SharedEmbeddingModel(self, model_spec(name, precision))
+
+    def register_loader(self, prefix: str, loader: Callable[[str, str], Any]):
+        """注册带前缀模型名（如 'onnx:name'）的加载函数 loader(name, precision)"""
+        self._loaders[prefix] = loader
+
+    def is_loaded(self, spec: str) -> bool:
+        with self._lock:
+            return spec in self._entries
+
+    def unload(self, spec: str) -> bool:
+        """卸载模型（正在 encode 时等待其完成）"""
+        with self._lock:
+            entry = self._entries.pop(spec, None)
+        if entry is None:
+            return False
+
+        before = current_rss_mb()
+        with entry.lock:
+            entry.model = None
+        release_memory()
+        self.unloads += 1
+        print(f"♻️  卸载嵌入模型: {spec}（RSS {before:.0f}MB → {current_rss_mb():.0f}MB）")
+        return True
+
+    def unload_idle(self) -> int:
+        """卸载超过空闲时间的模型，返回卸载数量"""
+        if not self.idle_timeout:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            idle = [
+                spec for spec, entry in self._entries.items()
+                if now - entry.last_used > self.idle_timeout and not entry.lock.locked()
+            ]
+        return sum(self.unload(spec) for spec in idle)
+
+    def clear(self):
+        """卸载全部模型"""
+        with self._lock:
+            specs = list(self._entries)
+        for spec in specs:
+            self.unload(spec)
+
+    def stats(self) -> Dict[str, Any]:
+        """已加载模型和进程内存"""
+        with self._lock:
+            models = {
+                spec: {
+                    "load_seconds": entry.load_seconds,
+                    "rss_delta_mb": entry.rss_delta_mb,
+                    "idle_seconds": time.monotonic() - entry.last_used,
+                }
+                for spec, entry in self._entries.items()
+            }
+        return {"models": models, "loads": self.loads, "unloads": self.unloads, "rss_mb": current_rss_mb()}
+
+    # ==================== 内部实现 ====================
+
+    def _entry(self, spec: str) -> _Entry:
+        """取出已加载的模型，没有则加载（同一模型只加载一次）"""
+        with self._lock:
+            entry = self._entries.get(spec)
+            if entry is not None:
+                return entry
+            loading = self._loading.setdefault(spec, threading.Lock())
+
+        with loading:
+            with self._lock:
+                entry = self._entries.get(spec)
+            if entry is not None:
+                return entry
+
+            prefix, sep, rest = spec.partition(":")
+            if not sep:
+                prefix, rest = "", spec
+            loader = self._loaders.get(prefix)
+            if loader is None:
+                raise ValueError(f"未知的模型类型: {spec}")
+            name, precision = parse_model_spec(rest)
+
+            rss_before = current_rss_mb()
+            start = time.time()
+            print(f"🔄 加载嵌入模型: {spec}")
+            model = loader(name, precision)
+            entry = _Entry(model, time.time() - start, current_rss_mb() - rss_before)
+            print(f"✅ 模型已加载: {spec}（{entry.load_seconds:.1f}秒，"
+                  f"RSS {rss_before:.0f}MB → {rss_before + entry.rss_delta_mb:.0f}MB）")
+
+            with self._lock:
+                self._entries[spec] = entry
+                self._loading.pop(spec, None)
+            self.loads += 1
+            self._start_reaper()
+            return entry
+
+    def _encode(self, spec: str, sentences, kwargs: Dict[str, Any]) -> np.ndarray:
+        while True:
+            entry = self._entry(spec)
+            with entry.lock:
+                if entry.model is None:
+                    # 刚好被卸载，重新加载
+                    continue
+                entry.last_used = time.monotonic()
+                result = entry.model.encode(sentences, **kwargs)
+                entry.last_used = time.monotonic()
+            if kwargs.get("convert_to_tensor"):
+                return result
+            return np.asarray(result, dtype=np.float32)
+
+    def _start_reaper(self):
+        """启动后台线程定期卸载空闲模型"""
+        with self._lock:
+            if not self.idle_timeout or self._reaper is not None:
+                return
+            self._reaper = threading.Thread(target=self._reap, name="model-reaper", daemon=True)
+        self._reaper.start()
+
+    def _reap(self):
+        interval = max(1.0, min(self.idle_timeout / 4, 60.0))
+
+        while True:
+            time.sleep(interval)
+            self.unload_idle()
+            with self._lock:
+                if not self._entries:
+                    self._reaper = None
+                    return
+
+
+# 进程级单例
+model_registry = EmbeddingModelRegistry()
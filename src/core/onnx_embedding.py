@@ -0,0 +1,294 @@
+"""
+ONNX Runtime 嵌入后端
+把 SentenceTransformer 模型导出为 ONNX（可选 int8 动态量化），在 CPU 上用 ONNX Runtime 推理，
+避免 PyTorch eager 模式的开销。
+
+通过模型名前缀选择（见 EmbeddingModel 中的 *_ONNX 成员）：
+- onnx:BAAI/bge-small-zh-v1.5         fp32 ONNX
+- onnx:BAAI/bge-small-zh-v1.5@int8    int8 动态量化 ONNX
+
+首次使用时自动导出到 ONNX_MODEL_DIR（默认 ./onnx_models），导出后与 PyTorch 的向量逐条比对，
+超出容差则拒绝使用。之后的进程直接加载导出结果，不再需要 PyTorch。
+
+依赖：pip install onnxruntime onnx（导出时还需要 sentence-transformers）
+"""
+
+import json
+import os
+import shutil
+import time
+from typing import List, Dict, Any, Optional, Union
+
+import numpy as np
+
+
+DEFAULT_EXPORT_DIR = os.getenv("ONNX_MODEL_DIR", "./onnx_models")
+
+# 与 PyTorch 向量的最小余弦相似度
+TOLERANCE = {"fp32": 0.9999, "int8": 0.98}
+
+# 导出后用于比对的句子（覆盖短句、长句和中英文混合）
+VERIFY_SENTENCES = [
+    "开始健康咨询访谈",
+    "您最近的睡眠质量怎么样？",
+    "用户说最近睡眠不好，经常失眠，白天也没有精神",
+    "您每周运动几次？每次大概多长时间？",
+    "用户表示工作压力很大，经常加班到深夜",
+    "Do you have any history of allergies?",
+    "您是否有高血压、糖尿病等慢性病史？如果有，目前是否在服药？",
+]
+
+
+def export_dir_for(name: str, base_dir: str = DEFAULT_EXPORT_DIR) -> str:
+    """模型的导出目录"""
+    return os.path.join(base_dir, name.replace("/", "__"))
+
+
+class OnnxEmbeddingModel:
+    """ONNX Runtime 推理的句向量模型（encode 接口与 SentenceTransformer 兼容）"""
+
+    def __init__(self, model_dir: str, precision: str = "fp32", num_threads: Optional[int] = None):
+        """
+        Args:
+            model_dir: export_onnx_model() 的输出目录
+            precision: fp32 / int8
+            num_threads: ONNX Runtime 算子内线程数（默认由 ONNX Runtime 决定）
+        """
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        with open(os.path.join(model_dir, "onnx_config.json"), "r", encoding="utf-8") as f:
+            self.config: Dict[str, Any] = json.load(f)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+
+        self.precision = precision
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, self.config["files"][precision]),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.max_seq_length = self.config["max_seq_length"]
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.config["dimension"]
+
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        convert_to_numpy: bool = True,
+        normalize_embeddings: bool = False,
+        **kwargs
+    ) -> np.ndarray:
+        """批量向量化（按长度排序分批，减少 padding）"""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, self.config["dimension"]), dtype=np.float32)
+
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        output = np.empty((len(texts), self.config["dimension"]), dtype=np.float32)
+
+        for start in range(0, len(texts), batch_size):
+            batch_index = order[start:start + batch_size]
+            output[batch_index] = self._encode_batch([texts[i] for i in batch_index])
+
+        if normalize_embeddings or self.config["normalize"]:
+            norms = np.linalg.norm(output, axis=1, keepdims=True)
+            output /= np.maximum(norms, 1e-12)
+
+        return output[0] if single else output
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        tokens = self.tokenizer(
+            texts, padding=True, truncation=True,
+            max_length=self.max_seq_length, return_tensors="np"
+        )
+        feeds = {
+            name: tokens[name].astype(np.int64)
+            for name in ("input_ids", "attention_mask", "token_type_ids")
+            if name in self.input_names and name in tokens
+        }
+        if "token_type_ids" in self.input_names and "token_type_ids" not in feeds:
+            feeds["token_type_ids"] = np.zeros_like(feeds["input_ids"])
+
+        hidden = self.session.run(None, feeds)[0]
+        return _pool(hidden, feeds["attention_mask"], self.config["pooling"])
+
+
+def _pool(hidden: np.ndarray, attention_mask: np.ndarray, mode: str) -> np.ndarray:
+    """与 sentence-transformers Pooling 模块一致的池化"""
+    if mode == "cls":
+        return hidden[:, 0].astype(np.float32)
+    mask = attention_mask[..., None].astype(np.float32)
+    if mode == "max":
+        return np.where(mask > 0, hidden, -1e9).max(axis=1).astype(np.float32)
+    summed = (hidden * mask).sum(axis=1)
+    return (summed / np.maximum(mask.sum(axis=1), 1e-9)).astype(np.float32)
+
+
+def _pooling_mode(pooling_module) -> str:
+    if getattr(pooling_module, "pooling_mode_cls_token", False):
+        return "cls"
+    if getattr(pooling_module, "pooling_mode_max_tokens", False):
+        return "max"
+    return "mean"
+
+
+def export_onnx_model(
+    name: str,
+    output_dir: Optional[str] = None,
+    quantize: bool = True,
+    verify: bool = True
+) -> str:
+    """
+    导出 SentenceTransformer 模型为 ONNX
+
+    Args:
+        name: 模型名称（如 BAAI/bge-small-zh-v1.5）
+        output_dir: 输出目录（默认 ONNX_MODEL_DIR 下按模型名建目录）
+        quantize: 同时生成 int8 动态量化模型
+        verify: 导出后与 PyTorch 向量比对，超出容差时删除导出结果并抛出 ValueError
+
+    Returns:
+        输出目录
+    """
+    output_dir = output_dir or export_dir_for(name)
+    tmp_dir = f"{output_dir}.tmp{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    print(f"📦 导出 ONNX 模型: {name}")
+    start = time.time()
+    try:
+        _export_to(name, tmp_dir, quantize, verify)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.replace(tmp_dir, output_dir)
+    print(f"✅ ONNX 模型已导出: {output_dir}（{time.time() - start:.1f}秒）")
+    return output_dir
+
+
+def _export_to(name: str, tmp_dir: str, quantize: bool, verify: bool):
+    """导出到临时目录（失败时由调用方清理）"""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    st_model = SentenceTransformer(name, device="cpu")
+    transformer = st_model[0]
+    auto_model = transformer.auto_model.eval()
+    tokenizer = transformer.tokenizer
+
+    pooling = "mean"
+    normalize = False
+    for module in list(st_model)[1:]:
+        kind = type(module).__name__
+        if kind == "Pooling":
+            pooling = _pooling_mode(module)
+        elif kind == "Normalize":
+            normalize = True
+        else:
+            raise ValueError(f"暂不支持包含 {kind} 模块的模型: {name}")
+
+    sample = tokenizer(["开始健康咨询访谈"], return_tensors="pt")
+    input_names = [key for key in ("input_ids", "attention_mask", "token_type_ids") if key in sample]
+    dynamic_axes = {key: {0: "batch", 1: "sequence"} for key in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    class _Encoder(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *args):
+            return self.model(**dict(zip(input_names, args)))[0]
+
+    fp32_path = os.path.join(tmp_dir, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            _Encoder(auto_model),
+            tuple(sample[key] for key in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+
+    files = {"fp32": "model.onnx"}
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantize_dynamic(fp32_path, os.path.join(tmp_dir, "model.int8.onnx"), weight_type=QuantType.QInt8)
+        files["int8"] = "model.int8.onnx"
+
+    tokenizer.save_pretrained(tmp_dir)
+    config = {
+        "model": name,
+        "pooling": pooling,
+        "normalize": normalize,
+        "max_seq_length": st_model.max_seq_length,
+        "dimension": st_model.get_sentence_embedding_dimension(),
+        "files": files,
+        "exported_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    with open(os.path.join(tmp_dir, "onnx_config.json"), "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+
+    if verify:
+        reference = st_model.encode(VERIFY_SENTENCES, convert_to_numpy=True)
+        report = {}
+        for precision in files:
+            onnx_model = OnnxEmbeddingModel(tmp_dir, precision)
+            report[precision] = compare_vectors(reference, onnx_model.encode(VERIFY_SENTENCES))
+            if report[precision]["min_cosine"] < TOLERANCE[precision]:
+                raise ValueError(
+                    f"ONNX 模型与 PyTorch 向量偏差过大（{precision}: 最小余弦相似度 "
+                    f"{report[precision]['min_cosine']:.5f} < {TOLERANCE[precision]}）"
+                )
+        config["verification"] = report
+        with open(os.path.join(tmp_dir, "onnx_config.json"), "w", encoding="utf-8") as f:
+            json.dump(config, f, ensure_ascii=False, indent=2)
+        for precision, result in report.items():
+            print(f"   ✅ {precision} 校验通过: 最小余弦相似度 {result['min_cosine']:.5f}，"
+                  f"最大绝对误差 {result['max_abs_diff']:.2e}")
+
+
+def compare_vectors(reference: np.ndarray, candidate: np.ndarray) -> Dict[str, float]:
+    """逐条比较两组向量（余弦相似度和最大绝对误差）"""
+    reference = np.asarray(reference, dtype=np.float32)
+    candidate = np.asarray(candidate, dtype=np.float32)
+    cosine = (reference * candidate).sum(axis=1) / (
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1) + 1e-12
+    )
+    return {
+        "min_cosine": float(cosine.min()),
+        "mean_cosine": float(cosine.mean()),
+        "max_abs_diff": float(np.abs(reference - candidate).max()),
+    }
+
+
+def load_onnx_model(name: str, precision: str = "fp32") -> OnnxEmbeddingModel:
+    """加载导出的 ONNX 模型，没有导出过则先导出（model_registry 的 onnx: 加载函数）"""
+    if precision not in TOLERANCE:
+        raise ValueError(f"ONNX 后端不支持精度: {precision}（可选: {', '.join(TOLERANCE)}）")
+
+    model_dir = export_dir_for(name)
+    config_path = os.path.join(model_dir, "onnx_config.json")
+    needs_export = not os.path.exists(config_path)
+    if not needs_export:
+        with open(config_path, "r", encoding="utf-8") as f:
+            needs_export = precision not in json.load(f)["files"]
+    if needs_export:
+        export_onnx_model(name, model_dir, quantize=True)
+
+    return OnnxEmbeddingModel(model_dir, precision)
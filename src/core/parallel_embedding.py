@@ -0,0 +1,178 @@
+"""
+多进程并行向量化
+大题库（数万问题）或批量重建多个问题库索引时，单进程 encode 只能用满少数几个核。
+ParallelEmbedder 把文本切成固定大小的分片，分发给多个工作进程（每个进程各加载一份模型），
+再按原顺序合并结果。
+
+工作进程数和分片大小根据可用 CPU 核数和内存自动选择：
+- 每个工作进程约占 EMBEDDING_WORKER_MEMORY_MB（默认 1024MB，模型权重 + 推理中间结果）
+- 工作进程数 = min(CPU 核数, 可用内存 × 80% / 每进程内存)
+- 每个进程的算子线程数 = CPU 核数 / 工作进程数，避免线程超订
+- 分片大小由每个进程除模型外剩余的内存决定（32 ~ 512 条）
+
+用法：
+    with ParallelEmbedder("BAAI/bge-small-zh-v1.5") as embedder:
+        vectors = embedder.encode(texts)
+
+QuestionRAG / QuestionRAGOptimized 通过 embedding_workers 参数启用；
+离线批量建索引见 bulk_index.py。
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from src.utils.memory import available_cpus, available_memory_mb
+
+
+# 每个工作进程的内存预算（MB）
+WORKER_MEMORY_MB = float(os.getenv("EMBEDDING_WORKER_MEMORY_MB", 1024))
+# 模型权重约占每进程预算的比例，其余用于推理中间结果
+MODEL_MEMORY_SHARE = 0.5
+# 每 MB 推理内存可容纳的文本条数（按 128 token、768 维的中间激活估算）
+TEXTS_PER_MB = 2
+MIN_SHARD_SIZE = 32
+MAX_SHARD_SIZE = 512
+
+# 少于该数量的文本不值得启动进程池
+PARALLEL_MIN_TEXTS = 1024
+
+
+def plan_workers(
+    workers: Optional[int] = None,
+    batch_size: Optional[int] = None
+) -> Tuple[int, int, int]:
+    """
+    根据 CPU 核数和可用内存选择 (工作进程数, 分片大小, 每进程线程数)
+
+    Args:
+        workers: 指定工作进程数（None 或 0 表示自动）
+        batch_size: 指定分片大小（None 或 0 表示自动）
+    """
+    cpus = available_cpus()
+    memory_mb = available_memory_mb()
+    budget_mb = memory_mb * 0.8 if memory_mb is not None else WORKER_MEMORY_MB * cpus
+
+    if not workers:
+        workers = int(min(cpus, budget_mb // WORKER_MEMORY_MB))
+    workers = max(1, workers)
+
+    if not batch_size:
+        headroom_mb = budget_mb / workers - WORKER_MEMORY_MB * MODEL_MEMORY_SHARE
+        batch_size = int(headroom_mb * TEXTS_PER_MB) // MIN_SHARD_SIZE * MIN_SHARD_SIZE
+        batch_size = min(max(batch_size, MIN_SHARD_SIZE), MAX_SHARD_SIZE)
+
+    threads = max(1, cpus // workers)
+    return workers, batch_size, threads
+
+
+# ==================== 工作进程 ====================
+
+_worker_model = None
+
+
+def _init_worker(spec: str, threads: int):
+    """工作进程初始化：限制算子线程数并加载模型"""
+    global _worker_model
+    for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[name] = str(threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+    from .model_registry import EmbeddingModelRegistry
+    # 工作进程生命周期由进程池管理，不需要空闲卸载
+    _worker_model = EmbeddingModelRegistry(idle_timeout=None).get(spec).load()
+
+
+def _encode_shard(texts: List[str]) -> np.ndarray:
+    return _worker_model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+
+
+class ParallelEmbedder:
+    """多进程向量化（进程池在第一次 encode 时启动，close() 时回收）"""
+
+    def __init__(
+        self,
+        model_spec: str,
+        workers: Optional[int] = None,
+        batch_size: Optional[int] = None
+    ):
+        """
+        Args:
+            model_spec: 模型名（可带 onnx: 前缀和 @精度 后缀，见 model_registry）
+            workers: 工作进程数（None 或 0 表示按 CPU 核数和内存自动选择）
+            batch_size: 每个分片的文本数（None 或 0 表示自动选择）
+        """
+        self.model_spec = model_spec
+        self.workers, self.batch_size, self.threads = plan_workers(workers, batch_size)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def chunk_size(self) -> int:
+        """一轮能让所有工作进程都忙起来的文本数"""
+        return self.workers * self.batch_size
+
+    @property
+    def started(self) -> bool:
+        return self._executor is not None
+
+    def worth_using(self, count: int) -> bool:
+        """进程池已启动，或文本足够多、值得付出启动进程和加载模型的开销"""
+        return self.started or count >= PARALLEL_MIN_TEXTS
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """按顺序返回 float32 向量矩阵"""
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        executor = self._ensure_executor()
+        shards = [texts[start:start + self.batch_size] for start in range(0, len(texts), self.batch_size)]
+
+        # map 按提交顺序返回结果，直接写入预分配的输出矩阵
+        output: Optional[np.ndarray] = None
+        start = 0
+        for vectors in executor.map(_encode_shard, shards):
+            vectors = np.asarray(vectors, dtype=np.float32)
+            if output is None:
+                output = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            output[start:start + len(vectors)] = vectors
+            start += len(vectors)
+        return output
+
+    def close(self):
+        """关闭进程池（释放工作进程中的模型）"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self) -> "ParallelEmbedder":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _ensure_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            print(f"🚀 启动 {self.workers} 个向量化进程（每进程 {self.threads} 线程，"
+                  f"分片 {self.batch_size} 条）: {self.model_spec}")
+            start = time.time()
+            # spawn：不继承父进程中已初始化的 torch / tokenizer 线程状态
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_spec, self.threads)
+            )
+            # 预热：等所有工作进程加载好模型，避免首批分片集中到先启动的进程
+            list(self._executor.map(_encode_shard, [["预热"]] * self.workers))
+            print(f"✅ 向量化进程已就绪（{time.time() - start:.1f}秒）")
+        return self._executor
@@ -0,0 +1,137 @@
+"""
+查询向量 LRU 缓存
+检索热路径上每次都要对上下文做一次向量化（模型前向或 OpenAI 网络请求），
+而开场上下文等文本会反复出现。这里按 (模型名, 归一化文本) 做有界的内存缓存。
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Any, List, Tuple
+
+import numpy as np
+
+from .embedding_cache import normalize_text
+
+
+# 第一轮检索使用的固定上下文（见 ConversationContext.get_context_summary）
+OPENING_CONTEXT = "开始健康咨询访谈"
+
+
+class QueryEmbeddingCache:
+    """线程安全的有界 LRU 查询向量缓存"""
+
+    def __init__(self, max_entries: int = 256):
+        """
+        Args:
+            max_entries: 最多缓存的查询数量（0 表示不缓存）
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(
+        self,
+        model_name: str,
+        text: str,
+        compute_fn: Callable[[str], np.ndarray]
+    ) -> np.ndarray:
+        """
+        读取缓存的查询向量，未命中时调用 compute_fn 并写入缓存
+
+        返回的数组是只读的，调用方不要原地修改。
+        """
+        key = (model_name, normalize_text(text))
+
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return vector
+            self.misses += 1
+
+        # 在锁外计算，避免一次模型前向阻塞其他线程的命中
+        vector = np.asarray(compute_fn(text), dtype=np.float32)
+        vector.flags.writeable = False
+
+        if self.max_entries > 0:
+            with self._lock:
+                self._entries[key] = vector
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        return vector
+
+    def get_or_compute_batch(
+        self,
+        model_name: str,
+        texts: List[str],
+        compute_batch_fn: Callable[[List[str]], np.ndarray]
+    ) -> np.ndarray:
+        """
+        批量读取查询向量，未命中的文本（去重后）一次调用 compute_batch_fn 计算并写入缓存
+
+        Returns:
+            查询向量矩阵（与 texts 顺序一致）
+        """
+        vectors: List[np.ndarray] = [None] * len(texts)
+        missing: Dict[Tuple[str, str], List[int]] = {}
+
+        with self._lock:
+            for i, text in enumerate(texts):
+                key = (model_name, normalize_text(text))
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    vectors[i] = vector
+                elif key in missing:
+                    # 同一批次内重复的文本只计算一次
+                    self.hits += 1
+                    missing[key].append(i)
+                else:
+                    self.misses += 1
+                    missing[key] = [i]
+
+        if missing:
+            computed = np.asarray(
+                compute_batch_fn([texts[rows[0]] for rows in missing.values()]), dtype=np.float32
+            )
+            for rows, vector in zip(missing.values(), computed):
+                for i in rows:
+                    vectors[i] = vector
+                self.put(model_name, texts[rows[0]], vector)
+
+        return np.stack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+
+    def put(self, model_name: str, text: str, vector: np.ndarray):
+        """写入预先计算好的查询向量（如快照中的预热查询）"""
+        if self.max_entries <= 0:
+            return
+        key = (model_name, normalize_text(text))
+        vector = np.array(vector, dtype=np.float32)
+        vector.flags.writeable = False
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """命中统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0
+            }
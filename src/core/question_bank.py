@@ -0,0 +1,167 @@
+"""
+问题库数据结构
+QuestionManager、QuestionRAG 和 QuestionRAGOptimized 共用的问题存储：
+- Question: 使用 __slots__ 的紧凑问题记录
+- QuestionBank: id → 下标字典，类别 / 关键词倒排索引，O(1) 查找
+- UnaskedSet: 保持文件顺序的未提问集合，O(1) 标记和取出
+"""
+
+from array import array
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Iterable, Iterator
+
+
+@dataclass(slots=True)
+class Question:
+    """问题数据类"""
+    id: int
+    question: str
+    type: str = "open"  # open, yesno, choice
+    category: Optional[str] = None
+    keywords: Optional[List[str]] = None
+    follow_up_hints: Optional[List[str]] = None
+
+    def __str__(self):
+        return f"问题 {self.id}: {self.question}"
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Question":
+        """从 YAML 中的问题条目构建"""
+        return cls(
+            id=data['id'],
+            question=data['question'],
+            type=data.get('type', 'open'),
+            category=data.get('category'),
+            keywords=data.get('keywords'),
+            follow_up_hints=data.get('follow_up_hints')
+        )
+
+
+class QuestionBank:
+    """带索引的问题库"""
+
+    def __init__(self, questions: Iterable[Question] = ()):
+        self.questions: List[Question] = list(questions)
+        self._index_of: Dict[int, int] = {}
+        self._by_category: Dict[str, array] = {}
+        self._by_keyword: Dict[str, array] = {}
+
+        for index, q in enumerate(self.questions):
+            self._index_of[q.id] = index
+            if q.category:
+                self._by_category.setdefault(q.category, array('i')).append(index)
+            for keyword in q.keywords or ():
+                self._by_keyword.setdefault(keyword, array('i')).append(index)
+
+    @classmethod
+    def from_dicts(cls, questions_data: Iterable[Dict[str, Any]]) -> "QuestionBank":
+        """从 YAML 的 questions 列表构建"""
+        return cls(Question.from_dict(q) for q in questions_data)
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    def __iter__(self) -> Iterator[Question]:
+        return iter(self.questions)
+
+    def __getitem__(self, index: int) -> Question:
+        return self.questions[index]
+
+    def __contains__(self, question_id: int) -> bool:
+        return question_id in self._index_of
+
+    def get(self, question_id: int) -> Optional[Question]:
+        """根据 ID 获取问题"""
+        index = self._index_of.get(question_id)
+        return self.questions[index] if index is not None else None
+
+    def index_of(self, question_id: int) -> Optional[int]:
+        """问题 ID 对应的下标"""
+        return self._index_of.get(question_id)
+
+    def by_category(self, category: str) -> List[Question]:
+        """某类别下的所有问题"""
+        return [self.questions[i] for i in self._by_category.get(category, ())]
+
+    def by_keyword(self, keyword: str) -> List[Question]:
+        """包含某关键词的所有问题"""
+        return [self.questions[i] for i in self._by_keyword.get(keyword, ())]
+
+    def categories(self) -> List[str]:
+        """所有类别（按首次出现顺序）"""
+        return list(self._by_category)
+
+    def keywords(self) -> List[str]:
+        """所有关键词（按首次出现顺序）"""
+        return list(self._by_keyword)
+
+    def new_unasked_set(self) -> "UnaskedSet":
+        """创建一个包含全部问题的未提问集合"""
+        return UnaskedSet(self)
+
+
+class UnaskedSet:
+    """
+    未提问集合
+
+    用数组实现的双向链表保存未提问问题的下标（按文件顺序），
+    标记已提问和取第一个未提问问题都是 O(1)，内存为每个问题两个 int。
+    """
+
+    def __init__(self, bank: QuestionBank):
+        self.bank = bank
+        self.reset()
+
+    def reset(self):
+        """恢复为全部未提问"""
+        n = len(self.bank)
+        # 下标 n 为哨兵节点
+        self._next = array('i', range(1, n + 2))
+        self._prev = array('i', range(-1, n))
+        self._next[n] = 0
+        self._prev[0] = n
+        self._asked = bytearray(n)
+        self._count = n
+
+    def __len__(self) -> int:
+        return self._count
+
+    def is_asked(self, question_id: int) -> bool:
+        index = self.bank.index_of(question_id)
+        return index is not None and bool(self._asked[index])
+
+    def mark_asked(self, question_id: int) -> bool:
+        """标记问题已提问（不在问题库中的 ID 会被忽略）"""
+        index = self.bank.index_of(question_id)
+        if index is None or self._asked[index]:
+            return False
+
+        prev_index, next_index = self._prev[index], self._next[index]
+        self._next[prev_index] = next_index
+        self._prev[next_index] = prev_index
+        self._asked[index] = 1
+        self._count -= 1
+        return True
+
+    def first(self) -> Optional[Question]:
+        """按文件顺序的第一个未提问问题"""
+        head = self._next[len(self.bank)]
+        return self.bank[head] if head != len(self.bank) else None
+
+    def pop(self) -> Optional[Question]:
+        """取出并标记第一个未提问问题"""
+        question = self.first()
+        if question is not None:
+            self.mark_asked(question.id)
+        return question
+
+    def asked_mask(self) -> bytearray:
+        """按问题下标的已提问标记（1 表示已提问）"""
+        return self._asked
+
+    def __iter__(self) -> Iterator[Question]:
+        sentinel = len(self.bank)
+        index = self._next[sentinel]
+        while index != sentinel:
+            yield self.bank[index]
+            index = self._next[index]
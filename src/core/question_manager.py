@@ -3,23 +3,18 @@
 负责加载、管理和保存问题列表
 """
 
+import threading
+import uuid
 import yaml
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass, asdict
 from datetime import datetime
 import json
 
-
-@dataclass
-class Question:
-    """问题数据类"""
-    id: int
-    question: str
-    type: str  # open, yesno, choice
-    
-    def __str__(self):
-        return f"问题 {self.id}: {self.question}"
+from .question_bank import Question, QuestionBank
+from .question_snapshot import load_snapshot
+from .hot_reload import FileWatcher, DEFAULT_POLL_INTERVAL
 
 
 @dataclass
@@ -38,11 +33,21 @@ class Answer:
 class QuestionManager:
     """问题管理器"""
     
-    def __init__(self, config_file: str = "questions.yaml"):
+    def __init__(self, config_file: str = "questions.yaml", use_snapshot: bool = True, hot_reload: bool = False):
         self.config_file = Path(config_file)
-        self.questions: List[Question] = []
+        self.use_snapshot = use_snapshot  # 优先使用编译好的 .qbank 快照
+        self.hot_reload = hot_reload  # 监视问题文件，修改后在下一场访谈开始时生效
+        self.bank = QuestionBank()
         self.settings: Dict[str, Any] = {}
         self.current_index = 0
+        self._pending: Optional[Tuple[QuestionBank, Dict[str, Any]]] = None  # 热更新读到的新版本
+        self._pending_lock = threading.Lock()
+        self._watcher: Optional[FileWatcher] = None
+
+    @property
+    def questions(self) -> List[Question]:
+        """问题列表（文件顺序）"""
+        return self.bank.questions
         
     def load_questions(self) -> bool:
         """从 YAML 文件加载问题"""
@@ -50,30 +55,79 @@ class QuestionManager:
             if not self.config_file.exists():
                 print(f"❌ 配置文件不存在: {self.config_file}")
                 return False
-                
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
-                
-            # 加载问题列表
-            questions_data = config.get('questions', [])
-            self.questions = [
-                Question(
-                    id=q['id'],
-                    question=q['question'],
-                    type=q.get('type', 'open')
-                )
-                for q in questions_data
-            ]
-            
-            # 加载设置
-            self.settings = config.get('settings', {})
-            
-            print(f"✅ 成功加载 {len(self.questions)} 个问题")
+
+            self.bank, self.settings = self._read_questions()
+            if self.hot_reload:
+                self.start_hot_reload()
             return True
             
         except Exception as e:
             print(f"❌ 加载问题配置失败: {e}")
             return False
+
+    def reload_questions(self) -> bool:
+        """
+        重新读取问题文件（热更新）
+
+        新的问题列表先暂存，当前访谈继续使用原来的列表（问题顺序不会在中途改变），
+        下一场访谈开始时（reset() 或还没有提问时）切换。
+        """
+        try:
+            pending = self._read_questions()
+        except Exception as e:
+            print(f"❌ 重新加载问题配置失败，继续使用当前问题: {e}")
+            return False
+
+        with self._pending_lock:
+            self._pending = pending
+        print(f"🔁 问题配置已更新（{len(pending[0])} 个问题），下一场访谈开始时生效")
+        return True
+
+    def start_hot_reload(self, interval: float = DEFAULT_POLL_INTERVAL) -> FileWatcher:
+        """开始监视问题文件，文件变化后在后台线程中调用 reload_questions()"""
+        if self._watcher is None:
+            self._watcher = FileWatcher(str(self.config_file), self.reload_questions, interval=interval)
+        if not self._watcher.running:
+            self._watcher.start()
+            print(f"👀 热更新已开启: {self.config_file}")
+        return self._watcher
+
+    def stop_hot_reload(self):
+        """停止监视问题文件"""
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
+    def _read_questions(self) -> Tuple[QuestionBank, Dict[str, Any]]:
+        """读取问题列表和设置（不修改当前状态）"""
+        # 快照与 YAML 一致时直接加载，无需解析 YAML
+        snapshot = load_snapshot(str(self.config_file)) if self.use_snapshot else None
+        if snapshot is not None:
+            bank = snapshot.question_bank()
+            print(f"✅ 从快照加载 {len(bank)} 个问题")
+            return bank, snapshot.settings
+
+        with open(self.config_file, 'r', encoding='utf-8') as f:
+            config = yaml.safe_load(f)
+
+        # 加载问题列表
+        questions_data = config.get('questions', [])
+        bank = QuestionBank.from_dicts(questions_data)
+
+        # 加载设置
+        settings = config.get('settings', {})
+
+        print(f"✅ 成功加载 {len(bank)} 个问题")
+        return bank, settings
+
+    def _adopt_pending(self):
+        """还没有开始提问时切换到热更新读到的新版本"""
+        if self._pending is None or self.current_index != 0:
+            return
+        with self._pending_lock:
+            pending, self._pending = self._pending, None
+        if pending is not None:
+            self.bank, self.settings = pending
     
     def get_welcome_message(self) -> str:
         """获取欢迎语"""
@@ -91,6 +145,7 @@ class QuestionManager:
     
     def has_next_question(self) -> bool:
         """是否还有下一个问题"""
+        self._adopt_pending()
         return self.current_index < len(self.questions)
     
     def get_next_question(self) -> Optional[Question]:
@@ -101,13 +156,18 @@ class QuestionManager:
             return question
         return None
     
+    def get_question_by_id(self, question_id: int) -> Optional[Question]:
+        """根据ID获取问题"""
+        return self.bank.get(question_id)
+
     def get_current_progress(self) -> str:
         """获取当前进度"""
         return f"{self.current_index}/{len(self.questions)}"
     
     def reset(self):
-        """重置进度"""
+        """重置进度（热更新的新问题从这里开始生效）"""
         self.current_index = 0
+        self._adopt_pending()
     
     def should_save_audio(self) -> bool:
         """是否保存音频"""
@@ -118,12 +178,34 @@ class QuestionManager:
         return self.settings.get('save_transcript', True)
 
 
+SESSIONS_DIR = Path("sessions")
+
+
+def new_session_id() -> str:
+    """全局唯一的会话 ID（时间戳 + 随机后缀），并发访谈的会话目录互不冲突"""
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+
+def _claim_session_dir(base_id: str) -> str:
+    """原子地创建一个不存在的会话目录，返回对应的会话 ID"""
+    SESSIONS_DIR.mkdir(parents=True, exist_ok=True)
+    session_id, suffix = base_id, 1
+    while True:
+        try:
+            (SESSIONS_DIR / session_id).mkdir()
+            return session_id
+        except FileExistsError:
+            suffix += 1
+            session_id = f"{base_id}_{suffix}"
+
+
 class SessionRecorder:
     """会话记录器"""
     
     def __init__(self, session_id: Optional[str] = None):
         if session_id is None:
-            session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+            # 同一秒开始的多场访谈（多进程或多会话服务）按 _2、_3 …… 区分
+            session_id = _claim_session_dir(datetime.now().strftime("%Y%m%d_%H%M%S"))
         
         self.session_id = session_id
         self.answers: List[Answer] = []
@@ -131,7 +213,7 @@ class SessionRecorder:
         self.end_time: Optional[datetime] = None
         
         # 创建会话目录
-        self.session_dir = Path("sessions") / session_id
+        self.session_dir = SESSIONS_DIR / session_id
         self.session_dir.mkdir(parents=True, exist_ok=True)
         
         print(f"📁 会话目录: {self.session_dir}")
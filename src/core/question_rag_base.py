@@ -0,0 +1,578 @@
+"""
+问题检索引擎的公共部分
+QuestionRAG 和 QuestionRAGOptimized 共用的加载、索引版本、热更新和检索流程：
+
+- 加载问题文件 / 快照，按内容哈希增量同步向量索引，构建只读的索引版本并整体替换
+- 检索：关键词快速通道、向量检索、BM25 排名融合、批量检索
+- 默认会话和 new_session() 创建的每场访谈会话
+
+子类只负责嵌入模型：设置 embedding_model_name / _embedding_model，
+需要时覆盖 embedding_model、_get_embedding、_encode_queries、_encode_batch（如 OpenAI embeddings）。
+"""
+
+from typing import List, Dict, Any, Optional, Sequence, Collection, Tuple, Set
+import numpy as np
+import yaml
+import threading
+import time
+from contextlib import nullcontext
+from dataclasses import replace
+
+from .question_bank import Question, QuestionBank, UnaskedSet
+from .vector_backend import create_vector_backend
+from .lexical_index import LexicalIndex, LexicalHit, RetrievalStats, fast_path_pick, fuse_rankings
+from .retrieval_session import RetrievalSession
+from .hot_reload import IndexVersion, FileWatcher, DEFAULT_POLL_INTERVAL, RELOAD_BATCH_SIZE
+from .index_sync import DEFAULT_INDEX_BATCH_SIZE, IndexDiff, sync_question_index
+from .embedding_cache import EmbeddingCache
+from .query_cache import QueryEmbeddingCache, OPENING_CONTEXT
+from .question_snapshot import load_snapshot
+from .model_registry import SharedEmbeddingModel
+
+
+class QuestionRAGBase:
+    """问题检索引擎基类（嵌入模型由子类提供）"""
+
+    # 子类在 __init__ 中设置
+    embedding_model_name: str
+    _embedding_model: Optional[SharedEmbeddingModel]
+
+    def __init__(
+        self,
+        question_file: str = "questions.yaml",
+        collection_name: str = "interview_questions",
+        persist_directory: str = "./chroma_db",
+        vector_backend: str = "chroma",
+        embedding_cache_dir: Optional[str] = "./embedding_cache",
+        embedding_cache_max_mb: float = 1024,
+        query_cache_size: int = 256,
+        use_snapshot: bool = True,
+        index_batch_size: int = DEFAULT_INDEX_BATCH_SIZE,
+        embedding_workers: int = 1,
+        hybrid_retrieval: bool = False,
+        lexical_weight: float = 0.5,
+        hot_reload: bool = False
+    ):
+        """参数含义见 QuestionRAG / QuestionRAGOptimized"""
+        self.vector_backend = vector_backend
+        if hot_reload:
+            self._check_reload_supported()
+        self.question_file = question_file
+        self.collection_name = collection_name
+        self.persist_directory = persist_directory
+        self.use_snapshot = use_snapshot
+        self.index_batch_size = index_batch_size
+        self.embedding_workers = embedding_workers
+        self._parallel_embedder = None  # 只在建索引期间存在
+        self.hybrid_retrieval = hybrid_retrieval
+        self.lexical_weight = lexical_weight
+        self.hot_reload = hot_reload
+        self._watcher: Optional[FileWatcher] = None
+        self._reload_lock = threading.Lock()  # 加载 / 热更新互斥（检索不需要这个锁）
+
+        # 嵌入向量缓存（跨集合、跨模型共享）
+        self.embedding_cache = (
+            EmbeddingCache(embedding_cache_dir, max_size_mb=embedding_cache_max_mb)
+            if embedding_cache_dir else None
+        )
+
+        # 查询向量 LRU 缓存（检索热路径）
+        self.query_cache = QueryEmbeddingCache(query_cache_size)
+
+        # 当前版本：问题库 + 检索后端 + 关键词索引，加载完成后只读，多场访谈共享；
+        # 热更新构建新版本后整体替换（命中快照时不需要打开向量数据库）
+        self._version = IndexVersion.empty()
+
+        # 默认会话：单场访谈可以直接调用引擎上的 retrieve_next_question / mark_question_asked，
+        # 并发的多场访谈各自使用 new_session() 创建的会话
+        self.session = RetrievalSession(self)
+
+    @property
+    def version(self) -> IndexVersion:
+        """当前版本（新会话从这个版本开始）"""
+        return self._version
+
+    @property
+    def bank(self) -> QuestionBank:
+        """当前版本的问题库"""
+        return self._version.bank
+
+    @property
+    def backend(self):
+        """当前版本的检索后端（加载前为 None）"""
+        return self._version.backend
+
+    @property
+    def questions(self) -> List[Question]:
+        """问题列表（文件顺序）"""
+        return self.bank.questions
+
+    @property
+    def asked_question_ids(self) -> Set[int]:
+        """默认会话已提问的问题ID"""
+        return self.session.asked_question_ids
+
+    @property
+    def unasked(self) -> UnaskedSet:
+        """默认会话未提问的问题（文件顺序）"""
+        return self.session.unasked
+
+    @property
+    def retrieval_stats(self) -> RetrievalStats:
+        """默认会话的检索路径统计"""
+        return self.session.retrieval_stats
+
+    def memory_mb(self) -> float:
+        """检索索引（向量索引 + 关键词索引）常驻内存的估算值（MB，不含共享的嵌入模型）"""
+        version = self._version
+        total = version.backend.memory_mb() if version.backend is not None else 0.0
+        if version.lexical_index is not None:
+            total += version.lexical_index.memory_bytes() / 1024 / 1024
+        return total
+
+    def new_session(self, session_id: Optional[str] = None) -> RetrievalSession:
+        """为一场访谈创建独立的检索会话（共享模型和索引，已提问记录互不影响）"""
+        return RetrievalSession(self, session_id=session_id)
+
+    # ==================== 嵌入模型 ====================
+
+    @property
+    def embedding_model(self) -> Optional[SharedEmbeddingModel]:
+        """嵌入模型（进程内共享，首次使用时加载）"""
+        return self._embedding_model.load()
+
+    def preload_model(self):
+        """
+        预先加载嵌入模型
+
+        可以与 load_and_index_questions() 在不同线程中并行执行（注册表保证只加载一次）；
+        从快照启动时第一轮检索不需要模型，客户端可以把它放到后台。
+        """
+        return self.embedding_model
+
+    def _get_embedding(self, text: str) -> np.ndarray:
+        """向量化单条查询文本"""
+        return self.embedding_model.encode(text, convert_to_numpy=True)
+
+    def _encode_queries(self, texts: List[str]) -> np.ndarray:
+        """批量向量化查询文本（不显示进度条）"""
+        return self.embedding_model.encode(texts, convert_to_numpy=True)
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """调用模型批量向量化问题（建索引）"""
+        if self._parallel_embedder is not None and self._parallel_embedder.worth_using(len(texts)):
+            return self._parallel_embedder.encode(texts)
+        return self.embedding_model.encode(
+            texts,
+            show_progress_bar=True,
+            convert_to_numpy=True
+        )
+
+    def _supports_parallel_embedding(self) -> bool:
+        """建索引时能否使用多进程向量化（只适用于本地模型）"""
+        return True
+
+    def _get_embeddings_batch(self, texts: List[str]) -> np.ndarray:
+        """批量获取嵌入向量（优先读取磁盘缓存）"""
+        if self.embedding_cache is not None:
+            return self.embedding_cache.encode(self.embedding_model_name, texts, self._encode_batch)
+        return self._encode_batch(texts)
+
+    def _get_query_embedding(self, text: str) -> np.ndarray:
+        """获取查询向量（经过 LRU 缓存）"""
+        return self.query_cache.get_or_compute(self.embedding_model_name, text, self._get_embedding)
+
+    def _get_query_embeddings(self, texts: List[str]) -> np.ndarray:
+        """批量获取查询向量（经过 LRU 缓存，未命中的一次向量化）"""
+        return self.query_cache.get_or_compute_batch(self.embedding_model_name, texts, self._encode_queries)
+
+    # ==================== 加载与热更新 ====================
+
+    def load_and_index_questions(self) -> bool:
+        """从 YAML 加载问题并建立索引"""
+        try:
+            with self._reload_lock:
+                version = self._build_version()
+                if version is None:
+                    return False
+                self._swap_version(version)
+
+            if self.hot_reload:
+                self.start_hot_reload()
+            return True
+
+        except Exception as e:
+            print(f"❌ 加载问题失败: {e}")
+            return False
+
+    def reload_questions(self) -> bool:
+        """
+        重新加载问题文件（热更新）
+
+        在调用线程中构建新版本：按内容哈希增量同步向量索引（只向量化新增或变化的问题，
+        小批次进行，进行中访谈的查询向量化不必久等），完成后整体替换当前版本。
+        进行中的访谈继续使用开始时的版本；失败时保留当前版本。
+        chroma 后端不支持重新加载（抛出 ValueError）。
+        """
+        self._check_reload_supported()
+        with self._reload_lock:
+            previous = self._version
+            try:
+                version = self._build_version(batch_size=RELOAD_BATCH_SIZE)
+            except Exception as e:
+                print(f"❌ 重新加载问题失败，继续使用版本 {previous.version}: {e}")
+                return False
+            if version is None:
+                print(f"❌ 重新加载问题失败，继续使用版本 {previous.version}")
+                return False
+            self._swap_version(version)
+
+        print(f"🔁 问题库已更新: 版本 {previous.version} → {self._version.version}"
+              f"（{len(previous.bank)} → {len(self.bank)} 个问题）")
+        return True
+
+    def start_hot_reload(self, interval: float = DEFAULT_POLL_INTERVAL) -> FileWatcher:
+        """开始监视问题文件，文件变化后在后台线程中调用 reload_questions()"""
+        self._check_reload_supported()
+        if self._watcher is None:
+            self._watcher = FileWatcher(self.question_file, self.reload_questions, interval=interval)
+        if not self._watcher.running:
+            self._watcher.start()
+            print(f"👀 热更新已开启: {self.question_file}")
+        return self._watcher
+
+    def stop_hot_reload(self):
+        """停止监视问题文件"""
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
+    def _check_reload_supported(self):
+        """
+        热更新要求每个版本的向量索引互不影响：numpy / compressed / hierarchical 每个版本各有一份
+        内存索引（或替换前打开的 mmap），chroma 的所有版本共用同一个磁盘集合，重新加载会直接改写
+        进行中访谈检索的向量（换模型时还会删除重建集合）
+        """
+        if self.vector_backend == "chroma":
+            raise ValueError(
+                "chroma 后端不支持问题库热更新：所有版本共用同一个磁盘集合，重新加载会改写进行中访谈"
+                "正在检索的向量。请使用 vector_backend=\"numpy\"（或 compressed / hierarchical），"
+                "或者修改问题文件后重启进程"
+            )
+
+    def _build_version(self, batch_size: Optional[int] = None) -> Optional[IndexVersion]:
+        """加载问题文件并构建一个新版本（不修改当前版本，调用方持有 _reload_lock）"""
+        if self.use_snapshot:
+            version = self._load_snapshot()
+            if version is not None:
+                return version
+
+        with open(self.question_file, 'r', encoding='utf-8') as f:
+            data = yaml.safe_load(f)
+
+        questions_data = (data or {}).get('questions', [])
+        if not questions_data:
+            print("❌ 未找到问题数据")
+            return None
+
+        bank = QuestionBank.from_dicts(questions_data)
+
+        print(f"📚 加载了 {len(bank)} 个问题")
+
+        # 按内容哈希增量更新索引（只重新向量化新增或变化的问题）；
+        # 每个版本打开自己的后端对象，旧版本的后端保持不变
+        backend = self._open_backend()
+        print("🔄 正在同步向量索引...")
+        diff = self._build_index(backend, bank.questions, batch_size)
+        if diff.is_empty:
+            print(f"✅ 向量数据库已是最新，跳过索引")
+        else:
+            print(f"✅ 向量索引同步完成（{diff.summary()}）")
+
+        # 预热开场上下文，第一轮检索无需再做向量化
+        self._get_query_embedding(OPENING_CONTEXT)
+        return self._new_version(bank, backend)
+
+    def _new_version(self, bank: QuestionBank, backend) -> IndexVersion:
+        """构建版本的所有延迟结构，之后的检索只读共享状态，多场访谈可以不加锁地并发检索"""
+        backend.prepare()
+        lexical_index = LexicalIndex(bank.questions) if self.hybrid_retrieval else None
+        return IndexVersion(version=0, bank=bank, backend=backend, lexical_index=lexical_index)
+
+    def _swap_version(self, version: IndexVersion):
+        """整体替换当前版本（一次赋值，检索线程看到的要么是旧版本，要么是新版本）"""
+        self._version = replace(version, version=self._version.version + 1, loaded_at=time.time())
+
+    def _load_snapshot(self) -> Optional[IndexVersion]:
+        """
+        加载与问题文件匹配的快照（mmap，不解析 YAML）
+
+        numpy 后端直接使用快照的向量矩阵，不打开向量数据库；
+        其他后端打开配置的后端，用快照中的向量增量同步（不加载模型、不重新向量化）。
+        """
+        snapshot = load_snapshot(self.question_file, embedding_model=self.embedding_model_name)
+        if snapshot is None:
+            return None
+
+        bank = snapshot.question_bank()
+        for text, vector in snapshot.warm_queries().items():
+            self.query_cache.put(self.embedding_model_name, text, vector)
+
+        if self.vector_backend == "numpy":
+            print(f"📚 从快照加载了 {len(bank)} 个问题: {snapshot.path}（numpy 后端，直接映射快照向量）")
+            return self._new_version(bank, snapshot.to_backend())
+
+        # 其他后端：把快照中的问题向量同步进配置的后端（不重新向量化）
+        print(f"📚 从快照加载了 {len(bank)} 个问题: {snapshot.path}（向量写入 {self.vector_backend} 后端）")
+        backend = self._open_backend()
+        snapshot_vectors = dict(zip(snapshot.header["documents"], snapshot.embeddings()))
+
+        def embed_batch(texts: List[str]) -> np.ndarray:
+            if all(text in snapshot_vectors for text in texts):
+                return np.stack([snapshot_vectors[text] for text in texts])
+            return self._get_embeddings_batch(texts)
+
+        diff = sync_question_index(
+            backend,
+            bank.questions,
+            self.embedding_model_name,
+            embed_batch,
+            index_metadata=self._index_metadata(),
+            batch_size=self.index_batch_size
+        )
+        if not diff.is_empty:
+            print(f"✅ 向量索引同步完成（{diff.summary()}）")
+        return self._new_version(bank, backend)
+
+    def _open_backend(self):
+        """打开检索后端"""
+        print(f"🔄 初始化向量数据库: {self.persist_directory} ({self.vector_backend})")
+        return create_vector_backend(
+            self.vector_backend,
+            self.persist_directory,
+            self.collection_name,
+            metadata=self._index_metadata()
+        )
+
+    def _index_metadata(self) -> Dict[str, Any]:
+        """索引级元数据"""
+        return {
+            "description": "Interview questions for RAG-based retrieval",
+            "embedding_model": self.embedding_model_name
+        }
+
+    def _build_index(self, backend, questions: List[Question], batch_size: Optional[int] = None) -> IndexDiff:
+        """将问题库增量同步到检索后端（热更新时传入较小的 batch_size，在进程内向量化）"""
+        if batch_size is None:
+            batch_size = self.index_batch_size
+            if self.embedding_workers != 1 and self._supports_parallel_embedding():
+                from .parallel_embedding import ParallelEmbedder, PARALLEL_MIN_TEXTS
+                embedder = ParallelEmbedder(self.embedding_model_name, workers=self.embedding_workers)
+                if embedder.workers > 1:
+                    self._parallel_embedder = embedder
+                    # 每批至少让所有工作进程都分到分片
+                    batch_size = max(batch_size, embedder.chunk_size, PARALLEL_MIN_TEXTS)
+
+        # 每批的新向量先在缓存内存中累积，同步结束后只写一个分片、更新一次缓存索引
+        cache_writes = self.embedding_cache.bulk_write() if self.embedding_cache is not None else nullcontext()
+        try:
+            with cache_writes:
+                return sync_question_index(
+                    backend,
+                    questions,
+                    self.embedding_model_name,
+                    self._get_embeddings_batch,
+                    index_metadata=self._index_metadata(),
+                    batch_size=batch_size
+                )
+        finally:
+            if self._parallel_embedder is not None:
+                self._parallel_embedder.close()
+                self._parallel_embedder = None
+
+    # ==================== 检索 ====================
+
+    def retrieve_next_question(
+        self,
+        context: str,
+        n_results: int = 3,
+        exclude_asked: bool = True,
+        last_answer: Optional[str] = None
+    ) -> Optional[Question]:
+        """
+        根据对话上下文检索最相关的下一个问题（默认会话）
+
+        Args:
+            context: 对话上下文（可以是最近的回答或整个对话摘要）
+            n_results: 检索候选问题数量
+            exclude_asked: 是否排除已提问的问题
+            last_answer: 最近一次回答（用于关键词检索，默认使用 context）
+
+        Returns:
+            最相关的问题对象
+        """
+        return self.session.retrieve_next_question(
+            context,
+            n_results=n_results,
+            exclude_asked=exclude_asked,
+            last_answer=last_answer
+        )
+
+    def search_next_question(
+        self,
+        context: str,
+        n_results: int = 3,
+        exclude_ids: Optional[Collection[int]] = None,
+        last_answer: Optional[str] = None,
+        stats: Optional[RetrievalStats] = None,
+        version: Optional[IndexVersion] = None
+    ) -> Optional[Question]:
+        """
+        检索最相关的下一个问题（只读共享结构，可并发调用；失败时抛出异常）
+
+        Args:
+            context: 对话上下文
+            n_results: 检索候选问题数量
+            exclude_ids: 需要排除的问题 ID（调用方会话的已提问记录）
+            last_answer: 最近一次回答（用于关键词检索，默认使用 context）
+            stats: 记录检索路径的统计对象
+            version: 检索使用的版本（调用方会话固定的版本，默认为当前版本）
+
+        Returns:
+            最相关的问题对象（没有候选时为 None）
+        """
+        start = time.perf_counter()
+        version = version or self._version
+
+        # 关键词快速通道：最近的回答强命中某个问题的关键词时不做向量化
+        lexical_hits = []
+        if self.hybrid_retrieval:
+            lexical_hits = self._lexical_search(version, last_answer or context, n_results, exclude_ids)
+            question = version.bank.get(fast_path_pick(lexical_hits))
+            if question:
+                if stats is not None:
+                    stats.record(True, start)
+                return question
+
+        # 生成查询向量
+        query_embedding = self._get_query_embedding(context)
+
+        # 检索（已问过的问题在检索内部排除，结果总是最相关的未问问题）
+        hits = version.backend.query(
+            query_embedding,
+            n_results=n_results,
+            exclude_ids=exclude_ids
+        )
+
+        # 与 BM25 排名融合
+        ranked = [metadata['id'] for metadata, _score in hits]
+        if lexical_hits:
+            ranked = fuse_rankings(ranked, [hit[0] for hit in lexical_hits], self.lexical_weight)
+        if stats is not None:
+            stats.record(False, start)
+
+        # 选择最佳问题
+        for question_id in ranked:
+            question = version.bank.get(question_id)
+            if question:
+                return question
+        return None
+
+    def retrieve_next_questions_batch(
+        self,
+        contexts: List[str],
+        asked_sets: Optional[Sequence[Optional[Collection[int]]]] = None,
+        n_results: int = 3
+    ) -> List[List[Tuple[Question, float]]]:
+        """
+        批量检索：一次向量化所有上下文，一次矩阵乘完成打分（离线模拟、回放、多会话服务）
+
+        Args:
+            contexts: 对话上下文列表
+            asked_sets: 每个上下文各自已提问的问题 ID（None 表示都不排除）
+            n_results: 每个上下文返回的候选数量
+
+        Returns:
+            每个上下文的候选 (问题, 分数) 列表，按分数从高到低排列
+
+        只使用向量检索（不经过关键词快速通道），不修改引擎自身的已提问记录。
+        """
+        if asked_sets is not None and len(asked_sets) != len(contexts):
+            raise ValueError(f"asked_sets 数量（{len(asked_sets)}）与 contexts 数量（{len(contexts)}）不一致")
+        if not contexts:
+            return []
+
+        version = self._version
+        try:
+            query_embeddings = self._get_query_embeddings(contexts)
+            hits = version.backend.query_batch(query_embeddings, n_results=n_results, exclude_ids=asked_sets)
+
+            results = []
+            for item_hits in hits:
+                candidates = []
+                for metadata, score in item_hits:
+                    question = version.bank.get(metadata['id'])
+                    if question:
+                        candidates.append((question, score))
+                results.append(candidates)
+            return results
+
+        except Exception as e:
+            print(f"❌ 批量检索问题失败: {e}")
+            return [[] for _ in contexts]
+
+    def _lexical_search(self, version: IndexVersion, text: str, n_results: int, exclude_ids) -> List[LexicalHit]:
+        """BM25 关键词检索（索引在构建版本时建立）"""
+        if version.lexical_index is None:
+            return []
+        return version.lexical_index.search(text, n_results, exclude_ids)
+
+    def get_follow_up_questions(
+        self,
+        current_question: Question,
+        user_answer: str,
+        n_results: int = 2
+    ) -> List[str]:
+        """
+        根据当前问题和用户回答生成追问建议
+
+        Args:
+            current_question: 当前问题对象
+            user_answer: 用户的回答文本
+            n_results: 返回的追问建议数量
+
+        Returns:
+            追问建议列表
+        """
+        # 如果问题预设了追问提示
+        if current_question.follow_up_hints:
+            return current_question.follow_up_hints[:n_results]
+
+        # 基于回答内容生成通用追问（后续可以接入 LLM 生成）
+        generic_followups = [
+            "能详细说说吗？",
+            "这种情况持续多久了？",
+            "有什么具体的例子吗？"
+        ]
+
+        return generic_followups[:n_results]
+
+    def mark_question_asked(self, question_id: int):
+        """标记问题已提问（默认会话）"""
+        self.session.mark_question_asked(question_id)
+
+    def reset_asked_questions(self):
+        """重置默认会话的已提问记录（新访谈时调用）"""
+        self.session.reset_asked_questions()
+
+    def get_all_questions(self) -> List[Question]:
+        """获取所有问题"""
+        return self.questions
+
+    def get_question_by_id(self, question_id: int) -> Optional[Question]:
+        """根据ID获取问题"""
+        return self.bank.get(question_id)
+
+    def get_unanswered_count(self) -> int:
+        """获取未回答问题数量（默认会话）"""
+        return self.session.get_unanswered_count()
@@ -6,15 +6,15 @@
 3. paraphrase-multilingual（默认）- 多语言
 """
 
-import chromadb
-from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
 from typing import List, Dict, Any, Optional
-import yaml
+import numpy as np
 import os
-from dataclasses import dataclass
 from enum import Enum
 
+from .question_rag_base import QuestionRAGBase
+from .index_sync import DEFAULT_INDEX_BATCH_SIZE
+from .model_registry import model_registry, model_spec, base_model_name, SharedEmbeddingModel
+
 
 class EmbeddingModel(Enum):
     """支持的嵌入模型"""
@@ -26,23 +26,17 @@ class EmbeddingModel(Enum):
     # 备选：多语言模型
     PARAPHRASE_MULTILINGUAL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
 
+    # CPU 加速：ONNX Runtime 推理（首次使用时导出，需要 onnxruntime；model_precision="int8" 使用量化模型）
+    TEXT2VEC_BASE_CHINESE_ONNX = "onnx:shibing624/text2vec-base-chinese"
+    BGE_SMALL_ZH_ONNX = "onnx:BAAI/bge-small-zh-v1.5"
+    PARAPHRASE_MULTILINGUAL_ONNX = "onnx:sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
     # 备选：OpenAI（需要 API key）
     OPENAI_TEXT_EMBEDDING_3_SMALL = "openai:text-embedding-3-small"
     OPENAI_TEXT_EMBEDDING_3_LARGE = "openai:text-embedding-3-large"
 
 
-@dataclass
-class Question:
-    """问题数据类"""
-    id: int
-    question: str
-    type: str
-    category: Optional[str] = None
-    keywords: Optional[List[str]] = None
-    follow_up_hints: Optional[List[str]] = None
-
-
-class QuestionRAGOptimized:
+class QuestionRAGOptimized(QuestionRAGBase):
     """优化的问题检索引擎"""
 
     def __init__(
@@ -52,64 +46,78 @@ class QuestionRAGOptimized:
         embedding_model: str = EmbeddingModel.BGE_SMALL_ZH.value,  # 默认使用中文模型
         persist_directory: str = "./chroma_db",
         use_openai: bool = False,
-        openai_api_key: Optional[str] = None
+        openai_api_key: Optional[str] = None,
+        vector_backend: str = "chroma",
+        embedding_cache_dir: Optional[str] = "./embedding_cache",
+        embedding_cache_max_mb: float = 1024,
+        query_cache_size: int = 256,
+        use_snapshot: bool = True,
+        model_precision: str = "fp32",
+        index_batch_size: int = DEFAULT_INDEX_BATCH_SIZE,
+        embedding_workers: int = 1,
+        hybrid_retrieval: bool = False,
+        lexical_weight: float = 0.5,
+        hot_reload: bool = False
     ):
         """
         初始化优化的 RAG 引擎
 
         Args:
             question_file: YAML 问题文件路径
-            collection_name: ChromaDB 集合名称
+            collection_name: 向量集合名称
             embedding_model: 嵌入模型名称
             persist_directory: 向量数据库持久化目录
             use_openai: 是否使用 OpenAI embeddings
             openai_api_key: OpenAI API key（使用 OpenAI 时需要）
+            vector_backend: 检索后端（chroma / numpy）
+            embedding_cache_dir: 嵌入向量磁盘缓存目录（None 表示不使用缓存）
+            embedding_cache_max_mb: 嵌入向量缓存大小上限（MB）
+            query_cache_size: 查询向量 LRU 缓存容量
+            use_snapshot: 优先使用编译好的 .qbank 快照（源文件哈希一致时）
+            model_precision: 本地模型权重精度（fp32 / bf16 / int8，低精度仅用于 CPU）
+            index_batch_size: 构建索引时每批向量化并写入的问题数（中断后从已写入的批次继续）
+            embedding_workers: 建索引时的向量化进程数（1 为单进程，0 为按 CPU 核数和内存自动选择）
+            hybrid_retrieval: 混合检索（BM25 关键词索引 + 向量检索，关键词强命中时跳过向量化，默认关闭）
+            lexical_weight: 融合排名时 BM25 的权重（0~1）
+            hot_reload: 加载完成后监视问题文件，修改后在后台增量更新索引并切换到新版本（chroma 后端不支持）
         """
-        self.question_file = question_file
-        self.collection_name = collection_name
-        self.persist_directory = persist_directory
+        super().__init__(
+            question_file=question_file,
+            collection_name=collection_name,
+            persist_directory=persist_directory,
+            vector_backend=vector_backend,
+            embedding_cache_dir=embedding_cache_dir,
+            embedding_cache_max_mb=embedding_cache_max_mb,
+            query_cache_size=query_cache_size,
+            use_snapshot=use_snapshot,
+            index_batch_size=index_batch_size,
+            embedding_workers=embedding_workers,
+            hybrid_retrieval=hybrid_retrieval,
+            lexical_weight=lexical_weight,
+            hot_reload=hot_reload
+        )
         self.use_openai = use_openai
 
         # 初始化嵌入模型
         if use_openai:
             print(f"🔄 使用 OpenAI Embeddings: {embedding_model}")
-            self.embedding_model = None
+            self._embedding_model = None
             self.openai_client = self._init_openai(openai_api_key)
             self.embedding_model_name = embedding_model.replace("openai:", "")
         else:
-            print(f"🔄 加载嵌入模型: {embedding_model}")
-            self._print_model_info(embedding_model)
-            self.embedding_model = SentenceTransformer(embedding_model)
-            self.embedding_model_name = embedding_model
+            # 模型由进程级注册表共享，首次向量化时才加载（使用快照时第一轮检索不需要模型）
+            self.embedding_model_name = model_spec(embedding_model, model_precision)
+            self._embedding_model = model_registry.get(self.embedding_model_name)
             self.openai_client = None
 
-        # 初始化 ChromaDB
-        print(f"🔄 初始化向量数据库: {persist_directory}")
-        self.client = chromadb.PersistentClient(
-            path=persist_directory,
-            settings=Settings(
-                anonymized_telemetry=False,
-                allow_reset=True
-            )
-        )
-
-        # 获取或创建集合
-        try:
-            self.collection = self.client.get_collection(name=collection_name)
-            print(f"✅ 加载已有集合: {collection_name}")
-        except Exception:
-            self.collection = self.client.create_collection(
-                name=collection_name,
-                metadata={
-                    "description": "Interview questions for RAG-based retrieval",
-                    "embedding_model": self.embedding_model_name
-                }
-            )
-            print(f"✅ 创建新集合: {collection_name}")
-
-        # 加载问题
-        self.questions: List[Question] = []
-        self.asked_question_ids: set = set()
+    @property
+    def embedding_model(self) -> Optional[SharedEmbeddingModel]:
+        """嵌入模型（进程内共享，首次使用时加载；使用 OpenAI 时为 None）"""
+        if self._embedding_model is None:
+            return None
+        if not self._embedding_model.is_loaded:
+            self._print_model_info(base_model_name(self.embedding_model_name))
+        return self._embedding_model.load()
 
     def _print_model_info(self, model_name: str):
         """打印模型信息"""
@@ -158,212 +166,39 @@ class QuestionRAGOptimized:
         except ImportError:
             raise ImportError("使用 OpenAI 需要安装: pip install openai")
 
-    def _get_embedding(self, text: str) -> List[float]:
+    def _get_embedding(self, text: str) -> np.ndarray:
         """获取文本嵌入向量"""
         if self.use_openai:
             response = self.openai_client.embeddings.create(
                 model=self.embedding_model_name,
                 input=text
             )
-            return response.data[0].embedding
-        else:
-            return self.embedding_model.encode(
-                text,
-                convert_to_numpy=True
-            ).tolist()
+            return np.asarray(response.data[0].embedding, dtype=np.float32)
+        return super()._get_embedding(text)
 
-    def _get_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
-        """批量获取嵌入向量"""
+    def _encode_queries(self, texts: List[str]) -> np.ndarray:
+        """批量向量化查询文本（不显示进度条）"""
         if self.use_openai:
-            response = self.openai_client.embeddings.create(
-                model=self.embedding_model_name,
-                input=texts
-            )
-            return [item.embedding for item in response.data]
-        else:
-            return self.embedding_model.encode(
-                texts,
-                show_progress_bar=True,
-                convert_to_numpy=True
-            ).tolist()
-
-    def load_and_index_questions(self) -> bool:
-        """从 YAML 加载问题并建立索引"""
-        try:
-            with open(self.question_file, 'r', encoding='utf-8') as f:
-                data = yaml.safe_load(f)
-
-            questions_data = data.get('questions', [])
-            if not questions_data:
-                print("❌ 未找到问题数据")
-                return False
-
-            self.questions = [
-                Question(
-                    id=q['id'],
-                    question=q['question'],
-                    type=q.get('type', 'open'),
-                    category=q.get('category'),
-                    keywords=q.get('keywords'),
-                    follow_up_hints=q.get('follow_up_hints')
-                )
-                for q in questions_data
-            ]
-
-            print(f"📚 加载了 {len(self.questions)} 个问题")
-
-            # 检查是否需要重新索引
-            current_count = self.collection.count()
-            if current_count == len(self.questions):
-                # 检查模型是否一致
-                metadata = self.collection.metadata
-                if metadata.get('embedding_model') == self.embedding_model_name:
-                    print(f"✅ 向量数据库已包含所有问题，跳过索引")
-                    return True
-
-            # 建立向量索引
-            print("🔄 正在建立向量索引...")
-            self._build_index()
-            print("✅ 向量索引建立完成")
-
-            return True
-
-        except Exception as e:
-            print(f"❌ 加载问题失败: {e}")
-            return False
-
-    def _build_index(self):
-        """将问题向量化并存入 ChromaDB"""
-        # 清空旧数据
-        try:
-            self.client.delete_collection(name=self.collection_name)
-            self.collection = self.client.create_collection(
-                name=self.collection_name,
-                metadata={
-                    "description": "Interview questions",
-                    "embedding_model": self.embedding_model_name
-                }
-            )
-        except Exception:
-            pass
-
-        # 准备数据
-        documents = []
-        metadatas = []
-        ids = []
-
-        for q in self.questions:
-            # 构建富文本（用于更好的语义理解）
-            doc_text = f"{q.question}"
-            if q.category:
-                doc_text += f" [类别: {q.category}]"
-            if q.keywords:
-                doc_text += f" [关键词: {', '.join(q.keywords)}]"
-
-            documents.append(doc_text)
-            metadatas.append({
-                "id": q.id,
-                "type": q.type,
-                "category": q.category or "",
-                "question_text": q.question
-            })
-            ids.append(f"q_{q.id}")
+            return self._openai_embeddings(texts)
+        return super()._encode_queries(texts)
 
-        # 批量生成嵌入向量
-        print(f"   正在向量化 {len(documents)} 个问题...")
-        embeddings = self._get_embeddings_batch(documents)
-
-        # 批量插入
-        self.collection.add(
-            embeddings=embeddings,
-            documents=documents,
-            metadatas=metadatas,
-            ids=ids
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """调用模型或 OpenAI 批量向量化"""
+        if self.use_openai:
+            return self._openai_embeddings(texts)
+        return super()._encode_batch(texts)
+
+    def _openai_embeddings(self, texts: List[str]) -> np.ndarray:
+        """调用 OpenAI 批量向量化"""
+        response = self.openai_client.embeddings.create(
+            model=self.embedding_model_name,
+            input=texts
         )
+        return np.asarray([item.embedding for item in response.data], dtype=np.float32)
 
-        print(f"✅ 已索引 {len(documents)} 个问题")
-
-    def retrieve_next_question(
-        self,
-        context: str,
-        n_results: int = 3,
-        exclude_asked: bool = True
-    ) -> Optional[Question]:
-        """根据对话上下文检索最相关的下一个问题"""
-        try:
-            # 生成查询向量
-            query_embedding = self._get_embedding(context)
-
-            # 检索
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=min(n_results * 2, len(self.questions))
-            )
-
-            # 解析结果
-            if not results['metadatas'] or not results['metadatas'][0]:
-                return None
-
-            # 选择最佳问题
-            for metadata in results['metadatas'][0]:
-                question_id = metadata['id']
-
-                # 跳过已问过的问题
-                if exclude_asked and question_id in self.asked_question_ids:
-                    continue
-
-                # 找到对应的问题对象
-                question = next((q for q in self.questions if q.id == question_id), None)
-                if question:
-                    return question
-
-            # 如果所有相关问题都问过了，返回任意未问过的问题
-            for q in self.questions:
-                if q.id not in self.asked_question_ids:
-                    return q
-
-            return None
-
-        except Exception as e:
-            print(f"❌ 检索问题失败: {e}")
-            return None
-
-    def get_follow_up_questions(
-        self,
-        current_question: Question,
-        user_answer: str,
-        n_results: int = 2
-    ) -> List[str]:
-        """根据当前问题和用户回答生成追问建议"""
-        if current_question.follow_up_hints:
-            return current_question.follow_up_hints[:n_results]
-
-        generic_followups = [
-            "能详细说说吗？",
-            "这种情况持续多久了？",
-            "有什么具体的例子吗？"
-        ]
-        return generic_followups[:n_results]
-
-    def mark_question_asked(self, question_id: int):
-        """标记问题已提问"""
-        self.asked_question_ids.add(question_id)
-
-    def reset_asked_questions(self):
-        """重置已提问记录"""
-        self.asked_question_ids.clear()
-
-    def get_all_questions(self) -> List[Question]:
-        """获取所有问题"""
-        return self.questions
-
-    def get_question_by_id(self, question_id: int) -> Optional[Question]:
-        """根据ID获取问题"""
-        return next((q for q in self.questions if q.id == question_id), None)
-
-    def get_unanswered_count(self) -> int:
-        """获取未回答问题数量"""
-        return len(self.questions) - len(self.asked_question_ids)
+    def _supports_parallel_embedding(self) -> bool:
+        """OpenAI embeddings 不使用本地多进程向量化"""
+        return not self.use_openai
 
 
 def analyze_answer_completeness(question: str, answer: str) -> Dict[str, Any]:
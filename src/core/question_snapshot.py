@@ -0,0 +1,295 @@
+"""
+问题库快照（编译产物）
+把 YAML 问题库“编译”为单个带版本号的二进制文件（.qbank），包含：
+- 问题记录与 settings
+- 预先计算好的 L2 归一化问题向量（可选）
+- 开场上下文等预热查询的向量
+- 模型名、源文件哈希等元数据
+
+运行时通过 mmap 加载：不解析 YAML、不做向量化（numpy 后端也不导入 chromadb）。
+当快照的源文件哈希与当前 YAML 一致时，QuestionManager / QuestionRAG /
+QuestionRAGOptimized 会自动使用快照；其他检索后端用快照中的向量同步索引。
+
+文件布局：
+    MAGIC(8) | version(u32) | header_len(u32) | header(JSON) | 对齐填充 | float32 向量数据
+
+用法：
+    python compile_questions.py questions_rag_example.yaml --model BAAI/bge-small-zh-v1.5
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import time
+from typing import List, Dict, Any, Optional, Callable
+
+import numpy as np
+import yaml
+
+from .question_bank import Question, QuestionBank
+from .index_sync import build_document, build_metadata, question_content_hash, iter_embedding_batches
+from .query_cache import OPENING_CONTEXT
+from .vector_backend import NumpyVectorBackend, _normalize_rows
+
+
+MAGIC = b"QBANK\0\0\0"
+FORMAT_VERSION = 1
+SNAPSHOT_SUFFIX = ".qbank"
+_PREFIX = struct.Struct("<8sII")
+_ALIGN = 64
+
+
+def snapshot_path_for(question_file: str) -> str:
+    """问题文件对应的快照路径（同目录，扩展名 .qbank）"""
+    return os.path.splitext(question_file)[0] + SNAPSHOT_SUFFIX
+
+
+def file_hash(path: str) -> str:
+    """源文件内容哈希"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _question_to_dict(q: Question) -> Dict[str, Any]:
+    return {
+        "id": q.id,
+        "question": q.question,
+        "type": q.type,
+        "category": q.category,
+        "keywords": q.keywords,
+        "follow_up_hints": q.follow_up_hints
+    }
+
+
+class QuestionSnapshot:
+    """已编译的问题库快照（mmap 只读）"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, header_len = _PREFIX.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self._mmap.close()
+            raise ValueError(f"不支持的快照格式: {path}")
+
+        start = _PREFIX.size
+        self.header: Dict[str, Any] = json.loads(bytes(self._mmap[start:start + header_len]))
+        # 向量数据区紧跟头部，按 64 字节对齐；头部中的 offset 相对于数据区起点
+        self._data_start = _aligned(start + header_len)
+
+    @property
+    def source_hash(self) -> str:
+        return self.header["source_hash"]
+
+    @property
+    def embedding_model(self) -> Optional[str]:
+        return self.header.get("embedding_model")
+
+    @property
+    def settings(self) -> Dict[str, Any]:
+        return self.header.get("settings", {})
+
+    def question_bank(self) -> QuestionBank:
+        """构建问题库"""
+        return QuestionBank.from_dicts(self.header["questions"])
+
+    def embeddings(self) -> Optional[np.ndarray]:
+        """问题向量矩阵（直接映射文件，零拷贝）"""
+        info = self.header.get("embeddings")
+        if not info:
+            return None
+        return np.frombuffer(
+            self._mmap, dtype=np.float32, count=info["rows"] * info["dim"],
+            offset=self._data_start + info["offset"]
+        ).reshape(info["rows"], info["dim"])
+
+    def warm_queries(self) -> Dict[str, np.ndarray]:
+        """预热查询向量（文本 → 向量）"""
+        info = self.header.get("warm_queries")
+        if not info:
+            return {}
+        matrix = np.frombuffer(
+            self._mmap, dtype=np.float32, count=len(info["texts"]) * info["dim"],
+            offset=self._data_start + info["offset"]
+        ).reshape(len(info["texts"]), info["dim"])
+        return dict(zip(info["texts"], matrix))
+
+    def to_backend(self) -> NumpyVectorBackend:
+        """构建只读的内存检索后端"""
+        bank_data = self.header["questions"]
+        return NumpyVectorBackend.from_arrays(
+            matrix=self.embeddings(),
+            ids=[f"q_{q['id']}" for q in bank_data],
+            documents=self.header["documents"],
+            metadatas=self.header["metadatas"],
+            metadata={"embedding_model": self.embedding_model}
+        )
+
+
+def load_snapshot(
+    question_file: str,
+    embedding_model: Optional[str] = None
+) -> Optional[QuestionSnapshot]:
+    """
+    加载与问题文件匹配的快照
+
+    Args:
+        question_file: YAML 问题文件路径
+        embedding_model: 需要的嵌入模型；指定时快照必须包含该模型的向量
+
+    Returns:
+        匹配的快照；不存在、已过期或模型不一致时返回 None
+    """
+    path = snapshot_path_for(question_file)
+    if not os.path.exists(path) or not os.path.exists(question_file):
+        return None
+
+    try:
+        snapshot = QuestionSnapshot(path)
+    except (OSError, ValueError):
+        return None
+
+    if snapshot.source_hash != file_hash(question_file):
+        return None
+    if embedding_model is not None and (
+        snapshot.embedding_model != embedding_model or not snapshot.header.get("embeddings")
+    ):
+        return None
+    return snapshot
+
+
+def compile_snapshot(
+    question_file: str,
+    output_path: Optional[str] = None,
+    embedding_model: Optional[str] = None,
+    embed_batch: Optional[Callable[[List[str]], np.ndarray]] = None,
+    warm_queries: Optional[List[str]] = None
+) -> str:
+    """
+    编译问题库快照
+
+    Args:
+        question_file: YAML 问题文件路径
+        output_path: 输出路径（默认与问题文件同目录，扩展名 .qbank）
+        embedding_model: 嵌入模型名称（与 embed_batch 一起提供时写入问题向量）
+        embed_batch: 批量向量化函数
+        warm_queries: 需要预先向量化的查询（默认为开场上下文）
+
+    Returns:
+        快照路径
+    """
+    output_path = output_path or snapshot_path_for(question_file)
+    source_hash = file_hash(question_file)
+
+    with open(question_file, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f)
+
+    bank = QuestionBank.from_dicts(data.get("questions", []))
+    model_name = embedding_model or ""
+    documents = [build_document(q) for q in bank]
+
+    header: Dict[str, Any] = {
+        "format_version": FORMAT_VERSION,
+        "source_file": os.path.basename(question_file),
+        "source_hash": source_hash,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "embedding_model": embedding_model,
+        "settings": data.get("settings", {}),
+        "questions": [_question_to_dict(q) for q in bank],
+        "documents": documents,
+        "metadatas": [build_metadata(q, question_content_hash(q, model_name)) for q in bank],
+    }
+
+    blocks: List[np.ndarray] = []
+    offset = 0
+    if embedding_model and embed_batch is not None and documents:
+        # 分批向量化直接写入预分配的矩阵，不保留中间结果
+        matrix = None
+        for start, batch in iter_embedding_batches(documents, embed_batch):
+            batch = batch.reshape(len(batch), -1)
+            if matrix is None:
+                matrix = np.empty((len(documents), batch.shape[1]), dtype=np.float32)
+            matrix[start:start + len(batch)] = _normalize_rows(batch)
+        header["embeddings"] = {"rows": matrix.shape[0], "dim": matrix.shape[1], "offset": offset}
+        blocks.append(matrix)
+        offset = _aligned(offset + matrix.nbytes)
+
+        queries = warm_queries if warm_queries is not None else [OPENING_CONTEXT]
+        if queries:
+            query_matrix = np.asarray(embed_batch(queries), dtype=np.float32).reshape(len(queries), -1)
+            header["warm_queries"] = {"texts": queries, "dim": query_matrix.shape[1], "offset": offset}
+            blocks.append(query_matrix)
+
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    data_start = _aligned(_PREFIX.size + len(header_bytes))
+
+    # 先写临时文件再替换，运行中的进程不会读到半个快照
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for block, key in zip(blocks, ("embeddings", "warm_queries")):
+            f.write(b"\0" * (data_start + header[key]["offset"] - f.tell()))
+            f.write(np.ascontiguousarray(block, dtype=np.float32).data)
+    os.replace(tmp_path, output_path)
+
+    return output_path
+
+
+def _aligned(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def main():
+    """命令行：编译问题库快照"""
+    parser = argparse.ArgumentParser(description="编译问题库快照（.qbank）")
+    parser.add_argument("question_files", nargs="+", help="YAML 问题文件")
+    parser.add_argument("--model", default=None,
+                        help="嵌入模型（如 BAAI/bge-small-zh-v1.5 或 BAAI/bge-small-zh-v1.5@int8，"
+                             "OpenAI 模型用 openai: 前缀）；不指定则只编译问题记录")
+    parser.add_argument("--cache-dir", default="./embedding_cache", help="嵌入向量缓存目录")
+    args = parser.parse_args()
+
+    embed_texts = None
+    model_name = None
+    if args.model:
+        from .embedding_cache import EmbeddingCache
+
+        if args.model.startswith("openai:"):
+            from openai import OpenAI
+            client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+            model_name = args.model.replace("openai:", "")
+
+            def encode(texts):
+                response = client.embeddings.create(model=model_name, input=texts)
+                return np.asarray([item.embedding for item in response.data], dtype=np.float32)
+        else:
+            from .model_registry import model_registry
+            model = model_registry.get(args.model)
+            model_name = model.spec
+
+            def encode(texts):
+                return model.encode(texts, convert_to_numpy=True, show_progress_bar=len(texts) > 100)
+
+        cache = EmbeddingCache(args.cache_dir) if args.cache_dir else None
+
+        def embed_cached(texts):
+            return cache.encode(model_name, texts, encode) if cache else encode(texts)
+        embed_texts = embed_cached
+
+    for question_file in args.question_files:
+        start = time.time()
+        path = compile_snapshot(question_file, embedding_model=model_name, embed_batch=embed_texts)
+        print(f"✅ {question_file} → {path} ({os.path.getsize(path) / 1024:.1f} KB, {time.time() - start:.2f}秒)")
+
+
+if __name__ == "__main__":
+    main()
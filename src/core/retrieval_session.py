@@ -0,0 +1,178 @@
+"""
+每场访谈的检索状态
+检索引擎（QuestionRAG / QuestionRAGOptimized）只保存可以共享的部分：嵌入模型、问题库、
+向量索引、关键词索引和查询缓存。加载完成后这些结构只读，多个线程可以不加锁地并发检索。
+
+每场访谈自己的状态放在 RetrievalSession 中：
+- 已提问的问题 ID 和未提问集合
+- 对话上下文（最近几轮问答）
+- 检索路径统计
+- 使用的索引版本：问题库热更新后，已经开始的访谈继续使用开始时的版本，
+  还没有提问的会话和重置后的会话使用最新版本
+
+同一进程中的多场访谈共享一个引擎（一份模型、一份索引），每场访谈一个会话对象：
+    rag = QuestionRAG("questions.yaml")
+    rag.load_and_index_questions()
+    session = rag.new_session()
+    question = session.retrieve_next_question()
+    session.mark_question_asked(question.id)
+
+单个会话对象不是线程安全的，同一场访谈的检索和标记应在同一个线程（或协程）中进行。
+"""
+
+import itertools
+from typing import List, Dict, Any, Optional, Set
+
+from .question_bank import Question, QuestionBank, UnaskedSet
+from .lexical_index import RetrievalStats
+from .query_cache import OPENING_CONTEXT
+
+
+_session_ids = itertools.count(1)
+
+
+class ConversationContext:
+    """对话上下文管理器"""
+
+    def __init__(self, max_history: int = 5):
+        self.max_history = max_history
+        self.qa_history: List[Dict[str, str]] = []  # 问答历史
+        self.current_topic = ""  # 当前话题
+
+    def add_qa(self, question: str, answer: str):
+        """添加问答记录"""
+        self.qa_history.append({"question": question, "answer": answer})
+        # 保持历史记录不超过上限
+        if len(self.qa_history) > self.max_history:
+            self.qa_history.pop(0)
+
+    def get_context_summary(self) -> str:
+        """获取上下文摘要（用于 RAG 检索）"""
+        if not self.qa_history:
+            return OPENING_CONTEXT
+
+        # 返回最近的对话内容
+        recent_qa = self.qa_history[-2:]  # 最近2轮
+        context_parts = []
+        for qa in recent_qa:
+            context_parts.append(f"问：{qa['question']}")
+            context_parts.append(f"答：{qa['answer']}")
+
+        return " ".join(context_parts)
+
+    def get_last_answer(self) -> Optional[str]:
+        """获取最后一次回答"""
+        if self.qa_history:
+            return self.qa_history[-1]["answer"]
+        return None
+
+
+class RetrievalSession:
+    """一场访谈的检索状态（引用共享的检索引擎）"""
+
+    def __init__(self, index: Any, session_id: Optional[str] = None, max_history: int = 5):
+        """
+        Args:
+            index: 共享的检索引擎（QuestionRAG / QuestionRAGOptimized）
+            session_id: 会话 ID（默认按创建顺序编号）
+            max_history: 对话上下文保留的问答轮数
+        """
+        self.index = index
+        self.session_id = session_id or f"session-{next(_session_ids)}"
+        self.asked_question_ids: Set[int] = set()
+        self.context = ConversationContext(max_history)
+        self.retrieval_stats = RetrievalStats()
+        self._version = None  # 第一次提问时固定
+        self._bank: Optional[QuestionBank] = None
+        self._unasked: Optional[UnaskedSet] = None
+
+    @property
+    def version(self):
+        """本会话使用的索引版本（还没有提问时跟随引擎的最新版本）"""
+        if self._version is None or not self.asked_question_ids:
+            self._version = self.index.version
+        return self._version
+
+    @property
+    def unasked(self) -> UnaskedSet:
+        """未提问的问题（文件顺序）；会话切换到新版本后按已提问记录重建"""
+        bank = self.version.bank
+        if self._bank is not bank:
+            self._bank = bank
+            self._unasked = bank.new_unasked_set()
+            for question_id in self.asked_question_ids:
+                self._unasked.mark_asked(question_id)
+        return self._unasked
+
+    def retrieve_next_question(
+        self,
+        context: Optional[str] = None,
+        n_results: int = 3,
+        exclude_asked: bool = True,
+        last_answer: Optional[str] = None
+    ) -> Optional[Question]:
+        """
+        检索最相关的下一个问题
+
+        Args:
+            context: 对话上下文（默认使用本会话最近两轮问答）
+            n_results: 检索候选问题数量
+            exclude_asked: 是否排除本会话已提问的问题
+            last_answer: 最近一次回答（用于关键词检索；不传 context 时默认取本会话最后一次回答）
+
+        Returns:
+            最相关的问题对象
+        """
+        if context is None:
+            context = self.context.get_context_summary()
+            if last_answer is None:
+                last_answer = self.context.get_last_answer()
+
+        try:
+            question = self.index.search_next_question(
+                context,
+                n_results=n_results,
+                exclude_ids=self.asked_question_ids if exclude_asked else None,
+                last_answer=last_answer,
+                stats=self.retrieval_stats,
+                version=self.version
+            )
+            if question:
+                return question
+
+            # 索引与问题库不一致时，退回到任意未问过的问题
+            return self.unasked.first()
+
+        except Exception as e:
+            print(f"❌ 检索问题失败: {e}")
+            return None
+
+    def record_answer(self, question: Question, answer: str):
+        """记录一轮问答：标记问题已提问并加入对话上下文"""
+        self.mark_question_asked(question.id)
+        self.context.add_qa(question.question, answer)
+
+    def mark_question_asked(self, question_id: int):
+        """标记问题已提问（第一次提问时固定索引版本）"""
+        unasked = self.unasked
+        self.asked_question_ids.add(question_id)
+        unasked.mark_asked(question_id)
+
+    def reset_asked_questions(self):
+        """重置已提问记录（之后使用引擎的最新版本）"""
+        self.asked_question_ids.clear()
+        self.unasked.reset()
+
+    def get_unanswered_count(self) -> int:
+        """获取未回答问题数量"""
+        return len(self.unasked)
+
+    def summary(self) -> Dict[str, Any]:
+        """会话状态摘要"""
+        return {
+            "session_id": self.session_id,
+            "version": self.version.version,
+            "asked": len(self.asked_question_ids),
+            "unasked": self.get_unanswered_count(),
+            "retrieval": self.retrieval_stats.summary(),
+        }
@@ -0,0 +1,703 @@
+"""
+向量检索后端
+为 QuestionRAG / QuestionRAGOptimized 提供可插拔的向量检索实现：
+1. numpy（内存）- L2 归一化的连续 float32 矩阵，一次矩阵向量乘 + argpartition 精确 top-k
+2. chroma（可选）- ChromaDB PersistentClient（SQLite + HNSW）
+3. compressed - 降维 + int8 量化的内存检索，全精度精排（见 compressed_index.py）
+4. hierarchical - 先按类别质心选类别，再在类别内精确检索（见 hierarchical_index.py）
+
+问题库通常只有几十到几千个问题，内存精确检索比 ChromaDB 更快、占用更少，
+且不需要安装 chromadb。
+"""
+
+import json
+import os
+import shutil
+import sys
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Tuple, Collection, Iterator, Sequence
+
+import numpy as np
+
+
+# 检索结果：(元数据, 相似度分数)，按分数从高到低排列
+SearchHit = Tuple[Dict[str, Any], float]
+
+# 批量检索时分数矩阵（查询数 × 行数）每块的最大元素数（float32，约 64MB）
+BATCH_SCORE_ELEMENTS = 1 << 24
+
+# chroma HNSW 索引每个向量的邻接表大小估算（默认 M=16，第 0 层 2M 个 int32 邻居）
+CHROMA_HNSW_LINK_BYTES = 2 * 16 * 4
+
+
+class VectorBackend:
+    """检索后端接口"""
+
+    name = "base"
+
+    def count(self) -> int:
+        """已索引的向量数量"""
+        raise NotImplementedError
+
+    def get_metadata(self) -> Dict[str, Any]:
+        """索引级元数据（如 embedding_model）"""
+        raise NotImplementedError
+
+    def reset(self, metadata: Optional[Dict[str, Any]] = None):
+        """清空索引，并写入新的索引级元数据"""
+        raise NotImplementedError
+
+    def add(
+        self,
+        ids: List[str],
+        embeddings: np.ndarray,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]]
+    ):
+        """批量添加向量"""
+        raise NotImplementedError
+
+    def upsert(
+        self,
+        ids: List[str],
+        embeddings: np.ndarray,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]]
+    ):
+        """批量插入或覆盖向量（按 id）"""
+        raise NotImplementedError
+
+    def delete(self, ids: List[str]):
+        """按 id 删除向量"""
+        raise NotImplementedError
+
+    @contextmanager
+    def bulk_write(self) -> Iterator[None]:
+        """
+        批量写入（分批构建索引时使用）
+
+        期间的每次 upsert 都是一个检查点：构建中断后，已写入的批次在下次加载时仍然存在，
+        增量同步只会重新向量化剩下的问题。默认每次写入都已持久化，无需额外处理。
+        """
+        yield
+
+    def get_content_hashes(self) -> Dict[str, str]:
+        """获取每条记录的内容哈希（记录 id → content_hash），用于增量索引"""
+        raise NotImplementedError
+
+    def memory_mb(self) -> float:
+        """索引在本进程中常驻内存的估算值（MB；数据不在进程内的后端返回 0）"""
+        return 0.0
+
+    def prepare(self):
+        """
+        完成延迟构建的检索结构（如分组、量化编码）
+
+        之后直到下一次写入，query() / query_batch() 只读取索引，可以在多个线程中并发调用。
+        """
+
+    def query(
+        self,
+        query_embedding: np.ndarray,
+        n_results: int,
+        exclude_ids: Optional[Collection[int]] = None
+    ) -> List[SearchHit]:
+        """
+        检索与查询向量最相似的 n_results 条记录
+
+        Args:
+            query_embedding: 查询向量
+            n_results: 返回数量
+            exclude_ids: 需要排除的问题 ID（元数据中的 id 字段），在检索内部过滤
+        """
+        raise NotImplementedError
+
+    def query_batch(
+        self,
+        query_embeddings: np.ndarray,
+        n_results: int,
+        exclude_ids: Optional[Sequence[Optional[Collection[int]]]] = None
+    ) -> List[List[SearchHit]]:
+        """
+        批量检索：每个查询向量各自返回 n_results 条记录
+
+        Args:
+            query_embeddings: 查询向量矩阵（每行一个查询）
+            n_results: 每个查询的返回数量
+            exclude_ids: 每个查询各自需要排除的问题 ID（None 表示都不排除）
+
+        默认逐个调用 query()，内存后端用一次矩阵乘完成打分。
+        """
+        queries = np.asarray(query_embeddings, dtype=np.float32).reshape(len(query_embeddings), -1)
+        excludes = _batch_excludes(exclude_ids, len(queries))
+        return [self.query(query, n_results, exclude) for query, exclude in zip(queries, excludes)]
+
+
+def _batch_excludes(
+    exclude_ids: Optional[Sequence[Optional[Collection[int]]]],
+    count: int
+) -> Sequence[Optional[Collection[int]]]:
+    """校验批量检索的排除集合数量"""
+    if exclude_ids is None:
+        return [None] * count
+    if len(exclude_ids) != count:
+        raise ValueError(f"排除集合数量（{len(exclude_ids)}）与查询数量（{count}）不一致")
+    return exclude_ids
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """按行 L2 归一化（零向量保持为零）"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class NumpyVectorBackend(VectorBackend):
+    """
+    内存向量检索后端
+
+    问题向量以 L2 归一化后的 float32 连续矩阵保存，
+    检索时做一次矩阵向量乘得到余弦相似度，再用 argpartition 取精确 top-k。
+    指定 persist_path 时，索引会保存为 .npz 文件，下次启动直接加载。
+
+    矩阵按容量倍增预分配，分批追加时不会每批复制整个矩阵；
+    bulk_write() 期间每批只追加写一个检查点文件（<persist_path>.ckpt/），结束时合并为一个 .npz。
+    """
+
+    # 初始矩阵容量（行）
+    MIN_CAPACITY = 64
+
+    name = "numpy"
+
+    def __init__(
+        self,
+        persist_path: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        self.persist_path = persist_path
+        self._metadata: Dict[str, Any] = dict(metadata or {})
+        self._ids: List[str] = []
+        self._documents: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._buffer: Optional[np.ndarray] = None  # _matrix 是它的前 n 行
+        self._row_of: Dict[str, int] = {}
+        self._row_of_question: Dict[int, int] = {}
+        self._bulk = False
+        self._checkpoints = 0
+
+        if persist_path and os.path.exists(persist_path):
+            self._load()
+        if persist_path and os.path.isdir(self._checkpoint_dir):
+            self._replay_checkpoints()
+
+    @classmethod
+    def from_arrays(
+        cls,
+        matrix: np.ndarray,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> "NumpyVectorBackend":
+        """
+        直接用已归一化的向量矩阵构建（不复制、不持久化）
+
+        用于从快照 mmap 加载的只读索引。
+        """
+        backend = cls(metadata=metadata)
+        backend._matrix = matrix
+        backend._ids = list(ids)
+        backend._documents = list(documents)
+        backend._metadatas = list(metadatas)
+        backend._rebuild_row_maps()
+        return backend
+
+    def count(self) -> int:
+        return len(self._ids)
+
+    def get_metadata(self) -> Dict[str, Any]:
+        return self._metadata
+
+    def reset(self, metadata: Optional[Dict[str, Any]] = None):
+        self._metadata = dict(metadata or {})
+        self._ids = []
+        self._documents = []
+        self._metadatas = []
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._buffer = None
+        self._row_of = {}
+        self._row_of_question = {}
+        self._save()
+
+    def add(
+        self,
+        ids: List[str],
+        embeddings: np.ndarray,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]]
+    ):
+        self.upsert(ids, embeddings, documents, metadatas)
+
+    def upsert(
+        self,
+        ids: List[str],
+        embeddings: np.ndarray,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]]
+    ):
+        if not ids:
+            return
+
+        vectors = _normalize_rows(np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1))
+        self._apply_upsert(ids, vectors, documents, metadatas)
+        if self._bulk:
+            self._write_checkpoint(ids, vectors, documents, metadatas)
+        else:
+            self._save()
+
+    def delete(self, ids: List[str]):
+        rows = {self._row_of[record_id] for record_id in ids if record_id in self._row_of}
+        if not rows:
+            return
+
+        keep = [row for row in range(len(self._ids)) if row not in rows]
+        self._matrix = self._buffer = np.ascontiguousarray(self._matrix[keep])
+        self._ids = [self._ids[row] for row in keep]
+        self._documents = [self._documents[row] for row in keep]
+        self._metadatas = [self._metadatas[row] for row in keep]
+        self._rebuild_row_maps()
+        self._save()
+
+    @contextmanager
+    def bulk_write(self) -> Iterator[None]:
+        if not self.persist_path or self._bulk:
+            yield
+            return
+
+        self._bulk = True
+        try:
+            yield
+        finally:
+            # 正常结束或抛出异常时都合并保存；进程被强制终止时由检查点恢复
+            self._bulk = False
+            if self._checkpoints:
+                self._save()
+
+    def get_content_hashes(self) -> Dict[str, str]:
+        return {
+            record_id: metadata.get("content_hash", "")
+            for record_id, metadata in zip(self._ids, self._metadatas)
+        }
+
+    def memory_mb(self) -> float:
+        return (self._matrix.nbytes + self._records_bytes()) / 1024 / 1024
+
+    def query(
+        self,
+        query_embedding: np.ndarray,
+        n_results: int,
+        exclude_ids: Optional[Collection[int]] = None
+    ) -> List[SearchHit]:
+        total = len(self._ids)
+        if total == 0 or n_results <= 0:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        return self._top_hits(self._matrix @ query, n_results, exclude_ids)
+
+    def query_batch(
+        self,
+        query_embeddings: np.ndarray,
+        n_results: int,
+        exclude_ids: Optional[Sequence[Optional[Collection[int]]]] = None
+    ) -> List[List[SearchHit]]:
+        queries = np.asarray(query_embeddings, dtype=np.float32).reshape(len(query_embeddings), -1)
+        excludes = _batch_excludes(exclude_ids, len(queries))
+        total = len(self._ids)
+        if total == 0 or n_results <= 0:
+            return [[] for _ in range(len(queries))]
+
+        queries = _normalize_rows(queries)
+        results: List[List[SearchHit]] = []
+        # 按块做矩阵乘，分数矩阵的大小与题库大小无关
+        block = max(1, BATCH_SCORE_ELEMENTS // total)
+        for start in range(0, len(queries), block):
+            scores = queries[start:start + block] @ self._matrix.T
+            for row, exclude in zip(scores, excludes[start:start + block]):
+                results.append(self._top_hits(row, n_results, exclude))
+        return results
+
+    def _top_hits(
+        self,
+        scores: np.ndarray,
+        n_results: int,
+        exclude_ids: Optional[Collection[int]]
+    ) -> List[SearchHit]:
+        """在一行分数上屏蔽排除的问题并取 top-k（会原地修改 scores）"""
+        total = len(scores)
+
+        # 排除的问题直接在分数向量上屏蔽，保证 top-k 都是候选问题
+        excluded_rows = self._excluded_rows(exclude_ids)
+        scores[excluded_rows] = -np.inf
+        available = total - len(excluded_rows)
+
+        k = min(n_results, available)
+        if k <= 0:
+            return []
+        if k < total:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(total)
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        return [(self._metadatas[i], float(scores[i])) for i in top]
+
+    def _records_bytes(self) -> int:
+        """记录 id、文档和元数据占用的内存（近似）"""
+        return sum(sys.getsizeof(record_id) for record_id in self._ids) + \
+            sum(sys.getsizeof(document) for document in self._documents) + \
+            sum(sys.getsizeof(metadata) + sum(sys.getsizeof(v) for v in metadata.values())
+                for metadata in self._metadatas)
+
+    def _excluded_rows(self, exclude_ids: Optional[Collection[int]]) -> List[int]:
+        """需要排除的问题 ID → 矩阵行号"""
+        if not exclude_ids:
+            return []
+        return [
+            self._row_of_question[question_id]
+            for question_id in exclude_ids
+            if question_id in self._row_of_question
+        ]
+
+    def _apply_upsert(
+        self,
+        ids: List[str],
+        vectors: np.ndarray,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]]
+    ):
+        """在内存中插入或覆盖已归一化的向量（不持久化）"""
+        self._ensure_writable()
+
+        # 已有记录原地覆盖，新记录追加到矩阵末尾
+        new_positions = []
+        replaced = False
+        for i, record_id in enumerate(ids):
+            row = self._row_of.get(record_id)
+            if row is None:
+                new_positions.append(i)
+            else:
+                self._matrix[row] = vectors[i]
+                self._documents[row] = documents[i]
+                self._metadatas[row] = metadatas[i]
+                replaced = True
+
+        if new_positions:
+            self._append_rows(vectors[new_positions])
+            for i in new_positions:
+                row = len(self._ids)
+                self._row_of[ids[i]] = row
+                if "id" in metadatas[i]:
+                    self._row_of_question[metadatas[i]["id"]] = row
+                self._ids.append(ids[i])
+                self._documents.append(documents[i])
+                self._metadatas.append(metadatas[i])
+
+        # 追加的行已增量登记；覆盖的记录可能改了问题 ID，整体重建（分批构建时只追加，不走这里）
+        if replaced:
+            self._rebuild_row_maps()
+
+    def _ensure_writable(self):
+        """从快照 mmap 构建的只读矩阵在第一次写入前复制一份"""
+        if self._matrix.size and not self._matrix.flags.writeable:
+            self._matrix = self._buffer = np.array(self._matrix, dtype=np.float32)
+
+    def _append_rows(self, vectors: np.ndarray):
+        """追加向量行；容量不足时按倍增扩容，均摊每行只复制 O(1) 次"""
+        rows, dim = len(self._ids), vectors.shape[1]
+        needed = rows + len(vectors)
+        buffer = self._buffer
+        if buffer is None or buffer.shape[1] != dim or buffer.shape[0] < needed:
+            capacity = max(needed, self.MIN_CAPACITY, 2 * (buffer.shape[0] if buffer is not None else 0))
+            buffer = np.empty((capacity, dim), dtype=np.float32)
+            if rows:
+                buffer[:rows] = self._matrix
+            self._buffer = buffer
+        buffer[rows:needed] = vectors
+        self._matrix = buffer[:needed]
+
+    @property
+    def _checkpoint_dir(self) -> str:
+        return f"{self.persist_path}.ckpt"
+
+    def _write_checkpoint(
+        self,
+        ids: List[str],
+        vectors: np.ndarray,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]]
+    ):
+        """把一批写入追加保存为检查点文件（只写本批数据）"""
+        os.makedirs(self._checkpoint_dir, exist_ok=True)
+        path = os.path.join(self._checkpoint_dir, f"{self._checkpoints:08d}.npz")
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            matrix=vectors,
+            ids=np.array(ids, dtype=str),
+            documents=np.array(documents, dtype=str),
+            metadatas=np.array(json.dumps(metadatas, ensure_ascii=False)),
+        )
+        os.replace(tmp_path, path)
+        self._checkpoints += 1
+
+    def _replay_checkpoints(self):
+        """回放上次中断的构建留下的检查点，然后合并保存"""
+        names = sorted(name for name in os.listdir(self._checkpoint_dir) if name.endswith(".npz")
+                       and not name.endswith(".tmp.npz"))
+        restored = 0
+        for name in names:
+            try:
+                with np.load(os.path.join(self._checkpoint_dir, name)) as data:
+                    vectors = np.ascontiguousarray(data["matrix"], dtype=np.float32)
+                    ids = [str(i) for i in data["ids"]]
+                    documents = [str(d) for d in data["documents"]]
+                    metadatas = json.loads(str(data["metadatas"]))
+            except (OSError, ValueError, KeyError):
+                # 写到一半的检查点：之后的批次由增量同步重新向量化
+                break
+            self._apply_upsert(ids, vectors, documents, metadatas)
+            restored += len(ids)
+
+        if restored:
+            print(f"🔁 从检查点恢复 {restored} 条向量（{self._checkpoint_dir}）")
+        self._save()
+
+    def _save(self):
+        """保存索引到 .npz（未指定 persist_path 时不保存），并清理已合并的检查点"""
+        if not self.persist_path:
+            return
+
+        directory = os.path.dirname(self.persist_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # 先写临时文件再替换，避免中途崩溃留下损坏的索引
+        tmp_path = f"{self.persist_path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            matrix=self._matrix,
+            ids=np.array(self._ids, dtype=str),
+            documents=np.array(self._documents, dtype=str),
+            metadatas=np.array(json.dumps(self._metadatas, ensure_ascii=False)),
+            metadata=np.array(json.dumps(self._metadata, ensure_ascii=False)),
+        )
+        os.replace(tmp_path, self.persist_path)
+        self._clear_checkpoints()
+
+    def _clear_checkpoints(self):
+        """删除已合并进完整索引的检查点"""
+        if self._checkpoints or os.path.isdir(self._checkpoint_dir):
+            shutil.rmtree(self._checkpoint_dir, ignore_errors=True)
+            self._checkpoints = 0
+
+    def _load(self):
+        """从 .npz 加载索引"""
+        with np.load(self.persist_path) as data:
+            self._matrix = self._buffer = np.ascontiguousarray(data["matrix"], dtype=np.float32)
+            self._ids = [str(i) for i in data["ids"]]
+            self._documents = [str(d) for d in data["documents"]]
+            self._metadatas = json.loads(str(data["metadatas"]))
+            self._metadata = json.loads(str(data["metadata"]))
+        self._rebuild_row_maps()
+
+    def _rebuild_row_maps(self):
+        """重建 记录 id / 问题 id → 矩阵行号 的映射"""
+        self._row_of = {record_id: row for row, record_id in enumerate(self._ids)}
+        self._row_of_question = {
+            metadata["id"]: row
+            for row, metadata in enumerate(self._metadatas)
+            if "id" in metadata
+        }
+
+
+class ChromaVectorBackend(VectorBackend):
+    """ChromaDB 检索后端（需要安装 chromadb）"""
+
+    name = "chroma"
+
+    def __init__(
+        self,
+        persist_directory: str,
+        collection_name: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        try:
+            import chromadb
+            from chromadb.config import Settings
+        except ImportError:
+            raise ImportError("使用 chroma 后端需要安装: pip install chromadb")
+
+        self.collection_name = collection_name
+        self.client = chromadb.PersistentClient(
+            path=persist_directory,
+            settings=Settings(
+                anonymized_telemetry=False,
+                allow_reset=True
+            )
+        )
+
+        # 获取或创建集合
+        try:
+            self.collection = self.client.get_collection(name=collection_name)
+            print(f"✅ 加载已有集合: {collection_name}")
+        except Exception:
+            self.collection = self.client.create_collection(
+                name=collection_name,
+                metadata=metadata or None
+            )
+            print(f"✅ 创建新集合: {collection_name}")
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def memory_mb(self) -> float:
+        # PersistentClient 在本进程内加载 HNSW 索引：按向量大小加上第 0 层邻接表估算
+        total = self.collection.count()
+        if total == 0:
+            return 0.0
+        sample = self.collection.get(limit=1, include=["embeddings"])["embeddings"]
+        dim = len(sample[0]) if sample is not None and len(sample) else 0
+        return total * (dim * 4 + CHROMA_HNSW_LINK_BYTES) / 1024 / 1024
+
+    def get_metadata(self) -> Dict[str, Any]:
+        return self.collection.metadata or {}
+
+    def reset(self, metadata: Optional[Dict[str, Any]] = None):
+        try:
+            self.client.delete_collection(name=self.collection_name)
+        except Exception:
+            pass
+        self.collection = self.client.create_collection(
+            name=self.collection_name,
+            metadata=metadata or None
+        )
+
+    def add(
+        self,
+        ids: List[str],
+        embeddings: np.ndarray,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]]
+    ):
+        self.collection.add(
+            embeddings=np.asarray(embeddings, dtype=np.float32).tolist(),
+            documents=documents,
+            metadatas=metadatas,
+            ids=ids
+        )
+
+    def upsert(
+        self,
+        ids: List[str],
+        embeddings: np.ndarray,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]]
+    ):
+        if not ids:
+            return
+        # chromadb 0.4.x 只接受列表；分批写入时每次只转换一批
+        self.collection.upsert(
+            embeddings=np.asarray(embeddings, dtype=np.float32).tolist(),
+            documents=documents,
+            metadatas=metadatas,
+            ids=ids
+        )
+
+    def delete(self, ids: List[str]):
+        if ids:
+            self.collection.delete(ids=ids)
+
+    def get_content_hashes(self) -> Dict[str, str]:
+        records = self.collection.get(include=["metadatas"])
+        return {
+            record_id: (metadata or {}).get("content_hash", "")
+            for record_id, metadata in zip(records["ids"], records["metadatas"])
+        }
+
+    def query(
+        self,
+        query_embedding: np.ndarray,
+        n_results: int,
+        exclude_ids: Optional[Collection[int]] = None
+    ) -> List[SearchHit]:
+        total = self.collection.count()
+        if total == 0 or n_results <= 0:
+            return []
+        where = None
+        if exclude_ids:
+            # 排除条件下推到 Chroma 的元数据过滤；n_results 不能超过过滤后的数量，
+            # 只扣除索引中确实存在的问题（已删除 / 未知的 ID 不占名额）
+            excluded = list(exclude_ids)
+            present = self.collection.get(where={"id": {"$in": excluded}}, include=[])
+            total -= len(present["ids"])
+            if total <= 0:
+                return []
+            where = {"id": {"$nin": excluded}}
+
+        results = self.collection.query(
+            query_embeddings=[np.asarray(query_embedding, dtype=np.float32).ravel().tolist()],
+            n_results=min(n_results, total),
+            where=where
+        )
+
+        if not results['metadatas'] or not results['metadatas'][0]:
+            return []
+
+        distances = (results.get('distances') or [[]])[0] or [0.0] * len(results['metadatas'][0])
+        # 距离越小越相似，取负数作为分数以保持“分数越高越相似”的约定
+        return [
+            (metadata, -float(distance))
+            for metadata, distance in zip(results['metadatas'][0], distances)
+        ]
+
+
+VECTOR_BACKENDS = ("numpy", "chroma", "compressed", "hierarchical")
+
+
+def create_vector_backend(
+    backend: str,
+    persist_directory: str,
+    collection_name: str,
+    metadata: Optional[Dict[str, Any]] = None
+) -> VectorBackend:
+    """
+    创建检索后端
+
+    Args:
+        backend: 后端名称（numpy / chroma / compressed / hierarchical，
+                 compressed 和 hierarchical 可带参数，见 compressed_index.py / hierarchical_index.py）
+        persist_directory: 持久化目录
+        collection_name: 集合名称
+        metadata: 新建索引时写入的索引级元数据
+    """
+    if backend == "numpy":
+        persist_path = os.path.join(persist_directory, f"{collection_name}.npz")
+        return NumpyVectorBackend(persist_path=persist_path, metadata=metadata)
+    if backend == "chroma":
+        return ChromaVectorBackend(persist_directory, collection_name, metadata=metadata)
+    if backend.split(":", 1)[0] == "compressed":
+        from .compressed_index import CompressedVectorBackend, parse_compressed_spec
+        persist_path = os.path.join(persist_directory, f"{collection_name}.cidx")
+        return CompressedVectorBackend(persist_path=persist_path, metadata=metadata, **parse_compressed_spec(backend))
+    if backend.split(":", 1)[0] == "hierarchical":
+        from .hierarchical_index import HierarchicalVectorBackend, parse_hierarchical_spec
+        # 与 numpy 后端共用同一个索引文件
+        persist_path = os.path.join(persist_directory, f"{collection_name}.npz")
+        return HierarchicalVectorBackend(persist_path=persist_path, metadata=metadata, **parse_hierarchical_spec(backend))
+    raise ValueError(f"未知的检索后端: {backend}（可选: {', '.join(VECTOR_BACKENDS)}）")
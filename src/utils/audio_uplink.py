@@ -0,0 +1,201 @@
+"""
+音频上行：合并麦克风小块后再发送
+录音线程每 20ms 产生一块（480 个采样），逐块 base64 + json.dumps 成一个
+input_audio_buffer.append 事件，每场访谈每秒 50 个 WebSocket 帧。这里改为：
+
+- 发送循环阻塞等待录音数据（线程用 queue.get(timeout)，协程用 await），不再每 10ms 轮询
+- FrameCoalescer 把小块合并成 frame_ms 毫秒的帧（默认 100ms，每秒 10 帧）；
+  缓冲中最早的音频等待超过 max_latency_ms 时不足一帧也立即发送（录音卡顿、停止录音时）
+- 事件按预先格式化的模板拼接（base64 只含 JSON 安全字符），不经过 json.dumps
+
+帧越大，服务端 VAD 检测到说话结束的时间最多晚一帧。
+传入 gate（src/utils/voice_gate.VoiceGate）时，录音块先经过本地语音门限，静音不再上传。
+
+    coalescer = FrameCoalescer(frame_ms=100, max_latency_ms=120)
+    for frame in iter_frames(recorder.get_audio, coalescer, lambda: self.running):
+        ws.send(append_event(frame))
+"""
+
+import asyncio
+import base64
+import time
+from typing import Callable, Iterator, AsyncIterator, Optional, List, Dict, Any
+
+from .voice_gate import VoiceGate
+
+
+SAMPLE_RATE = 24000
+SAMPLE_WIDTH = 2  # PCM16
+DEFAULT_FRAME_MS = 100
+DEFAULT_MAX_LATENCY_MS = 120
+# 没有缓冲数据时阻塞等待录音的最长时间（只用于检查是否已停止）
+IDLE_TIMEOUT = 0.5
+
+_APPEND_PREFIX = '{"type":"input_audio_buffer.append","audio":"'
+_APPEND_SUFFIX = '"}'
+
+
+def append_event(pcm: bytes) -> str:
+    """input_audio_buffer.append 事件的 JSON 文本（解析结果与 json.dumps 序列化的事件相同）"""
+    return _APPEND_PREFIX + base64.b64encode(pcm).decode("ascii") + _APPEND_SUFFIX
+
+
+class FrameCoalescer:
+    """把录音小块合并成固定时长的帧（带最大等待时间）"""
+
+    def __init__(
+        self,
+        frame_ms: float = DEFAULT_FRAME_MS,
+        max_latency_ms: float = DEFAULT_MAX_LATENCY_MS,
+        sample_rate: int = SAMPLE_RATE,
+        sample_width: int = SAMPLE_WIDTH
+    ):
+        """
+        Args:
+            frame_ms: 每帧的音频时长（毫秒）
+            max_latency_ms: 缓冲中最早的音频最多等待多久（毫秒，到期时不足一帧也发送）
+            sample_rate: 采样率
+            sample_width: 每个采样的字节数
+        """
+        if frame_ms <= 0 or max_latency_ms <= 0:
+            raise ValueError(f"frame_ms 和 max_latency_ms 必须大于 0（{frame_ms}, {max_latency_ms}）")
+        self.frame_ms = frame_ms
+        self.max_latency = max_latency_ms / 1000
+        self.bytes_per_ms = sample_rate * sample_width / 1000
+        self.frame_bytes = max(1, int(sample_rate * frame_ms / 1000)) * sample_width
+        self._buffer = bytearray()
+        self._first_at = 0.0  # 缓冲中最早的数据到达的时间
+        self.chunks_in = 0
+        self.frames_out = 0
+        self.bytes_out = 0
+        self.latency_flushes = 0
+
+    @property
+    def pending_bytes(self) -> int:
+        return len(self._buffer)
+
+    def push(self, chunk: bytes, now: Optional[float] = None) -> List[bytes]:
+        """加入一块录音，返回已经可以发送的帧"""
+        if not chunk:
+            return []
+        now = time.monotonic() if now is None else now
+        if not self._buffer:
+            self._first_at = now
+        self._buffer += chunk
+        self.chunks_in += 1
+
+        frames = []
+        while len(self._buffer) >= self.frame_bytes:
+            frames.append(self._take(self.frame_bytes))
+        if frames and self._buffer:
+            # 剩余部分来自刚到达的这一块
+            self._first_at = now
+        frame = self.flush_due(now)
+        if frame:
+            frames.append(frame)
+        return frames
+
+    def timeout(self, now: Optional[float] = None) -> Optional[float]:
+        """距离缓冲必须发送还有多少秒（没有缓冲数据时为 None）"""
+        if not self._buffer:
+            return None
+        now = time.monotonic() if now is None else now
+        return max(0.0, self._first_at + self.max_latency - now)
+
+    def flush_due(self, now: Optional[float] = None) -> Optional[bytes]:
+        """缓冲等待超过 max_latency_ms 时取出（不足一帧）"""
+        if not self._buffer:
+            return None
+        now = time.monotonic() if now is None else now
+        if self._first_at + self.max_latency > now:
+            return None
+        self.latency_flushes += 1
+        return self._take(len(self._buffer))
+
+    def flush(self) -> Optional[bytes]:
+        """取出缓冲中的全部数据（停止录音时）"""
+        if not self._buffer:
+            return None
+        return self._take(len(self._buffer))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "frame_ms": self.frame_ms,
+            "chunks_in": self.chunks_in,
+            "frames_out": self.frames_out,
+            "bytes_out": self.bytes_out,
+            "avg_frame_ms": self.bytes_out / self.frames_out / self.bytes_per_ms if self.frames_out else 0.0,
+            "latency_flushes": self.latency_flushes,
+        }
+
+    def _take(self, size: int) -> bytes:
+        frame = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        self.frames_out += 1
+        self.bytes_out += size
+        return frame
+
+
+def iter_frames(
+    get_chunk: Callable[[float], Optional[bytes]],
+    coalescer: FrameCoalescer,
+    running: Callable[[], bool],
+    idle_timeout: float = IDLE_TIMEOUT,
+    gate: Optional[VoiceGate] = None
+) -> Iterator[bytes]:
+    """
+    阻塞式上行（发送线程）
+
+    Args:
+        get_chunk: get_chunk(timeout) 阻塞等待一块录音，超时返回 None
+        coalescer: 合并器
+        running: 返回 False 时发送剩余数据后结束
+        idle_timeout: 没有缓冲数据时每次最多阻塞多久（秒）
+        gate: 本地语音门限（None 表示全部上传）
+    """
+    while running():
+        wait = coalescer.timeout()
+        chunk = get_chunk(idle_timeout if wait is None else wait)
+        if chunk:
+            for piece in gate.process(chunk) if gate else (chunk,):
+                yield from coalescer.push(piece)
+        else:
+            frame = coalescer.flush_due()
+            if frame:
+                yield frame
+    frame = coalescer.flush()
+    if frame:
+        yield frame
+
+
+async def aiter_frames(
+    queue: "asyncio.Queue",
+    coalescer: FrameCoalescer,
+    gate: Optional[VoiceGate] = None
+) -> AsyncIterator[bytes]:
+    """
+    异步上行（发送协程）：从队列取录音块（经过 gate 过滤），取到 None 时发送剩余数据后结束
+    """
+    while True:
+        wait = coalescer.timeout()
+        try:
+            if wait is None:
+                chunk = await queue.get()
+            else:
+                async with asyncio.timeout(wait):
+                    chunk = await queue.get()
+        except TimeoutError:
+            frame = coalescer.flush_due()
+            if frame:
+                yield frame
+            continue
+
+        if chunk is None:
+            break
+        for piece in gate.process(chunk) if gate else (chunk,):
+            for frame in coalescer.push(piece):
+                yield frame
+
+    frame = coalescer.flush()
+    if frame:
+        yield frame
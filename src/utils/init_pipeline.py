@@ -0,0 +1,145 @@
+"""
+并行初始化流水线
+把访谈开始前的准备工作（加载问题库 / 模型、打开索引、WebSocket 握手、打开音频设备、TTS 预热）
+描述为带依赖关系的任务，互不依赖的任务并行执行，只在后续步骤需要时才等待。
+
+用法：
+    pipeline = InitPipeline()
+    pipeline.add("加载问题", load_questions)
+    pipeline.add("TTS 预热", warm_tts, after=["加载问题"])
+    pipeline.add("WebSocket 握手", connect)
+    pipeline.add("加载模型", load_model, wait=False)  # 访谈开始后仍可在后台继续
+    results = pipeline.run()
+    timings = pipeline.timings()
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Dict, Any, List, Iterable, Optional
+
+from .startup_profile import startup_profiler
+
+
+class InitTaskError(Exception):
+    """初始化任务失败"""
+
+    def __init__(self, task: str, error: BaseException):
+        super().__init__(f"{task}: {error}")
+        self.task = task
+        self.error = error
+
+
+class InitPipeline:
+    """带依赖关系的并行初始化任务"""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        """
+        Args:
+            max_workers: 最大并行数（默认等于任务数）
+        """
+        self.max_workers = max_workers
+        self._tasks: Dict[str, Callable[[], Any]] = {}
+        self._deps: Dict[str, List[str]] = {}
+        self._wait: Dict[str, bool] = {}
+        self._timings: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self._start = 0.0
+
+    def add(
+        self,
+        name: str,
+        fn: Callable[[], Any],
+        after: Iterable[str] = (),
+        wait: bool = True
+    ) -> "InitPipeline":
+        """
+        添加任务
+
+        Args:
+            name: 任务名称（同时作为耗时记录的阶段名）
+            fn: 任务函数（无参数）
+            after: 依赖的任务名称，这些任务完成后才开始执行
+            wait: run() 是否等待该任务完成；为 False 时任务在后台继续执行，
+                  失败只记录在耗时信息中，不影响访谈开始
+        """
+        deps = list(after)
+        for dep in deps:
+            if dep not in self._tasks:
+                raise ValueError(f"未知的依赖任务: {dep}")
+        self._tasks[name] = fn
+        self._deps[name] = deps
+        self._wait[name] = wait
+        return self
+
+    def run(self) -> Dict[str, Any]:
+        """
+        执行所有任务，返回 任务名 → 返回值（不含后台任务）
+
+        任一需要等待的任务失败时，等待其余需要等待的任务结束，然后抛出 InitTaskError；
+        依赖失败任务的后续任务不会执行。
+        """
+        self._start = time.perf_counter()
+        futures: Dict[str, Future] = {}
+        failed = threading.Event()
+
+        def run_task(name: str):
+            # 添加顺序保证依赖任务的 future 已经创建
+            for dep in self._deps[name]:
+                futures[dep].result()
+            if failed.is_set():
+                raise InitTaskError(name, RuntimeError("前置任务失败，已取消"))
+
+            start = time.perf_counter()
+            record: Dict[str, Any] = {"start_ms": (start - self._start) * 1000}
+            try:
+                with startup_profiler.phase(name):
+                    return self._tasks[name]()
+            except BaseException as e:
+                record["error"] = str(e)
+                if self._wait[name]:
+                    failed.set()
+                raise
+            finally:
+                record["duration_ms"] = (time.perf_counter() - start) * 1000
+                record["background"] = not self._wait[name]
+                with self._lock:
+                    self._timings[name] = record
+
+        workers = self.max_workers or max(len(self._tasks), 1)
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="init")
+        for name in self._tasks:
+            futures[name] = executor.submit(run_task, name)
+        # 不等待后台任务，线程池在它们完成后自行回收
+        executor.shutdown(wait=False)
+
+        results: Dict[str, Any] = {}
+        errors: List[InitTaskError] = []
+        for name, future in futures.items():
+            if not self._wait[name]:
+                continue
+            error = future.exception()
+            if error is None:
+                results[name] = future.result()
+            else:
+                errors.append(error if isinstance(error, InitTaskError) else InitTaskError(name, error))
+
+        if errors:
+            # 优先报告真正执行失败的任务（被取消的任务没有耗时记录）
+            raise next((e for e in errors if e.task in self._timings), errors[0])
+        return results
+
+    def timings(self) -> Dict[str, Any]:
+        """
+        各阶段耗时（写入会话日志）
+
+        phases: 每个任务的开始偏移、耗时、是否后台任务（以及失败原因）
+        wall_ms: 需要等待的任务全部完成所用的时间（即访谈开始前的等待时间）
+        serial_ms: 同样这些任务串行执行的耗时之和
+        """
+        with self._lock:
+            phases = {name: dict(item) for name, item in self._timings.items()}
+        waited = [item for item in phases.values() if not item["background"]]
+        serial_ms = sum(item["duration_ms"] for item in waited)
+        wall_ms = max((item["start_ms"] + item["duration_ms"] for item in waited), default=0.0)
+        return {"phases": phases, "wall_ms": wall_ms, "serial_ms": serial_ms}
@@ -0,0 +1,58 @@
+"""
+进程内存工具
+读取常驻内存（RSS）、系统可用内存和 CPU 核数，以及在释放大对象（如嵌入模型）后把空闲内存归还给操作系统。
+"""
+
+import ctypes
+import gc
+import os
+import resource
+import sys
+from typing import Optional
+
+
+def current_rss_mb() -> float:
+    """当前进程常驻内存（MB）"""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # 非 Linux 平台退化为峰值 RSS（macOS 单位为字节）
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if peak > 1 << 30 else peak / 1024
+
+
+def release_memory():
+    """回收垃圾对象，并让 glibc 把空闲堆内存归还给系统（否则 RSS 不会下降）"""
+    gc.collect()
+    if sys.platform.startswith("linux"):
+        try:
+            ctypes.CDLL("libc.so.6").malloc_trim(0)
+        except (OSError, AttributeError):
+            pass
+
+
+def available_memory_mb() -> Optional[float]:
+    """系统可用内存（MB，Linux 的 MemAvailable；无法获取时返回 None）"""
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def available_cpus() -> int:
+    """当前进程可用的 CPU 核数（考虑 CPU 亲和性）"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
@@ -0,0 +1,357 @@
+"""
+出站 WebSocket 通道（单写者 + 优先级通道）
+对话线程（提问、response.create、会话配置）和发送循环（音频）原来同时在同一个 ws 上调用 send()，
+没有加锁；控制事件还要排在已经发出的一串音频帧后面。出站通道：
+
+- 只有一个写者（线程或协程）调用 ws.send()，其他线程 / 协程只把消息放进通道
+- 控制通道优先：写者每次先取控制消息，控制消息最多等正在发送的那一帧音频
+- 音频通道有界：满了时生产者（发送循环）等待，超时才丢弃该帧（录音缓冲会继续吸收积压）
+- 发送缓冲监控：内核 socket 发送队列（Linux TIOCOUTQ）或 asyncio transport 的写缓冲超过高水位时
+  暂停发送音频，降到低水位以下再恢复；缓冲保持很浅，response.create 发出后不必排在大量音频后面
+- 每个通道统计发送数、字节、丢弃数、最大队列长度和排队延迟（平均 / p95 / 最大）
+
+    outbound = OutboundChannel(self._write, backlog=lambda: socket_send_backlog(self.ws.sock))
+    outbound.start()
+    outbound.send_control(json.dumps({"type": "response.create"}))   # 对话线程
+    outbound.send_audio(append_event(frame))                          # 发送循环
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Callable, Awaitable, Optional, Dict, Any, Tuple
+
+
+CONTROL = "control"
+AUDIO = "audio"
+
+# 音频通道最多排队的帧数（100ms 一帧时约 5 秒）
+DEFAULT_AUDIO_LANE_FRAMES = 50
+# 发送缓冲积压超过高水位时暂停音频，降到低水位以下恢复（字节）
+SEND_BUFFER_HIGH_WATERMARK = 64 * 1024
+SEND_BUFFER_LOW_WATERMARK = 16 * 1024
+# 暂停音频期间检查发送缓冲的间隔（秒）
+BACKPRESSURE_POLL = 0.005
+# 音频通道满时发送循环最多等待多久（秒）
+AUDIO_ENQUEUE_TIMEOUT = 1.0
+# 每个通道保留多少个最近的排队延迟用于计算 p95
+LATENCY_SAMPLES = 1000
+
+
+def socket_send_backlog(sock) -> Optional[int]:
+    """socket 发送队列中尚未发出 / 确认的字节数（Linux TIOCOUTQ；不支持时返回 None）"""
+    try:
+        import fcntl
+        import struct
+        import termios
+
+        return struct.unpack("i", fcntl.ioctl(sock.fileno(), termios.TIOCOUTQ, b"\0\0\0\0"))[0]
+    except Exception:
+        return None
+
+
+def transport_send_backlog(ws) -> Optional[int]:
+    """websockets 异步连接的 transport 写缓冲字节数（不支持时返回 None）"""
+    try:
+        return ws.transport.get_write_buffer_size()
+    except Exception:
+        return None
+
+
+class LaneStats:
+    """一个通道的发送统计"""
+
+    __slots__ = ("sent", "bytes", "dropped", "max_depth", "total_latency", "max_latency", "_latencies")
+
+    def __init__(self):
+        self.sent = 0
+        self.bytes = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self._latencies: deque = deque(maxlen=LATENCY_SAMPLES)
+
+    def record(self, size: int, latency: float):
+        """记录一条已发送的消息（latency 为放入通道到发送完成的秒数）"""
+        self.sent += 1
+        self.bytes += size
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        self._latencies.append(latency)
+
+    def summary(self) -> Dict[str, Any]:
+        latencies = sorted(self._latencies)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else 0.0
+        return {
+            "sent": self.sent,
+            "bytes": self.bytes,
+            "dropped": self.dropped,
+            "max_depth": self.max_depth,
+            "avg_latency_ms": self.total_latency / self.sent * 1000 if self.sent else 0.0,
+            "p95_latency_ms": p95 * 1000,
+            "max_latency_ms": self.max_latency * 1000,
+        }
+
+
+class _OutboundLanes:
+    """两个通道的排队、取消息顺序和发送缓冲监控（线程版 / 协程版共用，不加锁）"""
+
+    def __init__(
+        self,
+        backlog: Optional[Callable[[], Optional[int]]],
+        audio_lane_frames: int,
+        high_watermark: int,
+        low_watermark: int
+    ):
+        self._backlog = backlog
+        self.audio_lane_frames = audio_lane_frames
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self._control: deque = deque()  # (文本, 放入时间)
+        self._audio: deque = deque()
+        self.lanes = {CONTROL: LaneStats(), AUDIO: LaneStats()}
+        self._closing = False
+        self._throttled = False
+        self._throttled_since = 0.0
+        self.backpressure_events = 0
+        self.backpressure_seconds = 0.0
+        self.max_backlog = 0
+        self.send_errors = 0
+        self.last_send_error: Optional[str] = None
+
+    def _push(self, lane: str, text: str):
+        queue = self._control if lane == CONTROL else self._audio
+        queue.append((text, time.monotonic()))
+        stats = self.lanes[lane]
+        stats.max_depth = max(stats.max_depth, len(queue))
+
+    def _audio_full(self) -> bool:
+        return len(self._audio) >= self.audio_lane_frames
+
+    def _next(self) -> Optional[Tuple[str, str, float]]:
+        """下一条要发送的消息：控制通道优先；发送缓冲积压时暂缓音频"""
+        if self._control:
+            return (CONTROL,) + self._control.popleft()
+        if self._audio and not self._closing and not self._check_backpressure():
+            return (AUDIO,) + self._audio.popleft()
+        return None
+
+    def _check_backpressure(self) -> bool:
+        """发送缓冲超过高水位时暂停音频，降到低水位以下再恢复（带迟滞）"""
+        if self._backlog is None:
+            return False
+        backlog = self._backlog()
+        if backlog is None:
+            self._backlog = None  # 平台不支持，不再检查
+            return False
+        self.max_backlog = max(self.max_backlog, backlog)
+        now = time.monotonic()
+        if self._throttled:
+            if backlog <= self.low_watermark:
+                self._throttled = False
+                self.backpressure_seconds += now - self._throttled_since
+        elif backlog > self.high_watermark:
+            self._throttled = True
+            self._throttled_since = now
+            self.backpressure_events += 1
+        return self._throttled
+
+    def _drop_audio(self):
+        """关闭时丢弃还没发出的音频"""
+        self.lanes[AUDIO].dropped += len(self._audio)
+        self._audio.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """各通道的发送 / 延迟统计和发送缓冲背压情况"""
+        return {
+            CONTROL: self.lanes[CONTROL].summary(),
+            AUDIO: self.lanes[AUDIO].summary(),
+            "queued": {CONTROL: len(self._control), AUDIO: len(self._audio)},
+            "backpressure_events": self.backpressure_events,
+            "backpressure_seconds": self.backpressure_seconds,
+            "max_send_backlog": self.max_backlog,
+            "send_errors": self.send_errors,
+            "last_send_error": self.last_send_error,
+        }
+
+
+class OutboundChannel(_OutboundLanes):
+    """线程版出站通道：一个写线程独占 send()"""
+
+    def __init__(
+        self,
+        send: Callable[[str], None],
+        backlog: Optional[Callable[[], Optional[int]]] = None,
+        audio_lane_frames: int = DEFAULT_AUDIO_LANE_FRAMES,
+        high_watermark: int = SEND_BUFFER_HIGH_WATERMARK,
+        low_watermark: int = SEND_BUFFER_LOW_WATERMARK,
+        name: str = "ws-writer"
+    ):
+        """
+        Args:
+            send: 实际发送一条文本消息的函数（只在写线程中调用）
+            backlog: 返回发送缓冲积压字节数的函数（如 socket_send_backlog），None 表示不监控
+            audio_lane_frames: 音频通道最多排队的帧数
+            high_watermark / low_watermark: 暂停 / 恢复发送音频的发送缓冲水位（字节）
+            name: 写线程名称
+        """
+        super().__init__(backlog, audio_lane_frames, high_watermark, low_watermark)
+        self._send = send
+        self.name = name
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """启动写线程（已启动时不做任何事）"""
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._closing = False
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def send_control(self, text: str):
+        """放入控制消息（不等待发送）"""
+        with self._cond:
+            self._push(CONTROL, text)
+            self._cond.notify_all()
+
+    def send_audio(self, text: str, timeout: Optional[float] = AUDIO_ENQUEUE_TIMEOUT) -> bool:
+        """放入音频消息；通道满时最多等待 timeout 秒，仍然满（或已关闭）时丢弃并返回 False"""
+        with self._cond:
+            if self._audio_full() and not self._closing:
+                self._cond.wait_for(lambda: not self._audio_full() or self._closing, timeout)
+            if self._closing or self._audio_full():
+                self.lanes[AUDIO].dropped += 1
+                return False
+            self._push(AUDIO, text)
+            self._cond.notify_all()
+            return True
+
+    def close(self, timeout: float = 1.0):
+        """发完控制消息后停止写线程（剩余的音频丢弃）"""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return super().stats()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                item = self._next()
+                while item is None:
+                    if self._closing and not self._control:
+                        self._drop_audio()
+                        self._cond.notify_all()
+                        return
+                    # 音频因背压暂停时定期重新检查发送缓冲，否则等新消息
+                    self._cond.wait(BACKPRESSURE_POLL if self._audio else None)
+                    item = self._next()
+                if item[0] == AUDIO:
+                    self._cond.notify_all()  # 音频通道腾出了位置
+
+            lane, text, queued_at = item
+            try:
+                self._send(text)
+            except Exception as e:
+                self.send_errors += 1
+                self.last_send_error = repr(e)
+            with self._cond:
+                self.lanes[lane].record(len(text), time.monotonic() - queued_at)
+
+
+class AsyncOutboundChannel(_OutboundLanes):
+    """协程版出站通道：一个写协程独占 await send()"""
+
+    def __init__(
+        self,
+        send: Callable[[str], Awaitable[None]],
+        backlog: Optional[Callable[[], Optional[int]]] = None,
+        audio_lane_frames: int = DEFAULT_AUDIO_LANE_FRAMES,
+        high_watermark: int = SEND_BUFFER_HIGH_WATERMARK,
+        low_watermark: int = SEND_BUFFER_LOW_WATERMARK,
+        name: str = "ws-writer"
+    ):
+        """参数与 OutboundChannel 相同，send 为协程函数"""
+        super().__init__(backlog, audio_lane_frames, high_watermark, low_watermark)
+        self._send = send
+        self.name = name
+        self._wakeup = asyncio.Event()
+        self._space = asyncio.Event()
+        self._space.set()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """在当前事件循环中启动写协程"""
+        if self._task is None or self._task.done():
+            self._closing = False
+            self._task = asyncio.create_task(self._run(), name=self.name)
+
+    def send_control(self, text: str):
+        """放入控制消息（不等待发送）"""
+        self._push(CONTROL, text)
+        self._wakeup.set()
+
+    async def send_audio(self, text: str, timeout: Optional[float] = AUDIO_ENQUEUE_TIMEOUT) -> bool:
+        """放入音频消息；通道满时最多等待 timeout 秒，仍然满（或已关闭）时丢弃并返回 False"""
+        if self._audio_full() and not self._closing:
+            try:
+                async with asyncio.timeout(timeout):
+                    while self._audio_full() and not self._closing:
+                        self._space.clear()
+                        await self._space.wait()
+            except TimeoutError:
+                pass
+        if self._closing or self._audio_full():
+            self.lanes[AUDIO].dropped += 1
+            return False
+        self._push(AUDIO, text)
+        self._wakeup.set()
+        return True
+
+    async def close(self, timeout: float = 1.0):
+        """发完控制消息后停止写协程（剩余的音频丢弃）"""
+        self._closing = True
+        self._wakeup.set()
+        self._space.set()
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._task, timeout)
+            except (TimeoutError, asyncio.CancelledError):
+                pass
+
+    async def _run(self):
+        while True:
+            item = self._next()
+            if item is None:
+                if self._closing and not self._control:
+                    self._drop_audio()
+                    return
+                self._wakeup.clear()
+                if self._audio:
+                    # 音频因背压暂停：定期重新检查发送缓冲
+                    try:
+                        async with asyncio.timeout(BACKPRESSURE_POLL):
+                            await self._wakeup.wait()
+                    except TimeoutError:
+                        pass
+                else:
+                    await self._wakeup.wait()
+                continue
+
+            lane, text, queued_at = item
+            if lane == AUDIO:
+                self._space.set()
+            try:
+                await self._send(text)
+            except Exception as e:
+                self.send_errors += 1
+                self.last_send_error = repr(e)
+            self.lanes[lane].record(len(text), time.monotonic() - queued_at)
@@ -0,0 +1,268 @@
+"""
+PCM 环形缓冲区
+AudioPlayer 原来用 queue.Queue(maxsize=100) 存放大小不一的音频块，满了就悄悄丢掉最早的一块（听起来是断音）；
+AudioRecorder 用无界 queue.Queue，发送循环卡住时内存一直增长。PCMRingBuffer：
+
+- 预先分配固定容量的 bytearray，不再为每块音频分配对象，容量有上限
+- 写满时按 overflow 策略处理：block（等待消费者腾出空间，超时后丢弃剩余部分）、
+  drop_oldest（丢弃最早未读的音频）、drop_newest（丢弃写不下的新音频）
+- acquire() / release() 返回缓冲区内部的只读 memoryview，消费者直接交给声卡，不复制
+- 统计欠载（消费者等数据时缓冲区已空，播放时每段语音播完也计一次）、溢出次数和丢弃的采样数
+
+单生产者、单消费者；一把锁只保护读写位置和内存拷贝，写声卡 / 读声卡都在锁外进行。
+
+    ring = PCMRingBuffer(capacity_ms=10000, overflow=OVERFLOW_DROP_OLDEST)
+    ring.write(pcm)                      # 生产者
+    view = ring.acquire(4800, timeout=0.1)
+    if view is not None:
+        stream.write(view)               # 消费者：零拷贝
+        ring.release()
+"""
+
+import threading
+import time
+from typing import Optional, Dict, Any
+
+
+SAMPLE_RATE = 24000
+SAMPLE_WIDTH = 2  # PCM16
+
+OVERFLOW_BLOCK = "block"
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_DROP_NEWEST = "drop_newest"
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST)
+
+
+class PCMRingBuffer:
+    """预分配、有界的 PCM16 环形缓冲区（单生产者 / 单消费者）"""
+
+    def __init__(
+        self,
+        capacity_ms: float,
+        overflow: str = OVERFLOW_DROP_OLDEST,
+        write_timeout: Optional[float] = None,
+        track_underruns: bool = True,
+        sample_rate: int = SAMPLE_RATE,
+        sample_width: int = SAMPLE_WIDTH
+    ):
+        """
+        Args:
+            capacity_ms: 容量（毫秒音频）
+            overflow: 写满时的策略（block / drop_oldest / drop_newest）
+            write_timeout: block 策略下写入最多等待多久（秒，None 表示一直等到有空间或关闭）
+            track_underruns: 是否统计欠载（录音缓冲的消费者比生产者快，等数据是常态，不需要统计）
+            sample_rate: 采样率
+            sample_width: 每个采样的字节数
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"未知的溢出策略: {overflow}（可选 {', '.join(OVERFLOW_POLICIES)}）")
+        self.sample_width = sample_width
+        self.bytes_per_ms = sample_rate * sample_width / 1000
+        self.capacity = max(1, int(capacity_ms * sample_rate / 1000)) * sample_width
+        self.overflow = overflow
+        self.write_timeout = write_timeout
+        self.track_underruns = track_underruns
+
+        self._buffer = bytearray(self.capacity)
+        self._view = memoryview(self._buffer)
+        # 绝对位置（只增不减）：[_read, _write) 是未读数据，从 _held_start 开始的 _held 字节已被 acquire() 借出
+        # （通常紧挨在 _read 之前；借出期间 clear() 会让 _read 跳走，借出的区域仍然保留到 release()）
+        self._read = 0
+        self._write = 0
+        self._held = 0
+        self._held_start = 0
+        self._cond = threading.Condition(threading.Lock())
+        self._closed = False
+        # 当前是否处于欠载中：每次断流只计一次，还没有写入过数据、clear() 之后等数据不算欠载
+        self._starved = True
+
+        self.bytes_written = 0
+        self.bytes_read = 0
+        self.peak_bytes = 0
+        self.underruns = 0
+        self.overruns = 0
+        self.dropped_bytes = 0
+        self.cleared_bytes = 0
+
+    @property
+    def available(self) -> int:
+        """未读字节数"""
+        return self._write - self._read
+
+    @property
+    def free(self) -> int:
+        """可写字节数（借出未归还的部分不可写）"""
+        return self.capacity - (self._write - self._reserved_start)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def write(self, data: bytes, timeout: Optional[float] = None) -> int:
+        """
+        写入 PCM 数据，返回实际写入的字节数（其余按溢出策略丢弃）
+
+        Args:
+            data: PCM 数据（bytes / bytearray / memoryview）
+            timeout: block 策略下最多等待多久（默认使用 write_timeout）
+        """
+        data = memoryview(data).cast("B")
+        size = len(data) - len(data) % self.sample_width
+        data = data[:size]
+        if not size:
+            return 0
+
+        with self._cond:
+            if self._closed:
+                self._drop(size)
+                return 0
+
+            discarded = 0
+            if self.overflow == OVERFLOW_BLOCK:
+                written = self._write_blocking(data, self.write_timeout if timeout is None else timeout)
+            else:
+                if self.overflow == OVERFLOW_DROP_OLDEST and size > self.free:
+                    # 先丢弃最早未读的数据（借出的部分不能覆盖）
+                    discarded = min(size - self.free, self.available)
+                    self._read += discarded
+                    if size > self.free:
+                        # 仍然写不下（超过容量或部分被借出）：保留最新的部分
+                        data = data[size - self.free:]
+                written = self._copy_in(data[:self.free])
+
+            if discarded or written < size:
+                self._drop(discarded + size - written)
+            self.bytes_written += written
+            self.peak_bytes = max(self.peak_bytes, self._write - self._read + self._held)
+            if written:
+                self._cond.notify_all()
+            return written
+
+    def acquire(self, max_bytes: int, timeout: Optional[float] = None) -> Optional[memoryview]:
+        """
+        借出最多 max_bytes 字节的连续未读数据（只读 memoryview，零拷贝），用完后必须调用 release()
+
+        Args:
+            max_bytes: 最多借出的字节数（环形末尾处可能更短）
+            timeout: 没有数据时最多等待多久（秒，0 表示不等待，None 表示一直等到有数据或关闭）
+
+        Returns:
+            没有数据（超时或已关闭）时返回 None
+        """
+        with self._cond:
+            if self._held:
+                raise RuntimeError("上一次 acquire() 借出的数据还没有 release()")
+            if not self.available:
+                if self.track_underruns and not self._starved and not self._closed:
+                    self._starved = True
+                    self.underruns += 1
+                if timeout == 0 or not self._cond.wait_for(lambda: self.available or self._closed, timeout):
+                    return None
+                if not self.available:
+                    return None
+            self._starved = False
+
+            start = self._read % self.capacity
+            length = min(max_bytes, self.available, self.capacity - start)
+            if length >= self.sample_width:
+                length -= length % self.sample_width
+            self._held_start = self._read
+            self._read += length
+            self._held = length
+            return self._view[start:start + length].toreadonly()
+
+    def release(self):
+        """归还 acquire() 借出的空间"""
+        with self._cond:
+            self.bytes_read += self._held
+            self._held = 0
+            self._cond.notify_all()
+
+    def read(self, max_bytes: int, timeout: Optional[float] = None) -> Optional[bytes]:
+        """读出最多 max_bytes 字节（复制；跨越环形末尾时拼接两段）"""
+        view = self.acquire(max_bytes, timeout)
+        if view is None:
+            return None
+        data = bytes(view)
+        self.release()
+        if len(data) < max_bytes and self.available:
+            rest = self.acquire(max_bytes - len(data), timeout=0)
+            if rest is not None:
+                data += bytes(rest)
+                self.release()
+        return data
+
+    def clear(self) -> int:
+        """丢弃全部未读数据（例如用户打断播放），返回丢弃的字节数"""
+        with self._cond:
+            cleared = self.available
+            self._read = self._write
+            self._starved = True
+            self.cleared_bytes += cleared
+            self._cond.notify_all()
+            return cleared
+
+    def close(self):
+        """关闭：唤醒等待中的读写，之后写入的数据全部丢弃"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """容量、水位和欠载 / 溢出计数"""
+        with self._cond:
+            buffered = self._write - self._read + self._held
+            return {
+                "overflow": self.overflow,
+                "capacity_ms": self.capacity / self.bytes_per_ms,
+                "buffered_ms": buffered / self.bytes_per_ms,
+                "peak_ms": self.peak_bytes / self.bytes_per_ms,
+                "bytes_written": self.bytes_written,
+                "bytes_read": self.bytes_read,
+                "underruns": self.underruns,
+                "overruns": self.overruns,
+                "dropped_samples": self.dropped_bytes // self.sample_width,
+                "cleared_samples": self.cleared_bytes // self.sample_width,
+            }
+
+    # ==================== 内部实现（调用方持有锁） ====================
+
+    @property
+    def _reserved_start(self) -> int:
+        """不可覆盖区域的起点：借出未归还时是借出的位置，否则是读位置"""
+        return self._held_start if self._held else self._read
+
+    def _write_blocking(self, data: memoryview, timeout: Optional[float]) -> int:
+        """等待消费者腾出空间，分段写入；超时或关闭时返回已写入的字节数"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        written = 0
+        while written < len(data):
+            if not self.free:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._cond.wait_for(lambda: self.free or self._closed, remaining)
+                if self._closed or not self.free:
+                    break
+            chunk = min(self.free, len(data) - written)
+            chunk -= chunk % self.sample_width
+            if not chunk:
+                break
+            written += self._copy_in(data[written:written + chunk])
+            self._cond.notify_all()
+        return written
+
+    def _copy_in(self, data: memoryview) -> int:
+        """把数据拷贝到写位置（调用方保证有足够空间）"""
+        size = len(data)
+        start = self._write % self.capacity
+        first = min(size, self.capacity - start)
+        self._view[start:start + first] = data[:first]
+        if first < size:
+            self._view[:size - first] = data[first:]
+        self._write += size
+        return size
+
+    def _drop(self, size: int):
+        self.overruns += 1
+        self.dropped_bytes += size
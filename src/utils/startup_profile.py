@@ -0,0 +1,136 @@
+"""
+启动耗时分析
+记录入口脚本的逐个 import 耗时和各初始化阶段耗时，
+并统计从进程启动到第一次提问（time-to-first-prompt）的时间。
+
+用法（入口脚本最前面）：
+    from src.utils.startup_profile import startup_profiler
+    if "--startup-profile" in sys.argv:
+        startup_profiler.enable()
+
+客户端中：
+    with startup_profiler.phase("加载问题"):
+        ...
+    startup_profiler.mark_first_prompt()
+"""
+
+import builtins
+import importlib.util
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Tuple
+
+
+class StartupProfiler:
+    """启动耗时记录器（未启用时所有接口都是空操作）"""
+
+    def __init__(self):
+        self.enabled = False
+        self.start_time = time.perf_counter()
+        self.imports: List[Tuple[str, float, float, int]] = []  # (模块, 累计耗时, 自身耗时, 嵌套深度)
+        self.phases: List[Tuple[str, float, float]] = []  # (阶段, 开始偏移, 耗时)
+        self.first_prompt_at: Optional[float] = None
+        self._original_import = None
+        self._stack: List[float] = []
+        self._lock = threading.Lock()
+
+    def enable(self, track_imports: bool = True):
+        """启用记录；track_imports 为 True 时记录之后每个首次导入的模块耗时"""
+        if self.enabled:
+            return
+        self.enabled = True
+        if track_imports:
+            self._original_import = builtins.__import__
+            builtins.__import__ = self._timed_import
+
+    def disable(self):
+        """停止记录 import"""
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def elapsed(self) -> float:
+        """距进程启动（本模块导入）的秒数"""
+        return time.perf_counter() - self.start_time
+
+    @contextmanager
+    def phase(self, name: str):
+        """记录一个初始化阶段的耗时"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases.append((name, start - self.start_time, time.perf_counter() - start))
+
+    def mark_first_prompt(self):
+        """记录第一次提问的时间，并输出报告"""
+        if not self.enabled or self.first_prompt_at is not None:
+            return
+        self.first_prompt_at = self.elapsed()
+        self.disable()
+        print(self.report())
+
+    def summary(self) -> Dict[str, Any]:
+        """结构化的耗时数据（写入会话日志）"""
+        return {
+            "time_to_first_prompt_ms": None if self.first_prompt_at is None else self.first_prompt_at * 1000,
+            "phases_ms": {name: duration * 1000 for name, _, duration in self.phases},
+        }
+
+    def report(self, top_imports: int = 15) -> str:
+        """格式化的耗时报告"""
+        lines = ["", "=" * 60, "⏱️  启动耗时分析", "=" * 60]
+
+        if self.imports:
+            top_level = [item for item in self.imports if item[3] == 0]
+            lines.append(f"\n📦 顶层 import 累计耗时（前 {top_imports} 项）:")
+            for name, total, _, _ in sorted(top_level, key=lambda item: -item[1])[:top_imports]:
+                lines.append(f"   {name:<40} {total * 1000:>8.1f}ms")
+
+            lines.append(f"\n🐢 最慢的模块（自身耗时，前 {top_imports} 项）:")
+            for name, _, own, _ in sorted(self.imports, key=lambda item: -item[2])[:top_imports]:
+                lines.append(f"   {name:<40} {own * 1000:>8.1f}ms")
+
+        if self.phases:
+            lines.append("\n🔧 初始化阶段:")
+            for name, offset, duration in self.phases:
+                lines.append(f"   {name:<30} +{offset * 1000:>8.1f}ms  {duration * 1000:>8.1f}ms")
+
+        if self.first_prompt_at is not None:
+            lines.append(f"\n🚀 首次提问: {self.first_prompt_at * 1000:.1f}ms")
+        lines.append("=" * 60)
+        return "\n".join(lines)
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        module_name = name
+        if level:
+            try:
+                module_name = importlib.util.resolve_name("." * level + name, (globals or {}).get("__package__"))
+            except (ImportError, ValueError):
+                module_name = None
+
+        # 只统计主线程中的首次导入（已导入的模块直接返回）
+        if (module_name is None or module_name in sys.modules
+                or threading.current_thread() is not threading.main_thread()):
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        self._stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            total = time.perf_counter() - start
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += total
+            self.imports.append((module_name, total, total - children, len(self._stack)))
+
+
+# 进程级单例
+startup_profiler = StartupProfiler()
@@ -0,0 +1,184 @@
+"""
+客户端语音门限（本地 VAD）
+录音线程一直在产生音频，TTS 播放时、受访者思考时的长时间静音也全部上传到 Realtime API。
+VoiceGate 放在录音和上行合并之间，只转发说话的部分：
+
+- 每块音频用 NumPy 计算均方根能量和过零率：能量高于门限（固定下限与自适应噪声底的较大者）
+  且过零率不像噪声（或能量明显更高）时判为语音
+- 开始说话时先补发之前缓存的 pre_roll_ms 音频（不丢字头），说话停止后继续转发 hangover_ms，
+  保证服务端 VAD 能收到足够长的静音来判断用户说完
+- 静音期间每 keepalive_ms 只转发一块音频作为保活
+
+hangover_ms 必须大于服务端的 silence_duration_ms，否则服务端收不到说完的判断：
+客户端按 vad_silence_duration_ms + HANGOVER_MARGIN_MS 设置。
+
+    gate = VoiceGate.for_server_vad(vad_silence_duration_ms, pre_roll_ms=300)
+    for frame in iter_frames(recorder.get_audio, coalescer, lambda: self.running, gate=gate):
+        ...
+"""
+
+from collections import deque
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+
+SAMPLE_RATE = 24000
+SAMPLE_WIDTH = 2  # PCM16
+
+# 能量门限下限（PCM16 均方根，约 -40 dBFS）
+DEFAULT_ENERGY_THRESHOLD = 330.0
+# 能量超过噪声底的倍数才算语音
+DEFAULT_NOISE_RATIO = 3.0
+# 过零率上限（浊音远低于此值，白噪声约 0.5）
+DEFAULT_MAX_ZCR = 0.25
+# 能量达到门限的倍数时不看过零率（清辅音过零率高）
+LOUD_RATIO = 3.0
+# 噪声底指数平均的平滑系数
+NOISE_SMOOTHING = 0.05
+
+DEFAULT_PRE_ROLL_MS = 300  # 与 session.update 的 prefix_padding_ms 一致
+DEFAULT_HANGOVER_MS = 1000
+DEFAULT_KEEPALIVE_MS = 1000
+# hangover 比服务端 silence_duration_ms 多出的余量
+HANGOVER_MARGIN_MS = 300
+
+
+class VoiceGate:
+    """按能量 / 过零率过滤静音的上行门限（带前置缓冲、拖尾和保活）"""
+
+    def __init__(
+        self,
+        sample_rate: int = SAMPLE_RATE,
+        energy_threshold: float = DEFAULT_ENERGY_THRESHOLD,
+        noise_ratio: float = DEFAULT_NOISE_RATIO,
+        max_zcr: float = DEFAULT_MAX_ZCR,
+        pre_roll_ms: float = DEFAULT_PRE_ROLL_MS,
+        hangover_ms: float = DEFAULT_HANGOVER_MS,
+        keepalive_ms: float = DEFAULT_KEEPALIVE_MS
+    ):
+        """
+        Args:
+            sample_rate: 采样率（PCM16 单声道）
+            energy_threshold: 能量门限下限（均方根）
+            noise_ratio: 自适应门限 = 噪声底 × noise_ratio
+            max_zcr: 过零率上限
+            pre_roll_ms: 开始说话时补发之前多少毫秒的音频
+            hangover_ms: 说话停止后继续转发多少毫秒
+            keepalive_ms: 静音期间每隔多少毫秒音频转发一块（0 表示不保活）
+        """
+        bytes_per_ms = sample_rate * SAMPLE_WIDTH / 1000
+        self.bytes_per_ms = bytes_per_ms
+        self.energy_threshold = energy_threshold
+        self.noise_ratio = noise_ratio
+        self.max_zcr = max_zcr
+        self.pre_roll_bytes = int(pre_roll_ms * bytes_per_ms)
+        self.hangover_bytes = int(hangover_ms * bytes_per_ms)
+        self.keepalive_bytes = int(keepalive_ms * bytes_per_ms)
+
+        self.noise_floor: Optional[float] = None
+        self._pre_roll: deque = deque()  # 尚未发送的静音块（按时间顺序）
+        self._pre_roll_size = 0
+        self._hangover_left = 0  # 还要继续转发的字节数
+        self._since_keepalive = 0  # 上次转发后丢弃的字节数
+
+        self.chunks_in = 0
+        self.chunks_out = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.speech_bytes = 0
+        self.keepalives = 0
+
+    @classmethod
+    def for_server_vad(
+        cls,
+        silence_duration_ms: float,
+        pre_roll_ms: float = DEFAULT_PRE_ROLL_MS,
+        hangover_ms: Optional[float] = None,
+        **kwargs
+    ) -> "VoiceGate":
+        """配合服务端 VAD 使用：hangover 默认比 silence_duration_ms 多 HANGOVER_MARGIN_MS"""
+        if hangover_ms is None:
+            hangover_ms = silence_duration_ms + HANGOVER_MARGIN_MS
+        return cls(pre_roll_ms=pre_roll_ms, hangover_ms=hangover_ms, **kwargs)
+
+    @property
+    def threshold(self) -> float:
+        """当前的能量门限"""
+        if self.noise_floor is None:
+            return self.energy_threshold
+        return max(self.energy_threshold, self.noise_floor * self.noise_ratio)
+
+    def is_speech(self, chunk: bytes) -> bool:
+        """判断一块音频是否为语音（非语音时更新噪声底）"""
+        samples = np.frombuffer(chunk, dtype="<i2", count=len(chunk) // SAMPLE_WIDTH).astype(np.float32)
+        if samples.size < 2:
+            return False
+        rms = float(np.sqrt(np.mean(samples * samples)))
+        signs = np.signbit(samples)
+        zcr = np.count_nonzero(signs[1:] != signs[:-1]) / (samples.size - 1)
+
+        threshold = self.threshold
+        speech = rms >= threshold and (zcr <= self.max_zcr or rms >= threshold * LOUD_RATIO)
+        if not speech:
+            if self.noise_floor is None:
+                self.noise_floor = rms
+            else:
+                self.noise_floor += NOISE_SMOOTHING * (rms - self.noise_floor)
+        return speech
+
+    def process(self, chunk: bytes) -> List[bytes]:
+        """输入一块录音，返回需要上传的块（可能为空，开始说话时包含前置缓冲）"""
+        if not chunk:
+            return []
+        self.chunks_in += 1
+        self.bytes_in += len(chunk)
+
+        if self.is_speech(chunk):
+            self.speech_bytes += len(chunk)
+            out = list(self._pre_roll)
+            out.append(chunk)
+            self._clear_pre_roll()
+            self._hangover_left = self.hangover_bytes
+            self._since_keepalive = 0
+        elif self._hangover_left > 0:
+            self._hangover_left -= len(chunk)
+            out = [chunk]
+            self._since_keepalive = 0
+        else:
+            self._since_keepalive += len(chunk)
+            if self.keepalive_bytes and self._since_keepalive >= self.keepalive_bytes:
+                # 保活块之前的缓冲已经不能再补发（会打乱顺序）
+                self._clear_pre_roll()
+                self._since_keepalive = 0
+                self.keepalives += 1
+                out = [chunk]
+            else:
+                self._pre_roll.append(chunk)
+                self._pre_roll_size += len(chunk)
+                while self._pre_roll_size > self.pre_roll_bytes:
+                    self._pre_roll_size -= len(self._pre_roll.popleft())
+                out = []
+
+        self.chunks_out += len(out)
+        self.bytes_out += sum(len(c) for c in out)
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        """上行字节统计（reduction 为少上传的比例）"""
+        return {
+            "chunks_in": self.chunks_in,
+            "chunks_out": self.chunks_out,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "bytes_saved": self.bytes_in - self.bytes_out,
+            "reduction": 1 - self.bytes_out / self.bytes_in if self.bytes_in else 0.0,
+            "speech_seconds": self.speech_bytes / self.bytes_per_ms / 1000,
+            "keepalives": self.keepalives,
+            "noise_floor": self.noise_floor,
+            "threshold": self.threshold,
+        }
+
+    def _clear_pre_roll(self):
+        self._pre_roll.clear()
+        self._pre_roll_size = 0
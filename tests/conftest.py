@@ -0,0 +1,83 @@
+"""
+测试共用的桩：用字符统计代替嵌入模型的检索引擎（不加载 sentence-transformers，结果确定）
+"""
+
+import numpy as np
+import pytest
+import yaml
+
+from src.core.question_rag_base import QuestionRAGBase
+
+FAKE_DIM = 64
+FAKE_MODEL = "fake-char-model"
+
+
+def fake_embedding(text: str) -> np.ndarray:
+    """字符袋向量（每个字符一个固定的随机向量）：共享字符越多的文本越相似"""
+    vector = np.zeros(FAKE_DIM, dtype=np.float32)
+    for char in text:
+        vector += np.random.default_rng(ord(char)).standard_normal(FAKE_DIM).astype(np.float32)
+    return vector
+
+
+class FakeEngine(QuestionRAGBase):
+    """问题检索引擎，嵌入模型换成 fake_embedding；记录建索引时向量化过的文本"""
+
+    def __init__(self, question_file: str, **kwargs):
+        kwargs.setdefault("embedding_cache_dir", None)
+        super().__init__(question_file=question_file, **kwargs)
+        self.embedding_model_name = FAKE_MODEL
+        self.encoded_documents = []
+
+    def _get_embedding(self, text):
+        return fake_embedding(text)
+
+    def _encode_queries(self, texts):
+        return np.stack([fake_embedding(text) for text in texts])
+
+    def _encode_batch(self, texts):
+        self.encoded_documents.extend(texts)
+        return np.stack([fake_embedding(text) for text in texts])
+
+
+def write_questions(path, questions) -> str:
+    """把 (问题ID, 问题, 分类) 写成 YAML 问题文件"""
+    data = {"questions": [
+        {"id": qid, "question": text, "type": "open", "category": category, "keywords": []}
+        for qid, text, category in questions
+    ]}
+    path.write_text(yaml.safe_dump(data, allow_unicode=True), encoding="utf-8")
+    return str(path)
+
+
+SAMPLE_QUESTIONS = [
+    (1, "您最近的身体状况如何？", "基础健康"),
+    (2, "您平时的睡眠质量怎么样？", "生活习惯"),
+    (3, "您晚上几点睡觉？早上几点起床？", "生活习惯"),
+    (4, "您每周运动几次？", "生活习惯"),
+    (5, "您有没有长期服用的药物？", "用药"),
+    (6, "您对目前的治疗满意吗？", "用药"),
+]
+
+
+@pytest.fixture
+def question_file(tmp_path):
+    return write_questions(tmp_path / "questions.yaml", SAMPLE_QUESTIONS)
+
+
+@pytest.fixture
+def make_engine(tmp_path):
+    """创建并加载 FakeEngine（默认 numpy 后端，索引写在临时目录）"""
+    engines = []
+
+    def make(question_file, **kwargs):
+        kwargs.setdefault("vector_backend", "numpy")
+        kwargs.setdefault("persist_directory", str(tmp_path / "index"))
+        engine = FakeEngine(question_file, **kwargs)
+        assert engine.load_and_index_questions()
+        engines.append(engine)
+        return engine
+
+    yield make
+    for engine in engines:
+        engine.stop_hot_reload()
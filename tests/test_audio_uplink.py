@@ -0,0 +1,149 @@
+"""
+音频上行测试：FrameCoalescer 的帧边界（跨块切分、数据顺序不变）、最大等待时间、停止时 flush，
+以及阻塞式 / 异步上行循环
+"""
+
+import asyncio
+import base64
+import json
+import queue
+
+import pytest
+
+from src.utils.audio_uplink import FrameCoalescer, append_event, iter_frames, aiter_frames
+
+# 20ms 一块（24kHz PCM16）
+CHUNK_BYTES = 960
+
+
+def chunks(n, size=CHUNK_BYTES):
+    """内容各不相同的录音块，便于检查合并后的字节顺序"""
+    return [bytes([i % 251]) * size for i in range(n)]
+
+
+def test_frame_boundaries():
+    """100ms 一帧 = 5 块；第 5 块到达时正好凑满一帧"""
+    coalescer = FrameCoalescer(frame_ms=100, max_latency_ms=1000)
+    assert coalescer.frame_bytes == 5 * CHUNK_BYTES
+    data = chunks(12)
+
+    frames = []
+    for i, chunk in enumerate(data):
+        out = coalescer.push(chunk, now=i * 0.02)
+        assert [len(frame) for frame in out] == ([coalescer.frame_bytes] if i in (4, 9) else [])
+        frames += out
+    assert coalescer.pending_bytes == 2 * CHUNK_BYTES
+    frames.append(coalescer.flush())
+    assert coalescer.flush() is None
+    assert b"".join(frames) == b"".join(data)
+
+
+def test_chunks_straddling_frame_boundary():
+    """块大小不整除帧大小：超出的部分留到下一帧，等待时间从这一块到达时重新计算"""
+    coalescer = FrameCoalescer(frame_ms=10, max_latency_ms=50)  # 480 字节一帧
+    data = chunks(3, size=700)
+
+    out = coalescer.push(data[0], now=0.0)
+    assert [len(frame) for frame in out] == [480]
+    assert coalescer.pending_bytes == 220
+    assert coalescer.timeout(now=0.0) == pytest.approx(0.05)
+
+    out += coalescer.push(data[1], now=0.03)
+    out += coalescer.push(data[2], now=0.06)
+    # 剩余数据在 0.06 到达，0.1 时还没到期
+    assert coalescer.timeout(now=0.1) == pytest.approx(0.01)
+    assert all(len(frame) == 480 for frame in out)
+    out.append(coalescer.flush())
+    assert b"".join(out) == b"".join(data)
+    # 帧总是整数个采样
+    assert all(len(frame) % 2 == 0 for frame in out)
+
+
+def test_max_latency_flush():
+    """缓冲中最早的数据等待超过 max_latency_ms 时不足一帧也发送"""
+    coalescer = FrameCoalescer(frame_ms=100, max_latency_ms=60)
+    assert coalescer.timeout() is None
+    assert coalescer.push(chunks(1)[0], now=0.0) == []
+    assert coalescer.flush_due(now=0.05) is None
+    assert coalescer.timeout(now=0.05) == pytest.approx(0.01)
+
+    # 第 4 块到达时（60ms）最早的数据已经等够了
+    out = []
+    for i, chunk in enumerate(chunks(3), start=1):
+        out += coalescer.push(chunk, now=i * 0.02)
+    assert [len(frame) for frame in out] == [4 * CHUNK_BYTES]
+    assert coalescer.pending_bytes == 0
+
+    coalescer.push(chunks(1)[0], now=1.0)
+    assert len(coalescer.flush_due(now=1.06)) == CHUNK_BYTES
+
+    stats = coalescer.stats()
+    assert stats["latency_flushes"] == 2 and stats["frames_out"] == 2 and stats["chunks_in"] == 5
+    assert stats["avg_frame_ms"] == pytest.approx(50)
+
+
+def test_invalid_arguments_and_empty_chunks():
+    with pytest.raises(ValueError):
+        FrameCoalescer(frame_ms=0)
+    with pytest.raises(ValueError):
+        FrameCoalescer(max_latency_ms=0)
+    coalescer = FrameCoalescer()
+    assert coalescer.push(b"") == []
+    assert coalescer.stats()["chunks_in"] == 0
+
+
+def test_append_event_matches_json():
+    pcm = bytes(range(256)) * 3
+    assert json.loads(append_event(pcm)) == {
+        "type": "input_audio_buffer.append", "audio": base64.b64encode(pcm).decode("ascii")
+    }
+
+
+def test_iter_frames_flushes_on_stop():
+    """阻塞式上行：凑满的帧立即发送，停止后发送缓冲中剩余的数据"""
+    recorded = queue.Queue()
+    data = chunks(7)
+    for chunk in data:
+        recorded.put(chunk)
+    timeouts = []
+
+    def get_chunk(timeout):
+        timeouts.append(timeout)
+        try:
+            return recorded.get(timeout=0.01)
+        except queue.Empty:
+            return None
+
+    coalescer = FrameCoalescer(frame_ms=100, max_latency_ms=10_000)
+    frames = list(iter_frames(get_chunk, coalescer, running=lambda: not recorded.empty(), idle_timeout=0.5))
+    assert [len(frame) for frame in frames] == [5 * CHUNK_BYTES, 2 * CHUNK_BYTES]
+    assert b"".join(frames) == b"".join(data)
+    # 缓冲为空时按 idle_timeout 等待，有缓冲数据时按剩余等待时间
+    assert timeouts[0] == 0.5 and all(t < 10 for t in timeouts[1:])
+
+
+def test_aiter_frames_latency_and_stop():
+    """异步上行：等待超时时发送不足一帧的数据；取到 None 时发送剩余数据后结束"""
+    async def scenario():
+        recorded = asyncio.Queue()
+        coalescer = FrameCoalescer(frame_ms=100, max_latency_ms=30)
+        frames = []
+
+        async def consume():
+            async for frame in aiter_frames(recorded, coalescer):
+                frames.append(frame)
+
+        task = asyncio.create_task(consume())
+        data = chunks(3)
+        await recorded.put(data[0])
+        await asyncio.sleep(0.1)
+        assert frames == [data[0]]  # 等待超时后单独发送
+
+        await recorded.put(data[1])
+        await recorded.put(data[2])
+        await recorded.put(None)
+        await task
+        return frames, data
+
+    frames, data = asyncio.run(scenario())
+    assert frames == [data[0], data[1] + data[2]]
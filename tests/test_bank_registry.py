@@ -0,0 +1,138 @@
+"""
+多问题库注册表测试：
+- 第一次 get() 才加载，之后命中；并发 get() 同一个问题库只加载一次
+- 估算内存超过上限时按最近最少使用卸载（刚加载的除外），卸载时停止热更新
+- 默认工厂使用进程内的 numpy 后端，估算内存不为 0，内存上限真正生效
+"""
+
+import threading
+import time
+
+import pytest
+
+from src.core import bank_registry
+from src.core.bank_registry import QuestionBankRegistry
+
+from conftest import FakeEngine, SAMPLE_QUESTIONS, write_questions
+
+
+class StubEngine:
+    def __init__(self, name, memory_mb=10.0, load_delay=0.0, fails=False):
+        self.name = name
+        self.questions = []
+        self._memory_mb = memory_mb
+        self._load_delay = load_delay
+        self._fails = fails
+        self.hot_reload_stopped = False
+
+    def load_and_index_questions(self):
+        time.sleep(self._load_delay)
+        return not self._fails
+
+    def memory_mb(self):
+        return self._memory_mb
+
+    def new_session(self, session_id=None):
+        return (self.name, session_id)
+
+    def stop_hot_reload(self):
+        self.hot_reload_stopped = True
+
+
+def make_registry(max_memory_mb=0, **engine_options):
+    created = []
+
+    def factory(name, question_file):
+        engine = StubEngine(name, **engine_options.get(name, {}))
+        created.append(engine)
+        return engine
+
+    registry = QuestionBankRegistry(max_memory_mb=max_memory_mb, engine_factory=factory)
+    registry.register_files(["banks/a.yaml", "banks/b.yaml", "examples/c.yaml"])
+    return registry, created
+
+
+def test_lazy_loading_and_hits():
+    registry, created = make_registry()
+    assert registry.names() == ["a", "b", "c"]
+    assert created == [] and not registry.is_loaded("a")
+
+    engine = registry.get("a")
+    assert [e.name for e in created] == ["a"]
+    assert registry.get("a") is engine
+    assert registry.new_session("a", "call-1") == ("a", "call-1")
+    assert len(created) == 1
+
+    stats = registry.stats()
+    assert stats["loads"] == 1 and stats["misses"] == 1 and stats["hits"] == 2
+    assert stats["banks"]["a"]["loaded"] and not stats["banks"]["b"]["loaded"]
+
+    with pytest.raises(KeyError):
+        registry.get("unknown")
+
+
+def test_concurrent_get_loads_once():
+    registry, created = make_registry(a={"load_delay": 0.05})
+    engines = []
+    threads = [threading.Thread(target=lambda: engines.append(registry.get("a"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) == 1
+    assert all(engine is created[0] for engine in engines)
+
+
+def test_load_failure_not_cached():
+    registry, created = make_registry(a={"fails": True})
+    with pytest.raises(RuntimeError):
+        registry.get("a")
+    assert not registry.is_loaded("a")
+    assert registry.stats()["load_failures"] == 1
+    with pytest.raises(RuntimeError):
+        registry.get("a")
+    assert len(created) == 2
+
+
+def test_memory_cap_evicts_least_recently_used():
+    registry, created = make_registry(max_memory_mb=25)
+    a = registry.get("a")
+    registry.get("b")
+    registry.get("a")  # b 成为最久未用的
+    c = registry.get("c")
+
+    assert registry.stats()["loaded"] == ["a", "c"]
+    assert registry.memory_mb() == 20
+    assert [e.hot_reload_stopped for e in created] == [False, True, False]
+    assert registry.stats()["evictions"] == 1
+    assert registry.stats()["events"][-1]["event"] == "evict"
+
+    # 卸载后再次使用时重新加载，又挤掉最久未用的 a
+    registry.get("c")
+    registry.get("b")
+    assert registry.stats()["loaded"] == ["c", "b"]
+    assert registry.get("c") is c and registry.get("a") is not a
+
+
+def test_bank_larger_than_cap_stays_loaded():
+    """单个问题库超过上限时卸载其他问题库，但保留刚加载的"""
+    registry, _ = make_registry(max_memory_mb=25, c={"memory_mb": 40})
+    registry.get("a")
+    registry.get("c")
+    assert registry.stats()["loaded"] == ["c"]
+
+
+def test_default_factory_uses_numpy_backend(tmp_path, monkeypatch):
+    """默认工厂：每个问题库一个集合、numpy 后端；估算内存来自实际的向量矩阵"""
+    monkeypatch.setattr(bank_registry, "QuestionRAG", FakeEngine)
+    files = [write_questions(tmp_path / f"{name}.yaml", SAMPLE_QUESTIONS) for name in ("a", "b", "c")]
+    registry = QuestionBankRegistry(max_memory_mb=1e-6, persist_directory=str(tmp_path / "index"),
+                                    use_snapshot=False)
+    registry.register_files(files)
+
+    a = registry.get("a")
+    assert a.vector_backend == "numpy" and a.collection_name == "a"
+    assert a.memory_mb() > 0
+    registry.get("b")
+    assert registry.stats()["loaded"] == ["b"]
+    assert registry.stats()["evictions"] == 1
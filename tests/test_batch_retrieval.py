@@ -0,0 +1,73 @@
+"""
+批量检索测试：retrieve_next_questions_batch 与逐条检索（search_next_question / backend.query）结果一致，
+每个上下文使用各自的已提问集合，不修改引擎的已提问记录
+"""
+
+import numpy as np
+import pytest
+
+from conftest import write_questions
+
+TOPICS = ["睡眠", "运动", "饮食", "吸烟", "饮酒", "用药", "血压", "体重", "情绪", "工作"]
+
+CONTEXTS = [
+    "我最近睡眠不好，晚上总是醒",
+    "每周跑步三次，偶尔游泳",
+    "平时吃得比较清淡",
+    "我在吃降压药，血压控制得还行",
+    "工作压力大，情绪有点低落",
+    "开始健康咨询访谈",
+]
+
+
+@pytest.fixture
+def bank_file(tmp_path):
+    questions = []
+    for i, topic in enumerate(TOPICS):
+        questions.append((2 * i + 1, f"您的{topic}情况怎么样？", topic))
+        questions.append((2 * i + 2, f"关于{topic}，最近有什么变化吗？", topic))
+    return write_questions(tmp_path / "batch.yaml", questions)
+
+
+@pytest.mark.parametrize("backend", ["numpy", "compressed", "hierarchical"])
+def test_batch_matches_single_queries(bank_file, make_engine, backend):
+    engine = make_engine(bank_file, vector_backend=backend, use_snapshot=False)
+    asked_sets = [set(), {1, 2}, None, {7, 11, 12}, set(range(1, 19)), {3}]
+
+    results = engine.retrieve_next_questions_batch(CONTEXTS, asked_sets, n_results=3)
+    assert len(results) == len(CONTEXTS)
+    for context, asked, candidates in zip(CONTEXTS, asked_sets, results):
+        hits = engine.backend.query(engine._get_query_embedding(context), n_results=3, exclude_ids=asked)
+        assert [q.id for q, _score in candidates] == [metadata["id"] for metadata, _score in hits]
+        assert np.allclose([score for _q, score in candidates], [score for _m, score in hits], atol=1e-5)
+        assert not {q.id for q, _score in candidates} & (asked or set())
+
+        single = engine.search_next_question(context, n_results=3, exclude_ids=asked)
+        assert candidates[0][0] is single
+
+    # 只剩两个未提问的问题
+    assert len(results[4]) == 2
+
+
+def test_batch_query_embeddings_match_single(bank_file, make_engine):
+    """批量向量化（去重、经过缓存）与逐条向量化的结果相同"""
+    engine = make_engine(bank_file, use_snapshot=False)
+    batch = engine._get_query_embeddings(CONTEXTS + CONTEXTS[:2])
+    engine.query_cache.clear()
+    single = np.stack([engine._get_query_embedding(context) for context in CONTEXTS + CONTEXTS[:2]])
+    assert np.allclose(batch, single)
+
+
+def test_batch_does_not_touch_engine_state(bank_file, make_engine):
+    engine = make_engine(bank_file, use_snapshot=False)
+    engine.mark_question_asked(1)
+    engine.retrieve_next_questions_batch(CONTEXTS, [{2, 3}] * len(CONTEXTS))
+    assert engine.asked_question_ids == {1}
+
+    # 没有 asked_sets 时不排除任何问题（包括默认会话已提问的）
+    results = engine.retrieve_next_questions_batch(["您的睡眠情况怎么样？"], n_results=1)
+    assert results[0][0][0].id == 1
+
+    assert engine.retrieve_next_questions_batch([]) == []
+    with pytest.raises(ValueError):
+        engine.retrieve_next_questions_batch(CONTEXTS, [set()])
@@ -0,0 +1,133 @@
+"""
+压缩索引测试：int8 量化误差、候选用全精度向量精排后的顺序、分批写入只在 prepare() 时压缩一次、重新加载
+"""
+
+import os
+
+import numpy as np
+
+from src.core.compressed_index import CompressedVectorBackend, quantize_int8, exact_top_k
+
+
+DIM = 64
+
+
+def bank_vectors(n, seed=0):
+    """集中在 16 维子空间的随机向量（接近真实句向量）"""
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal((n, 16)) @ rng.standard_normal((16, DIM))).astype(np.float32)
+
+
+def upsert(backend, vectors, start=0):
+    ids = list(range(start, start + len(vectors)))
+    backend.upsert(
+        ids=[f"q_{i}" for i in ids],
+        embeddings=vectors,
+        documents=[f"问题 {i}" for i in ids],
+        metadatas=[{"id": i} for i in ids]
+    )
+
+
+def hit_ids(hits):
+    return [metadata["id"] for metadata, _score in hits]
+
+
+def count_compressions(monkeypatch, backend):
+    calls = []
+    compress = backend._compress
+    monkeypatch.setattr(backend, "_compress", lambda: (calls.append(1), compress())[1])
+    return calls
+
+
+def test_quantize_int8_round_trip():
+    """反量化误差不超过半个量化步长；每行最大值映射到 ±127；全零行不除零"""
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((20, DIM)).astype(np.float32)
+    vectors[3] = 0.0
+    codes, scales = quantize_int8(vectors)
+    assert codes.dtype == np.int8 and scales.dtype == np.float32
+    restored = codes.astype(np.float32) * scales[:, None]
+    assert np.all(np.abs(restored - vectors) <= scales[:, None] / 2 + 1e-6)
+    assert np.all(np.abs(codes[np.arange(20) != 3]).max(axis=1) == 127)
+    assert not codes[3].any()
+
+
+def test_rescore_orders_by_full_precision():
+    """精排：返回的分数是全精度余弦相似度，按从高到低排列，与暴力检索的 top-k 一致"""
+    vectors = bank_vectors(300)
+    backend = CompressedVectorBackend(dims=16, rerank_factor=8)
+    upsert(backend, vectors)
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    for query in bank_vectors(5, seed=1):
+        hits = backend.query(query, n_results=5)
+        scores = [score for _metadata, score in hits]
+        assert scores == sorted(scores, reverse=True)
+        expected = normalized[hit_ids(hits)] @ (query / np.linalg.norm(query))
+        assert np.allclose(scores, expected, atol=1e-5)
+        assert hit_ids(hits) == exact_top_k(normalized, query[None, :], 5)[0].tolist()
+
+    # 排除的问题不会出现在精排结果中
+    query = bank_vectors(1, seed=1)[0]
+    top = hit_ids(backend.query(query, n_results=3))
+    assert not set(top) & set(hit_ids(backend.query(query, n_results=3, exclude_ids=set(top))))
+
+
+def test_bulk_write_compresses_once_on_prepare(tmp_path, monkeypatch):
+    """分批写入不压缩、不估算 recall；prepare() 压缩一次并保存编码和压缩统计"""
+    persist_path = str(tmp_path / "bank.cidx")
+    backend = CompressedVectorBackend(persist_path=persist_path, dims=16)
+    compressions = count_compressions(monkeypatch, backend)
+    vectors = bank_vectors(400)
+
+    with backend.bulk_write():
+        for start in range(0, len(vectors), 100):
+            upsert(backend, vectors[start:start + 100], start)
+    assert compressions == []
+    assert not os.path.exists(os.path.join(persist_path, "codes.npy"))
+    assert "compression" not in backend.get_metadata()
+
+    backend.prepare()
+    backend.prepare()
+    assert compressions == [1]
+    assert os.path.exists(os.path.join(persist_path, "codes.npy"))
+    report = backend.get_metadata()["compression"]
+    assert report["dims"] == 16 and report["original_dims"] == DIM
+    assert 0.0 < report["recall@10"] <= 1.0
+
+    # 之后的写入让编码和统计失效
+    upsert(backend, bank_vectors(1, seed=2), 400)
+    assert "compression" not in backend.get_metadata()
+    assert not os.path.exists(os.path.join(persist_path, "codes.npy"))
+
+
+def test_reload_uses_saved_codes(tmp_path, monkeypatch):
+    """重新打开已压缩的索引：直接加载编码，不重新拟合，检索结果与保存前一致"""
+    persist_path = str(tmp_path / "bank.cidx")
+    backend = CompressedVectorBackend(persist_path=persist_path, dims=16)
+    upsert(backend, bank_vectors(200))
+    backend.prepare()
+    queries = bank_vectors(5, seed=1)
+    before = backend.query_batch(queries, n_results=5)
+
+    reopened = CompressedVectorBackend(persist_path=persist_path, dims=16)
+    compressions = count_compressions(monkeypatch, reopened)
+    assert reopened.count() == 200
+    assert np.array_equal(reopened._codes, backend._codes)
+    assert reopened.get_metadata()["compression"] == backend.get_metadata()["compression"]
+    after = reopened.query_batch(queries, n_results=5)
+    assert [hit_ids(hits) for hits in after] == [hit_ids(hits) for hits in before]
+    assert compressions == []
+
+
+def test_reload_before_prepare_compresses_lazily(tmp_path):
+    """写入后没有 prepare() 的索引：第一次检索时在内存中压缩"""
+    persist_path = str(tmp_path / "bank.cidx")
+    vectors = bank_vectors(100)
+    upsert(CompressedVectorBackend(persist_path=persist_path, dims=16), vectors)
+
+    reopened = CompressedVectorBackend(persist_path=persist_path, dims=16)
+    assert reopened._codes is None
+    query = vectors[7]
+    assert hit_ids(reopened.query(query, n_results=1)) == [7]
+    assert reopened._codes is not None
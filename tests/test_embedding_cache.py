@@ -0,0 +1,161 @@
+"""
+嵌入缓存测试：命中 / 未命中、多个问题库（进程）共享缓存、按分片 LRU 淘汰、
+bulk_write() 中多批写入只生成一个分片并只更新一次索引、小分片合并
+"""
+
+import os
+
+import numpy as np
+
+from src.core import embedding_cache
+from src.core.embedding_cache import EmbeddingCache
+
+DIM = 8
+MODEL = "test-model"
+
+
+class CountingEncoder:
+    """确定性的假模型：记录每次被要求向量化的文本"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return np.stack([vector_of(text) for text in texts])
+
+
+def vector_of(text):
+    rng = np.random.default_rng(sum(map(ord, text)))
+    return rng.standard_normal(DIM).astype(np.float32)
+
+
+def shard_files(cache):
+    return sorted(os.listdir(cache.shard_dir))
+
+
+def count_index_writes(monkeypatch, cache):
+    writes = []
+    write_index = cache._write_index
+    monkeypatch.setattr(cache, "_write_index", lambda: (writes.append(1), write_index())[1])
+    return writes
+
+
+def test_hits_and_misses(tmp_path):
+    """只向量化未命中的文本；返回顺序与输入一致；文本规范化后相同视为同一条"""
+    cache = EmbeddingCache(str(tmp_path))
+    encode = CountingEncoder()
+
+    first = cache.encode(MODEL, ["你好", "再见"], encode)
+    assert encode.calls == [["你好", "再见"]]
+    assert (cache.hits, cache.misses) == (0, 2)
+
+    second = cache.encode(MODEL, ["再见", "新问题", " 你好 "], encode)
+    assert encode.calls[1:] == [["新问题"]]
+    assert (cache.hits, cache.misses) == (2, 3)
+    assert np.array_equal(second[0], first[1])
+    assert np.array_equal(second[2], first[0])
+    assert np.array_equal(second[1], vector_of("新问题"))
+
+
+def test_shared_between_instances_and_keyed_by_model(tmp_path):
+    """另一个问题库（或进程）打开同一目录时直接命中；换模型不命中"""
+    texts = ["问题一", "问题二", "问题三"]
+    EmbeddingCache(str(tmp_path)).encode(MODEL, texts, CountingEncoder())
+
+    other = EmbeddingCache(str(tmp_path))
+    encode = CountingEncoder()
+    vectors = other.encode(MODEL, texts[1:], encode)
+    assert encode.calls == []
+    assert other.hits == 2
+    assert np.array_equal(vectors, np.stack([vector_of(text) for text in texts[1:]]))
+
+    other.encode("other-model", texts[:1], encode)
+    assert encode.calls == [texts[:1]]
+
+
+def test_lru_eviction_by_shard(tmp_path):
+    """超过上限时淘汰最久没有读取过的分片，最近读取过的保留"""
+    cache = EmbeddingCache(str(tmp_path))
+    encode = CountingEncoder()
+    for name in ["a", "b", "c"]:
+        cache.encode(MODEL, [f"{name}-{i}" for i in range(4)], encode)
+    shard_bytes = max(info["nbytes"] for info in cache._index["shards"].values())
+
+    # 读取最早的 a 分片，让 b 成为最久未用的
+    cache.encode(MODEL, ["a-0"], encode)
+    cache.max_bytes = 3 * shard_bytes
+    cache.encode(MODEL, [f"d-{i}" for i in range(4)], encode)
+    assert len(shard_files(cache)) == 3
+
+    encode.calls.clear()
+    reopened = EmbeddingCache(str(tmp_path))
+    reopened.encode(MODEL, ["a-1", "b-1", "c-1", "d-1"], encode)
+    assert encode.calls == [["b-1"]]
+
+
+def test_bulk_write_flushes_once(tmp_path, monkeypatch):
+    """bulk_write() 中分批 encode：未写出的向量也能命中，结束时只写一个分片、更新一次索引"""
+    cache = EmbeddingCache(str(tmp_path))
+    writes = count_index_writes(monkeypatch, cache)
+    encode = CountingEncoder()
+
+    with cache.bulk_write():
+        for start in range(0, 40, 10):
+            cache.encode(MODEL, [f"q-{i}" for i in range(start, start + 10)], encode)
+        cache.encode(MODEL, ["q-3", "q-33"], encode)
+        assert writes == [] and shard_files(cache) == []
+    assert len(encode.calls) == 4
+    assert writes == [1]
+    assert len(shard_files(cache)) == 1
+
+    reopened = EmbeddingCache(str(tmp_path))
+    encode = CountingEncoder()
+    vectors = reopened.encode(MODEL, [f"q-{i}" for i in range(40)], encode)
+    assert encode.calls == []
+    assert np.array_equal(vectors[17], vector_of("q-17"))
+
+
+def test_bulk_write_flushes_on_error(tmp_path):
+    """批量写入中途出错：已经向量化的部分仍然写入缓存"""
+    cache = EmbeddingCache(str(tmp_path))
+    try:
+        with cache.bulk_write():
+            cache.encode(MODEL, ["q-1", "q-2"], CountingEncoder())
+            raise RuntimeError("同步中断")
+    except RuntimeError:
+        pass
+
+    encode = CountingEncoder()
+    EmbeddingCache(str(tmp_path)).encode(MODEL, ["q-1", "q-2"], encode)
+    assert encode.calls == []
+
+
+def test_bulk_write_row_limit(tmp_path, monkeypatch):
+    """累积行数达到 BULK_FLUSH_ROWS 时提前写出一个分片（按整批累积）"""
+    monkeypatch.setattr(embedding_cache, "BULK_FLUSH_ROWS", 8)
+    cache = EmbeddingCache(str(tmp_path))
+    with cache.bulk_write():
+        for start in range(0, 20, 5):
+            cache.encode(MODEL, [f"q-{i}" for i in range(start, start + 5)], CountingEncoder())
+    assert sorted(info["rows"] for info in cache._index["shards"].values()) == [10, 10]
+
+
+def test_small_shards_compacted(tmp_path, monkeypatch):
+    """同一模型的小分片超过上限时合并成一个，合并后仍然全部命中"""
+    monkeypatch.setattr(embedding_cache, "COMPACT_MAX_SMALL_SHARDS", 4)
+    cache = EmbeddingCache(str(tmp_path))
+    for i in range(4):
+        cache.encode(MODEL, [f"q-{i}"], CountingEncoder())
+    cache.encode("other-model", ["q-0"], CountingEncoder())
+    assert len(shard_files(cache)) == 5
+
+    cache.encode(MODEL, ["q-4"], CountingEncoder())
+    assert len(shard_files(cache)) == 2
+    rows = {info["model"]: info["rows"] for info in cache._index["shards"].values()}
+    assert rows == {MODEL: 5, "other-model": 1}
+
+    encode = CountingEncoder()
+    vectors = EmbeddingCache(str(tmp_path)).encode(MODEL, [f"q-{i}" for i in range(5)], encode)
+    assert encode.calls == []
+    assert np.array_equal(vectors, np.stack([vector_of(f"q-{i}") for i in range(5)]))
@@ -0,0 +1,148 @@
+"""
+分层检索测试：
+- 查询落在某个类别附近时，只检索少数类别的 top-k 与全量暴力检索一致（recall）
+- 排除已提问问题后候选不足、质心相似度过低时回退到全量检索
+- 过大的类别切分为子簇；分组后矩阵重排不影响按 ID 排除
+"""
+
+import numpy as np
+import pytest
+
+from src.core.hierarchical_index import HierarchicalVectorBackend, build_groups, parse_hierarchical_spec
+from src.core.vector_backend import NumpyVectorBackend
+
+DIM = 32
+N_CATEGORIES = 12
+PER_CATEGORY = 60
+
+
+def clustered_bank(seed=0):
+    """每个类别围绕一个随机中心，类别之间区分明显（接近真实问卷：同类问题语义相近）"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((N_CATEGORIES, DIM)).astype(np.float32)
+    vectors, categories = [], []
+    for c, center in enumerate(centers):
+        vectors.append(center + 0.35 * rng.standard_normal((PER_CATEGORY, DIM)).astype(np.float32))
+        categories += [f"类别{c}"] * PER_CATEGORY
+    return np.concatenate(vectors), categories, centers
+
+
+def fill(backend, vectors, categories):
+    n = len(vectors)
+    backend.upsert(
+        ids=[f"q_{i}" for i in range(n)],
+        embeddings=vectors,
+        documents=[f"问题 {i}" for i in range(n)],
+        metadatas=[{"id": i, "category": categories[i]} for i in range(n)]
+    )
+    backend.prepare()
+    return backend
+
+
+def hit_ids(hits):
+    return [metadata["id"] for metadata, _score in hits]
+
+
+@pytest.fixture(scope="module")
+def bank():
+    vectors, categories, centers = clustered_bank()
+    flat = fill(NumpyVectorBackend(), vectors, categories)
+    return vectors, categories, centers, flat
+
+
+def make_hierarchical(vectors, categories, **kwargs):
+    kwargs.setdefault("min_flat_rows", 100)
+    return fill(HierarchicalVectorBackend(**kwargs), vectors, categories)
+
+
+def test_recall_matches_brute_force(bank):
+    """查询接近某个类别时，top-10 与暴力检索的重合率不低于 0.95，返回的是精确的余弦相似度"""
+    vectors, categories, centers, flat = bank
+    backend = make_hierarchical(vectors, categories, n_probe=2)
+    rng = np.random.default_rng(1)
+
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    overlap = []
+    for center in centers:
+        for _ in range(5):
+            query = center + 0.3 * rng.standard_normal(DIM).astype(np.float32)
+            expected = flat.query(query, n_results=10)
+            hits = backend.query(query, n_results=10)
+            overlap.append(len(set(hit_ids(hits)) & set(hit_ids(expected))) / 10)
+            scores = normalized[hit_ids(hits)] @ (query / np.linalg.norm(query))
+            assert np.allclose([score for _metadata, score in hits], scores, atol=1e-5)
+
+    assert np.mean(overlap) >= 0.95
+    stats = backend.stats()
+    assert stats["hierarchical_queries"] == len(overlap) and stats["flat_queries"] == 0
+    # 每次只给 2 个类别打分
+    assert stats["avg_candidates"] == 2 * PER_CATEGORY
+
+
+def test_probe_all_groups_equals_flat(bank):
+    vectors, categories, centers, flat = bank
+    backend = make_hierarchical(vectors, categories, n_probe=N_CATEGORIES)
+    query = centers[3]
+    assert hit_ids(backend.query(query, n_results=5)) == hit_ids(flat.query(query, n_results=5))
+    assert backend.stats()["flat_queries"] == 1
+
+
+def test_exclusion_and_fallback_when_category_exhausted(bank):
+    """排除已提问的问题；选中类别剩下的问题不够时回退到全量检索"""
+    vectors, categories, centers, flat = bank
+    backend = make_hierarchical(vectors, categories, n_probe=1)
+    query = centers[0]
+
+    top = hit_ids(backend.query(query, n_results=5))
+    assert all(categories[i] == "类别0" for i in top)
+    hits = backend.query(query, n_results=5, exclude_ids=set(top))
+    assert not set(hit_ids(hits)) & set(top)
+    assert backend.stats()["flat_queries"] == 0
+
+    category_ids = {i for i in range(len(vectors)) if categories[i] == "类别0"}
+    exhausted = category_ids - {min(category_ids)}
+    hits = backend.query(query, n_results=3, exclude_ids=exhausted)
+    assert hit_ids(hits) == hit_ids(flat.query(query, n_results=3, exclude_ids=exhausted))
+    assert backend.stats()["flat_queries"] == 1
+
+
+def test_fallback_score(bank):
+    """查询与所有质心都不相似时回退到全量检索"""
+    vectors, categories, _centers, flat = bank
+    backend = make_hierarchical(vectors, categories, n_probe=2, fallback_score=0.99)
+    query = np.random.default_rng(2).standard_normal(DIM).astype(np.float32)
+    assert hit_ids(backend.query(query, n_results=5)) == hit_ids(flat.query(query, n_results=5))
+    assert backend.stats()["flat_queries"] == 1
+
+
+def test_small_bank_uses_flat_search(bank):
+    vectors, categories, centers, flat = bank
+    backend = make_hierarchical(vectors, categories, min_flat_rows=len(vectors) + 1)
+    results = backend.query_batch(centers[:3], n_results=4)
+    assert [hit_ids(hits) for hits in results] == [hit_ids(hits) for hits in flat.query_batch(centers[:3], 4)]
+    assert backend.stats()["groups"] is None
+
+
+def test_large_categories_split_into_subclusters(bank):
+    vectors, categories, _centers, _flat = bank
+    labels, groups, centroids = build_groups(vectors, categories, max_group_size=25)
+    assert len(labels) == len(groups) == len(centroids)
+    assert all(label.split("#")[0] in set(categories) for label in labels)
+    assert sorted(np.concatenate(groups).tolist()) == list(range(len(vectors)))
+    assert all(len({categories[row] for row in rows}) == 1 for rows in groups)
+    assert np.allclose(np.linalg.norm(centroids, axis=1), 1.0, atol=1e-5)
+
+    backend = make_hierarchical(vectors, categories, max_group_size=25)
+    assert backend.stats()["groups"] == len(labels)
+    # 重排后按 ID 排除仍然正确
+    top = hit_ids(backend.query(vectors[7], n_results=3))
+    assert top[0] == 7
+    assert 7 not in hit_ids(backend.query(vectors[7], n_results=3, exclude_ids={7}))
+
+
+def test_parse_spec():
+    assert parse_hierarchical_spec("hierarchical") == {}
+    assert parse_hierarchical_spec("hierarchical:5") == {"n_probe": 5}
+    with pytest.raises(ValueError):
+        parse_hierarchical_spec("hierarchical:0")
@@ -0,0 +1,127 @@
+"""
+问题库热更新测试：
+- 进行中的访谈继续使用开始时的版本（问题库和向量索引都不变），新会话和重置后的会话使用新版本
+- 重新加载时有会话并发检索：不出错，结果只来自会话固定的版本
+- 增量同步只向量化新增或修改的问题；加载失败时保留当前版本；FileWatcher 检测到修改后自动切换
+"""
+
+import threading
+import time
+
+import pytest
+
+from conftest import FakeEngine, SAMPLE_QUESTIONS, write_questions
+
+# 删除问题 2，修改问题 3，新增问题 7
+UPDATED_QUESTIONS = [
+    (1, "您最近的身体状况如何？", "基础健康"),
+    (3, "您一般几点入睡？", "生活习惯"),
+    (4, "您每周运动几次？", "生活习惯"),
+    (5, "您有没有长期服用的药物？", "用药"),
+    (6, "您对目前的治疗满意吗？", "用药"),
+    (7, "您家里有人吸烟吗？", "生活习惯"),
+]
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "等待超时"
+        time.sleep(0.02)
+
+
+def test_active_session_keeps_its_version(tmp_path, question_file, make_engine):
+    engine = make_engine(question_file, use_snapshot=False)
+    session = engine.new_session("call-1")
+    first = session.retrieve_next_question("睡眠质量")
+    session.record_answer(first, "睡得不太好")
+    old_version = session.version
+    old_backend_count = old_version.backend.count()
+
+    write_questions(tmp_path / "questions.yaml", UPDATED_QUESTIONS)
+    engine.encoded_documents.clear()
+    assert engine.reload_questions()
+
+    # 增量同步：只向量化修改的问题 3 和新增的问题 7
+    assert len(engine.encoded_documents) == 2
+    assert engine.version.version == old_version.version + 1
+    assert {q.id for q in engine.bank} == {1, 3, 4, 5, 6, 7}
+
+    # 进行中的访谈：版本、问题库和向量索引都不变
+    assert session.version is old_version
+    assert old_version.backend is not engine.backend
+    assert old_version.backend.count() == old_backend_count
+    assert session.retrieve_next_question("您家里有人吸烟吗").id != 7
+    assert {q.id for q in session.unasked} == {q[0] for q in SAMPLE_QUESTIONS} - {first.id}
+
+    # 新会话使用新版本；重置后的会话也切换到新版本，已提问记录按新问题库重建
+    fresh = engine.new_session("call-2")
+    assert fresh.retrieve_next_question("您家里有人吸烟吗").id == 7
+    session.reset_asked_questions()
+    assert session.version is engine.version
+    assert session.retrieve_next_question("您家里有人吸烟吗").id == 7
+
+
+def test_retrieval_during_reload(tmp_path, question_file, make_engine):
+    """重新加载期间会话持续检索：不抛异常，返回的问题都属于会话开始时的问题库"""
+    engine = make_engine(question_file, use_snapshot=False)
+    session = engine.new_session()
+    session.mark_question_asked(1)
+    pinned = {q.id for q in session.version.bank}
+    errors, returned = [], set()
+    stop = threading.Event()
+
+    def interview():
+        while not stop.is_set():
+            try:
+                question = session.index.search_next_question(
+                    "吸烟 睡眠 运动", exclude_ids=session.asked_question_ids, version=session.version
+                )
+                returned.add(question.id)
+            except Exception as e:
+                errors.append(e)
+
+    thread = threading.Thread(target=interview)
+    thread.start()
+    try:
+        for i in range(5):
+            questions = UPDATED_QUESTIONS + [(100 + i, f"新增问题 {i}：您吸烟多少年了？", "生活习惯")]
+            write_questions(tmp_path / "questions.yaml", questions)
+            assert engine.reload_questions()
+    finally:
+        stop.set()
+        thread.join()
+
+    assert errors == []
+    assert returned and returned <= pinned
+    assert engine.version.version == session.version.version + 5
+
+
+def test_failed_reload_keeps_current_version(tmp_path, question_file, make_engine):
+    engine = make_engine(question_file, use_snapshot=False)
+    current = engine.version
+
+    (tmp_path / "questions.yaml").write_text("questions: []\n", encoding="utf-8")
+    assert not engine.reload_questions()
+    (tmp_path / "questions.yaml").write_text("questions: [", encoding="utf-8")
+    assert not engine.reload_questions()
+    assert engine.version is current
+    assert engine.retrieve_next_question("睡眠质量").id == 2
+
+
+def test_file_watcher_swaps_version(tmp_path, question_file, make_engine):
+    engine = make_engine(question_file, use_snapshot=False)
+    session = engine.new_session()
+    session.mark_question_asked(1)
+    watcher = engine.start_hot_reload(interval=0.02)
+    assert watcher.running
+
+    write_questions(tmp_path / "questions.yaml", UPDATED_QUESTIONS)
+    wait_until(lambda: 7 in engine.bank)
+    assert 7 not in session.version.bank
+    assert engine.new_session().retrieve_next_question("您家里有人吸烟吗").id == 7
+
+
+def test_chroma_rejects_hot_reload(question_file):
+    with pytest.raises(ValueError):
+        FakeEngine(question_file, vector_backend="chroma", hot_reload=True)
@@ -0,0 +1,123 @@
+"""
+增量索引同步测试：按内容哈希对比，只重新向量化新增或变化的问题（内存 numpy 后端 + 桩编码器）
+"""
+
+import hashlib
+from dataclasses import replace
+
+import numpy as np
+
+from src.core.question_bank import Question
+from src.core.vector_backend import NumpyVectorBackend
+from src.core.index_sync import (
+    diff_index, sync_question_index, question_content_hash, question_record_id, build_document,
+)
+
+
+MODEL = "stub-model"
+DIM = 8
+
+
+class StubEncoder:
+    """按文本哈希生成确定的向量，并记录每次被要求向量化的文本"""
+
+    def __init__(self):
+        self.calls = []
+
+    @property
+    def encoded(self):
+        return [text for batch in self.calls for text in batch]
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return np.stack([
+            np.frombuffer(hashlib.sha256(text.encode("utf-8")).digest()[:DIM], dtype=np.uint8).astype(np.float32)
+            for text in texts
+        ])
+
+
+def make_bank(n=5):
+    return [
+        Question(id=i, question=f"问题 {i}", category="测试", keywords=[f"关键词{i}"])
+        for i in range(1, n + 1)
+    ]
+
+
+def hashes_of(questions, model=MODEL):
+    return {question_record_id(q): question_content_hash(q, model) for q in questions}
+
+
+def test_diff_index():
+    """新增、变化、删除、未变四类各自归类"""
+    questions = make_bank(4)
+    existing = hashes_of(questions[:3])
+    existing["q_99"] = "stale"  # 已从问题库删除
+    questions[1] = replace(questions[1], question="改过的问题 2")
+
+    diff = diff_index(existing, questions, MODEL)
+    assert [q.id for q in diff.added] == [4]
+    assert [q.id for q in diff.updated] == [2]
+    assert diff.removed == ["q_99"]
+    assert diff.unchanged == 2
+    assert not diff.is_empty
+
+
+def test_content_hash_covers_fields_and_model():
+    """问题文本、类别、关键词、模型任一变化都会改变哈希；题型不参与向量化，不影响哈希"""
+    question = make_bank(1)[0]
+    base = question_content_hash(question, MODEL)
+    assert question_content_hash(replace(question, question="别的"), MODEL) != base
+    assert question_content_hash(replace(question, category="别的"), MODEL) != base
+    assert question_content_hash(replace(question, keywords=["别的"]), MODEL) != base
+    assert question_content_hash(question, "other-model") != base
+    assert question_content_hash(replace(question, type="yesno"), MODEL) == base
+
+
+def test_sync_embeds_only_changed_questions():
+    backend = NumpyVectorBackend(metadata={"embedding_model": MODEL})
+    questions = make_bank(5)
+
+    encoder = StubEncoder()
+    diff = sync_question_index(backend, questions, MODEL, encoder, batch_size=2)
+    assert len(diff.added) == 5
+    assert backend.count() == 5
+    assert sorted(encoder.encoded) == sorted(build_document(q) for q in questions)
+    assert [len(batch) for batch in encoder.calls] == [2, 2, 1]
+
+    # 没有变化：不调用编码器
+    encoder = StubEncoder()
+    diff = sync_question_index(backend, questions, MODEL, encoder)
+    assert diff.is_empty and diff.unchanged == 5
+    assert encoder.calls == []
+
+    # 修改一个、新增一个、删除一个：只向量化前两者
+    changed = replace(questions[2], keywords=["新关键词"])
+    added = Question(id=6, question="问题 6")
+    updated_bank = questions[:2] + [changed] + questions[3:4] + [added]
+    encoder = StubEncoder()
+    diff = sync_question_index(backend, updated_bank, MODEL, encoder)
+    assert sorted(encoder.encoded) == sorted([build_document(changed), build_document(added)])
+    assert diff.removed == ["q_5"]
+    assert backend.count() == 5
+    assert backend.get_content_hashes() == hashes_of(updated_bank)
+
+    # 检索结果里的元数据已更新
+    query = encoder([build_document(changed)])[0]
+    top, score = backend.query(query, n_results=1)[0]
+    assert top["id"] == 3 and score > 0.999
+
+
+def test_sync_rebuilds_on_model_change():
+    """嵌入模型变化时整体重建（向量维度可能不同）"""
+    backend = NumpyVectorBackend(metadata={"embedding_model": MODEL})
+    questions = make_bank(3)
+    sync_question_index(backend, questions, MODEL, StubEncoder())
+
+    encoder = StubEncoder()
+    diff = sync_question_index(
+        backend, questions, "other-model", encoder, index_metadata={"embedding_model": "other-model"}
+    )
+    assert len(diff.added) == 3
+    assert len(encoder.encoded) == 3
+    assert backend.get_metadata()["embedding_model"] == "other-model"
+    assert backend.count() == 3
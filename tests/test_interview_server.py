@@ -0,0 +1,170 @@
+"""
+异步访谈服务测试（不连接 Realtime API：AsyncInterviewSession 换成由测试控制结束时机的桩会话）：
+- 会话 ID 在排队前登记，进行中 / 排队中的 ID 不能重复使用，结束后释放
+- 并发访谈数不超过 max_sessions，其余排队
+- 访谈异常结束时释放 ID 和名额；close() 卸载问题库
+"""
+
+import asyncio
+
+import pytest
+
+from src.clients import interview_server
+from src.clients.interview_server import InterviewServer, CallAudio
+from src.core.bank_registry import QuestionBankRegistry
+
+
+class StubEngine:
+    def __init__(self, name):
+        self.name = name
+        self.questions = []
+
+    def load_and_index_questions(self):
+        return True
+
+    def memory_mb(self):
+        return 1.0
+
+    def preload_model(self):
+        pass
+
+
+class StubSession:
+    """只记录并发情况的会话：等待 release 事件后按 outcome 结束"""
+
+    running = 0
+    peak = 0
+
+    def __init__(self, server, engine, audio, session_id, bank):
+        self.server = server
+        self.engine = engine
+        self.session_id = session_id
+        self.bank = bank
+        self.release = asyncio.Event()
+        self.outcome = "completed"
+
+    async def run(self):
+        StubSession.running += 1
+        StubSession.peak = max(StubSession.peak, StubSession.running)
+        try:
+            await self.release.wait()
+            if self.outcome == "error":
+                raise RuntimeError("连接中断")
+            return self.summary()
+        finally:
+            StubSession.running -= 1
+
+    def summary(self):
+        return {"session_id": self.session_id, "bank": self.bank, "status": self.outcome}
+
+
+@pytest.fixture
+def make_server(monkeypatch):
+    monkeypatch.setattr(interview_server, "AsyncInterviewSession", StubSession)
+    StubSession.running = StubSession.peak = 0
+
+    def make(max_sessions=10):
+        registry = QuestionBankRegistry(max_memory_mb=0, engine_factory=lambda name, path: StubEngine(name))
+        return InterviewServer("test-key", question_files=["bank_a.yaml", "bank_b.yaml"],
+                               max_sessions=max_sessions, registry=registry)
+
+    return make
+
+
+async def wait_until(predicate, timeout=2.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        assert loop.time() < deadline, "等待超时"
+        await asyncio.sleep(0.01)
+
+
+def test_session_id_reserved_while_running_and_queued(make_server):
+    async def scenario():
+        server = make_server(max_sessions=1)
+        first = asyncio.create_task(server.run_interview(CallAudio(), session_id="call-1"))
+        await wait_until(lambda: "call-1" in server.sessions)
+
+        # 进行中的 ID
+        with pytest.raises(ValueError):
+            await server.run_interview(CallAudio(), session_id="call-1")
+
+        # 排队中的 ID（名额已满，还没有创建会话）
+        queued = asyncio.create_task(server.run_interview(CallAudio(), session_id="call-2"))
+        await wait_until(lambda: "call-2" in server._reserved)
+        assert "call-2" not in server.sessions
+        with pytest.raises(ValueError):
+            await server.run_interview(CallAudio(), session_id="call-2")
+
+        server.sessions["call-1"].release.set()
+        assert (await first)["status"] == "completed"
+        await wait_until(lambda: "call-2" in server.sessions)
+        server.sessions["call-2"].release.set()
+        await queued
+
+        # 结束后可以重新使用
+        assert server._reserved == set()
+        again = asyncio.create_task(server.run_interview(CallAudio(), session_id="call-1"))
+        await wait_until(lambda: "call-1" in server.sessions)
+        server.sessions["call-1"].release.set()
+        assert (await again)["session_id"] == "call-1"
+        await server.close()
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_sessions_capped(make_server):
+    """6 通来电、最多 2 场并发：其余排队，全部完成，各自分配到指定的问题库"""
+    async def scenario():
+        server = make_server(max_sessions=2)
+        banks = ["bank_a", "bank_b"] * 3
+        calls = [asyncio.create_task(server.run_interview(CallAudio(), bank=bank)) for bank in banks]
+
+        finished = 0
+        while finished < len(calls):
+            await wait_until(lambda: len(server.sessions) == min(2, len(calls) - finished))
+            assert server.stats()["active"] <= 2
+            next(iter(server.sessions.values())).release.set()
+            finished += 1
+            await wait_until(lambda: sum(call.done() for call in calls) == finished)
+
+        results = await asyncio.gather(*calls)
+        assert sorted(result["bank"] for result in results) == sorted(banks)
+        assert len({result["session_id"] for result in results}) == len(calls)
+        assert StubSession.peak == 2
+        stats = server.stats()
+        assert stats["peak"] == 2 and stats["started"] == 6
+        assert stats["finished"] == {"completed": 6}
+        assert sorted(stats["banks_loaded"]) == ["bank_a", "bank_b"]
+        await server.close()
+
+    asyncio.run(scenario())
+
+
+def test_failed_session_releases_slot_and_shutdown(make_server):
+    """访谈抛出异常时释放 ID 和并发名额；close() 卸载全部问题库"""
+    async def scenario():
+        server = make_server(max_sessions=1)
+        await server.start()
+        assert sorted(server.registry.stats()["loaded"]) == ["bank_a", "bank_b"]
+
+        failing = asyncio.create_task(server.run_interview(CallAudio(), session_id="call-1"))
+        await wait_until(lambda: "call-1" in server.sessions)
+        session = server.sessions["call-1"]
+        session.outcome = "error"
+        session.release.set()
+        with pytest.raises(RuntimeError):
+            await failing
+        assert server.sessions == {} and server._reserved == set()
+
+        # 名额已归还：下一通来电不必排队
+        nxt = asyncio.create_task(server.run_interview(CallAudio(), session_id="call-1"))
+        await wait_until(lambda: "call-1" in server.sessions)
+        server.sessions["call-1"].release.set()
+        assert (await nxt)["status"] == "completed"
+
+        await server.close()
+        assert server.registry.stats()["loaded"] == []
+        assert server.executor._shutdown
+
+    asyncio.run(scenario())
@@ -0,0 +1,84 @@
+"""
+关键词索引测试：快速通道的阈值（最低分数、领先倍数）和倒数排名融合（RRF）的顺序
+"""
+
+from src.core.question_bank import Question
+from src.core.lexical_index import (
+    LexicalIndex, fast_path_pick, fuse_rankings, FAST_PATH_MIN_SCORE, FAST_PATH_MARGIN,
+)
+
+
+SLEEP, EXERCISE, STRESS, DIET = 1, 2, 3, 4
+
+BANK = [
+    Question(id=SLEEP, question="您平时的睡眠质量怎么样？", keywords=["睡眠", "失眠", "熬夜"]),
+    Question(id=EXERCISE, question="您每周运动几次？", keywords=["运动", "锻炼", "跑步"]),
+    Question(id=STRESS, question="最近工作压力大吗？", keywords=["压力", "加班"]),
+    Question(id=DIET, question="您的饮食习惯是怎样的？", keywords=["饮食", "外卖"]),
+]
+
+
+def test_fast_path_thresholds():
+    """首位必须命中关键词、分数达到下限，并领先第二名 FAST_PATH_MARGIN 倍"""
+    score = FAST_PATH_MIN_SCORE * 2
+    assert fast_path_pick([]) is None
+    assert fast_path_pick([(SLEEP, score, 1)]) == SLEEP
+    # 没有命中关键词（只有字符 n-gram）
+    assert fast_path_pick([(SLEEP, score, 0)]) is None
+    # 分数低于下限
+    assert fast_path_pick([(SLEEP, FAST_PATH_MIN_SCORE - 0.01, 1)]) is None
+    assert fast_path_pick([(SLEEP, FAST_PATH_MIN_SCORE, 1)]) == SLEEP
+    # 领先倍数：恰好达到时通过，差一点时走向量检索
+    second = score / FAST_PATH_MARGIN
+    assert fast_path_pick([(SLEEP, score, 1), (STRESS, second, 1)]) == SLEEP
+    assert fast_path_pick([(SLEEP, score, 1), (STRESS, second * 1.01, 1)]) is None
+    # 自定义阈值
+    assert fast_path_pick([(SLEEP, score, 1)], min_score=score + 1) is None
+    assert fast_path_pick([(SLEEP, score, 1), (STRESS, score * 0.9, 1)], margin=1.05) == SLEEP
+
+
+def test_fast_path_on_bank():
+    """回答强命中一个问题的关键词时走快速通道，同时命中两个问题时不走"""
+    index = LexicalIndex(BANK)
+
+    hits = index.search("我最近睡眠不好，经常失眠", n_results=3)
+    assert hits[0][0] == SLEEP and hits[0][2] == 2
+    assert fast_path_pick(hits) == SLEEP
+
+    # 已提问的问题不再返回，也不会触发快速通道
+    hits = index.search("我最近睡眠不好，经常失眠", n_results=3, exclude_ids={SLEEP})
+    assert SLEEP not in [hit[0] for hit in hits]
+    assert fast_path_pick(hits) is None
+
+    # 两个问题的关键词各命中一个，分数接近，没有明显领先
+    hits = index.search("压力和睡眠", n_results=3)
+    assert {hit[0] for hit in hits[:2]} == {SLEEP, STRESS}
+    assert fast_path_pick(hits) is None
+
+    # 没有命中任何关键词
+    assert fast_path_pick(index.search("今天天气不错", n_results=3)) is None
+
+
+def test_fuse_rankings_weights():
+    """加权倒数排名融合：两边都靠前的问题排在前面，权重为 0 / 1 时退化为单边排名"""
+    vector, lexical = [SLEEP, EXERCISE, STRESS], [STRESS, SLEEP]
+
+    # SLEEP: 0.5/60 + 0.5/61，STRESS: 0.5/62 + 0.5/60，EXERCISE: 0.5/61
+    assert fuse_rankings(vector, lexical, 0.5) == [SLEEP, STRESS, EXERCISE]
+    assert fuse_rankings(vector, lexical, 0.0) == vector
+    assert fuse_rankings(vector, lexical, 1.0) == [STRESS, SLEEP, EXERCISE]
+    # 只在一边出现的问题也保留
+    assert fuse_rankings([SLEEP], [DIET], 0.5) == [SLEEP, DIET]
+
+
+def test_fuse_rankings_on_bank():
+    """向量排名与题库上的 BM25 排名融合后的顺序"""
+    index = LexicalIndex(BANK)
+    lexical = [hit[0] for hit in index.search("最近总是熬夜，失眠", n_results=4)]
+    assert lexical == [SLEEP, STRESS]  # STRESS 只命中字符 n-gram「最近」
+
+    vector = [EXERCISE, SLEEP, DIET, STRESS]
+    # SLEEP: 0.5/61 + 0.5/60，STRESS: 0.5/63 + 0.5/61，EXERCISE: 0.5/60，DIET: 0.5/62
+    assert fuse_rankings(vector, lexical, 0.5) == [SLEEP, STRESS, EXERCISE, DIET]
+    # BM25 权重很低时只能调换向量排名相邻的问题
+    assert fuse_rankings(vector, lexical, 0.02) == [SLEEP, EXERCISE, STRESS, DIET]
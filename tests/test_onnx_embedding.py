@@ -0,0 +1,107 @@
+"""
+ONNX 嵌入后端测试：
+- 导出失败（校验不通过）时清理临时目录，已有的导出结果不受影响
+- 池化、向量比对等纯 numpy 部分
+- 用一个本地的小模型完整走一遍导出 → 校验 → 加载（需要 onnxruntime / torch / sentence-transformers）
+"""
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+from src.core import onnx_embedding
+from src.core.onnx_embedding import compare_vectors, export_onnx_model, load_onnx_model, _pool
+
+
+def test_compare_vectors():
+    reference = np.array([[1.0, 0.0], [0.0, 2.0]], dtype=np.float32)
+    assert compare_vectors(reference, reference)["min_cosine"] == pytest.approx(1.0)
+
+    report = compare_vectors(reference, np.array([[1.0, 0.0], [2.0, 0.0]], dtype=np.float32))
+    assert report["min_cosine"] == pytest.approx(0.0, abs=1e-6)
+    assert report["mean_cosine"] == pytest.approx(0.5)
+    assert report["max_abs_diff"] == pytest.approx(2.0)
+
+
+def test_pool_modes():
+    """mean 池化忽略 padding，cls 取第一个 token，max 不受 padding 影响"""
+    hidden = np.array([[[1.0, 4.0], [3.0, 2.0], [100.0, 100.0]]], dtype=np.float32)
+    mask = np.array([[1, 1, 0]])
+    assert _pool(hidden, mask, "mean").tolist() == [[2.0, 3.0]]
+    assert _pool(hidden, mask, "cls").tolist() == [[1.0, 4.0]]
+    assert _pool(hidden, mask, "max").tolist() == [[3.0, 4.0]]
+
+
+def test_unknown_precision():
+    with pytest.raises(ValueError):
+        load_onnx_model("some/model", precision="fp16")
+
+
+def test_failed_verification_keeps_previous_export(tmp_path, monkeypatch):
+    """校验不通过：删除临时目录并抛出 ValueError，之前的导出结果保持不变"""
+    output_dir = tmp_path / "model"
+    output_dir.mkdir()
+    (output_dir / "onnx_config.json").write_text("{}", encoding="utf-8")
+
+    def failing_export(name, tmp_dir, quantize, verify):
+        with open(os.path.join(tmp_dir, "model.onnx"), "wb") as f:
+            f.write(b"partial")
+        raise ValueError("ONNX 模型与 PyTorch 向量偏差过大")
+
+    monkeypatch.setattr(onnx_embedding, "_export_to", failing_export)
+    with pytest.raises(ValueError):
+        export_onnx_model("some/model", str(output_dir))
+
+    assert sorted(os.listdir(tmp_path)) == ["model"]
+    assert (output_dir / "onnx_config.json").read_text(encoding="utf-8") == "{}"
+
+
+def tiny_sentence_transformer(path):
+    """在本地构造一个随机初始化的小 BERT 句向量模型（不需要下载）"""
+    transformers = pytest.importorskip("transformers")
+    st = pytest.importorskip("sentence_transformers")
+
+    characters = sorted({c for c in "".join(onnx_embedding.VERIFY_SENTENCES) if not c.isspace()})
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + characters
+    bert_dir = path / "bert"
+    bert_dir.mkdir()
+    (bert_dir / "vocab.txt").write_text("\n".join(vocab), encoding="utf-8")
+    tokenizer = transformers.BertTokenizer(str(bert_dir / "vocab.txt"))
+    config = transformers.BertConfig(
+        vocab_size=len(vocab), hidden_size=32, num_hidden_layers=2,
+        num_attention_heads=2, intermediate_size=64, max_position_embeddings=128
+    )
+    transformers.BertModel(config).save_pretrained(str(bert_dir))
+    tokenizer.save_pretrained(str(bert_dir))
+
+    transformer = st.models.Transformer(str(bert_dir), max_seq_length=64)
+    pooling = st.models.Pooling(transformer.get_word_embedding_dimension(), pooling_mode="mean")
+    model_dir = path / "st"
+    st.SentenceTransformer(modules=[transformer, pooling, st.models.Normalize()]).save(str(model_dir))
+    return str(model_dir)
+
+
+def test_export_verify_and_load(tmp_path):
+    """导出 fp32 / int8，两者都通过与 PyTorch 向量的比对，加载后向量与 PyTorch 一致"""
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("onnx")
+    pytest.importorskip("torch")
+    model_path = tiny_sentence_transformer(tmp_path)
+
+    output_dir = export_onnx_model(model_path, str(tmp_path / "onnx"), quantize=True, verify=True)
+    with open(os.path.join(output_dir, "onnx_config.json"), "r", encoding="utf-8") as f:
+        config = json.load(f)
+    assert config["pooling"] == "mean" and config["normalize"]
+    assert set(config["files"]) == set(config["verification"]) == {"fp32", "int8"}
+    assert config["verification"]["fp32"]["min_cosine"] >= onnx_embedding.TOLERANCE["fp32"]
+
+    from sentence_transformers import SentenceTransformer
+    reference = SentenceTransformer(model_path, device="cpu").encode(onnx_embedding.VERIFY_SENTENCES)
+    model = onnx_embedding.OnnxEmbeddingModel(output_dir, "fp32")
+    vectors = model.encode(onnx_embedding.VERIFY_SENTENCES, batch_size=3)
+    assert vectors.shape == (len(onnx_embedding.VERIFY_SENTENCES), config["dimension"])
+    assert compare_vectors(reference, vectors)["min_cosine"] >= onnx_embedding.TOLERANCE["fp32"]
+    # 单条输入返回一维向量，与批量结果一致
+    assert np.allclose(model.encode(onnx_embedding.VERIFY_SENTENCES[2]), vectors[2], atol=1e-5)
@@ -0,0 +1,161 @@
+"""
+出站通道测试：控制消息排在已排队的音频前面、发送缓冲背压（迟滞）与音频通道满时丢帧、发送失败计数
+"""
+
+import asyncio
+import threading
+import time
+
+from src.utils.outbound import OutboundChannel, AsyncOutboundChannel, CONTROL, AUDIO
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "等待超时"
+        time.sleep(0.005)
+
+
+class BlockingSend:
+    """记录发送顺序；第一条消息阻塞到 release()，让后面的消息在通道里排队"""
+
+    def __init__(self):
+        self.sent = []
+        self.started = threading.Event()
+        self._gate = threading.Event()
+
+    def __call__(self, text):
+        if not self.sent:
+            self.started.set()
+            self._gate.wait(2)
+        self.sent.append(text)
+
+    def release(self):
+        self._gate.set()
+
+
+def test_control_jumps_ahead_of_queued_audio():
+    send = BlockingSend()
+    channel = OutboundChannel(send)
+    channel.start()
+
+    channel.send_audio("audio-1")
+    assert send.started.wait(1)  # 写线程正在发送第一帧
+    for i in range(2, 5):
+        channel.send_audio(f"audio-{i}")
+    channel.send_control("response.create")
+    channel.send_control("session.update")
+
+    send.release()
+    wait_until(lambda: len(send.sent) == 6)
+    # 控制消息只等正在发送的那一帧，按放入顺序排在排队的音频前面
+    assert send.sent == ["audio-1", "response.create", "session.update", "audio-2", "audio-3", "audio-4"]
+    channel.close()
+
+    stats = channel.stats()
+    assert stats[CONTROL]["sent"] == 2 and stats[AUDIO]["sent"] == 4
+    assert stats[AUDIO]["max_depth"] == 3
+
+
+def test_backpressure_pauses_audio_and_drops_when_lane_full():
+    """发送缓冲超过高水位时暂停音频（控制消息照发）；音频通道满时等待超时后丢帧；降到低水位以下恢复"""
+    sent = []
+    backlog = {"bytes": 100}
+    channel = OutboundChannel(sent.append, backlog=lambda: backlog["bytes"],
+                              audio_lane_frames=2, high_watermark=50, low_watermark=10)
+    channel.start()
+
+    assert channel.send_audio("audio-1")
+    assert channel.send_audio("audio-2")
+    assert not channel.send_audio("audio-3", timeout=0.05)
+    channel.send_control("response.create")
+    wait_until(lambda: sent == ["response.create"])
+
+    # 低于高水位但仍高于低水位：保持暂停（迟滞）
+    backlog["bytes"] = 30
+    time.sleep(0.05)
+    assert sent == ["response.create"]
+
+    backlog["bytes"] = 0
+    wait_until(lambda: len(sent) == 3)
+    assert sent == ["response.create", "audio-1", "audio-2"]
+    channel.close()
+
+    stats = channel.stats()
+    assert stats[AUDIO]["dropped"] == 1
+    assert stats["backpressure_events"] == 1
+    assert stats["backpressure_seconds"] > 0
+    assert stats["max_send_backlog"] == 100
+
+
+def test_close_drops_pending_audio_but_sends_control():
+    send = BlockingSend()
+    channel = OutboundChannel(send)
+    channel.start()
+    channel.send_audio("audio-1")
+    assert send.started.wait(1)
+    channel.send_audio("audio-2")
+    channel.send_control("session.close")
+
+    closer = threading.Thread(target=channel.close)
+    closer.start()
+    wait_until(lambda: channel._closing)
+    send.release()
+    closer.join(2)
+    assert send.sent == ["audio-1", "session.close"]
+    assert channel.stats()[AUDIO]["dropped"] == 1
+    # 关闭后放入的音频直接丢弃
+    assert not channel.send_audio("audio-3")
+
+
+def test_send_errors_counted_and_writer_keeps_running():
+    sent = []
+
+    def flaky_send(text):
+        if text == "bad":
+            raise ConnectionError("连接已断开")
+        sent.append(text)
+
+    channel = OutboundChannel(flaky_send)
+    channel.start()
+    channel.send_control("bad")
+    channel.send_control("good")
+    wait_until(lambda: sent == ["good"])
+    channel.close()
+
+    stats = channel.stats()
+    assert stats["send_errors"] == 1
+    assert "连接已断开" in stats["last_send_error"]
+
+
+def test_async_channel_priority_and_errors():
+    async def scenario():
+        sent = []
+        gate = asyncio.Event()
+
+        async def send(text):
+            if text == "audio-1":
+                await gate.wait()
+            if text == "bad":
+                raise ConnectionError("连接已断开")
+            sent.append(text)
+
+        channel = AsyncOutboundChannel(send)
+        channel.start()
+        await channel.send_audio("audio-1")
+        await asyncio.sleep(0.01)
+        await channel.send_audio("audio-2")
+        channel.send_control("bad")
+        channel.send_control("response.create")
+        gate.set()
+        for _ in range(200):
+            if len(sent) == 3:
+                break
+            await asyncio.sleep(0.005)
+        await channel.close()
+        return sent, channel.stats()
+
+    sent, stats = asyncio.run(scenario())
+    assert sent == ["audio-1", "response.create", "audio-2"]
+    assert stats["send_errors"] == 1
+    assert stats[CONTROL]["sent"] == 2 and stats[AUDIO]["sent"] == 2
@@ -0,0 +1,210 @@
+"""
+PCMRingBuffer 测试：环形回绕、三种溢出策略的丢弃计数、阻塞写超时、close() 唤醒读者
+"""
+
+import threading
+import time
+
+import pytest
+
+from src.utils.pcm_ring import (
+    PCMRingBuffer, OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST,
+)
+
+
+# capacity_ms=1 → 24 个采样 = 48 字节
+CAPACITY = 48
+
+
+def pcm(start: int, size: int) -> bytes:
+    """可区分的测试数据（每个字节不同）"""
+    return bytes((start + i) % 256 for i in range(size))
+
+
+def test_capacity():
+    """容量按毫秒换算为字节，并对齐到采样"""
+    ring = PCMRingBuffer(capacity_ms=1)
+    assert ring.capacity == CAPACITY
+    assert ring.free == CAPACITY and ring.available == 0
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        PCMRingBuffer(capacity_ms=1, overflow="drop_random")
+
+
+def test_write_read_across_wrap():
+    """写入跨越环形末尾：acquire 只借出末尾一段，read 拼接两段"""
+    ring = PCMRingBuffer(capacity_ms=1)
+    assert ring.write(pcm(0, 32)) == 32
+    assert ring.read(32, timeout=0) == pcm(0, 32)
+
+    data = pcm(100, 32)
+    assert ring.write(data) == 32  # 16 字节写到末尾，16 字节回绕到开头
+    view = ring.acquire(32, timeout=0)
+    assert bytes(view) == data[:16]
+    assert view.readonly
+    ring.release()
+    assert ring.read(32, timeout=0) == data[16:]
+
+    ring.write(pcm(200, 32))
+    assert ring.read(64, timeout=0) == pcm(200, 32)
+    stats = ring.stats()
+    assert stats["bytes_written"] == stats["bytes_read"] == 96
+    assert stats["overruns"] == 0 and stats["dropped_samples"] == 0
+
+
+def test_acquire_requires_release():
+    ring = PCMRingBuffer(capacity_ms=1)
+    ring.write(pcm(0, 8))
+    assert ring.acquire(4, timeout=0) is not None
+    with pytest.raises(RuntimeError):
+        ring.acquire(4, timeout=0)
+    ring.release()
+    assert ring.read(8, timeout=0) == pcm(4, 4)
+
+
+def test_odd_bytes_are_trimmed():
+    """不足一个采样的尾部字节不写入"""
+    ring = PCMRingBuffer(capacity_ms=1)
+    assert ring.write(pcm(0, 7)) == 6
+    assert ring.available == 6
+
+
+def test_drop_oldest():
+    """写满时丢弃最早未读的数据，保留最新的"""
+    ring = PCMRingBuffer(capacity_ms=1, overflow=OVERFLOW_DROP_OLDEST)
+    old, new = pcm(0, 40), pcm(100, 20)
+    assert ring.write(old) == 40
+    assert ring.write(new) == 20
+    assert ring.read(CAPACITY, timeout=0) == old[12:] + new
+
+    stats = ring.stats()
+    assert stats["overruns"] == 1
+    assert stats["dropped_samples"] == 6
+    assert stats["bytes_written"] == 60
+
+
+def test_drop_oldest_larger_than_capacity():
+    """一次写入超过容量：只保留最后 capacity 字节"""
+    ring = PCMRingBuffer(capacity_ms=1, overflow=OVERFLOW_DROP_OLDEST)
+    data = pcm(0, 100)
+    assert ring.write(data) == CAPACITY
+    assert ring.read(CAPACITY, timeout=0) == data[-CAPACITY:]
+    assert ring.stats()["dropped_samples"] == (100 - CAPACITY) // 2
+
+
+def test_drop_newest():
+    """写满时丢弃写不下的新数据，已缓冲的数据不变"""
+    ring = PCMRingBuffer(capacity_ms=1, overflow=OVERFLOW_DROP_NEWEST)
+    old, new = pcm(0, 40), pcm(100, 20)
+    assert ring.write(old) == 40
+    assert ring.write(new) == 8
+    assert ring.read(CAPACITY, timeout=0) == old + new[:8]
+
+    stats = ring.stats()
+    assert stats["overruns"] == 1
+    assert stats["dropped_samples"] == 6
+    assert stats["bytes_written"] == 48
+
+
+def test_block_write_times_out():
+    """block 策略：没有消费者时等待 write_timeout 后丢弃剩余部分"""
+    ring = PCMRingBuffer(capacity_ms=1, overflow=OVERFLOW_BLOCK, write_timeout=0.1)
+    start = time.monotonic()
+    assert ring.write(pcm(0, 60)) == CAPACITY
+    assert time.monotonic() - start >= 0.09
+
+    stats = ring.stats()
+    assert stats["overruns"] == 1
+    assert stats["dropped_samples"] == 6
+    assert ring.read(CAPACITY, timeout=0) == pcm(0, CAPACITY)
+
+
+def test_block_write_waits_for_consumer():
+    """block 策略：消费者腾出空间后继续写入，不丢数据"""
+    ring = PCMRingBuffer(capacity_ms=1, overflow=OVERFLOW_BLOCK, write_timeout=5)
+    data = pcm(0, 200)
+    received = bytearray()
+
+    def consume():
+        while len(received) < len(data):
+            chunk = ring.read(16, timeout=1)
+            if chunk is None:
+                break
+            received.extend(chunk)
+
+    consumer = threading.Thread(target=consume)
+    consumer.start()
+    assert ring.write(data) == len(data)
+    consumer.join(timeout=5)
+    assert bytes(received) == data
+    assert ring.stats()["overruns"] == 0
+
+
+def test_close_wakes_blocked_reader():
+    """close() 唤醒一直等待数据的消费者，acquire 返回 None"""
+    ring = PCMRingBuffer(capacity_ms=1)
+    result = []
+    reader = threading.Thread(target=lambda: result.append(ring.acquire(16, timeout=None)))
+    reader.start()
+    time.sleep(0.05)
+    assert reader.is_alive()
+
+    ring.close()
+    reader.join(timeout=1)
+    assert not reader.is_alive()
+    assert result == [None]
+    # 关闭后写入全部丢弃
+    assert ring.write(pcm(0, 8)) == 0
+    assert ring.stats()["dropped_samples"] == 4
+
+
+def test_close_wakes_blocked_writer():
+    """close() 唤醒等待空间的生产者"""
+    ring = PCMRingBuffer(capacity_ms=1, overflow=OVERFLOW_BLOCK)
+    ring.write(pcm(0, CAPACITY))
+    result = []
+    writer = threading.Thread(target=lambda: result.append(ring.write(pcm(0, 8))))
+    writer.start()
+    time.sleep(0.05)
+    ring.close()
+    writer.join(timeout=1)
+    assert result == [0]
+
+
+def test_underruns():
+    """断流只计一次欠载；clear() 之后等数据不算欠载"""
+    ring = PCMRingBuffer(capacity_ms=1)
+    assert ring.acquire(8, timeout=0) is None
+    assert ring.stats()["underruns"] == 0  # 还没有写入过数据
+
+    ring.write(pcm(0, 8))
+    assert ring.read(8, timeout=0) == pcm(0, 8)
+    assert ring.read(8, timeout=0) is None
+    assert ring.read(8, timeout=0) is None
+    assert ring.stats()["underruns"] == 1
+
+    ring.write(pcm(0, 8))
+    assert ring.clear() == 8
+    assert ring.read(8, timeout=0) is None
+    stats = ring.stats()
+    assert stats["underruns"] == 1
+    assert stats["cleared_samples"] == 4
+
+
+def test_clear_keeps_acquired_region():
+    """acquire() 借出期间 clear()：借出的区域在 release() 之前不会被新写入覆盖"""
+    ring = PCMRingBuffer(capacity_ms=1)
+    ring.write(b"A" * 8)
+    view = ring.acquire(4, timeout=0)
+    ring.write(b"B" * 4)
+    assert ring.clear() == 8
+    # 借出的 4 字节和清空前写入的 8 字节都还在 view 之后，写位置不能绕回来覆盖 view
+    assert ring.free == CAPACITY - 12
+
+    assert ring.write(b"C" * ring.free) == CAPACITY - 12
+    assert bytes(view) == b"AAAA"
+    ring.release()
+    assert ring.free == 12
+    assert ring.read(CAPACITY, timeout=0) == b"C" * (CAPACITY - 12)
@@ -0,0 +1,137 @@
+"""
+查询向量 LRU 缓存测试：淘汰顺序、批量读取、多线程并发读写、加载后开场上下文已预热
+"""
+
+import threading
+
+import numpy as np
+import pytest
+
+from src.core.query_cache import QueryEmbeddingCache, OPENING_CONTEXT
+
+from conftest import FAKE_MODEL, fake_embedding
+
+MODEL = "test-model"
+
+
+class Counter:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        return np.full(4, len(self.calls), dtype=np.float32)
+
+    def batch(self, texts):
+        self.calls.append(list(texts))
+        return np.stack([np.full(4, len(text), dtype=np.float32) for text in texts])
+
+
+def cached_texts(cache):
+    return [text for _model, text in cache._entries]
+
+
+def test_lru_eviction_order():
+    """超过容量时淘汰最久未使用的；命中和重新写入都会刷新位置"""
+    cache = QueryEmbeddingCache(max_entries=3)
+    compute = Counter()
+    for text in ["a", "b", "c"]:
+        cache.get_or_compute(MODEL, text, compute)
+    cache.get_or_compute(MODEL, "a", compute)
+    cache.get_or_compute(MODEL, "d", compute)
+    assert cached_texts(cache) == ["c", "a", "d"]
+
+    cache.put(MODEL, "c", np.zeros(4))
+    cache.get_or_compute(MODEL, "e", compute)
+    assert cached_texts(cache) == ["d", "c", "e"]
+    assert compute.calls == ["a", "b", "c", "d", "e"]
+
+    stats = cache.stats()
+    assert stats["entries"] == 3 and stats["hits"] == 1 and stats["misses"] == 5
+
+
+def test_keys_normalized_and_per_model():
+    cache = QueryEmbeddingCache()
+    compute = Counter()
+    first = cache.get_or_compute(MODEL, "睡眠  质量", compute)
+    assert cache.get_or_compute(MODEL, " 睡眠 质量 ", compute) is first
+    cache.get_or_compute("other-model", "睡眠 质量", compute)
+    assert len(compute.calls) == 2
+
+    with pytest.raises(ValueError):
+        first[0] = 1.0  # 返回的向量是只读的
+
+
+def test_disabled_cache():
+    cache = QueryEmbeddingCache(max_entries=0)
+    compute = Counter()
+    cache.get_or_compute(MODEL, "a", compute)
+    cache.get_or_compute(MODEL, "a", compute)
+    cache.put(MODEL, "b", np.zeros(4))
+    assert compute.calls == ["a", "a"]
+    assert cache.stats()["entries"] == 0
+
+
+def test_batch_computes_missing_once():
+    """批量读取：命中的直接返回，未命中的去重后一次计算，结果顺序与输入一致"""
+    cache = QueryEmbeddingCache()
+    compute = Counter()
+    cache.put(MODEL, "bb", np.full(4, 9, dtype=np.float32))
+
+    matrix = cache.get_or_compute_batch(MODEL, ["a", "bb", "ccc", "a"], compute.batch)
+    assert compute.calls == [["a", "ccc"]]
+    assert matrix[:, 0].tolist() == [1, 9, 3, 1]
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 2
+
+    cache.get_or_compute_batch(MODEL, ["ccc", "a"], compute.batch)
+    assert len(compute.calls) == 1
+    assert cache.get_or_compute_batch(MODEL, [], compute.batch).shape == (0, 0)
+
+
+def test_concurrent_access():
+    """多个线程同时读写：容量不超限，计数不丢失，命中的向量与计算结果一致"""
+    cache = QueryEmbeddingCache(max_entries=32)
+    texts = [f"上下文 {i}" for i in range(64)]
+    errors = []
+
+    def worker(seed):
+        rng = np.random.default_rng(seed)
+        for _ in range(500):
+            text = texts[rng.integers(len(texts))]
+            if rng.random() < 0.2:
+                vectors = cache.get_or_compute_batch(MODEL, [text, texts[0]], lambda batch: np.stack(
+                    [fake_embedding(t) for t in batch]))
+                vector = vectors[0]
+            else:
+                vector = cache.get_or_compute(MODEL, text, fake_embedding)
+            if not np.array_equal(vector, fake_embedding(text)):
+                errors.append(text)
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    stats = cache.stats()
+    assert stats["entries"] <= 32
+    # 每次单条读取计一次，每次批量读取计两次：总数减去调用次数就是批量读取的次数
+    batch_calls = stats["hits"] + stats["misses"] - 8 * 500
+    assert 0 < batch_calls < 8 * 500
+
+
+def test_opening_context_prewarmed(question_file, make_engine):
+    """加载完成后开场上下文已在缓存中：第一轮检索不需要向量化"""
+    engine = make_engine(question_file, use_snapshot=False)
+    calls = []
+    engine._get_embedding = lambda text: (calls.append(text), fake_embedding(text))[1]
+
+    session = engine.new_session()
+    assert session.retrieve_next_question() is not None
+    assert calls == []
+    assert engine.query_cache.stats()["hits"] >= 1
+
+    vector = engine.query_cache.get_or_compute(FAKE_MODEL, OPENING_CONTEXT, engine._get_embedding)
+    assert np.array_equal(vector, fake_embedding(OPENING_CONTEXT))
+    assert calls == []
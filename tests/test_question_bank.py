@@ -0,0 +1,73 @@
+"""
+未提问集合（数组双向链表）测试：删除头 / 尾 / 中间节点、重复和未知 ID、pop 与 reset，
+以及随机顺序删除时与列表实现的结果一致
+"""
+
+import random
+
+from src.core.question_bank import QuestionBank, UnaskedSet
+
+
+def make_bank(n):
+    return QuestionBank.from_dicts(
+        {"id": 100 + i, "question": f"问题 {i}", "type": "open", "category": "测试"} for i in range(n)
+    )
+
+
+def unasked_ids(unasked):
+    return [q.id for q in unasked]
+
+
+def test_remove_head_tail_and_middle():
+    unasked = UnaskedSet(make_bank(5))
+    assert unasked_ids(unasked) == [100, 101, 102, 103, 104]
+
+    assert unasked.mark_asked(100)  # 头
+    assert unasked.first().id == 101
+    assert unasked.mark_asked(104)  # 尾
+    assert unasked.mark_asked(102)  # 中间
+    assert unasked_ids(unasked) == [101, 103]
+    assert len(unasked) == 2
+    assert unasked.is_asked(102) and not unasked.is_asked(103)
+    assert list(unasked.asked_mask()) == [1, 0, 1, 0, 1]
+
+    # 重复标记和不在问题库中的 ID 被忽略
+    assert not unasked.mark_asked(102)
+    assert not unasked.mark_asked(999)
+    assert not unasked.is_asked(999)
+    assert len(unasked) == 2
+
+
+def test_pop_until_empty_and_reset():
+    unasked = UnaskedSet(make_bank(3))
+    assert [unasked.pop().id for _ in range(3)] == [100, 101, 102]
+    assert unasked.first() is None and unasked.pop() is None
+    assert len(unasked) == 0 and unasked_ids(unasked) == []
+
+    unasked.reset()
+    assert unasked_ids(unasked) == [100, 101, 102]
+    assert not any(unasked.asked_mask())
+
+
+def test_empty_bank():
+    unasked = UnaskedSet(make_bank(0))
+    assert len(unasked) == 0
+    assert unasked.first() is None
+    assert unasked_ids(unasked) == []
+
+
+def test_random_removals_match_list():
+    """随机顺序删除：每一步的遍历顺序、first() 和计数都与按文件顺序的列表一致"""
+    rng = random.Random(0)
+    for n in (1, 2, 7, 50):
+        bank = make_bank(n)
+        unasked = UnaskedSet(bank)
+        expected = [q.id for q in bank]
+        order = expected[:]
+        rng.shuffle(order)
+        for question_id in order:
+            assert unasked.mark_asked(question_id)
+            expected.remove(question_id)
+            assert unasked_ids(unasked) == expected
+            assert len(unasked) == len(expected)
+            assert unasked.first() is (bank.get(expected[0]) if expected else None)
@@ -0,0 +1,72 @@
+"""
+问题库快照测试：
+- numpy 后端直接使用快照向量，不向量化问题
+- 其他后端仍按配置打开，用快照中的向量同步（不重新向量化）
+- YAML 修改后快照过期，回退到正常建索引；模型不一致时不使用快照
+"""
+
+import numpy as np
+
+from src.core.compressed_index import CompressedVectorBackend
+from src.core.question_snapshot import QuestionSnapshot, compile_snapshot, load_snapshot
+from src.core.query_cache import OPENING_CONTEXT
+from src.core.vector_backend import NumpyVectorBackend
+
+from conftest import FAKE_DIM, FAKE_MODEL, SAMPLE_QUESTIONS, fake_embedding, write_questions
+
+
+def compile_fake(question_file, model=FAKE_MODEL):
+    return compile_snapshot(
+        question_file, embedding_model=model,
+        embed_batch=lambda texts: np.stack([fake_embedding(text) for text in texts])
+    )
+
+
+def test_compile_and_load(question_file):
+    path = compile_fake(question_file)
+    snapshot = QuestionSnapshot(path)
+    assert [q.id for q in snapshot.question_bank()] == [q[0] for q in SAMPLE_QUESTIONS]
+    embeddings = snapshot.embeddings()
+    assert embeddings.shape == (len(SAMPLE_QUESTIONS), FAKE_DIM)
+    assert np.allclose(np.linalg.norm(embeddings, axis=1), 1.0, atol=1e-5)
+    assert np.array_equal(snapshot.warm_queries()[OPENING_CONTEXT], fake_embedding(OPENING_CONTEXT))
+
+    assert load_snapshot(question_file, embedding_model=FAKE_MODEL) is not None
+    assert load_snapshot(question_file, embedding_model="other-model") is None
+
+
+def test_numpy_backend_uses_snapshot(question_file, make_engine):
+    compile_fake(question_file)
+    engine = make_engine(question_file, vector_backend="numpy")
+    assert isinstance(engine.backend, NumpyVectorBackend)
+    assert engine.encoded_documents == []
+    assert engine.backend.count() == len(SAMPLE_QUESTIONS)
+    assert engine.retrieve_next_question("睡眠质量").id == 2
+
+
+def test_configured_backend_filled_from_snapshot(question_file, make_engine):
+    """配置了其他后端时不退化为 numpy：打开该后端并写入快照向量，不调用模型"""
+    compile_fake(question_file)
+    engine = make_engine(question_file, vector_backend="compressed")
+    assert isinstance(engine.backend, CompressedVectorBackend)
+    assert engine.encoded_documents == []
+    assert engine.backend.count() == len(SAMPLE_QUESTIONS)
+    assert engine.retrieve_next_question("睡眠质量").id == 2
+
+
+def test_stale_snapshot_falls_back_to_yaml(tmp_path, question_file, make_engine):
+    """修改 YAML 后快照的源文件哈希不一致：解析 YAML 并正常向量化"""
+    compile_fake(question_file)
+    write_questions(tmp_path / "questions.yaml", SAMPLE_QUESTIONS + [(7, "您家里有人吸烟吗？", "生活习惯")])
+    assert load_snapshot(question_file, embedding_model=FAKE_MODEL) is None
+
+    engine = make_engine(question_file)
+    assert len(engine.bank) == 7
+    assert len(engine.encoded_documents) == 7
+    assert engine.retrieve_next_question("吸烟").id == 7
+
+
+def test_snapshot_disabled(question_file, make_engine):
+    compile_fake(question_file)
+    engine = make_engine(question_file, use_snapshot=False)
+    assert len(engine.encoded_documents) == len(SAMPLE_QUESTIONS)
@@ -0,0 +1,244 @@
+"""
+检索后端测试：
+- 已提问的问题在检索内部排除，top-k 总是未提问的问题（numpy 与 chroma 后端；没有安装 chromadb 时跳过）
+- 分批写入中断后从检查点恢复，增量同步只处理剩下的问题
+"""
+
+import numpy as np
+import pytest
+
+from src.core.question_bank import Question
+from src.core.vector_backend import NumpyVectorBackend, ChromaVectorBackend
+from src.core.index_sync import (
+    sync_question_index, build_document, build_metadata, question_content_hash, question_record_id,
+)
+
+
+def make_backend(n=6, kind="numpy", persist_directory=None):
+    """问题 i 的向量为 [1, 0.1i, 0, 0]：用 QUERY 检索时相似度按问题 ID 递减"""
+    if kind == "chroma":
+        pytest.importorskip("chromadb")
+        backend = ChromaVectorBackend(str(persist_directory), "exclusion_test")
+    else:
+        backend = NumpyVectorBackend()
+    vectors = np.array([[1.0, 0.1 * i, 0.0, 0.0] for i in range(1, n + 1)], dtype=np.float32)
+    backend.upsert(
+        ids=[f"q_{i}" for i in range(1, n + 1)],
+        embeddings=vectors,
+        documents=[f"问题 {i}" for i in range(1, n + 1)],
+        metadatas=[{"id": i} for i in range(1, n + 1)]
+    )
+    return backend
+
+
+QUERY = np.array([1.0, 0.0, 0.0, 0.0], dtype=np.float32)
+BACKENDS = ["numpy", "chroma"]
+
+
+def hit_ids(hits):
+    return [metadata["id"] for metadata, _score in hits]
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+def test_query_ranks_by_cosine(kind, tmp_path):
+    backend = make_backend(kind=kind, persist_directory=tmp_path)
+    hits = backend.query(QUERY, n_results=3)
+    assert hit_ids(hits) == [1, 2, 3]
+    scores = [score for _metadata, score in hits]
+    assert scores == sorted(scores, reverse=True)
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+def test_asked_questions_never_returned(kind, tmp_path):
+    """排除的问题不会出现在结果中，且结果仍然补满 n_results 个"""
+    backend = make_backend(kind=kind, persist_directory=tmp_path)
+    assert hit_ids(backend.query(QUERY, n_results=3, exclude_ids={1, 2})) == [3, 4, 5]
+    assert hit_ids(backend.query(QUERY, n_results=3, exclude_ids={1, 3, 5})) == [2, 4, 6]
+
+    # 只剩下两个未提问的问题
+    assert hit_ids(backend.query(QUERY, n_results=3, exclude_ids={1, 2, 3, 4})) == [5, 6]
+    # 全部已提问
+    assert backend.query(QUERY, n_results=3, exclude_ids=set(range(1, 7))) == []
+    # 不在索引中的 ID 忽略（也不减少可返回的数量）
+    assert hit_ids(backend.query(QUERY, n_results=2, exclude_ids={1, 42})) == [2, 3]
+    assert hit_ids(backend.query(QUERY, n_results=5, exclude_ids={1, 42, 43, 44, 45, 46})) == [2, 3, 4, 5, 6]
+
+    # 删除后的问题 ID 残留在已提问集合中
+    backend.delete(["q_6"])
+    assert hit_ids(backend.query(QUERY, n_results=5, exclude_ids={1, 6})) == [2, 3, 4, 5]
+    assert backend.query(QUERY, n_results=5, exclude_ids={1, 2, 3, 4, 5, 6}) == []
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+def test_query_batch_excludes_per_query(kind, tmp_path):
+    """批量检索：每个查询使用各自的已提问集合"""
+    backend = make_backend(kind=kind, persist_directory=tmp_path)
+    queries = np.stack([QUERY, QUERY, QUERY])
+    results = backend.query_batch(queries, n_results=2, exclude_ids=[{1}, None, {1, 2, 3}])
+    assert [hit_ids(hits) for hits in results] == [[2, 3], [1, 2], [4, 5]]
+
+    results = backend.query_batch(queries, n_results=2)
+    assert [hit_ids(hits) for hits in results] == [[1, 2]] * 3
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+def test_memory_estimate(kind, tmp_path):
+    """进程内索引的估算内存不为 0（问题库注册表按它执行内存上限），并随问题数增长"""
+    small = make_backend(n=6, kind=kind, persist_directory=tmp_path / "small")
+    large = make_backend(n=60, kind=kind, persist_directory=tmp_path / "large")
+    assert 0 < small.memory_mb() < large.memory_mb()
+
+
+def test_excluded_rows():
+    """问题 ID → 矩阵行号，删除后按新的行号映射"""
+    backend = make_backend()
+    assert backend._excluded_rows(None) == []
+    assert backend._excluded_rows(set()) == []
+    assert sorted(backend._excluded_rows({2, 5, 42})) == [1, 4]
+
+    backend.delete(["q_1"])
+    assert sorted(backend._excluded_rows({2, 5})) == [0, 3]
+    assert backend._excluded_rows({1}) == []
+
+
+def test_row_maps_updated_incrementally(monkeypatch):
+    """分批追加时增量登记行号，不重建映射；覆盖已有记录时重建，结果与整体重建一致"""
+    backend = NumpyVectorBackend()
+    rebuilds = []
+    rebuild = backend._rebuild_row_maps
+    monkeypatch.setattr(backend, "_rebuild_row_maps", lambda: (rebuilds.append(1), rebuild())[1])
+
+    for start in range(1, 13, 3):
+        ids = list(range(start, start + 3))
+        backend.upsert(
+            ids=[f"q_{i}" for i in ids],
+            embeddings=np.array([[1.0, 0.1 * i, 0.0, 0.0] for i in ids], dtype=np.float32),
+            documents=[f"问题 {i}" for i in ids],
+            metadatas=[{"id": i} for i in ids]
+        )
+    assert rebuilds == []
+    assert backend._row_of_question == {i: i - 1 for i in range(1, 13)}
+    assert backend._row_of == {f"q_{i}": i - 1 for i in range(1, 13)}
+
+    # 覆盖 q_2（问题 ID 改为 20）并追加 q_13
+    backend.upsert(
+        ids=["q_2", "q_13"],
+        embeddings=np.array([[1.0, 0.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0]], dtype=np.float32),
+        documents=["问题 20", "问题 13"],
+        metadatas=[{"id": 20}, {"id": 13}]
+    )
+    assert rebuilds == [1]
+    assert 2 not in backend._row_of_question
+    assert backend._row_of_question[20] == 1 and backend._row_of_question[13] == 12
+    assert hit_ids(backend.query(QUERY, n_results=2)) == [20, 1]
+
+
+def test_top_hits_masks_excluded_rows():
+    """_top_hits 在分数向量上屏蔽排除的行，k 不超过剩余的候选数"""
+    backend = make_backend(4)
+    scores = np.array([0.9, 0.8, 0.7, 0.6], dtype=np.float32)
+    hits = backend._top_hits(scores.copy(), 2, {1})
+    assert hit_ids(hits) == [2, 3]
+    assert [score for _metadata, score in hits] == [np.float32(0.8), np.float32(0.7)]
+
+    assert hit_ids(backend._top_hits(scores.copy(), 10, {2, 4})) == [1, 3]
+    assert backend._top_hits(scores.copy(), 2, {1, 2, 3, 4}) == []
+    assert backend._top_hits(scores.copy(), 0, None) == []
+
+
+# ==================== 分批写入检查点 ====================
+
+MODEL = "stub-model"
+
+
+def stub_encode(texts):
+    """桩编码器：每个文本一个确定的向量"""
+    return np.array([[1.0, float(len(text)), float(sum(map(ord, text)) % 97), 1.0] for text in texts],
+                    dtype=np.float32)
+
+
+def checkpoint_bank(n):
+    return [Question(id=i, question=f"问题 {i}", keywords=[f"关键词{i}"]) for i in range(1, n + 1)]
+
+
+def upsert_questions(backend, questions):
+    """按 sync_question_index 的格式写入一批问题"""
+    documents = [build_document(q) for q in questions]
+    backend.upsert(
+        ids=[question_record_id(q) for q in questions],
+        embeddings=stub_encode(documents),
+        documents=documents,
+        metadatas=[build_metadata(q, question_content_hash(q, MODEL)) for q in questions]
+    )
+
+
+def interrupted_build(persist_path, questions, batch_size):
+    """模拟进程在 bulk_write 中途被强制终止：只写了检查点，没有合并保存"""
+    backend = NumpyVectorBackend(persist_path=persist_path)
+    backend.reset(metadata={"embedding_model": MODEL})
+    # 相当于进入 bulk_write() 后进程被终止：每批只写检查点，结束时的合并保存不会发生
+    backend._bulk = True
+    for start in range(0, len(questions), batch_size):
+        upsert_questions(backend, questions[start:start + batch_size])
+
+
+def test_interrupted_bulk_write_resumes_from_checkpoints(tmp_path):
+    persist_path = str(tmp_path / "questions.npz")
+    questions = checkpoint_bank(7)
+    interrupted_build(persist_path, questions[:4], batch_size=2)
+    checkpoint_dir = tmp_path / "questions.npz.ckpt"
+    assert len(list(checkpoint_dir.iterdir())) == 2
+
+    # 重新打开：回放检查点并合并保存
+    backend = NumpyVectorBackend(persist_path=persist_path)
+    assert backend.count() == 4
+    assert not checkpoint_dir.exists()
+    assert hit_ids(backend.query(stub_encode(["问题 3 [关键词: 关键词3]"])[0], n_results=1)) == [3]
+
+    # 继续同步：只向量化检查点之后的问题
+    encoded = []
+
+    def embed(texts):
+        encoded.extend(texts)
+        return stub_encode(texts)
+
+    diff = sync_question_index(backend, questions, MODEL, embed, batch_size=2)
+    assert [q.id for q in diff.added] == [5, 6, 7]
+    assert diff.unchanged == 4
+    assert len(encoded) == 3
+    assert NumpyVectorBackend(persist_path=persist_path).count() == 7
+
+
+def test_replay_stops_at_damaged_checkpoint(tmp_path):
+    """写到一半的检查点之后的批次不回放（由增量同步重新向量化）"""
+    persist_path = str(tmp_path / "questions.npz")
+    interrupted_build(persist_path, checkpoint_bank(6), batch_size=2)
+    checkpoint_dir = tmp_path / "questions.npz.ckpt"
+    (checkpoint_dir / "00000001.npz").write_bytes(b"truncated")
+
+    backend = NumpyVectorBackend(persist_path=persist_path)
+    assert sorted(metadata["id"] for metadata in backend._metadatas) == [1, 2]
+    assert not checkpoint_dir.exists()
+
+
+def test_failed_bulk_write_keeps_finished_batches(tmp_path):
+    """向量化抛出异常时，已写入的批次合并保存，重试时不再向量化"""
+    persist_path = str(tmp_path / "questions.npz")
+    questions = checkpoint_bank(6)
+    backend = NumpyVectorBackend(persist_path=persist_path, metadata={"embedding_model": MODEL})
+    calls = []
+
+    def flaky_embed(texts):
+        calls.append(len(texts))
+        if len(calls) == 3:
+            raise RuntimeError("模型服务中断")
+        return stub_encode(texts)
+
+    with pytest.raises(RuntimeError):
+        sync_question_index(backend, questions, MODEL, flaky_embed, batch_size=2)
+
+    backend = NumpyVectorBackend(persist_path=persist_path)
+    assert backend.count() == 4
+    calls.clear()
+    diff = sync_question_index(backend, questions, MODEL, flaky_embed, batch_size=2)
+    assert calls == [2] and len(diff.added) == 2 and diff.unchanged == 4
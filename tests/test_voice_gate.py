@@ -0,0 +1,95 @@
+"""
+本地 VAD（VoiceGate）测试：开始说话时补发前置缓冲、说话后的拖尾、静音期间的保活和自适应噪声底
+"""
+
+import numpy as np
+
+from src.utils.voice_gate import VoiceGate, HANGOVER_MARGIN_MS
+
+# 20ms 一块（24kHz PCM16 = 480 个采样 = 960 字节）
+CHUNK_SAMPLES = 480
+
+
+def silence(level: int) -> bytes:
+    """能量很低的恒定信号（每块的 level 不同，便于检查转发了哪几块）"""
+    return np.full(CHUNK_SAMPLES, level, dtype="<i2").tobytes()
+
+
+def speech(amplitude: float = 3000.0, freq: float = 300.0) -> bytes:
+    """正弦波：能量高、过零率低，判为语音"""
+    t = np.arange(CHUNK_SAMPLES) / 24000
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype("<i2").tobytes()
+
+
+def test_pre_roll_sent_before_speech():
+    """开始说话时先补发最近 pre_roll_ms 的静音块（按时间顺序），更早的丢弃"""
+    gate = VoiceGate(pre_roll_ms=60, hangover_ms=0, keepalive_ms=0)
+    quiet = [silence(level) for level in range(1, 6)]
+    for chunk in quiet:
+        assert gate.process(chunk) == []
+
+    voice = speech()
+    assert gate.process(voice) == quiet[-3:] + [voice]
+    # 前置缓冲已发出，下一段语音不会重复补发
+    assert gate.process(voice) == [voice]
+
+    stats = gate.stats()
+    assert stats["chunks_in"] == 7 and stats["chunks_out"] == 5
+    assert stats["bytes_saved"] == 2 * len(voice)
+
+
+def test_hangover_after_speech():
+    """说话停止后继续转发 hangover_ms，之后的静音进入前置缓冲"""
+    gate = VoiceGate(pre_roll_ms=0, hangover_ms=60, keepalive_ms=0)
+    assert gate.process(speech()) != []
+    tail = [silence(level) for level in range(1, 6)]
+    assert [gate.process(chunk) for chunk in tail] == [[tail[0]], [tail[1]], [tail[2]], [], []]
+
+    # 再次说话重新计算拖尾
+    assert gate.process(speech()) != []
+    assert gate.process(tail[0]) == [tail[0]]
+
+
+def test_hangover_follows_server_vad():
+    """配合服务端 VAD：拖尾默认比 silence_duration_ms 多 HANGOVER_MARGIN_MS"""
+    gate = VoiceGate.for_server_vad(700)
+    assert gate.hangover_bytes == int((700 + HANGOVER_MARGIN_MS) * gate.bytes_per_ms)
+    assert VoiceGate.for_server_vad(700, hangover_ms=200).hangover_bytes == int(200 * gate.bytes_per_ms)
+
+    # 700ms 静音之后服务端才能判断说完：拖尾期间的 1000ms 静音全部转发
+    gate.process(speech())
+    forwarded = sum(len(gate.process(silence(1))) for _ in range(50))
+    assert forwarded == 50
+
+
+def test_keepalive_during_silence():
+    """静音期间每 keepalive_ms 转发一块；保活块之前的缓冲不再补发"""
+    gate = VoiceGate(pre_roll_ms=40, hangover_ms=0, keepalive_ms=100)
+    quiet = [silence(level) for level in range(1, 13)]
+    outputs = [gate.process(chunk) for chunk in quiet]
+    sent = [i for i, out in enumerate(outputs) if out]
+    assert sent == [4, 9]
+    assert outputs[4] == [quiet[4]] and outputs[9] == [quiet[9]]
+    assert gate.stats()["keepalives"] == 2
+
+    # 保活之后只缓冲了 quiet[10]、quiet[11]
+    voice = speech()
+    assert gate.process(voice) == [quiet[10], quiet[11], voice]
+
+
+def test_noise_floor_adapts():
+    """持续的背景噪声抬高门限；高过零率的嘶声不算语音，明显更响时仍判为语音"""
+    gate = VoiceGate(pre_roll_ms=0, hangover_ms=0, keepalive_ms=0)
+    rng = np.random.default_rng(0)
+    hiss = (rng.standard_normal(CHUNK_SAMPLES) * 200).astype("<i2").tobytes()
+    for _ in range(50):
+        assert gate.process(hiss) == []
+    assert 150 < gate.noise_floor < 250
+    assert gate.threshold == gate.noise_floor * gate.noise_ratio
+
+    # 能量只比噪声底高一点：不算语音
+    assert gate.process(speech(amplitude=500)) == []
+    # 响亮的白噪声（过零率高）：能量超过门限 LOUD_RATIO 倍时也算语音（清辅音）
+    loud_hiss = (rng.standard_normal(CHUNK_SAMPLES) * 8000).astype("<i2").tobytes()
+    assert gate.process(loud_hiss) == [loud_hiss]
+    assert gate.process(speech()) != []